@@ -9,24 +9,35 @@ This Python module imports the following module(s):
     firms.py
     aggregates.py
     utilities.py
+    rootfinder.py
+    cache.py
+    instrument.py
+    plots.py
 
 This Python module defines the following function(s):
+    get_SS_key()
+    get_SS_features()
+    get_SS_warm()
+    get_SS_KL()
+    get_SS_KLerr()
+    get_SS_damped()
     get_SS_bsct()
+    get_SS_root()
+    get_SS_output()
 ------------------------------------------------------------------------
 '''
 # Import packages
 import time
 import numpy as np
 import scipy.optimize as opt
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
-import os
 import households as hh
 import firms
 import aggregates as aggr
 import utilities as utils
+import rootfinder
+import cache
+import instrument as inst
+import plots
 
 '''
 ------------------------------------------------------------------------
@@ -35,47 +46,759 @@ import utilities as utils
 '''
 
 
-def get_SS_bsct(init_vals, args, graphs=False):
+def get_SS_key(args, SS_method, n_method='root', hh_batch=False,
+               hh_root='illinois', root_method='hybr'):
     '''
     --------------------------------------------------------------------
-    Solve for the steady-state solution of the S-period-lived agent OG
-    model with endogenous labor supply using the bisection method for
-    the outer loop
+    Return the cache key of a steady-state solution, the digest of its
+    arguments together with the solver options that change the stored
+    solution. hh_root only matters if hh_batch=True and root_method
+    only if SS_method='root', so they are left out otherwise
+    --------------------------------------------------------------------
+    INPUTS:
+    args        = length 15 tuple, steady-state arguments
+    SS_method   = string, 'bsct' for get_SS_bsct() or 'root' for
+                  get_SS_root()
+    n_method    = string, 'root', 'closed', 'brent', or 'stacked',
+                  method used to solve the household problems
+    hh_batch    = boolean, =True if solve the household problems of all
+                  J ability types at once
+    hh_root     = string, 'illinois', 'brent', or 'newton', method of
+                  rootfinder.root_vec() used if hh_batch=True
+    root_method = string, method of opt.root() used if SS_method='root'
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        utils.get_digest()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    solver_opts = length 5 tuple, (SS_method, n_method, hh_batch,
+                  hh_root, root_method) with the unused options None
+    ss_key      = string, digest of (args, solver_opts)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: ss_key
+    --------------------------------------------------------------------
+    '''
+    solver_opts = (SS_method, n_method, bool(hh_batch),
+                   hh_root if hh_batch else None,
+                   root_method if SS_method == 'root' else None)
+    ss_key = utils.get_digest((args, solver_opts))
+
+    return ss_key
+
+
+def get_SS_features(args):
+    '''
+    --------------------------------------------------------------------
+    Return the parameters of a steady-state argument tuple that are used
+    to measure how close two steady-state problems are, and the shape
+    key that must match for one solution to be a starting guess for the
+    other
+    --------------------------------------------------------------------
+    INPUTS:
+    args = length 15 tuple, (J, S, lambdas, emat, beta, sigma, l_tilde,
+           b_ellip, upsilon, chi_n_vec, A, alpha, delta, SS_tol,
+           EulDiff)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    J         = integer >= 1, number of ability types
+    S         = integer in [3, 80], number of periods an individual
+                lives
+    lambdas   = (J,) vector, income percentiles for ability types
+    beta      = scalar in (0,1), discount factor for each model per
+    sigma     = scalar > 0, coefficient of relative risk aversion
+    alpha     = scalar in (0,1), capital share of income
+    delta     = scalar in [0,1], model-period depreciation rate
+    feat_vec  = (J+5,) vector, (S, beta, sigma, alpha, delta, lambdas)
+    shape_key = length 1 tuple, (J,)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: feat_vec, shape_key
+    --------------------------------------------------------------------
+    '''
+    J, S, lambdas = args[:3]
+    beta, sigma = args[4:6]
+    alpha, delta = args[11:13]
+    feat_vec = np.hstack((S, beta, sigma, alpha, delta, lambdas))
+    shape_key = (int(J),)
+
+    return feat_vec, shape_key
+
+
+def get_SS_warm(cache_dir, args, KL_init, c1_vec):
+    '''
+    --------------------------------------------------------------------
+    Replace the initial guesses of the steady-state aggregates and first
+    period consumption with the solution of the closest steady-state
+    problem in the solution cache, if there is one
     --------------------------------------------------------------------
     INPUTS:
-    init_vals = length 3 tuple, (Kss_init, Lss_init, c1_init)
-    args      = length 15 tuple, (J, S, lambdas, emat, beta, sigma,
-                l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
-                SS_tol, EulDiff)
-    graphs    = boolean, =True if output steady-state graphs
+    cache_dir = string, path of solution cache directory
+    args      = length 15 tuple, steady-state arguments
+    KL_init   = (2,) vector, default initial guess for (K_ss, L_ss)
+    c1_vec    = (J,) vector, default initial guesses for first period
+                consumption of each ability type
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        cache.get_nearest_entry()
+        get_SS_features()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    near_output = dictionary or None, ss_output of the closest cached
+                  steady state
+    near_args   = tuple or None, arguments of the closest steady state
+    near_dist   = scalar >= 0, normalized distance between near_args
+                  and args
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: KL_init, c1_vec
+    --------------------------------------------------------------------
+    '''
+    near_output, near_args, near_dist = \
+        cache.get_nearest_entry(cache_dir, 'SS', args, get_SS_features)
+    if near_output is not None:
+        print('Warm start steady state from cached solution at ' +
+              'distance ' + '%10.4e' % (near_dist) + '.')
+        KL_init = np.array([near_output['K_ss'], near_output['L_ss']])
+        c1_vec = near_output['c_ss'][0, :].copy()
+
+    return KL_init, c1_vec
+
+
+def get_SS_KL(KL_init, c1_vec, args, n_method='root', hh_batch=False,
+              hh_root='illinois', monitor=None):
+    '''
+    --------------------------------------------------------------------
+    Given a guess for the steady-state aggregate capital stock K and
+    aggregate labor L, solve the lifetime problems of all J ability
+    types and compute the aggregate capital stock and aggregate labor
+    that they imply
+    --------------------------------------------------------------------
+    INPUTS:
+    KL_init  = (2,) vector, (K_init, L_init)
+    c1_vec   = (J,) vector, initial guesses for first period consumption
+               of each ability type
+    args     = length 15 tuple, (J, S, lambdas, emat, beta, sigma,
+               l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+               SS_tol, EulDiff)
+    n_method = string, 'root', 'closed', 'brent', or 'stacked',
+               method used to solve the household problems
+    hh_batch = boolean, =True if solve the household problems of all J
+               ability types at once with hh.get_cnb_mat() and a
+               vectorized root finder. Requires n_method='closed'
+    hh_root  = string, 'illinois', 'brent', or 'newton', method of
+               rootfinder.root_vec() used if hh_batch=True
+    monitor  = None or dictionary, monitor from instrument.get_monitor()
+               that times the household solve (hh_time) and the
+               aggregation (aggr_time) and counts the c1 root finder
+               calls (c1_root_calls), their function evaluations
+               (c1_root_nfev) and failures (c1_root_fail), and the
+               counts of hh.get_cnb_vecs()
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         firms.get_r()
         firms.get_w()
-        hh.bn_solve()
-        hh.c1_bSp1err()
+        hh.c1_bSp1err_jac()
         hh.get_cnb_vecs()
+        hh.solve_lifetime()
+        hh.c1_bSp1err_mat()
+        hh.c1_bSp1err_mat_jac()
+        hh.get_cnb_mat()
+        rootfinder.root_vec()
         aggr.get_K()
         aggr.get_L()
+        inst.add_count()
+        inst.add_time()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    hh_start   = scalar, time at the start of the household solve
+    aggr_start = scalar, time at the start of the aggregation
+    J          = integer >= 1, number of ability types
+    S          = integer in [3, 80], number of periods an individual
+                 lives
+    lambdas    = (J,) vector, income percentiles for ability types
+    emat       = (S, J) matrix, e_{j,s} ability by age and ability type
+    beta       = scalar in (0,1), discount factor for each model per
+    sigma      = scalar > 0, coefficient of relative risk aversion
+    l_tilde    = scalar > 0, time endowment for each agent each period
+    b_ellip    = scalar > 0, fitted value of b for elliptical
+                 disutility of labor
+    upsilon    = scalar > 1, fitted value of upsilon for elliptical
+                 disutility of labor
+    chi_n_vec  = (S,) vector, values for chi^n_s
+    A          = scalar > 0, total factor productivity parameter in
+                 firms' production function
+    alpha      = scalar in (0,1), capital share of income
+    delta      = scalar in [0,1], model-period depreciation rate of
+                 capital
+    SS_tol     = scalar > 0, tolerance level for household root finders
+    EulDiff    = Boolean, =True if want difference version of Euler
+                 errors beta*(1+r)*u'(c2) - u'(c1), =False if want
+                 ratio version [beta*(1+r)*u'(c2)]/[u'(c1)] - 1
+    c1_options = length 1 dict, options to pass into
+                 opt.root(c1_bSp1err_jac,...)
+    r_params   = length 3 tuple, args to pass into get_r()
+    w_params   = length 2 tuple, args to pass into get_w()
+    K_init     = scalar, initial value of aggregate capital stock
+    L_init     = scalar, initial value of aggregate labor
+    r_init     = scalar, initial value for interest rate
+    w_init     = scalar, initial value for wage
+    rpath      = (S,) vector, lifetime path of interest rates
+    wpath      = (S,) vector, lifetime path of wages
+    cmat       = (S, J) matrix, lifetime consumption of each ability
+                 type
+    nmat       = (S, J) matrix, lifetime labor supply of each ability
+                 type
+    bmat       = (S, J) matrix, lifetime savings of each ability type
+                 (b1, b2,...bS)
+    b_Sp1_vec  = (J,) vector, savings in period after last period of
+                 life of each ability type, should be close to zero
+    c1_new     = (J,) vector, optimal c1 of each ability type
+    c1_args    = length 13 tuple, args to pass into c1_bSp1err_jac(), or
+                 length 11 tuple, args to pass into c1_bSp1err_mat()
+                 if hh_batch=True
+    c1_func    = function, c1_bSp1err_mat_jac() if hh_root='newton',
+                 otherwise c1_bSp1err_mat()
+    c1_success = boolean, =True if all J c1 root problems converged
+    c1_nfev    = integer >= 1, number of evaluations of c1_func
+    results_c1 = results object, root finder results from
+                 opt.root(c1_bSp1err_jac,...)
+    cnb_args   = length 9 tuple, args to pass into get_cnb_vecs() or
+                 get_cnb_mat()
+    lf_args    = length 14 tuple, args to pass into hh.solve_lifetime()
+                 if n_method='stacked'
+    n_err_vec  = (S,) vector, labor supply Euler errors of ability type
+                 j from hh.solve_lifetime()
+    b_err_vec  = (S-1,) vector, savings Euler errors of ability type j
+                 from hh.solve_lifetime()
+    j          = integer in [0, J-1], index of ability type
+    K_new      = scalar, updated K given bmat
+    K_cnstr    = boolean, =True if K_new <= 0
+    L_new      = scalar, updated L given nmat
+    KL_new     = (2,) vector, updated K and L given bmat and nmat
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: KL_new, cmat, nmat, bmat, b_Sp1_vec, c1_new
+    --------------------------------------------------------------------
+    '''
+    (J, S, lambdas, emat, beta, sigma, l_tilde, b_ellip, upsilon,
+        chi_n_vec, A, alpha, delta, SS_tol, EulDiff) = args
+    c1_options = {'maxiter': 500}
+    r_params = (A, alpha, delta)
+    w_params = (A, alpha)
+    K_init, L_init = KL_init
+    r_init = firms.get_r(r_params, K_init, L_init)
+    w_init = firms.get_w(w_params, K_init, L_init)
+    rpath = r_init * np.ones(S)
+    wpath = w_init * np.ones(S)
+    cmat = np.zeros((S, J))
+    nmat = np.zeros((S, J))
+    bmat = np.zeros((S, J))
+    b_Sp1_vec = np.zeros(J)
+    c1_new = np.zeros(J)
+    hh_start = time.perf_counter()
+    if hh_batch:
+        c1_args = (0.0, emat, beta, sigma, l_tilde, b_ellip, upsilon,
+                   chi_n_vec, rpath, wpath, EulDiff)
+        if hh_root == 'newton':
+            c1_func = hh.c1_bSp1err_mat_jac
+        else:
+            c1_func = hh.c1_bSp1err_mat
+        c1_new, b_Sp1_vec, c1_success, c1_nfev = \
+            rootfinder.root_vec(c1_func, c1_vec, args=c1_args,
+                                method=hh_root, tol=SS_tol)
+        inst.add_count(monitor, 'c1_root_calls')
+        inst.add_count(monitor, 'c1_root_nfev', c1_nfev)
+        if not c1_success:
+            inst.add_count(monitor, 'c1_root_fail')
+        cnb_args = (0.0, emat, beta, sigma, l_tilde, b_ellip, upsilon,
+                    chi_n_vec, EulDiff)
+        cmat, nmat, bmat, b_Sp1_vec = \
+            hh.get_cnb_mat(c1_new, rpath, wpath, cnb_args)
+    elif n_method == 'stacked':
+        for j in range(J):
+            lf_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
+                       upsilon, chi_n_vec, rpath, wpath, EulDiff,
+                       n_method, c1_vec[j], SS_tol)
+            (c1_new[j], cmat[:, j], nmat[:, j], bmat[:, j], b_Sp1_vec[j],
+                n_err_vec, b_err_vec) = hh.solve_lifetime(lf_args)
+    else:
+        for j in range(J):
+            c1_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
+                       upsilon, chi_n_vec, rpath, wpath, EulDiff,
+                       n_method, monitor)
+            results_c1 = \
+                opt.root(hh.c1_bSp1err_jac, c1_vec[j], args=(c1_args),
+                         jac=True, method='lm', tol=SS_tol,
+                         options=(c1_options))
+            c1_new[j] = results_c1.x
+            inst.add_count(monitor, 'c1_root_calls')
+            inst.add_count(monitor, 'c1_root_nfev', results_c1.nfev)
+            if not results_c1.success:
+                inst.add_count(monitor, 'c1_root_fail')
+            cnb_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
+                        upsilon, chi_n_vec, EulDiff)
+            cmat[:, j], nmat[:, j], bmat[:, j], b_Sp1_vec[j] = \
+                hh.get_cnb_vecs(c1_new[j], rpath, wpath, cnb_args,
+                                n_method, monitor)
+    aggr_start = time.perf_counter()
+    inst.add_time(monitor, 'hh_time', aggr_start - hh_start)
+    K_new, K_cnstr = aggr.get_K(bmat, lambdas)
+    L_new = aggr.get_L(nmat, emat, lambdas)
+    KL_new = np.array([K_new, L_new])
+    inst.add_time(monitor, 'aggr_time', time.perf_counter() - aggr_start)
+
+    return KL_new, cmat, nmat, bmat, b_Sp1_vec, c1_new
+
+
+def get_SS_KLerr(KL_init, *args):
+    '''
+    --------------------------------------------------------------------
+    Compute the steady-state fixed point errors of aggregate capital and
+    aggregate labor, the difference between the K and L implied by the
+    household decisions given KL_init and KL_init itself. The vector of
+    first period consumption guesses c1_vec is updated in place so that
+    the next evaluation starts from the last solution.
+    --------------------------------------------------------------------
+    INPUTS:
+    KL_init = (2,) vector, (K_init, L_init)
+    args    = length 6 tuple, (c1_vec, ss_args, n_method, hh_batch,
+              hh_root, monitor)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_SS_KL()
+        inst.emit()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    c1_vec     = (J,) vector, initial guesses for first period
+                 consumption of each ability type
+    ss_args    = length 15 tuple, args to pass into get_SS_KL()
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 method used to solve the household problems
+    hh_batch   = boolean, =True if solve the household problems of all J
+                 ability types at once
+    hh_root    = string, method of rootfinder.root_vec() if hh_batch=True
+    monitor    = None or dictionary, monitor from
+                 instrument.get_monitor() that records an 'SS_eval'
+                 event for each evaluation
+    eval_start = scalar, time at the start of the evaluation
+    KL_new     = (2,) vector, updated K and L
+    cmat       = (S, J) matrix, lifetime consumption
+    nmat       = (S, J) matrix, lifetime labor supply
+    bmat       = (S, J) matrix, lifetime savings
+    b_Sp1_vec  = (J,) vector, savings in period after last period of life
+    c1_new     = (J,) vector, optimal c1 of each ability type
+    KL_err     = (2,) vector, KL_new - KL_init
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: KL_err
+    --------------------------------------------------------------------
+    '''
+    c1_vec, ss_args, n_method, hh_batch, hh_root, monitor = args
+    eval_start = time.perf_counter()
+    KL_new, cmat, nmat, bmat, b_Sp1_vec, c1_new = \
+        get_SS_KL(KL_init, c1_vec, ss_args, n_method, hh_batch, hh_root,
+                  monitor)
+    if np.isfinite(c1_new).all() and (c1_new > 0).all():
+        c1_vec[:] = c1_new
+    KL_err = KL_new - KL_init
+    inst.emit(monitor, 'SS_eval',
+              {'dist': (KL_err ** 2).sum(), 'K': KL_new[0],
+               'L': KL_new[1],
+               'iter_time': time.perf_counter() - eval_start})
+
+    return KL_err
+
+
+def get_SS_damped(KL_init, c1_vec, args, n_method='root', hh_batch=False,
+                  hh_root='illinois', monitor=None):
+    '''
+    --------------------------------------------------------------------
+    Solve for steady-state aggregate capital K and aggregate labor L by
+    damped fixed point iteration on (K, L)
+    --------------------------------------------------------------------
+    INPUTS:
+    KL_init  = (2,) vector, initial guess for (K_ss, L_ss)
+    c1_vec   = (J,) vector, initial guesses for first period consumption
+               of each ability type
+    args     = length 15 tuple, args to pass into get_SS_KL()
+    n_method = string, 'root', 'closed', 'brent', or 'stacked',
+               method used to solve the household problems
+    hh_batch = boolean, =True if solve the household problems of all J
+               ability types at once
+    hh_root  = string, method of rootfinder.root_vec() if hh_batch=True
+    monitor  = None or dictionary, monitor from instrument.get_monitor()
+               that records an 'SS_iter' event for each iteration
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_SS_KL()
+        inst.emit()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    maxiter_SS = integer >= 1, maximum number of iterations in outer
+                 loop
+    iter_SS    = integer >= 0, index of iteration number
+    iter_start = scalar, time at the start of the current iteration
+    mindist_SS = scalar > 0, minimum distance tolerance for
+                 convergence
+    dist_SS    = scalar > 0, distance metric for current iteration
+    xi_SS      = scalar in (0,1], updating parameter
+    KL_new     = (2,) vector, updated K and L given KL_init
+    cmat       = (S, J) matrix, lifetime consumption given KL_init
+    nmat       = (S, J) matrix, lifetime labor supply given KL_init
+    bmat       = (S, J) matrix, lifetime savings given KL_init
+    b_Sp1_vec  = (J,) vector, savings in period after last period of
+                 life given KL_init
+    c1_new     = (J,) vector, optimal c1 of each ability type given
+                 KL_init, used as the next guess c1_vec if it is
+                 finite and positive
+    KL_ss      = (2,) vector, steady-state (K_ss, L_ss)
+    ss_success = boolean, =True if dist_SS < mindist_SS
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: KL_ss, cmat, nmat, bmat, b_Sp1_vec, ss_success
+    --------------------------------------------------------------------
+    '''
+    maxiter_SS = 200
+    iter_SS = 0
+    mindist_SS = 1e-12
+    dist_SS = 10
+    xi_SS = 0.2
+    while (iter_SS < maxiter_SS) and (dist_SS >= mindist_SS):
+        iter_SS += 1
+        iter_start = time.perf_counter()
+        KL_new, cmat, nmat, bmat, b_Sp1_vec, c1_new = \
+            get_SS_KL(KL_init, c1_vec, args, n_method, hh_batch,
+                      hh_root, monitor)
+        if np.isfinite(c1_new).all() and (c1_new > 0).all():
+            c1_vec = c1_new
+        dist_SS = ((KL_new - KL_init) ** 2).sum()
+        KL_init = xi_SS * KL_new + (1 - xi_SS) * KL_init
+        inst.emit(monitor, 'SS_iter',
+                  {'iter': iter_SS, 'dist': dist_SS, 'K': KL_new[0],
+                   'L': KL_new[1],
+                   'iter_time': time.perf_counter() - iter_start})
+        print('SS Iteration=', iter_SS, ', SS Distance=',
+              '%10.4e' % (dist_SS), ',K:', '%10.4e' % (KL_new[0]),
+              'L:', '%10.4e' % (KL_new[1]))
+    KL_ss = KL_init
+    ss_success = dist_SS < mindist_SS
+    if not ss_success:
+        print('SS reached maxiter and did not converge.')
+
+    return KL_ss, cmat, nmat, bmat, b_Sp1_vec, ss_success
+
+
+def get_SS_bsct(init_vals, args, graphs=False, n_method='root',
+                hh_batch=False, cache_dir=None, warm_start=False,
+                hh_root='illinois', monitor=None):
+    '''
+    --------------------------------------------------------------------
+    Solve for the steady-state solution of the S-period-lived agent OG
+    model with endogenous labor supply using the bisection method for
+    the outer loop
+    --------------------------------------------------------------------
+    INPUTS:
+    init_vals  = length 3 tuple, (Kss_init, Lss_init, c1_init)
+    args       = length 15 tuple, (J, S, lambdas, emat, beta, sigma,
+                 l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+                 SS_tol, EulDiff)
+    graphs     = boolean, =True if output steady-state graphs
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 method used to solve the household problems
+    hh_batch   = boolean, =True if solve the household problems of all J
+                 ability types at once with hh.get_cnb_mat() and a
+                 vectorized root finder. Requires n_method='closed'
+    cache_dir  = None or string, path of solution cache directory. If
+                 not None and a solution for args is in the cache, it is
+                 returned without recomputing, and its graphs are
+                 rendered if graphs=True. Otherwise the new solution is
+                 saved in the cache if it converged
+    warm_start = boolean, =True if start from the solution of the
+                 closest steady-state problem in the cache (requires
+                 cache_dir) instead of init_vals
+    hh_root    = string, 'illinois', 'brent', or 'newton', method of
+                 rootfinder.root_vec() used if hh_batch=True
+    monitor    = None or dictionary, monitor from instrument.get_monitor()
+                 that records an event for each outer loop iteration
+                 and an 'SS_done' event at the end
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_SS_key()
+        cache.load_cache()
+        plots.get_fig_tasks()
+        plots.render_figs()
+        get_SS_warm()
+        get_SS_damped()
+        get_SS_output()
+        inst.emit()
+        cache.save_cache()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    start_time = scalar > 0, time at beginning of program
+    ss_key     = string, digest of args and the solver options used as
+                 the cache key
+    Kss_init   = scalar > 0, initial guess for steady-state aggregate
+                 capital stock
+    Lss_init   = scalar > 0, initial guess for steady-state aggregate
+                 labor
+    c1_init    = scalar > 0, initial guess for first period consumpt'n
+    J          = integer >= 1, number of ability types
+    err_msg    = string, error message
+    c1_vec     = (J,) vector, initial guesses for first period
+                 consumption of each ability type
+    KL_init    = (2,) vector, (Kss_init, Lss_init)
+    KL_ss      = (2,) vector, steady-state (K_ss, L_ss)
+    cmat       = (S, J) matrix, steady-state lifetime consumption
+    nmat       = (S, J) matrix, steady-state lifetime labor supply
+    bmat       = (S, J) matrix, steady-state lifetime savings
+    b_Sp1_vec  = (J,) vector, steady-state savings in period after last
+                 period of life
+    ss_success = boolean, =True if get_SS_damped() converged
+    ss_output  = length 14 dict, steady-state objects {n_ss, b_ss,
+                 c_ss, b_Sp1_ss, w_ss, r_ss, K_ss, L_ss, Y_ss, C_ss,
+                 n_err_ss, b_err_ss, RCerr_ss, ss_time}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: ss_output
+    --------------------------------------------------------------------
+    '''
+    start_time = time.perf_counter()
+    if cache_dir is not None:
+        ss_key = get_SS_key(args, 'bsct', n_method, hh_batch, hh_root)
+        ss_output = cache.load_cache(cache_dir, 'SS', ss_key)
+        if ss_output is not None:
+            print('Retrieved steady-state solution ' + ss_key[:12] +
+                  ' from cache.')
+            if graphs:
+                plots.render_figs(plots.get_fig_tasks('SS', ss_output,
+                                                      args[2]))
+            return ss_output
+    Kss_init, Lss_init, c1_init = init_vals
+    J = args[0]
+    if hh_batch and n_method != 'closed':
+        err_msg = ('ERROR, get_SS_bsct(): hh_batch=True requires ' +
+                   "n_method='closed'.")
+        raise RuntimeError(err_msg)
+    c1_vec = c1_init * np.ones(J)
+    KL_init = np.array([Kss_init, Lss_init])
+    if warm_start and (cache_dir is not None):
+        KL_init, c1_vec = get_SS_warm(cache_dir, args, KL_init, c1_vec)
+    KL_ss, cmat, nmat, bmat, b_Sp1_vec, ss_success = \
+        get_SS_damped(KL_init, c1_vec, args, n_method, hh_batch,
+                      hh_root, monitor)
+    ss_output = get_SS_output(KL_ss, (cmat, nmat, bmat, b_Sp1_vec), args,
+                              start_time, graphs)
+    inst.emit(monitor, 'SS_done',
+              {'K': KL_ss[0], 'L': KL_ss[1],
+               'ss_time': ss_output['ss_time']})
+    if (cache_dir is not None) and ss_success:
+        cache.save_cache(cache_dir, 'SS', ss_key, ss_output, args)
+    elif cache_dir is not None:
+        print('WARNING: Steady-state solution ' + ss_key[:12] +
+              ' did not converge and is not saved in the cache.')
+
+    return ss_output
+
+
+def get_SS_root(init_vals, args, graphs=False, n_method='root',
+                hh_batch=False, root_method='hybr', cache_dir=None,
+                warm_start=False, hh_root='illinois', monitor=None):
+    '''
+    --------------------------------------------------------------------
+    Solve for the steady-state solution of the S-period-lived agent OG
+    model with endogenous labor supply by solving the outer loop as a
+    two-dimensional root problem in (K, L) with a hybrid Powell or
+    Broyden method. If the root finder does not reach the same
+    tolerance as get_SS_bsct(), the damped fixed point iteration is run
+    from the root finder's solution, or from the initial guess if that
+    solution is not feasible.
+    --------------------------------------------------------------------
+    INPUTS:
+    init_vals   = length 3 tuple, (Kss_init, Lss_init, c1_init)
+    args        = length 15 tuple, (J, S, lambdas, emat, beta, sigma,
+                  l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+                  SS_tol, EulDiff)
+    graphs      = boolean, =True if output steady-state graphs
+    n_method    = string, 'root', 'closed', 'brent', or 'stacked',
+                  method used to solve the household problems
+    hh_batch    = boolean, =True if solve the household problems of all
+                  J ability types at once. Requires n_method='closed'
+    root_method = string, method to pass into opt.root(), for example
+                  'hybr' (hybrid Powell) or 'broyden1'
+    cache_dir   = None or string, path of solution cache directory. If
+                  not None and a solution for args is in the cache, it
+                  is returned without recomputing, and its graphs are
+                  rendered if graphs=True. Otherwise the new solution
+                  is saved in the cache if it converged
+    warm_start  = boolean, =True if start from the solution of the
+                  closest steady-state problem in the cache (requires
+                  cache_dir) instead of init_vals
+    hh_root     = string, 'illinois', 'brent', or 'newton', method of
+                  rootfinder.root_vec() used if hh_batch=True
+    monitor     = None or dictionary, monitor from
+                  instrument.get_monitor() that records an event for
+                  each evaluation or iteration of the outer loop and an
+                  'SS_done' event at the end
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_SS_key()
+        cache.load_cache()
+        plots.get_fig_tasks()
+        plots.render_figs()
+        get_SS_warm()
+        get_SS_KLerr()
+        get_SS_KL()
+        get_SS_damped()
+        get_SS_output()
+        inst.emit()
+        cache.save_cache()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    start_time = scalar > 0, time at beginning of program
+    ss_key     = string, digest of args and the solver options used as
+                 the cache key
+    Kss_init   = scalar > 0, initial guess for steady-state aggregate
+                 capital stock
+    Lss_init   = scalar > 0, initial guess for steady-state aggregate
+                 labor
+    c1_init    = scalar > 0, initial guess for first period consumpt'n
+    J          = integer >= 1, number of ability types
+    SS_tol     = scalar > 0, tolerance level for the root finders
+    err_msg    = string, error message
+    mindist_SS = scalar > 0, minimum distance tolerance for
+                 convergence, same as in get_SS_damped()
+    c1_vec     = (J,) vector, initial guesses for first period
+                 consumption of each ability type, updated in place by
+                 get_SS_KLerr()
+    KL_init    = (2,) vector, (Kss_init, Lss_init)
+    KL_args    = length 6 tuple, args to pass into get_SS_KLerr()
+    results_KL = results object, results from opt.root(get_SS_KLerr,..)
+    KL_ss      = (2,) vector, steady-state (K_ss, L_ss)
+    KL_new     = (2,) vector, K and L implied by KL_ss
+    cmat       = (S, J) matrix, steady-state lifetime consumption
+    nmat       = (S, J) matrix, steady-state lifetime labor supply
+    bmat       = (S, J) matrix, steady-state lifetime savings
+    b_Sp1_vec  = (J,) vector, steady-state savings in period after last
+                 period of life
+    c1_new     = (J,) vector, optimal c1 of each ability type
+    dist_SS    = scalar >= 0, distance between KL_new and KL_ss
+    ss_success = boolean, =True if the steady state converged, either
+                 dist_SS < mindist_SS or convergence of get_SS_damped()
+    ss_output  = length 14 dict, steady-state objects {n_ss, b_ss,
+                 c_ss, b_Sp1_ss, w_ss, r_ss, K_ss, L_ss, Y_ss, C_ss,
+                 n_err_ss, b_err_ss, RCerr_ss, ss_time}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: ss_output
+    --------------------------------------------------------------------
+    '''
+    start_time = time.perf_counter()
+    if cache_dir is not None:
+        ss_key = get_SS_key(args, 'root', n_method, hh_batch, hh_root,
+                            root_method)
+        ss_output = cache.load_cache(cache_dir, 'SS', ss_key)
+        if ss_output is not None:
+            print('Retrieved steady-state solution ' + ss_key[:12] +
+                  ' from cache.')
+            if graphs:
+                plots.render_figs(plots.get_fig_tasks('SS', ss_output,
+                                                      args[2]))
+            return ss_output
+    Kss_init, Lss_init, c1_init = init_vals
+    J = args[0]
+    SS_tol = args[13]
+    if hh_batch and n_method != 'closed':
+        err_msg = ('ERROR, get_SS_root(): hh_batch=True requires ' +
+                   "n_method='closed'.")
+        raise RuntimeError(err_msg)
+    mindist_SS = 1e-12
+    c1_vec = c1_init * np.ones(J)
+    KL_init = np.array([Kss_init, Lss_init])
+    if warm_start and (cache_dir is not None):
+        KL_init, c1_vec = get_SS_warm(cache_dir, args, KL_init, c1_vec)
+    KL_args = (c1_vec, args, n_method, hh_batch, hh_root, monitor)
+    results_KL = opt.root(get_SS_KLerr, KL_init, args=(KL_args),
+                          method=root_method, tol=SS_tol)
+    KL_ss = results_KL.x
+    if np.isfinite(KL_ss).all() and (KL_ss > 0).all():
+        KL_new, cmat, nmat, bmat, b_Sp1_vec, c1_new = \
+            get_SS_KL(KL_ss, c1_vec, args, n_method, hh_batch, hh_root,
+                      monitor)
+        dist_SS = ((KL_new - KL_ss) ** 2).sum()
+    else:
+        KL_ss = KL_init
+        c1_vec[:] = c1_init
+        dist_SS = np.inf
+    print('SS root finder ' + root_method + ': success=',
+          results_KL.success, ', SS Distance=', '%10.4e' % (dist_SS))
+    ss_success = dist_SS < mindist_SS
+    if not ss_success:
+        print('SS root finder did not converge. Switching to damped ' +
+              'fixed point iteration.')
+        KL_ss, cmat, nmat, bmat, b_Sp1_vec, ss_success = \
+            get_SS_damped(KL_ss, c1_vec, args, n_method, hh_batch,
+                          hh_root, monitor)
+    ss_output = get_SS_output(KL_ss, (cmat, nmat, bmat, b_Sp1_vec), args,
+                              start_time, graphs)
+    inst.emit(monitor, 'SS_done',
+              {'K': KL_ss[0], 'L': KL_ss[1],
+               'ss_time': ss_output['ss_time']})
+    if (cache_dir is not None) and ss_success:
+        cache.save_cache(cache_dir, 'SS', ss_key, ss_output, args)
+    elif cache_dir is not None:
+        print('WARNING: Steady-state solution ' + ss_key[:12] +
+              ' did not converge and is not saved in the cache.')
+
+    return ss_output
+
+
+def get_SS_output(KL_ss, hh_vars, args, start_time, graphs=False):
+    '''
+    --------------------------------------------------------------------
+    Given the steady-state aggregate capital and labor and the
+    steady-state household decisions, compute the remaining
+    steady-state objects and Euler errors, print the steady-state
+    diagnostics, and render the steady-state graphs with plots.py
+    --------------------------------------------------------------------
+    INPUTS:
+    KL_ss      = (2,) vector, steady-state (K_ss, L_ss)
+    hh_vars    = length 4 tuple, (c_ss, n_ss, b_ss, b_Sp1_ss)
+    args       = length 15 tuple, (J, S, lambdas, emat, beta, sigma,
+                 l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+                 SS_tol, EulDiff)
+    start_time = scalar > 0, clock time at beginning of the steady-state
+                 computation
+    graphs     = boolean, =True if output steady-state graphs
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        firms.get_r()
+        firms.get_w()
         aggr.get_Y()
         aggr.get_C()
-        hh.get_cons()
         hh.get_n_errors()
         hh.get_b_errors()
         utils.print_time()
+        plots.get_fig_tasks()
+        plots.render_figs()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    start_time   = scalar > 0, clock time at beginning of program
-    Kss_init     = scalar > 0, initial guess for steady-state aggregate
-                   capital stock
-    Lss_init     = scalar > 0, initial guess for steady-state aggregate
-                   labor
-    rss_init     = scalar > 0, initial guess for steady-state interest
-                   rate
-    wss_init     = scalar > 0, initial guess for steady-state wage
-    c1_init      = scalar > 0, initial guess for first period consumpt'n
+    J            = integer >= 1, number of ability types
     S            = integer in [3, 80], number of periods an individual
                    lives
+    lambdas      = (J,) vector, income percentiles for ability types
+    emat         = (S, J) matrix, e_{j,s} ability by age and ability
+                   type
     beta         = scalar in (0,1), discount factor for each model per
     sigma        = scalar > 0, coefficient of relative risk aversion
     l_tilde      = scalar > 0, time endowment for each agent each period
@@ -93,62 +816,26 @@ def get_SS_bsct(init_vals, args, graphs=False):
     EulDiff      = Boolean, =True if want difference version of Euler
                    errors beta*(1+r)*u'(c2) - u'(c1), =False if want
                    ratio version [beta*(1+r)*u'(c2)]/[u'(c1)] - 1
-    hh_fsolve    = boolean, =True if solve inner-loop household problem
-                   by choosing c_1 to set final period savings b_{S+1}=0
-    KL_outer     = boolean, =True if guess K and L in outer loop
-                   Otherwise, guess r and w in outer loop
-    maxiter_SS   = integer >= 1, maximum number of iterations in outer
-                   loop bisection method
-    iter_SS      = integer >= 0, index of iteration number
-    mindist_SS   = scalar > 0, minimum distance tolerance for
-                   convergence
-    dist_SS      = scalar > 0, distance metric for current iteration
-    xi_SS        = scalar in (0,1], updating parameter
-    KL_init      = (2,) vector, (K_init, L_init)
-    c1_options   = length 1 dict, options to pass into
-                   opt.root(c1_bSp1err,...)
-    cnb_args     = length 8 tuple, args to pass into get_cnb_vecs()
     r_params     = length 3 tuple, args to pass into get_r()
     w_params     = length 2 tuple, args to pass into get_w()
-    K_init       = scalar, initial value of aggregate capital stock
-    L_init       = scalar, initial value of aggregate labor
-    r_init       = scalar, initial value for interest rate
-    w_init       = scalar, initial value for wage
-    rpath        = (S,) vector, lifetime path of interest rates
-    wpath        = (S,) vector, lifetime path of wages
-    c1_args      = length 10 tuple, args to pass into c1_bSp1err()
-    results_c1   = results object, root finder results from
-                   opt.root(c1_bSp1err,...)
-    c1_new       = scalar, updated value of optimal c1 given r_init and
-                   w_init
-    cvec_new     = (S,) vector, updated values for lifetime consumption
-    nvec_new     = (S,) vector, updated values for lifetime labor supply
-    bvec_new     = (S,) vector, updated values for lifetime savings
-                   (b1, b2,...bS)
-    b_Sp1_new    = scalar, updated value for savings in last period,
-                   should be arbitrarily close to zero
-    K_new        = scalar, updated K given bvec_new
-    K_cnstr      = boolean, =True if K_new <= 0
-    L_new        = scalar, updated L given nvec_new
-    KL_new       = (2,) vector, updated K and L given bvec_new, nvec_new
     K_ss         = scalar > 0, steady-state aggregate capital stock
     L_ss         = scalar > 0, steady-state aggregate labor
     r_ss         = scalar > 0, steady-state interest rate
     w_ss         = scalar > 0, steady-state wage
-    c1_ss        = scalar > 0, steady-state consumption in first period
-    c_ss         = (S,) vector, steady-state lifetime consumption
-    n_ss         = (S,) vector, steady-state lifetime labor supply
-    b_ss         = (S,) vector, steady-state lifetime savings
+    c_ss         = (S, J) matrix, steady-state lifetime consumption
+    n_ss         = (S, J) matrix, steady-state lifetime labor supply
+    b_ss         = (S, J) matrix, steady-state lifetime savings
                    (b1_ss, b2_ss, ...bS_ss) where b1_ss=0
-    b_Sp1_ss     = scalar, steady-state savings for period after last
-                   period of life. b_Sp1_ss approx. 0 in equilibrium
+    b_Sp1_ss     = (J,) vector, steady-state savings for period after
+                   last period of life. b_Sp1_ss approx. 0 in
+                   equilibrium
     Y_params     = length 2 tuple, (A, alpha)
     Y_ss         = scalar > 0, steady-state aggregate output (GDP)
     C_ss         = scalar > 0, steady-state aggregate consumption
-    n_err_params = length 5 tuple, args to pass into get_n_errors()
-    n_err_ss     = (S,) vector, lifetime labor supply Euler errors
+    n_err_params = length 6 tuple, args to pass into get_n_errors()
+    n_err_ss     = (S, J) matrix, lifetime labor supply Euler errors
     b_err_params = length 2 tuple, args to pass into get_b_errors()
-    b_err_ss     = (S-1) vector, lifetime savings Euler errors
+    b_err_ss     = (S-1, J) matrix, lifetime savings Euler errors
     RCerr_ss     = scalar, resource constraint error
     ss_time      = scalar, seconds elapsed to run steady-state comput'n
     ss_output    = length 14 dict, steady-state objects {n_ss, b_ss,
@@ -156,63 +843,24 @@ def get_SS_bsct(init_vals, args, graphs=False):
                    n_err_ss, b_err_ss, RCerr_ss, ss_time}
 
     FILES CREATED BY THIS FUNCTION:
-        SS_bc.png
-        SS_n.png
+        images/c_ss_3D.png
+        images/c_ss_2D.png
+        images/n_ss_3D.png
+        images/n_ss_2D.png
+        images/b_ss_3D.png
+        images/b_ss_2D.png
 
     RETURNS: ss_output
     --------------------------------------------------------------------
     '''
-    start_time = time.clock()
-    Kss_init, Lss_init, c1_init = init_vals
     (J, S, lambdas, emat, beta, sigma, l_tilde, b_ellip, upsilon,
         chi_n_vec, A, alpha, delta, SS_tol, EulDiff) = args
-    maxiter_SS = 200
-    iter_SS = 0
-    mindist_SS = 1e-12
-    dist_SS = 10
-    xi_SS = 0.2
-    KL_init = np.array([Kss_init, Lss_init])
-    c1_options = {'maxiter': 500}
     r_params = (A, alpha, delta)
     w_params = (A, alpha)
-    while (iter_SS < maxiter_SS) and (dist_SS >= mindist_SS):
-        iter_SS += 1
-        K_init, L_init = KL_init
-        r_init = firms.get_r(r_params, K_init, L_init)
-        w_init = firms.get_w(w_params, K_init, L_init)
-        rpath = r_init * np.ones(S)
-        wpath = w_init * np.ones(S)
-        cmat = np.zeros((S, J))
-        nmat = np.zeros((S, J))
-        bmat = np.zeros((S, J))
-        b_Sp1_vec = np.zeros(J)
-        for j in range(J):
-            c1_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
-                       upsilon, chi_n_vec, rpath, wpath, EulDiff)
-            results_c1 = \
-                opt.root(hh.c1_bSp1err, c1_init, args=(c1_args),
-                         method='lm', tol=SS_tol, options=(c1_options))
-            c1 = results_c1.x
-            cnb_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
-                        upsilon, chi_n_vec, EulDiff)
-            cmat[:, j], nmat[:, j], bmat[:, j], b_Sp1_vec[j] = \
-                hh.get_cnb_vecs(c1, rpath, wpath, cnb_args)
-        K_new, K_cnstr = aggr.get_K(bmat, lambdas)
-        L_new = aggr.get_L(nmat, emat, lambdas)
-        KL_new = np.array([K_new, L_new])
-        dist_SS = ((KL_new - KL_init) ** 2).sum()
-        KL_init = xi_SS * KL_new + (1 - xi_SS) * KL_init
-        print('SS Iteration=', iter_SS, ', SS Distance=',
-              '%10.4e' % (dist_SS), ',K:', '%10.4e' % (K_new),
-              'L:', '%10.4e' % (L_new))
-
-    K_ss, L_ss = KL_init
+    K_ss, L_ss = KL_ss
     r_ss = firms.get_r(r_params, K_ss, L_ss)
     w_ss = firms.get_w(w_params, K_ss, L_ss)
-    c_ss = cmat
-    n_ss = nmat
-    b_ss = bmat
-    b_Sp1_ss = b_Sp1_vec
+    c_ss, n_ss, b_ss, b_Sp1_ss = hh_vars
     Y_params = (A, alpha)
     Y_ss = aggr.get_Y(Y_params, K_ss, L_ss)
     C_ss = aggr.get_C(c_ss, lambdas)
@@ -228,7 +876,7 @@ def get_SS_bsct(init_vals, args, graphs=False):
                                          EulDiff)
     RCerr_ss = Y_ss - C_ss - delta * K_ss
 
-    ss_time = time.clock() - start_time
+    ss_time = time.perf_counter() - start_time
 
     ss_output = {
         'n_ss': n_ss, 'b_ss': b_ss, 'c_ss': c_ss, 'b_Sp1_ss': b_Sp1_ss,
@@ -249,156 +897,6 @@ def get_SS_bsct(init_vals, args, graphs=False):
     utils.print_time(ss_time, 'SS')
 
     if graphs:
-        '''
-        ----------------------------------------------------------------
-        cur_path    = string, path name of current directory
-        output_fldr = string, folder in current path to save files
-        output_dir  = string, total path of images folder
-        output_path = string, path of file name of figure to be saved
-        sgrid       = (S,) vector, ages from 1 to S
-        lamcumsum   = (J,) vector, cumulative sum of lambdas vector
-        jmidgrid    = (J,) vector, midpoints of ability percentile bins
-        smat        = (J, S) matrix, sgrid copied down J rows
-        jmat        = (J, S) matrix, jmidgrid copied across S columns
-        ----------------------------------------------------------------
-        '''
-        # Create directory if images directory does not already exist
-        cur_path = os.path.split(os.path.abspath(__file__))[0]
-        output_fldr = 'images'
-        output_dir = os.path.join(cur_path, output_fldr)
-        if not os.access(output_dir, os.F_OK):
-            os.makedirs(output_dir)
-
-        # Plot 3D steady-state consumption distribution
-        sgrid = np.arange(1, S + 1)
-        lamcumsum = lambdas.cumsum()
-        jmidgrid = 0.5 * lamcumsum + 0.5 * (lamcumsum - lambdas)
-        smat, jmat = np.meshgrid(sgrid, jmidgrid)
-        cmap_c = cm.get_cmap('summer')
-        fig = plt.figure()
-        ax = fig.gca(projection='3d')
-        ax.set_xlabel(r'age-$s$')
-        ax.set_ylabel(r'ability-$j$')
-        ax.set_zlabel(r'indiv. consumption $c_{j,s}$')
-        ax.plot_surface(smat, jmat, c_ss.T, rstride=1,
-                        cstride=6, cmap=cmap_c)
-        output_path = os.path.join(output_dir, 'c_ss_3D')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot 2D steady-state consumption distribution
-        minorLocator = MultipleLocator(1)
-        fig, ax = plt.subplots()
-        linestyles = np.array(["-", "--", "-.", ":"])
-        markers = np.array(["x", "v", "o", "d", ">", "|"])
-        pct_lb = 0
-        for j in range(J):
-            this_label = (str(int(np.rint(pct_lb))) + " - " +
-                          str(int(np.rint(pct_lb + 100 * lambdas[j]))) +
-                          "%")
-            pct_lb += 100 * lambdas[j]
-            if j <= 3:
-                ax.plot(sgrid, c_ss[:, j], label=this_label,
-                        linestyle=linestyles[j], color='black')
-            elif j > 3:
-                ax.plot(sgrid, c_ss[:, j], label=this_label,
-                        marker=markers[j - 4], color='black')
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        box = ax.get_position()
-        ax.set_position([box.x0, box.y0, box.width * 0.8, box.height])
-        ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
-        ax.set_xlabel(r'age-$s$')
-        ax.set_ylabel(r'indiv. consumption $c_{j,s}$')
-        output_path = os.path.join(output_dir, 'c_ss_2D')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-
-        # Plot 3D steady-state labor supply distribution
-        fig = plt.figure()
-        ax = fig.gca(projection='3d')
-        ax.set_xlabel(r'age-$s$')
-        ax.set_ylabel(r'ability-$j$')
-        ax.set_zlabel(r'labor supply $n_{j,s}$')
-        ax.plot_surface(smat, jmat, n_ss.T, rstride=1,
-                        cstride=6, cmap=cmap_c)
-        output_path = os.path.join(output_dir, 'n_ss_3D')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot 2D steady-state labor supply distribution
-        minorLocator = MultipleLocator(1)
-        fig, ax = plt.subplots()
-        linestyles = np.array(["-", "--", "-.", ":"])
-        markers = np.array(["x", "v", "o", "d", ">", "|"])
-        pct_lb = 0
-        for j in range(J):
-            this_label = (str(int(np.rint(pct_lb))) + " - " +
-                          str(int(np.rint(pct_lb + 100 * lambdas[j]))) +
-                          "%")
-            pct_lb += 100 * lambdas[j]
-            if j <= 3:
-                ax.plot(sgrid, n_ss[:, j], label=this_label,
-                        linestyle=linestyles[j], color='black')
-            elif j > 3:
-                ax.plot(sgrid, n_ss[:, j], label=this_label,
-                        marker=markers[j - 4], color='black')
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        box = ax.get_position()
-        ax.set_position([box.x0, box.y0, box.width * 0.8, box.height])
-        ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
-        ax.set_xlabel(r'age-$s$')
-        ax.set_ylabel(r'labor supply $n_{j,s}$')
-        output_path = os.path.join(output_dir, 'n_ss_2D')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-
-        # Plot 3D steady-state savings/wealth distribution
-        fig = plt.figure()
-        ax = fig.gca(projection='3d')
-        ax.set_xlabel(r'age-$s$')
-        ax.set_ylabel(r'ability-$j$')
-        ax.set_zlabel(r'indiv. savings $b_{j,s}$')
-        ax.plot_surface(smat, jmat, b_ss.T, rstride=1,
-                        cstride=6, cmap=cmap_c)
-        output_path = os.path.join(output_dir, 'b_ss_3D')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot 2D steady-state savings/wealth distribution
-        fig, ax = plt.subplots()
-        linestyles = np.array(["-", "--", "-.", ":"])
-        markers = np.array(["x", "v", "o", "d", ">", "|"])
-        pct_lb = 0
-        for j in range(J):
-            this_label = (str(int(np.rint(pct_lb))) + " - " +
-                          str(int(np.rint(pct_lb + 100 * lambdas[j]))) +
-                          "%")
-            pct_lb += 100 * lambdas[j]
-            if j <= 3:
-                ax.plot(sgrid, b_ss[:, j], label=this_label,
-                        linestyle=linestyles[j], color='black')
-            elif j > 3:
-                ax.plot(sgrid, b_ss[:, j], label=this_label,
-                        marker=markers[j - 4], color='black')
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        box = ax.get_position()
-        ax.set_position([box.x0, box.y0, box.width * 0.8, box.height])
-        ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
-        ax.set_xlabel(r'age-$s$')
-        ax.set_ylabel(r'indiv. savings $b_{j,s}$')
-        output_path = os.path.join(output_dir, 'b_ss_2D')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
+        plots.render_figs(plots.get_fig_tasks('SS', ss_output, lambdas))
 
     return ss_output
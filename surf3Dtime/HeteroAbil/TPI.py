@@ -10,10 +10,20 @@ This Python module imports the following module(s):
     firms.py
     households.py
     utilities.py
+    fixedpoint.py
+    cache.py
+    rootfinder.py
+    instrument.py
+    plots.py
 
 This Python module defines the following function(s):
     get_path()
     get_cnbpath()
+    get_cnbpath_mat()
+    get_TPI_features()
+    get_TPI_warm()
+    save_TPI_ckpt()
+    load_TPI_ckpt()
     get_TPI()
 ------------------------------------------------------------------------
 '''
@@ -24,12 +34,27 @@ import aggregates as aggr
 import firms
 import households as hh
 import utilities as utils
+import fixedpoint as fpt
+import cache
+import rootfinder
+import instrument as inst
+import plots
 import scipy.optimize as opt
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
+import scipy.linalg as sla
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+'''
+------------------------------------------------------------------------
+workers_min_S = integer >= 1, smallest number of cohorts S for which
+                get_TPI() solves the household problems on a pool of
+                worker processes. With fewer cohorts each lifetime is
+                too cheap to pay for sending it to a worker (at S=20 a
+                pool of workers was slower than solving in sequence),
+                so the problems are solved in this process
+------------------------------------------------------------------------
+'''
+workers_min_S = 40
 
 '''
 ------------------------------------------------------------------------
@@ -84,7 +109,8 @@ def get_path(x1, xT, T, spec):
     return xpath
 
 
-def get_cnbpath(params, rpath, wpath):
+def get_cnbpath(params, rpath, wpath, n_method='root', executor=None,
+                cpath_prev=None, monitor=None):
     '''
     --------------------------------------------------------------------
     Given time paths for interest rates and wages, this function
@@ -95,17 +121,43 @@ def get_cnbpath(params, rpath, wpath):
     solving each lifetime decision.
     --------------------------------------------------------------------
     INPUTS:
-    params  = length 14 tuple, (J, S, T2, lambdas, emat, beta, sigma,
-              l_tilde, b_ellip, upsilon, chi_n_vec, bmat1, TPI_tol,
-              diff)
-    rpath   = (T2+S-1,) vector, equilibrium time path of interest rate
-    wpath   = (T2+S-1,) vector, equilibrium time path of the real wage
+    params     = length 14 tuple, (J, S, T2, lambdas, emat, beta,
+                 sigma, l_tilde, b_ellip, upsilon, chi_n_vec, bmat1,
+                 TPI_tol, diff)
+    rpath      = (T2+S-1,) vector, equilibrium time path of interest
+                 rate
+    wpath      = (T2+S-1,) vector, equilibrium time path of the real
+                 wage
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 method used to solve the household problems
+    executor   = None or concurrent.futures.Executor, if not None the
+                 household lifetime problems are mapped over the
+                 executor's workers instead of solved in sequence. This
+                 is only faster than the sequence for long lifetimes
+                 (see workers_min_S) on several cores. With
+                 n_method='stacked', hh.solve_lifetime() is mapped over
+                 the lifetime problems in this process if executor is
+                 None
+    cpath_prev = None or (S, J, T2+S-1) array, time path of the
+                 distribution of consumption from the previous TPI
+                 iteration or from a cached solution, used for the
+                 initial guesses of c1. If None, the guesses are 0.1 or
+                 the solution of the previous cohort
+    monitor    = None or dictionary, monitor from instrument.get_monitor()
+                 that counts the lifetimes solved (lifetimes), the c1
+                 root finder calls (c1_root_calls), their function
+                 evaluations (c1_root_nfev) and failures (c1_root_fail),
+                 and the counts of hh.get_cnb_vecs(). Only lifetimes is
+                 counted if executor is not None or n_method='stacked'
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
-        hh.c1_bSp1err()
+        hh.c1_bSp1err_jac()
         hh.get_cnb_vecs()
         hh.get_n_errors()
         hh.get_b_errors()
+        hh.solve_lifetime()
+        utils.get_cohort_diag()
+        inst.add_count()
 
     OBJECTS CREATED WITHIN FUNCTION:
     J             =
@@ -143,17 +195,17 @@ def get_cnbpath(params, rpath, wpath):
                     elements of matrix should only be in first column
                     and first row
     c1_options    = length 1 dict, options for
-                    opt.root(hh.c1_bSp1err,...)
+                    opt.root(hh.c1_bSp1err_jac,...)
     b_err_params  = length 2 tuple, args to pass into
                     hh.get_b_errors()
     p             = integer in [1, S-1], index representing number of
                     periods remaining in a lifetime, used to solve
                     incomplete lifetimes
     c1_init       = scalar > 0, guess for initial period consumption
-    c1_args       = length 10 tuple, args to pass into
-                    opt.root(hh.c1_bSp1err,...)
+    c1_args       = length 13 tuple, args to pass into
+                    opt.root(hh.c1_bSp1err_jac,...)
     results_c1    = results object, solution from
-                    opt.root(hh.c1_bSp1err,...)
+                    opt.root(hh.c1_bSp1err_jac,...)
     c1            = scalar > 0, optimal initial consumption
     cnb_args      = length 8 tuple, args to pass into
                     hh.get_cnb_vecs()
@@ -164,14 +216,20 @@ def get_cnbpath(params, rpath, wpath):
     bvec          = (p,) vector, individual lifetime savings decisions
     b_Sp1         = scalar, savings in last period for next period.
                     Should be zero in equilibrium
-    DiagMaskc     = (p, p) boolean identity matrix
-    DiagMaskb     = (p-1, p-1) boolean identity matrix
     n_err_params  = length 5 tuple, args to pass into hh.get_n_errors()
     n_err_vec     = (p,) vector, individual lifetime labor supply Euler
                     errors
     b_err_vec     = (p-1,) vector, individual lifetime savings Euler
                     errors
     t             = integer in [0,T2-1], index of time period (minus 1)
+    lf_args       = length 14 tuple, args to pass into
+                    hh.solve_lifetime()
+    lf_list       = list, lf_args tuples of all incomplete lifetimes
+                    followed by all complete lifetimes
+    chunksize     = integer >= 1, number of lifetimes sent to a worker
+                    at a time
+    lf_results    = iterator, hh.solve_lifetime() results in the same
+                    order as lf_list
 
     FILES CREATED BY THIS FUNCTION: None
 
@@ -187,114 +245,679 @@ def get_cnbpath(params, rpath, wpath):
     n_err_path = np.zeros((S, J, T2 + S - 1))
     b_err_path = np.zeros((S, J, T2 + S - 1))
     bSp1_err_path = np.zeros((S, J, T2))
+    if (executor is not None) or (n_method == 'stacked'):
+        # Build the arguments of every lifetime problem, solve them on
+        # the executor's workers (or in sequence), and then fill in the
+        # paths in order
+        lf_list = []
+        for p in range(1, S):
+            for j in range(J):
+                if cpath_prev is None:
+                    c1_init = 0.1
+                else:
+                    c1_init = cpath_prev[-p, j, 0]
+                lf_args = (bmat1[-p, j], emat[-p:, j], beta, sigma,
+                           l_tilde, b_ellip, upsilon, chi_n_vec[-p:],
+                           rpath[:p], wpath[:p], diff, n_method, c1_init,
+                           TPI_tol)
+                lf_list.append(lf_args)
+        for t in range(T2):
+            for j in range(J):
+                if cpath_prev is None:
+                    c1_init = 0.1
+                else:
+                    c1_init = cpath_prev[0, j, t]
+                lf_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
+                           upsilon, chi_n_vec, rpath[t:t + S],
+                           wpath[t:t + S], diff, n_method, c1_init,
+                           TPI_tol)
+                lf_list.append(lf_args)
+        inst.add_count(monitor, 'lifetimes', len(lf_list))
+        if executor is not None:
+            chunksize = max(1, len(lf_list) // 128)
+            lf_results = executor.map(hh.solve_lifetime, lf_list,
+                                      chunksize=chunksize)
+        else:
+            lf_results = map(hh.solve_lifetime, lf_list)
+        for p in range(1, S):
+            for j in range(J):
+                c_1, cvec, nvec, bvec, b_Sp1, n_err_vec, b_err_vec = \
+                    next(lf_results)
+                utils.get_cohort_diag(cpath, S - p, 0, p, j)[:] = cvec
+                utils.get_cohort_diag(npath, S - p, 0, p, j)[:] = nvec
+                utils.get_cohort_diag(n_err_path, S - p, 0, p, j)[:] = \
+                    n_err_vec
+                bSp1_err_path[-p, j, 0] = b_Sp1
+                if p > 1:
+                    utils.get_cohort_diag(bpath, S - p + 1, 1, p - 1,
+                                          j)[:] = bvec[1:]
+                    utils.get_cohort_diag(b_err_path, S - p + 1, 1,
+                                          p - 1, j)[:] = b_err_vec
+        for t in range(T2):
+            for j in range(J):
+                c_1, cvec, nvec, bvec, b_Sp1, n_err_vec, b_err_vec = \
+                    next(lf_results)
+                utils.get_cohort_diag(cpath, 0, t, S, j)[:] = cvec
+                utils.get_cohort_diag(npath, 0, t, S, j)[:] = nvec
+                utils.get_cohort_diag(n_err_path, 0, t, S, j)[:] = \
+                    n_err_vec
+                utils.get_cohort_diag(bpath, 0, t, S, j)[:] = bvec
+                utils.get_cohort_diag(b_err_path, 1, t + 1, S - 1,
+                                      j)[:] = b_err_vec
+                bSp1_err_path[0, j, t] = b_Sp1
+
+        return cpath, npath, bpath, n_err_path, b_err_path, bSp1_err_path
+
     # Solve the incomplete remaining lifetime decisions of agents alive
     # in period t=1 but not born in period t=1
     c1_options = {'maxiter': 500}
     b_err_params = (beta, sigma)
     for p in range(1, S):
-        c1_init = 0.1
         for j in range(J):
+            if cpath_prev is None:
+                c1_init = 0.1
+            else:
+                c1_init = cpath_prev[-p, j, 0]
             c1_args = (bmat1[-p, j], emat[-p:, j], beta, sigma, l_tilde,
                        b_ellip, upsilon, chi_n_vec[-p:], rpath[:p],
-                       wpath[:p], diff)
+                       wpath[:p], diff, n_method, monitor)
             results_c1 = \
-                opt.root(hh.c1_bSp1err, c1_init, args=(c1_args),
-                         method='lm', tol=TPI_tol, options=(c1_options))
+                opt.root(hh.c1_bSp1err_jac, c1_init, args=(c1_args),
+                         jac=True, method='lm', tol=TPI_tol,
+                         options=(c1_options))
             c_1 = results_c1.x
+            inst.add_count(monitor, 'lifetimes')
+            inst.add_count(monitor, 'c1_root_calls')
+            inst.add_count(monitor, 'c1_root_nfev', results_c1.nfev)
+            if not results_c1.success:
+                inst.add_count(monitor, 'c1_root_fail')
             cnb_args = (bmat1[-p, j], emat[-p:, j], beta, sigma,
                         l_tilde, b_ellip, upsilon, chi_n_vec[-p:], diff)
             cvec, nvec, bvec, b_Sp1 = \
-                hh.get_cnb_vecs(c_1, rpath[:p], wpath[:p], cnb_args)
-            DiagMaskc = np.eye(p, dtype=bool)
-            DiagMaskb = np.eye(p - 1, dtype=bool)
-            cpath[-p:, j, :p] = DiagMaskc * cvec + cpath[-p:, j, :p]
-            npath[-p:, j, :p] = DiagMaskc * nvec + npath[-p:, j, :p]
+                hh.get_cnb_vecs(c_1, rpath[:p], wpath[:p], cnb_args,
+                                n_method, monitor)
+            utils.get_cohort_diag(cpath, S - p, 0, p, j)[:] = cvec
+            utils.get_cohort_diag(npath, S - p, 0, p, j)[:] = nvec
             n_err_params = (emat[-p:, j], sigma, l_tilde,
                             chi_n_vec[-p:], b_ellip, upsilon)
             n_err_vec = hh.get_n_errors(n_err_params, wpath[:p], cvec,
                                         nvec, diff)
-            n_err_path[-p:, j, :p] = (DiagMaskc * n_err_vec +
-                                      n_err_path[-p:, j, :p])
+            utils.get_cohort_diag(n_err_path, S - p, 0, p, j)[:] = \
+                n_err_vec
             bSp1_err_path[-p, j, 0] = b_Sp1
             if p > 1:
-                bpath[S - p + 1:, j, 1:p] = (DiagMaskb * bvec[1:] +
-                                             bpath[S - p + 1:, j, 1:p])
+                utils.get_cohort_diag(bpath, S - p + 1, 1, p - 1, j)[:] = \
+                    bvec[1:]
                 b_err_vec = hh.get_b_errors(b_err_params, rpath[1:p],
                                             cvec, diff)
-                b_err_path[S - p + 1:, j, 1:p] = \
-                    (DiagMaskb * b_err_vec +
-                     b_err_path[S - p + 1:, j, 1:p])
+                utils.get_cohort_diag(b_err_path, S - p + 1, 1, p - 1,
+                                      j)[:] = b_err_vec
 
     # Solve the remaining lifetime decisions of agents born between
     # period t=1 and t=T (complete lifetimes)
-    DiagMaskc = np.eye(S, dtype=bool)
-    DiagMaskb = np.eye(S - 1, dtype=bool)
     for t in range(T2):  # Go from periods 1 to T (columns 0 to T-1)
         for j in range(J):
-            if t == 0:
+            if cpath_prev is not None:
+                c1_init = cpath_prev[0, j, t]
+            elif t == 0:
                 c1_init = 0.1
             else:
                 c1_init = cpath[0, j, t - 1]
             c1_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
                        upsilon, chi_n_vec, rpath[t:t + S],
-                       wpath[t:t + S], diff)
+                       wpath[t:t + S], diff, n_method, monitor)
             results_c1 = \
-                opt.root(hh.c1_bSp1err, c1_init, args=(c1_args),
-                         method='lm', tol=TPI_tol, options=(c1_options))
+                opt.root(hh.c1_bSp1err_jac, c1_init, args=(c1_args),
+                         jac=True, method='lm', tol=TPI_tol,
+                         options=(c1_options))
             c_1 = results_c1.x
+            inst.add_count(monitor, 'lifetimes')
+            inst.add_count(monitor, 'c1_root_calls')
+            inst.add_count(monitor, 'c1_root_nfev', results_c1.nfev)
+            if not results_c1.success:
+                inst.add_count(monitor, 'c1_root_fail')
             cnb_args = (0.0, emat[:, j], beta, sigma, l_tilde, b_ellip,
                         upsilon, chi_n_vec, diff)
             cvec, nvec, bvec, b_Sp1 = \
                 hh.get_cnb_vecs(c_1, rpath[t:t + S], wpath[t:t + S],
-                                cnb_args)
-            cpath[:, j, t:t + S] = (DiagMaskc * cvec +
-                                    cpath[:, j, t:t + S])
-            npath[:, j, t:t + S] = (DiagMaskc * nvec +
-                                    npath[:, j, t:t + S])
+                                cnb_args, n_method, monitor)
+            utils.get_cohort_diag(cpath, 0, t, S, j)[:] = cvec
+            utils.get_cohort_diag(npath, 0, t, S, j)[:] = nvec
             n_err_params = (emat[:, j], sigma, l_tilde, chi_n_vec,
                             b_ellip, upsilon)
             n_err_vec = hh.get_n_errors(n_err_params, wpath[t:t + S],
                                         cvec, nvec, diff)
-            n_err_path[:, j, t:t + S] = (DiagMaskc * n_err_vec +
-                                         n_err_path[:, j, t:t + S])
-            bpath[:, j, t:t + S] = (DiagMaskc * bvec +
-                                    bpath[:, j, t:t + S])
+            utils.get_cohort_diag(n_err_path, 0, t, S, j)[:] = n_err_vec
+            utils.get_cohort_diag(bpath, 0, t, S, j)[:] = bvec
             b_err_vec = \
                 hh.get_b_errors(b_err_params, rpath[t + 1:t + S], cvec,
                                 diff)
-            b_err_path[1:, j, t + 1:t + S] = \
-                (DiagMaskb * b_err_vec + b_err_path[1:, j, t + 1:t + S])
+            utils.get_cohort_diag(b_err_path, 1, t + 1, S - 1, j)[:] = \
+                b_err_vec
             bSp1_err_path[0, j, t] = b_Sp1
 
     return cpath, npath, bpath, n_err_path, b_err_path, bSp1_err_path
 
 
-def get_TPI(params, bmat1, graphs):
+def get_cnbpath_mat(params, rpath, wpath, hh_root='illinois',
+                    cpath_prev=None, monitor=None):
+    '''
+    --------------------------------------------------------------------
+    Given time paths for interest rates and wages, this function
+    generates the same time paths of the distribution of individual
+    consumption, labor supply, savings, Euler errors, and residual
+    end-of-life savings as get_cnbpath() with n_method='closed', but
+    solves the household lifetime problems in batches with
+    hh.get_cnb_mat() and the vectorized root finder
+    rootfinder.root_vec() instead of one scipy root finder call per
+    household. The J incomplete lifetimes with p periods remaining are
+    solved at once for each p, and all T2 * J complete lifetimes are
+    solved at once, where column t * J + j is the lifetime of ability
+    type j born in period t.
+    --------------------------------------------------------------------
+    INPUTS:
+    params     = length 14 tuple, (J, S, T2, lambdas, emat, beta,
+                 sigma, l_tilde, b_ellip, upsilon, chi_n_vec, bmat1,
+                 TPI_tol, diff)
+    rpath      = (T2+S-1,) vector, equilibrium time path of interest
+                 rate
+    wpath      = (T2+S-1,) vector, equilibrium time path of the real
+                 wage
+    hh_root    = string, 'illinois', 'brent', or 'newton', method of
+                 rootfinder.root_vec() used to solve for c1
+    cpath_prev = None or (S, J, T2+S-1) array, time path of the
+                 distribution of consumption from the previous TPI
+                 iteration or from a cached solution, used for the
+                 initial guesses of c1. If None, the guesses are 0.1
+    monitor    = None or dictionary, monitor from instrument.get_monitor()
+                 that counts the lifetimes solved (lifetimes), the
+                 vectorized c1 root finder calls (c1_root_calls), their
+                 vector function evaluations (c1_root_nfev), and the
+                 calls in which not all problems converged
+                 (c1_root_fail)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        hh.c1_bSp1err_mat()
+        hh.c1_bSp1err_mat_jac()
+        hh.get_cnb_mat()
+        hh.get_n_errors()
+        hh.get_b_errors()
+        rootfinder.root_vec()
+        inst.add_count()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    J             = integer >= 1, number of ability types
+    S             = integer in [3,80], number of periods an individual
+                    lives
+    T2            = integer > S, number of periods until steady state
+    lambdas       = (J,) vector, income percentiles for ability types
+    emat          = (S, J) matrix, e_{j,s} ability by age and ability
+                    type
+    beta          = scalar in (0,1), discount factor
+    sigma         = scalar > 0, coefficient of relative risk aversion
+    l_tilde       = scalar > 0, time endowment for each agent each
+                    period
+    b_ellip       = scalar > 0, fitted value of b for elliptical
+                    disutility of labor
+    upsilon       = scalar > 1, fitted value of upsilon for elliptical
+                    disutility of labor
+    chi_n_vec     = (S,) vector, values for chi^n_s
+    bmat1         = (S, J) matrix, initial period savings distribution
+    TPI_tol       = scalar > 0, tolerance level for the root finders
+    diff          = boolean, =True if want difference version of Euler
+                    errors beta*(1+r)*u'(c2) - u'(c1), =False if want
+                    ratio version [beta*(1+r)*u'(c2)]/[u'(c1)] - 1
+    cpath         = (S, J, T2+S-1) array, time path of the distribution
+                    of consumption
+    npath         = (S, J, T2+S-1) array, time path of the distribution
+                    of labor supply
+    bpath         = (S, J, T2+S-1) array, time path of the distribution
+                    of savings
+    n_err_path    = (S, J, T2+S-1) array, time path of distribution of
+                    labor supply Euler errors
+    b_err_path    = (S, J, T2+S-1) array, time path of distribution of
+                    savings Euler errors
+    bSp1_err_path = (S, J, T2) array, residual last period savings,
+                    which should be close to zero in equilibrium
+    c1_func       = function, hh.c1_bSp1err_mat_jac() if
+                    hh_root='newton', otherwise hh.c1_bSp1err_mat()
+    b_err_params  = length 2 tuple, args to pass into
+                    hh.get_b_errors()
+    p             = integer in [1, S-1], number of periods remaining in
+                    the incomplete lifetimes
+    c1_init       = (J,) or (T2*J,) vector, guesses for initial period
+                    consumption
+    c1_args       = length 11 tuple, args to pass into c1_func
+    c1_vec        = (J,) or (T2*J,) vector, optimal initial consumption
+    b_Sp1_vec     = (J,) or (T2*J,) vector, savings in last period for
+                    next period. Should be zero in equilibrium
+    c1_success    = boolean, =True if all c1 root problems converged
+    c1_nfev       = integer >= 1, number of evaluations of c1_func
+    cnb_args      = length 9 tuple, args to pass into hh.get_cnb_mat()
+    cmat          = (p, J) or (S, T2*J) matrix, lifetime consumption
+    nmat          = (p, J) or (S, T2*J) matrix, lifetime labor supply
+    bmat          = (p, J) or (S, T2*J) matrix, lifetime savings
+    age_idx       = (p,) vector or (S, 1) matrix, indices of the ages of
+                    the lifetimes in the time path arrays
+    per_idx       = (p,) vector or (S, T2) matrix, indices of the
+                    periods of the lifetimes in the time path arrays
+    n_err_params  = length 6 tuple, args to pass into hh.get_n_errors()
+    emat_all      = (S, T2*J) matrix, ability paths of all complete
+                    lifetimes
+    rmat          = (S, T2*J) matrix, interest rate paths of all
+                    complete lifetimes
+    wmat          = (S, T2*J) matrix, wage paths of all complete
+                    lifetimes
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: cpath, npath, bpath, n_err_path, b_err_path, bSp1_err_path
+    --------------------------------------------------------------------
+    '''
+    (J, S, T2, lambdas, emat, beta, sigma, l_tilde, b_ellip, upsilon,
+        chi_n_vec, bmat1, TPI_tol, diff) = params
+    cpath = np.zeros((S, J, T2 + S - 1))
+    npath = np.zeros((S, J, T2 + S - 1))
+    bpath = np.append(bmat1.reshape((S, J, 1)),
+                      np.zeros((S, J, T2 + S - 2)), axis=2)
+    n_err_path = np.zeros((S, J, T2 + S - 1))
+    b_err_path = np.zeros((S, J, T2 + S - 1))
+    bSp1_err_path = np.zeros((S, J, T2))
+    if hh_root == 'newton':
+        c1_func = hh.c1_bSp1err_mat_jac
+    else:
+        c1_func = hh.c1_bSp1err_mat
+    b_err_params = (beta, sigma)
+
+    # Solve the incomplete remaining lifetime decisions of agents alive
+    # in period t=1 but not born in period t=1, all J ability types with
+    # p periods remaining at once
+    for p in range(1, S):
+        if cpath_prev is None:
+            c1_init = 0.1 * np.ones(J)
+        else:
+            c1_init = cpath_prev[-p, :, 0]
+        c1_args = (bmat1[-p, :], emat[-p:, :], beta, sigma, l_tilde,
+                   b_ellip, upsilon, chi_n_vec[-p:], rpath[:p],
+                   wpath[:p], diff)
+        c1_vec, b_Sp1_vec, c1_success, c1_nfev = \
+            rootfinder.root_vec(c1_func, c1_init, args=c1_args,
+                                method=hh_root, tol=TPI_tol)
+        inst.add_count(monitor, 'lifetimes', J)
+        inst.add_count(monitor, 'c1_root_calls')
+        inst.add_count(monitor, 'c1_root_nfev', c1_nfev)
+        if not c1_success:
+            inst.add_count(monitor, 'c1_root_fail')
+        cnb_args = (bmat1[-p, :], emat[-p:, :], beta, sigma, l_tilde,
+                    b_ellip, upsilon, chi_n_vec[-p:], diff)
+        cmat, nmat, bmat, b_Sp1_vec = \
+            hh.get_cnb_mat(c1_vec, rpath[:p], wpath[:p], cnb_args)
+        age_idx = np.arange(S - p, S)
+        per_idx = np.arange(p)
+        cpath[age_idx, :, per_idx] = cmat
+        npath[age_idx, :, per_idx] = nmat
+        n_err_params = (emat[-p:, :], sigma, l_tilde,
+                        chi_n_vec[-p:].reshape((p, 1)), b_ellip, upsilon)
+        n_err_path[age_idx, :, per_idx] = \
+            hh.get_n_errors(n_err_params, wpath[:p].reshape((p, 1)),
+                            cmat, nmat, diff)
+        bSp1_err_path[-p, :, 0] = b_Sp1_vec
+        if p > 1:
+            bpath[age_idx[1:], :, per_idx[1:]] = bmat[1:, :]
+            b_err_path[age_idx[1:], :, per_idx[1:]] = \
+                hh.get_b_errors(b_err_params,
+                                rpath[1:p].reshape((p - 1, 1)), cmat,
+                                diff)
+
+    # Solve the remaining lifetime decisions of agents born between
+    # period t=1 and t=T (complete lifetimes), all at once
+    age_idx = np.arange(S).reshape((S, 1))
+    per_idx = age_idx + np.arange(T2).reshape((1, T2))
+    emat_all = np.tile(emat, (1, T2))
+    rmat = np.repeat(rpath[per_idx], J, axis=1)
+    wmat = np.repeat(wpath[per_idx], J, axis=1)
+    if cpath_prev is None:
+        c1_init = 0.1 * np.ones(T2 * J)
+    else:
+        c1_init = cpath_prev[0, :, :T2].T.flatten()
+    c1_args = (0.0, emat_all, beta, sigma, l_tilde, b_ellip, upsilon,
+               chi_n_vec, rmat, wmat, diff)
+    c1_vec, b_Sp1_vec, c1_success, c1_nfev = \
+        rootfinder.root_vec(c1_func, c1_init, args=c1_args,
+                            method=hh_root, tol=TPI_tol)
+    inst.add_count(monitor, 'lifetimes', T2 * J)
+    inst.add_count(monitor, 'c1_root_calls')
+    inst.add_count(monitor, 'c1_root_nfev', c1_nfev)
+    if not c1_success:
+        inst.add_count(monitor, 'c1_root_fail')
+    cnb_args = (0.0, emat_all, beta, sigma, l_tilde, b_ellip, upsilon,
+                chi_n_vec, diff)
+    cmat, nmat, bmat, b_Sp1_vec = \
+        hh.get_cnb_mat(c1_vec, rmat, wmat, cnb_args)
+    cpath[age_idx, :, per_idx] = cmat.reshape((S, T2, J))
+    npath[age_idx, :, per_idx] = nmat.reshape((S, T2, J))
+    bpath[age_idx, :, per_idx] = bmat.reshape((S, T2, J))
+    n_err_params = (emat_all, sigma, l_tilde, chi_n_vec.reshape((S, 1)),
+                    b_ellip, upsilon)
+    n_err_path[age_idx, :, per_idx] = \
+        hh.get_n_errors(n_err_params, wmat, cmat, nmat,
+                        diff).reshape((S, T2, J))
+    b_err_path[age_idx[1:], :, per_idx[1:]] = \
+        hh.get_b_errors(b_err_params, rmat[1:, :], cmat,
+                        diff).reshape((S - 1, T2, J))
+    bSp1_err_path[0, :, :] = b_Sp1_vec.reshape((T2, J)).T
+
+    return cpath, npath, bpath, n_err_path, b_err_path, bSp1_err_path
+
+
+def get_TPI_features(args):
+    '''
+    --------------------------------------------------------------------
+    Return the parameters of a TPI argument tuple that are used to
+    measure how close two transition path problems are, and the shape
+    key that must match for one solution to be a starting guess for the
+    other
+    --------------------------------------------------------------------
+    INPUTS:
+    args = length 24 tuple, (J, S, T1, T2, lambdas, emat, beta, sigma,
+           l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta, K_ss,
+           L_ss, C_ss, maxiter, mindist, TPI_tol, xi, diff, bmat1)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    J         = integer >= 1, number of ability types
+    S         = integer in [3, 80], number of periods an individual
+                lives
+    T2        = integer > T1, number of time periods after which
+                steady-state is forced in TPI
+    lambdas   = (J,) vector, income percentiles for ability types
+    beta      = scalar in (0,1), discount factor for model period
+    sigma     = scalar > 0, coefficient of relative risk aversion
+    alpha     = scalar in (0,1), capital share of income
+    delta     = scalar in [0,1], per-period capital depreciation rt
+    K_ss      = scalar > 0, steady-state aggregate capital stock
+    bmat1     = (S, J) matrix, initial period savings distribution
+    K1_ratio  = scalar, initial aggregate capital stock relative to the
+                steady state
+    feat_vec  = (J+6,) vector, (S, beta, sigma, alpha, delta, lambdas,
+                K1_ratio)
+    shape_key = length 3 tuple, (J, S, T2)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: feat_vec, shape_key
+    --------------------------------------------------------------------
+    '''
+    J, S = args[:2]
+    T2, lambdas = args[3:5]
+    beta, sigma = args[6:8]
+    alpha, delta, K_ss = args[13:16]
+    bmat1 = args[23]
+    K1_ratio = (bmat1 * lambdas.reshape((1, J))).sum() / K_ss
+    feat_vec = np.hstack((S, beta, sigma, alpha, delta, lambdas,
+                          K1_ratio))
+    shape_key = (int(J), int(S), int(T2))
+
+    return feat_vec, shape_key
+
+
+def get_TPI_warm(cache_dir, tpi_args, Kpath_init, Lpath_init):
+    '''
+    --------------------------------------------------------------------
+    Replace the initial guesses of the aggregate capital and labor paths
+    with the paths of the closest transition path problem in the
+    solution cache, shifted to the current steady state and initial
+    capital stock, and return its consumption path to seed the initial
+    guesses of c1 of every cohort
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir  = string, path of solution cache directory
+    tpi_args   = length 24 tuple, TPI arguments with bmat1 appended
+    Kpath_init = (T2+S-1,) vector, default initial guess for the time
+                 path of the aggregate capital stock
+    Lpath_init = (T2+S-1,) vector, default initial guess for the time
+                 path of aggregate labor
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        cache.get_nearest_entry()
+        get_TPI_features()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    T2          = integer > T1, number of time periods after which
+                  steady-state is forced in TPI
+    K_ss        = scalar > 0, steady-state aggregate capital stock
+    L_ss        = scalar > 0, steady-state aggregate labor
+    near_output = dictionary or None, tpi_output of the closest cached
+                  transition path
+    near_args   = tuple or None, arguments of the closest transition
+                  path
+    near_dist   = scalar >= 0, normalized distance between near_args
+                  and tpi_args
+    Kpath_warm  = (T2+S-1,) vector, shifted K path of near_output
+    Lpath_warm  = (T2+S-1,) vector, shifted L path of near_output
+    cpath_prev  = None or (S, J, T2+S-1) array, consumption path of
+                  near_output
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: Kpath_init, Lpath_init, cpath_prev
+    --------------------------------------------------------------------
+    '''
+    T2 = tpi_args[3]
+    K_ss, L_ss = tpi_args[15:17]
+    cpath_prev = None
+    near_output, near_args, near_dist = \
+        cache.get_nearest_entry(cache_dir, 'TPI', tpi_args,
+                                get_TPI_features)
+    if near_output is not None:
+        Kpath_warm = Kpath_init.copy()
+        Lpath_warm = Lpath_init.copy()
+        Kpath_warm[1:T2] = near_output['Kpath'][1:T2] - near_args[15] + K_ss
+        Lpath_warm[:T2] = near_output['Lpath'][:T2] - near_args[16] + L_ss
+        if (Kpath_warm > 0).all() and (Lpath_warm > 0).all():
+            print('Warm start TPI from cached solution at distance ' +
+                  '%10.4e' % (near_dist) + '.')
+            Kpath_init = Kpath_warm
+            Lpath_init = Lpath_warm
+            cpath_prev = near_output['cpath']
+
+    return Kpath_init, Lpath_init, cpath_prev
+
+
+def save_TPI_ckpt(ckpt_file, ckpt_key, Kpath_init, Lpath_init, iter_TPI,
+                  dist_path):
+    '''
+    --------------------------------------------------------------------
+    Save a checkpoint of time path iteration (TPI) from which get_TPI()
+    can resume. The checkpoint only holds the current guesses of the
+    aggregate capital and labor paths, the iteration number, and the
+    history of distances, so it is small. It is written to a temporary
+    file and renamed, so an interrupted write never replaces the last
+    complete checkpoint.
+    --------------------------------------------------------------------
+    INPUTS:
+    ckpt_file  = string, path of checkpoint file
+    ckpt_key   = string, digest of the TPI arguments (params, bmat1)
+                 without the iteration controls
+    Kpath_init = (T2+S-1,) vector, current guess for the time path of
+                 the aggregate capital stock
+    Lpath_init = (T2+S-1,) vector, current guess for the time path of
+                 aggregate labor
+    iter_TPI   = integer >= 0, number of completed TPI iterations
+    dist_path  = list, distance of each completed TPI iteration
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        np.savez()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    ckpt_dir = string, directory of checkpoint file
+    tmp_path = string, temporary path of checkpoint file
+    tmp_file = file object, temporary checkpoint file
+
+    FILES CREATED BY THIS FUNCTION:
+        ckpt_file
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    ckpt_dir = os.path.dirname(os.path.abspath(ckpt_file))
+    if not os.access(ckpt_dir, os.F_OK):
+        os.makedirs(ckpt_dir)
+    tmp_path = ckpt_file + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'wb') as tmp_file:
+        np.savez(tmp_file, ckpt_key=ckpt_key, Kpath_init=Kpath_init,
+                 Lpath_init=Lpath_init, iter_TPI=iter_TPI,
+                 dist_path=np.array(dist_path))
+    os.replace(tmp_path, ckpt_file)
+
+
+def load_TPI_ckpt(ckpt_file, ckpt_key):
+    '''
+    --------------------------------------------------------------------
+    Load a checkpoint of time path iteration saved by save_TPI_ckpt() if
+    it exists and was saved for the same TPI arguments
+    --------------------------------------------------------------------
+    INPUTS:
+    ckpt_file = string, path of checkpoint file
+    ckpt_key  = string, digest of the TPI arguments (params, bmat1)
+                without the iteration controls
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        np.load()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    ckpt      = None or length 4 tuple, (Kpath_init, Lpath_init,
+                iter_TPI, dist_path) of the checkpoint, None if there is
+                no checkpoint for ckpt_key
+    ckpt_data = NpzFile, contents of checkpoint file
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: ckpt
+    --------------------------------------------------------------------
+    '''
+    ckpt = None
+    try:
+        with np.load(ckpt_file) as ckpt_data:
+            if str(ckpt_data['ckpt_key']) == ckpt_key:
+                ckpt = (ckpt_data['Kpath_init'], ckpt_data['Lpath_init'],
+                        int(ckpt_data['iter_TPI']),
+                        list(ckpt_data['dist_path']))
+    except (OSError, KeyError, ValueError, EOFError):
+        ckpt = None
+
+    return ckpt
+
+
+def get_TPI(params, bmat1, graphs, n_method='root', workers=1,
+            accel='damped', accel_mem=5, cache_dir=None,
+            warm_start=False, hh_batch=False, hh_root='illinois',
+            jac_KL=None, ckpt_file=None, ckpt_iter=10, ckpt_secs=None,
+            resume=False, monitor=None):
     '''
     --------------------------------------------------------------------
     Solves for transition path equilibrium using time path iteration
     (TPI)
     --------------------------------------------------------------------
     INPUTS:
-    params = length 23 tuple, (J, S, T1, T2, lambdas, emat, beta, sigma,
-             l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
-             K_ss, L_ss, C_ss, maxiter, mindist, TPI_tol, xi, diff)
-    bmat1  = (S, J) matrix, initial period savings distribution
-    graphs = Boolean, =True if want graphs of TPI objects
+    params     = length 23 tuple, (J, S, T1, T2, lambdas, emat, beta,
+                 sigma, l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha,
+                 delta, K_ss, L_ss, C_ss, maxiter, mindist, TPI_tol, xi,
+                 diff)
+    bmat1      = (S, J) matrix, initial period savings distribution
+    graphs     = Boolean, =True if want graphs of TPI objects
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 method used to solve the household problems
+    workers    = integer >= 1, number of worker processes used to solve
+                 the household lifetime problems in each iteration. If
+                 workers=1, or if S < workers_min_S, they are solved in
+                 sequence in this process. The pool only pays off for
+                 long lifetimes (large S) on a machine with several
+                 cores
+    accel      = string, 'damped', 'anderson', 'broyden', or 'newton',
+                 method used to update the stacked guess of the K and L
+                 paths in each iteration. 'newton' requires jac_KL
+    accel_mem  = integer >= 1, number of past iterations used by
+                 Anderson mixing
+    cache_dir  = None or string, path of solution cache directory. If
+                 not None and a solution for (params, bmat1) is in the
+                 cache, it is returned without recomputing, and its
+                 graphs are rendered if graphs=True. Otherwise the new
+                 solution is saved in the cache if it converged
+    warm_start = boolean, =True if start from the K and L paths and the
+                 consumption path of the closest transition path problem
+                 in the cache (requires cache_dir)
+    hh_batch   = boolean, =True if solve the household lifetime problems
+                 in batches with get_cnbpath_mat() instead of
+                 get_cnbpath(). Requires n_method='closed', and workers
+                 is ignored
+    hh_root    = string, 'illinois', 'brent', or 'newton', method of
+                 rootfinder.root_vec() used if hh_batch=True
+    jac_KL     = None or (2*T2, 2*T2) matrix, sequence-space Jacobian of
+                 the mapping from the stacked K and L paths to the new K
+                 and L paths around the steady state, from
+                 jacobian.get_KL_jac(). Used as the fixed Jacobian of
+                 the Newton update if accel='newton'
+    ckpt_file  = None or string, path of the checkpoint file. If not
+                 None, a checkpoint of the K and L paths is saved with
+                 save_TPI_ckpt() every ckpt_iter iterations and every
+                 ckpt_secs seconds
+    ckpt_iter  = integer >= 1, number of iterations between checkpoints
+    ckpt_secs  = None or scalar > 0, wall-clock seconds between
+                 checkpoints, checked at the end of each iteration. If
+                 None, checkpoints are only saved every ckpt_iter
+                 iterations
+    resume     = boolean, =True if restart from the checkpoint in
+                 ckpt_file when it exists and was saved for the same
+                 params (except maxiter, mindist, and xi) and bmat1. The
+                 checkpoint takes precedence over warm_start
+    monitor    = None or dictionary, monitor from instrument.get_monitor()
+                 that records a 'TPI_iter' event with the time spent
+                 solving the household problems (hh_time) and
+                 aggregating and updating the paths (aggr_time) and the
+                 root finder counts of each iteration, and a 'TPI_done'
+                 event at the end
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        utils.get_digest()
+        cache.load_cache()
         aggr.get_K()
         get_path()
+        get_TPI_warm()
+        load_TPI_ckpt()
+        sla.lu_factor()
         firms.get_r()
         firms.get_w()
         get_cnbpath()
+        get_cnbpath_mat()
+        fpt.fp_update()
+        save_TPI_ckpt()
         aggr.get_L()
         aggr.get_Y()
         aggr.get_C()
+        inst.add_time()
+        inst.emit()
         utils.print_time()
+        plots.get_fig_tasks()
+        plots.render_figs()
+        cache.save_cache()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    start_time    = scalar, current processor time in seconds (float)
+    start_time    = scalar, current time in seconds (float)
+    iter_start    = scalar, time at the start of the current iteration
+    hh_start      = scalar, time at the start of the household solve
+    aggr_start    = scalar, time at the start of the aggregation
+    tpi_args      = length 24 tuple, params with bmat1 appended
+    solver_opts   = length 5 tuple, (n_method, hh_batch, hh_root,
+                    accel, accel_mem) options that change the solution,
+                    with hh_root None if hh_batch=False and accel_mem
+                    None if accel is not 'anderson'
+    tpi_key       = string, digest of tpi_args and solver_opts used as
+                    the cache key
+    ckpt_key      = string, digest of tpi_args without the iteration
+                    controls maxiter, mindist, and xi, used as the
+                    checkpoint key
     J             = integer >= 1, number of heterogeneous ability groups
     S             = integer in [3,80], number of periods an individual
                     lives
@@ -331,6 +954,7 @@ def get_TPI(params, bmat1, graphs):
                     ratio version [beta*(1+r)*u'(c2)]/[u'(c1)] - 1
     K1            = scalar > 0, initial aggregate capital stock
     K1_cstr       = Boolean, =True if K1 <= 0
+    err_msg       = string, error message
     Kpath_init    = (T2+S-1,) vector, initial guess for the time path of
                     the aggregate capital stock
     Lpath_init    = (T2+S-1,) vector, initial guess for the time path of
@@ -342,6 +966,22 @@ def get_TPI(params, bmat1, graphs):
     w_params      = length 2 tuple, (A, alpha)
     Y_params      = length 2 tuple, (A, alpha)
     cnb_params    = length 14 tuple, args to pass into get_cnbpath()
+    executor      = None or ProcessPoolExecutor, pool of worker
+                    processes if workers > 1, S >= workers_min_S, and
+                    hh_batch=False
+    cpath_prev    = None or (S, J, T2+S-1) array, cpath from the
+                    previous TPI iteration
+    ckpt          = None or length 4 tuple, (Kpath_init, Lpath_init,
+                    iter_TPI, dist_path) loaded from ckpt_file
+    ckpt_time     = scalar, wall-clock time of the last checkpoint
+    accel_params  = length 2 tuple, (xi, accel_mem), args to pass into
+                    fpt.fp_update()
+    accel_hist    = dictionary, history of the outer loop iterations
+                    used by fpt.fp_update(), which holds the LU
+                    factorization of jac_KL - I if accel='newton'
+    dist_path     = list, distance dist of each TPI iteration
+    KL_path_next  = (2*T2,) vector, updated guess of the appended K and
+                    L paths from observation 1 to T2
     rpath         = (T2+S-1,) vector, time path of the interest rates
     wpath         = (T2+S-1,) vector, time path of the wages
     cpath         = (S, J, T2+S-1) array, time path of distribution of
@@ -381,9 +1021,10 @@ def get_TPI(params, bmat1, graphs):
     Lpath         = (T2+S-1,) vector, equilibrium time path of aggregate
                     labor L_t
     tpi_time      = scalar, time to compute TPI solution (seconds)
-    tpi_output    = length 14 dictionary, {cpath, npath, bpath, wpath,
+    tpi_output    = length 16 dictionary, {cpath, npath, bpath, wpath,
                     rpath, Kpath, Lpath, Ypath, Cpath, bSp1_err_path,
-                    n_err_path, b_err_path, RCerrPath, tpi_time}
+                    n_err_path, b_err_path, RCerrPath, tpi_time,
+                    iter_TPI, dist_path}
 
     FILES CREATED BY THIS FUNCTION:
         Kpath.png
@@ -399,11 +1040,34 @@ def get_TPI(params, bmat1, graphs):
     RETURNS: tpi_output
     --------------------------------------------------------------------
     '''
-    start_time = time.clock()
+    start_time = time.perf_counter()
+    tpi_args = tuple(params) + (bmat1,)
+    solver_opts = (n_method, bool(hh_batch),
+                   hh_root if hh_batch else None, accel,
+                   accel_mem if accel == 'anderson' else None)
+    tpi_key = utils.get_digest((tpi_args, solver_opts))
+    ckpt_key = utils.get_digest(tuple(params[:18]) +
+                                (params[20], params[22], bmat1))
+    if cache_dir is not None:
+        tpi_output = cache.load_cache(cache_dir, 'TPI', tpi_key)
+        if tpi_output is not None:
+            print('Retrieved transition path solution ' + tpi_key[:12] +
+                  ' from cache.')
+            if graphs:
+                plots.render_figs(plots.get_fig_tasks('TPI', tpi_output))
+            return tpi_output
     (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde, b_ellip,
         upsilon, chi_n_vec, A, alpha, delta, K_ss, L_ss, C_ss, maxiter,
         mindist, TPI_tol, xi, diff) = params
     K1, K1_cstr = aggr.get_K(bmat1, lambdas)
+    if hh_batch and n_method != 'closed':
+        err_msg = ('ERROR, get_TPI(): hh_batch=True requires ' +
+                   "n_method='closed'.")
+        raise RuntimeError(err_msg)
+    if accel == 'newton' and jac_KL is None:
+        err_msg = ("ERROR, get_TPI(): accel='newton' requires the " +
+                   'Jacobian jac_KL.')
+        raise RuntimeError(err_msg)
 
     # Create time paths for K and L
     Kpath_init = np.zeros(T2 + S - 1)
@@ -418,44 +1082,109 @@ def get_TPI(params, bmat1, graphs):
     Y_params = (A, alpha)
     cnb_params = (J, S, T2, lambdas, emat, beta, sigma, l_tilde,
                   b_ellip, upsilon, chi_n_vec, bmat1, TPI_tol, diff)
-    while (iter_TPI < maxiter) and (dist >= mindist):
-        iter_TPI += 1
-        rpath = firms.get_r(r_params, Kpath_init, Lpath_init)
-        wpath = firms.get_w(w_params, Kpath_init, Lpath_init)
-        cpath, npath, bpath, n_err_path, b_err_path, bSp1_err_path = \
-            get_cnbpath(cnb_params, rpath, wpath)
-        Kpath_new = np.zeros(T2 + S - 1)
-        Kpath_new[:T2], Kpath_cstr = aggr.get_K(bpath[:, :, :T2],
-                                                lambdas)
-        Kpath_new[T2:] = K_ss
-        Kpath_cstr = np.append(Kpath_cstr, np.zeros(S - 1, dtype=bool))
-        Kpath_new[Kpath_cstr] = 0.01
-        Lpath_new = np.zeros(T2 + S - 1)
-        Lpath_new[:T2] = aggr.get_L(npath[:, :, :T2], emat, lambdas)
-        Lpath_new[T2:] = L_ss
-        rpath_new = firms.get_r(r_params, Kpath_new, Lpath_new)
-        wpath_new = firms.get_w(w_params, Kpath_new, Lpath_new)
-        Ypath = aggr.get_Y(Y_params, Kpath_new, Lpath_new)
-        Cpath = np.zeros(T2 + S - 1)
-        Cpath[:T2] = aggr.get_C(cpath[:, :, :T2], lambdas)
-        Cpath[T2:] = C_ss
-        RCerrPath = (Ypath[:-1] - Cpath[:-1] - Kpath_new[1:] +
-                     (1 - delta) * Kpath_new[:-1])
-        # Check the distance of Kpath_new1
-        KL_path_new = np.append(Kpath_new[:T2], Lpath_new[:T2])
-        KL_path_init = np.append(Kpath_init[:T2], Lpath_init[:T2])
-        dist = ((KL_path_new - KL_path_init) ** 2).sum()
-        # dist = np.absolute(KL_path_new - KL_path_init).max()
-        print(
-            'TPI iter: ', iter_TPI, ', dist: ', "%10.4e" % (dist),
-            ', max abs all errs: ', "%10.4e" %
-            (np.hstack((np.absolute(b_err_path).max(),
-             np.absolute(n_err_path).max(),
-             np.absolute(bSp1_err_path).max()))).max())
-        # The resource constraint does not bind across the transition
-        # path until the equilibrium is solved
-        Kpath_init = xi * Kpath_new + (1 - xi) * Kpath_init
-        Lpath_init = xi * Lpath_new + (1 - xi) * Lpath_init
+    if (workers > 1) and not hh_batch and (S >= workers_min_S):
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        if (workers > 1) and not hh_batch:
+            print('TPI solves the household problems in sequence ' +
+                  'because S=' + str(S) + ' < workers_min_S=' +
+                  str(workers_min_S) + '.')
+        executor = None
+    # Shut the worker processes down even if an iteration raises
+    try:
+        cpath_prev = None
+        if warm_start and (cache_dir is not None):
+            Kpath_init, Lpath_init, cpath_prev = \
+                get_TPI_warm(cache_dir, tpi_args, Kpath_init, Lpath_init)
+        accel_params = (xi, accel_mem)
+        accel_hist = {}
+        if accel == 'newton':
+            accel_hist['jac_lu'] = sla.lu_factor(jac_KL - np.eye(2 * T2))
+        dist_path = []
+        ckpt = None
+        if resume and (ckpt_file is not None):
+            ckpt = load_TPI_ckpt(ckpt_file, ckpt_key)
+        if ckpt is not None:
+            Kpath_init, Lpath_init, iter_TPI, dist_path = ckpt
+            # Always solve at least one iteration for the output paths
+            iter_TPI = min(iter_TPI, maxiter - 1)
+            Kpath_init = Kpath_init.copy()
+            Lpath_init = Lpath_init.copy()
+            cpath_prev = None
+            print('Resuming TPI from checkpoint after iteration ' +
+                  str(iter_TPI) + '.')
+        ckpt_time = time.time()
+        while (iter_TPI < maxiter) and (dist >= mindist):
+            iter_TPI += 1
+            iter_start = time.perf_counter()
+            rpath = firms.get_r(r_params, Kpath_init, Lpath_init)
+            wpath = firms.get_w(w_params, Kpath_init, Lpath_init)
+            hh_start = time.perf_counter()
+            if hh_batch:
+                (cpath, npath, bpath, n_err_path, b_err_path,
+                    bSp1_err_path) = get_cnbpath_mat(cnb_params, rpath, wpath,
+                                                     hh_root, cpath_prev,
+                                                     monitor)
+            else:
+                (cpath, npath, bpath, n_err_path, b_err_path,
+                    bSp1_err_path) = get_cnbpath(cnb_params, rpath, wpath,
+                                                 n_method, executor,
+                                                 cpath_prev, monitor)
+            cpath_prev = cpath
+            aggr_start = time.perf_counter()
+            inst.add_time(monitor, 'hh_time', aggr_start - hh_start)
+            # The aggregates are summed directly into the first T2 periods
+            # of the new paths
+            Kpath_new = np.zeros(T2 + S - 1)
+            Kpath_cstr = aggr.get_K(bpath[:, :, :T2], lambdas,
+                                    Kpath_new[:T2])[1]
+            Kpath_new[T2:] = K_ss
+            Kpath_cstr = np.append(Kpath_cstr, np.zeros(S - 1, dtype=bool))
+            Kpath_new[Kpath_cstr] = 0.01
+            Lpath_new = np.zeros(T2 + S - 1)
+            aggr.get_L(npath[:, :, :T2], emat, lambdas, Lpath_new[:T2])
+            Lpath_new[T2:] = L_ss
+            rpath_new = firms.get_r(r_params, Kpath_new, Lpath_new)
+            wpath_new = firms.get_w(w_params, Kpath_new, Lpath_new)
+            Ypath = aggr.get_Y(Y_params, Kpath_new, Lpath_new)
+            Cpath = np.zeros(T2 + S - 1)
+            aggr.get_C(cpath[:, :, :T2], lambdas, Cpath[:T2])
+            Cpath[T2:] = C_ss
+            RCerrPath = (Ypath[:-1] - Cpath[:-1] - Kpath_new[1:] +
+                         (1 - delta) * Kpath_new[:-1])
+            # Check the distance of Kpath_new1
+            KL_path_new = np.append(Kpath_new[:T2], Lpath_new[:T2])
+            KL_path_init = np.append(Kpath_init[:T2], Lpath_init[:T2])
+            dist = ((KL_path_new - KL_path_init) ** 2).sum()
+            # dist = np.absolute(KL_path_new - KL_path_init).max()
+            print(
+                'TPI iter: ', iter_TPI, ', dist: ', "%10.4e" % (dist),
+                ', max abs all errs: ', "%10.4e" %
+                (np.hstack((np.absolute(b_err_path).max(),
+                 np.absolute(n_err_path).max(),
+                 np.absolute(bSp1_err_path).max()))).max())
+            # The resource constraint does not bind across the transition
+            # path until the equilibrium is solved
+            dist_path.append(dist)
+            KL_path_next = fpt.fp_update(accel, accel_params, KL_path_init,
+                                         KL_path_new, accel_hist, x_lb=0.0)
+            Kpath_init[:T2] = KL_path_next[:T2]
+            Lpath_init[:T2] = KL_path_next[T2:]
+            inst.add_time(monitor, 'aggr_time',
+                          time.perf_counter() - aggr_start)
+            inst.emit(monitor, 'TPI_iter',
+                      {'iter': iter_TPI, 'dist': dist,
+                       'iter_time': time.perf_counter() - iter_start})
+            if (ckpt_file is not None) and (
+                    (iter_TPI % ckpt_iter == 0) or
+                    ((ckpt_secs is not None) and
+                     (time.time() - ckpt_time >= ckpt_secs))):
+                save_TPI_ckpt(ckpt_file, ckpt_key, Kpath_init, Lpath_init,
+                              iter_TPI, dist_path)
+                ckpt_time = time.time()
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     if (iter_TPI == maxiter) and (dist > mindist):
         print('TPI reached maxiter and did not converge.')
@@ -467,14 +1196,17 @@ def get_TPI(params, bmat1, graphs):
     rpath = rpath_new
     wpath = wpath_new
 
-    tpi_time = time.clock() - start_time
+    tpi_time = time.perf_counter() - start_time
+    inst.emit(monitor, 'TPI_done',
+              {'iter': iter_TPI, 'dist': dist, 'tpi_time': tpi_time})
 
     tpi_output = {
         'cpath': cpath, 'npath': npath, 'bpath': bpath, 'wpath': wpath,
         'rpath': rpath, 'Kpath': Kpath, 'Lpath': Lpath, 'Ypath': Ypath,
         'Cpath': Cpath, 'bSp1_err_path': bSp1_err_path,
         'n_err_path': n_err_path, 'b_err_path': b_err_path,
-        'RCerrPath': RCerrPath, 'tpi_time': tpi_time}
+        'RCerrPath': RCerrPath, 'tpi_time': tpi_time,
+        'iter_TPI': iter_TPI, 'dist_path': np.array(dist_path)}
 
     # Print maximum resource constraint error. Only look at resource
     # constraint up to period T2 - 1 because period T2 includes K_{t+1},
@@ -492,115 +1224,12 @@ def get_TPI(params, bmat1, graphs):
     utils.print_time(tpi_time, 'TPI')
 
     if graphs:
-        '''
-        ----------------------------------------------------------------
-        cur_path    = string, path name of current directory
-        output_fldr = string, folder in current path to save files
-        output_dir  = string, total path of images folder
-        output_path = string, path of file name of figure to be saved
-        tvec        = (T2+S-1,) vector, time period vector
-        tgridT      = (T2,) vector, time period vector from 1 to T2
-        sgrid       = (S,) vector, all ages from 1 to S
-        tmat        = (S, T2) matrix, time periods for decisions ages
-                      (S) and time periods (T2)
-        smat        = (S, T2) matrix, ages for all decisions ages (S)
-                      and time periods (T2)
-        ----------------------------------------------------------------
-        '''
-        # Create directory if images directory does not already exist
-        cur_path = os.path.split(os.path.abspath(__file__))[0]
-        output_fldr = "images"
-        output_dir = os.path.join(cur_path, output_fldr)
-        if not os.access(output_dir, os.F_OK):
-            os.makedirs(output_dir)
-
-        # Plot time path of aggregate capital stock
-        tvec = np.linspace(1, T2 + S - 1, T2 + S - 1)
-        minorLocator = MultipleLocator(1)
-        fig, ax = plt.subplots()
-        plt.plot(tvec, Kpath, marker='D')
-        # for the minor ticks, use no labels; default NullFormatter
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        plt.title('Time path for aggregate capital stock K')
-        plt.xlabel(r'Period $t$')
-        plt.ylabel(r'Aggregate capital $K_{t}$')
-        output_path = os.path.join(output_dir, 'Kpath')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot time path of aggregate labor
-        fig, ax = plt.subplots()
-        plt.plot(tvec, Lpath, marker='D')
-        # for the minor ticks, use no labels; default NullFormatter
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        plt.title('Time path for aggregate labor L')
-        plt.xlabel(r'Period $t$')
-        plt.ylabel(r'Aggregate labor $L_{t}$')
-        output_path = os.path.join(output_dir, 'Lpath')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot time path of aggregate output (GDP)
-        fig, ax = plt.subplots()
-        plt.plot(tvec, Ypath, marker='D')
-        # for the minor ticks, use no labels; default NullFormatter
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        plt.title('Time path for aggregate output (GDP) Y')
-        plt.xlabel(r'Period $t$')
-        plt.ylabel(r'Aggregate output $Y_{t}$')
-        output_path = os.path.join(output_dir, 'Ypath')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot time path of aggregate consumption
-        fig, ax = plt.subplots()
-        plt.plot(tvec, Cpath, marker='D')
-        # for the minor ticks, use no labels; default NullFormatter
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        plt.title('Time path for aggregate consumption C')
-        plt.xlabel(r'Period $t$')
-        plt.ylabel(r'Aggregate consumption $C_{t}$')
-        output_path = os.path.join(output_dir, 'C_aggr_path')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot time path of real wage
-        fig, ax = plt.subplots()
-        plt.plot(tvec, wpath, marker='D')
-        # for the minor ticks, use no labels; default NullFormatter
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        plt.title('Time path for real wage w')
-        plt.xlabel(r'Period $t$')
-        plt.ylabel(r'Real wage $w_{t}$')
-        output_path = os.path.join(output_dir, 'wpath')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Plot time path of real interest rate
-        fig, ax = plt.subplots()
-        plt.plot(tvec, rpath, marker='D')
-        # for the minor ticks, use no labels; default NullFormatter
-        ax.xaxis.set_minor_locator(minorLocator)
-        plt.grid(b=True, which='major', color='0.65', linestyle='-')
-        plt.title('Time path for real interest rate r')
-        plt.xlabel(r'Period $t$')
-        plt.ylabel(r'Real interest rate $r_{t}$')
-        output_path = os.path.join(output_dir, 'rpath')
-        plt.savefig(output_path)
-        # plt.show()
-        plt.close()
-
-        # Come up with nice visualization for time paths of individual
-        # decisions
+        plots.render_figs(plots.get_fig_tasks('TPI', tpi_output))
+
+    if (cache_dir is not None) and (dist < mindist):
+        cache.save_cache(cache_dir, 'TPI', tpi_key, tpi_output, tpi_args)
+    elif cache_dir is not None:
+        print('WARNING: TPI solution ' + tpi_key[:12] +
+              ' did not converge and is not saved in the cache.')
 
     return tpi_output
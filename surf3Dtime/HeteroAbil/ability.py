@@ -13,19 +13,80 @@ This module defines the following function(s):
     arctan_deriv_func()
     arc_error()
     arctan_fit()
+    clear_abil_memo()
+    set_abil_memo()
+    get_e_paths()
+    get_interp_wgts()
     get_e_interp()
     get_e_orig()
 ------------------------------------------------------------------------
 '''
 import numpy as np
 import scipy.optimize as opt
-import scipy.interpolate as si
-import matplotlib
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
+import scipy.spatial as spat
 import os
 
+'''
+------------------------------------------------------------------------
+abil_memo     = dictionary, memoized results of get_e_paths(),
+                get_interp_wgts(), and get_e_interp() keyed by the
+                arguments that determine them, so that repeated calls in
+                the same process (for example the tasks of a parameter
+                sweep) do not refit the arctan tails or recompute the
+                interpolation
+abil_memo_max = integer >= 1, maximum number of entries in abil_memo.
+                The oldest entries are dropped first
+------------------------------------------------------------------------
+'''
+abil_memo = {}
+abil_memo_max = 64
+
+
+def clear_abil_memo():
+    '''
+    --------------------------------------------------------------------
+    Remove all the memoized results from abil_memo, so that the next
+    calls of get_e_paths(), get_interp_wgts(), and get_e_interp()
+    recompute them
+    --------------------------------------------------------------------
+    INPUTS: None
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    abil_memo.clear()
+
+
+def set_abil_memo(key, value):
+    '''
+    --------------------------------------------------------------------
+    Save value in abil_memo under key, dropping the oldest entries
+    first if abil_memo already has abil_memo_max entries
+    --------------------------------------------------------------------
+    INPUTS:
+    key   = string or tuple, key of the memoized result
+    value = object, memoized result
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    abil_memo.pop(key, None)
+    while len(abil_memo) >= abil_memo_max:
+        del abil_memo[next(iter(abil_memo))]
+    abil_memo[key] = value
+
 
 def graph_income(ages, abil_midp, abil_pcts, emat, filesuffix=""):
     '''
@@ -71,6 +132,10 @@ def graph_income(ages, abil_midp, abil_pcts, emat, filesuffix=""):
     Returns: None
     --------------------------------------------------------------------
     '''
+    import matplotlib
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
+
     J = abil_midp.shape[0]
     abil_mesh, age_mesh = np.meshgrid(abil_midp, ages)
     cmap1 = matplotlib.cm.get_cmap('summer')
@@ -321,6 +386,184 @@ def arctan_fit(first_point, coef1, coef2, coef3, abil_deprec,
     return abil_last
 
 
+def get_e_paths():
+    '''
+    --------------------------------------------------------------------
+    This function generates the unscaled 80 x 7 matrix of lifetime
+    earnings ability profiles used by get_e_orig(). The profiles do not
+    depend on any input, so they are computed the first time the
+    function is called, including the seven arctan fits of the ages 81
+    to 100, and a copy of the memoized matrix is returned afterwards.
+    --------------------------------------------------------------------
+    INPUTS: None
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        arctan_fit()
+        set_abil_memo()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    one            = (7,) vector, coefficients on linear term in log
+                     ability equation for each ability group
+    two            = (7,) vector, coefficients on quadratic term in log
+                     ability equation for each ability group
+    three          = (7,) vector, coefficients on cubic term in log
+                     ability equation for each ability group
+    const          = (7,) vector, constants in log ability equation for
+                     each ability group
+    ages_short     = (60, 7) matrix, matrix of ages where the column
+                     vector of ages 21 to 80 is copied across 7 columns
+    log_abil_paths = (60, 7) matrix, predicted log ability paths based
+                     on age (21 to 80) and 7 lifetime ability groups
+    abil_paths     = (60, 7) matrix, predicted level of ability paths
+                     based on age (21 to 80) and 7 ability groups
+    e_orig         = (80, 7) matrix, lifetime ability profiles
+    abil_deprec    = (7,) vector, proportion that we assume ability
+                     depreciates between age 80 and age 100
+    init_guesses   = (7, 3) matrix, initial guesses for 3 parameters of
+                     the arctan functional fit for extrapolating the
+                     last 20 years of lifetime abilities in each group
+    j              = integer >= 1, index of ability group
+
+    RETURNS: e_orig
+    --------------------------------------------------------------------
+    '''
+    if 'e_paths' in abil_memo:
+        return abil_memo['e_paths'].copy()
+
+    # 1) Generate polynomials and use them to get income profiles for
+    #    ages 21 to 80.
+    one = np.array([-0.09720122, 0.05995294, 0.17654618,
+                    0.21168263, 0.21638731, 0.04500235, 0.09229392])
+    two = np.array([0.00247639, -0.00004086, -0.00240656, -
+                    0.00306555, -0.00321041, 0.00094253, 0.00012902])
+    three = np.array([-0.00001842, -0.00000521, 0.00001039,
+                      0.00001438, 0.00001579, -0.00001470, -0.00001169])
+    const = np.array([3.41e+00, 0.69689692, -0.78761958, -1.11e+00,
+                      -0.93939272, 1.60e+00, 1.89e+00])
+    ages_short = np.tile(np.linspace(21, 80, 60).reshape((60, 1)),
+                         (1, 7))
+    log_abil_paths = (const + (one * ages_short) +
+                      (two * (ages_short ** 2)) +
+                      (three * (ages_short ** 3)))
+    abil_paths = np.exp(log_abil_paths)
+    e_orig = np.zeros((80, 7))
+    e_orig[:60, :] = abil_paths
+    e_orig[60:, :] = 0.0
+
+    # 2) Forecast (with some art) the path of the final 20 years of
+    #    ability types. This following variable is what percentage of
+    #    ability at age 80 ability falls to at age 100. In general, we
+    #    wanted people to lose half of their ability over a 20-year
+    #    period. The first entry is 0.47, though, because nothing higher
+    #    would converge. The second-to-last is 0.7 because this group
+    #    actually has a slightly higher ability at age 80 than the last
+    #    group, so this value makes it decrease more so it ends up being
+    #    monotonic.
+    abil_deprec = np.array([0.47, 0.5, 0.5, 0.5, 0.5, 0.7, 0.5])
+    #     Initial guesses for the arctan. They're pretty sensitive.
+    init_guesses = \
+        np.array([[58, 0.0756438545595, -5.6940142786], [27, 0.069, -5],
+                 [35, .06, -5], [37, 0.339936555352, -33.5987329144],
+                 [70.5229181668, 0.0701993896947, -6.37746859905],
+                 [35, .06, -5], [35, .06, -5]])
+    for j in range(7):
+        e_orig[60:, j] = \
+            arctan_fit(e_orig[59, j], one[j], two[j], three[j],
+                       abil_deprec[j], init_guesses[j])
+    set_abil_memo('e_paths', e_orig.copy())
+
+    return e_orig
+
+
+def get_interp_wgts(S, abil_midp):
+    '''
+    --------------------------------------------------------------------
+    This function computes the weights with which get_e_interp()
+    linearly interpolates the 80 x 7 source matrix of abilities at the
+    S x J new age and ability percentile midpoints. Each new point is
+    located in a triangle of the Delaunay triangulation of the source
+    grid, and its value is the barycentric weighted average of the
+    values at the three vertices of that triangle, which is the same
+    interpolation as scipy.interpolate.griddata(method='linear'). The
+    triangulation of the source grid is computed once, and the vertices
+    and weights are memoized by S and abil_midp.
+    --------------------------------------------------------------------
+    INPUTS:
+    S         = integer >= 3, number of ages to interpolate
+    abil_midp = (J,) vector, midpoints of the percentile bins of the J
+                ability groups
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        spat.Delaunay()
+        set_abil_memo()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    wgts_key    = tuple, key of the vertices and weights in abil_memo
+    emat_j_midp = (7,) vector, midpoints of the percentile bins
+                  corresponding to J percentiles of emat
+    emat_s_midp = (80,) vector, midpoints of the age bins
+                  corresponding to 80 ages of emat
+    emat_j_mesh = (80,7) matrix, mesh with 7 original ability
+                  percentile midpoints along each column copied down
+                  80 rows
+    emat_s_mesh = (80,7) matrix, mesh with 80 original age midpoints
+                  down each row copied across 7 columns
+    newcoords   = (80*7, 2) matrix, age-ability type pairs for all the
+                  points in the grid of the original data
+    emat_tri    = Delaunay object, triangulation of newcoords
+    newstep     = scalar > 0, step size or size of each new age-period
+                  in years
+    new_s_midp  = (S,) vector, midpoints of the new age bins
+    new_j_mesh  = (S,J) matrix, mesh with J new ability percentile
+                  midpoints along each column copied down S rows
+    new_s_mesh  = (S,J) matrix, mesh with S new age midpoints down each
+                  row copied across J columns
+    new_pts     = (S*J, 2) matrix, age-ability type pairs of the new
+                  grid
+    simplex     = (S*J,) vector, index of the triangle containing each
+                  new point, -1 if outside the source grid
+    trans       = (S*J, 3, 2) array, affine transformations to the
+                  barycentric coordinates of each point's triangle
+    bary        = (S*J, 2) matrix, first two barycentric coordinates of
+                  each new point
+    vert        = (S*J, 3) matrix, flat indices in the source matrix of
+                  the vertices of each new point's triangle
+    wgts        = (S*J, 3) matrix, interpolation weights of the vertices,
+                  NaN for points outside the source grid
+
+    RETURNS: vert, wgts
+    --------------------------------------------------------------------
+    '''
+    wgts_key = ('interp_wgts', S, np.asarray(abil_midp, dtype=float)
+                .tobytes())
+    if wgts_key in abil_memo:
+        return abil_memo[wgts_key]
+
+    if 'emat_tri' not in abil_memo:
+        emat_j_midp = np.array([0.125, 0.375, 0.600, 0.750, 0.850,
+                                0.945, 0.995])
+        emat_s_midp = np.linspace(20.5, 99.5, 80)
+        emat_j_mesh, emat_s_mesh = np.meshgrid(emat_j_midp, emat_s_midp)
+        newcoords = np.hstack((emat_s_mesh.reshape((80 * 7, 1)),
+                              emat_j_mesh.reshape((80 * 7, 1))))
+        set_abil_memo('emat_tri', spat.Delaunay(newcoords))
+    emat_tri = abil_memo['emat_tri']
+    newstep = 80 / S
+    new_s_midp = np.linspace(20 + 0.5 * newstep, 100 - 0.5 * newstep, S)
+    new_j_mesh, new_s_mesh = np.meshgrid(abil_midp, new_s_midp)
+    new_pts = np.column_stack((new_s_mesh.ravel(), new_j_mesh.ravel()))
+    simplex = emat_tri.find_simplex(new_pts)
+    trans = emat_tri.transform[simplex]
+    bary = np.einsum('ijk,ik->ij', trans[:, :2, :],
+                     new_pts - trans[:, 2, :])
+    wgts = np.column_stack((bary, 1 - bary.sum(1)))
+    wgts[simplex < 0, :] = np.nan
+    vert = emat_tri.simplices[simplex]
+    set_abil_memo(wgts_key, (vert, wgts))
+
+    return vert, wgts
+
+
 def get_e_interp(S, age_wgts, age_wgts_80, abil_wgts, plot=False):
     '''
     --------------------------------------------------------------------
@@ -329,7 +572,9 @@ def get_e_interp(S, age_wgts, age_wgts_80, abil_wgts, plot=False):
     and 7 is the number of ability types in the source matrix, and
     interpolates new values of a new S x J sized matrix of abilities
     using linear interpolation. [NOTE: For this application, cubic
-    spline interpolation introduces too much curvature.]
+    spline interpolation introduces too much curvature.] The result is
+    memoized by its arguments, so only the first call with a given S,
+    age_wgts, age_wgts_80, and abil_wgts computes it unless plot=True.
     --------------------------------------------------------------------
     INPUTS:
     S           = integer >= 3, number of ages to interpolate. This
@@ -347,11 +592,14 @@ def get_e_interp(S, age_wgts, age_wgts_80, abil_wgts, plot=False):
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         get_e_orig()
+        get_interp_wgts()
         graph_income()
+        set_abil_memo()
 
     OBJECTS CREATED WITHIN FUNCTION:
     abil_wgts_orig  = (7,) vector, percent of population in each ability
                       category
+    emat_key        = tuple, key of the interpolated matrix in abil_memo
     emat_orig       = (80, 7) matrix, source data of lifetime earnings
                       profiles. The 80 ages range from 21 to 100, and
                       the J ability types represent income percentiles
@@ -364,30 +612,27 @@ def get_e_interp(S, age_wgts, age_wgts_80, abil_wgts, plot=False):
                       bin for particular ability group
     j               = integer >= 0, index of ability group
     err_msg         = string, error message
-    emat_j_midp     = (7,) vector, midpoints of the percentile bins
-                      corresponding to J percentiles of emat
-    emat_s_midp     = (80,) vector, midpoints of the age bins
-                      corresponding to 80 ages of emat
-    emat_j_mesh     = (80,7) matrix, mesh with 7 original ability
-                      percentile midpoints along each column copied down
-                      80 rows
-    emat_s_mesh     = (80,7) matrix, mesh with 80 original age midpoints
-                      down each row copied across 7 columns
+    vert            = (S*J, 3) matrix, flat indices in emat_orig of the
+                      vertices of the triangle of each new point
+    wgts            = (S*J, 3) matrix, interpolation weights of the
+                      vertices
+    emat_new        = (S, J) matrix, interpolated ability matrix
     newstep         = scalar > 0, step size or size of each new age-
                       period in years
-    new_j_mesh      = (S,J) matrix, mesh with J new ability percentile
-                      midpoints along each column copied down S rows
-    new_s_mesh      = (S,J) matrix, mesh with S new age midpoints down
-                      each row copied across J columns
-    newcoords       = (80*7, 2) matrix, age-ability type pairs for all
-                      the points in the grid of the original data
-    emat_new        = (S, J) matrix, interpolated ability matrix
+    new_s_midp      = (S,) vector, midpoints of the new age bins
     emat_new_scaled = (S, J) matrix interpolated ability matrix scaled
                       so that population-weighted average is 1
 
     RETURNS: emat_new_scaled
     --------------------------------------------------------------------
     '''
+    emat_key = ('e_interp', S,
+                np.asarray(age_wgts, dtype=float).tobytes(),
+                np.asarray(age_wgts_80, dtype=float).tobytes(),
+                np.asarray(abil_wgts, dtype=float).tobytes())
+    if (not plot) and (emat_key in abil_memo):
+        return abil_memo[emat_key].copy()
+
     # Get original 80 x 7 ability matrix
     abil_wgts_orig = np.array([0.25, 0.25, 0.2, 0.1, 0.1, 0.09, 0.01])
     emat_orig = get_e_orig(age_wgts_80, abil_wgts_orig, plot)
@@ -412,27 +657,21 @@ def get_e_interp(S, age_wgts, age_wgts_80, abil_wgts, plot=False):
                        'outside the allowable bounds.')
             raise RuntimeError(err_msg)
 
-        emat_j_midp = np.array([0.125, 0.375, 0.600, 0.750, 0.850,
-                                0.945, 0.995])
-        emat_s_midp = np.linspace(20.5, 99.5, 80)
-        emat_j_mesh, emat_s_mesh = np.meshgrid(emat_j_midp, emat_s_midp)
-        newstep = 80 / S
-        new_s_midp = np.linspace(20 + 0.5 * newstep,
-                                 100 - 0.5 * newstep, S)
-        new_j_mesh, new_s_mesh = np.meshgrid(abil_midp, new_s_midp)
-        newcoords = np.hstack((emat_s_mesh.reshape((80 * 7, 1)),
-                              emat_j_mesh.reshape((80 * 7, 1))))
-        emat_new = \
-            si.griddata(newcoords, emat_orig.flatten(),
-                        (new_s_mesh, new_j_mesh), method='linear')
+        vert, wgts = get_interp_wgts(S, abil_midp)
+        emat_new = ((emat_orig.ravel()[vert] * wgts).sum(1)
+                    .reshape((S, J)))
         emat_new_scaled = emat_new / (emat_new *
                                       age_wgts.reshape(S, 1) *
                                       abil_wgts.reshape(1, J)).sum()
 
         if plot:
+            newstep = 80 / S
+            new_s_midp = np.linspace(20 + 0.5 * newstep,
+                                     100 - 0.5 * newstep, S)
             kwargs = {'filesuffix': '_intrp_scaled'}
             graph_income(new_s_midp, abil_midp, abil_wgts,
                          emat_new_scaled, **kwargs)
+    set_abil_memo(emat_key, emat_new_scaled.copy())
 
     return emat_new_scaled
 
@@ -464,32 +703,13 @@ def get_e_orig(age_wgts, abil_wgts, plot=False):
     plot         = Boolean, =True generates 3D plots of ability paths
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
-        arc_tan_fit()
+        get_e_paths()
         graph_income()
 
     OBJECTS CREATED WITHIN FUNCTION:
     err            = string, error message
-    one            = (7,) vector, coefficients on linear term in log
-                     ability equation for each ability group
-    two            = (7,) vector, coefficients on quadratic term in log
-                     ability equation for each ability group
-    three          = (7,) vector, coefficients on cubic term in log
-                     ability equation for each ability group
-    const          = (7,) vector, constants in log ability equation for
-                     each ability group
-    ages_short     = (60, 7) matrix, matrix of ages where the column
-                     vector of ages 21 to 80 is copied across 7 columns
-    log_abil_paths = (60, 7) matrix, predicted log ability paths based
-                     on age (21 to 80) and 7 lifetime ability groups
-    abil_paths     = (60, 7) matrix, predicted level of ability paths
-                     based on age (21 to 80) and 7 ability groups
-    e_orig         = (80, 7) matrix, lifetime ability profiles
-    abil_deprec    = (7,) vector, proportion that we assume ability
-                     depreciates between age 80 and age 100
-    init_guesses   = (7, 3) matrix, initial guesses for 3 parameters of
-                     the arctan functional fit for extrapolating the
-                     last 20 years of lifetime abilities in each group
-    j              = integer >= 1, index of ability group
+    e_orig         = (80, 7) matrix, lifetime ability profiles from
+                     get_e_paths()
     e_orig_scaled  = (80, 7) matrix, lifetime ability profiles scaled so
                      that population-weighted average is 1
     ages_long      = (80) vector, one-year ages from 21 to 100
@@ -510,46 +730,9 @@ def get_e_orig(age_wgts, abil_wgts, plot=False):
         err_msg = 'Vector abil_wgts does not have 7 elements.'
         raise RuntimeError(err_msg)
 
-    # 1) Generate polynomials and use them to get income profiles for
-    #    ages 21 to 80.
-    one = np.array([-0.09720122, 0.05995294, 0.17654618,
-                    0.21168263, 0.21638731, 0.04500235, 0.09229392])
-    two = np.array([0.00247639, -0.00004086, -0.00240656, -
-                    0.00306555, -0.00321041, 0.00094253, 0.00012902])
-    three = np.array([-0.00001842, -0.00000521, 0.00001039,
-                      0.00001438, 0.00001579, -0.00001470, -0.00001169])
-    const = np.array([3.41e+00, 0.69689692, -0.78761958, -1.11e+00,
-                      -0.93939272, 1.60e+00, 1.89e+00])
-    ages_short = np.tile(np.linspace(21, 80, 60).reshape((60, 1)),
-                         (1, 7))
-    log_abil_paths = (const + (one * ages_short) +
-                      (two * (ages_short ** 2)) +
-                      (three * (ages_short ** 3)))
-    abil_paths = np.exp(log_abil_paths)
-    e_orig = np.zeros((80, 7))
-    e_orig[:60, :] = abil_paths
-    e_orig[60:, :] = 0.0
-
-    # 2) Forecast (with some art) the path of the final 20 years of
-    #    ability types. This following variable is what percentage of
-    #    ability at age 80 ability falls to at age 100. In general, we
-    #    wanted people to lose half of their ability over a 20-year
-    #    period. The first entry is 0.47, though, because nothing higher
-    #    would converge. The second-to-last is 0.7 because this group
-    #    actually has a slightly higher ability at age 80 than the last
-    #    group, so this value makes it decrease more so it ends up being
-    #    monotonic.
-    abil_deprec = np.array([0.47, 0.5, 0.5, 0.5, 0.5, 0.7, 0.5])
-    #     Initial guesses for the arctan. They're pretty sensitive.
-    init_guesses = \
-        np.array([[58, 0.0756438545595, -5.6940142786], [27, 0.069, -5],
-                 [35, .06, -5], [37, 0.339936555352, -33.5987329144],
-                 [70.5229181668, 0.0701993896947, -6.37746859905],
-                 [35, .06, -5], [35, .06, -5]])
-    for j in range(7):
-        e_orig[60:, j] = \
-            arctan_fit(e_orig[59, j], one[j], two[j], three[j],
-                       abil_deprec[j], init_guesses[j])
+    # 1) and 2) Get the income profiles for ages 21 to 80 from the
+    #    polynomials and forecast the final 20 years with arctan fits
+    e_orig = get_e_paths()
 
     # 3) Rescale the lifetime earnings path matrix so that the
     #    population weighted average equals 1.
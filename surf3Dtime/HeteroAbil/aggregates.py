@@ -8,6 +8,7 @@ from Chapter 7 of the OG textbook.
 This Python module imports the following module(s): None
 
 This Python module defines the following function(s):
+    get_aggr_sum()
     get_L()
     get_K()
     get_Y()
@@ -24,7 +25,42 @@ import numpy as np
 '''
 
 
-def get_L(narr, emat, lambdas):
+def get_aggr_sum(arr, wgts, out=None):
+    '''
+    --------------------------------------------------------------------
+    Compute the weighted sum over ages and ability types of a steady-
+    state distribution or of each period of a time path distribution,
+    sum_{s,j} wgts_{s,j} * arr_{j,s,t}, as one contraction that
+    broadcasts the (S, J) weights across the time periods instead of
+    copying them into an (S, J, T) array
+    --------------------------------------------------------------------
+    INPUTS:
+    arr  = (S, J) matrix or (S, J, T) array, steady-state distribution
+           or time path of a distribution
+    wgts = (S, J) matrix, weight of each age and ability type
+    out  = None or (T,) vector, array in which the time path sums are
+           stored if arr is (S, J, T)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    X = scalar or (T,) vector, weighted sum of arr over ages and
+        ability types
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: X
+    --------------------------------------------------------------------
+    '''
+    if arr.ndim == 2:
+        X = np.einsum('sj,sj->', arr, wgts)
+    else:
+        X = np.einsum('sjt,sj->t', arr, wgts, out=out)
+
+    return X
+
+
+def get_L(narr, emat, lambdas, out=None):
     '''
     --------------------------------------------------------------------
     Solve for steady-state aggregate labor L or time path of aggregate
@@ -50,25 +86,21 @@ def get_L(narr, emat, lambdas):
               distribution of labor supply (n_{j,s,t})
     emat    = (S, J) matrix, e_{j,s} ability by age and ability type
     lambdas = (J,) vector, income percentiles for ability types
+    out     = None or (T+S-1,) vector, array in which the time path of
+              aggregate labor is stored if narr is (S, J, T+S-1)
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_aggr_sum()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    epsilon    = scalar > 0, small value at which stitch f(X) function
-    a          = scalar > 0, multiplicative factor in f(X) = a*exp(b*X)
-    b          = scalar, multiplicative factor in exponent of
-                 f(X) = a*exp(b*X)
-    S          = integer >= 3, number of periods in individual life
-    Tpers      = integer > 3, number of time periods in the time path
-    J          = integer >= 1, number of ability types
-    emat_arr   = (S, J, T+S-1) array, ability matrix copied across T+S-1
-                 time periods
-    lambda_mat = (S, J) matrix, lambdas vector copied down S rows
-    lambda_arr = (S, J, T+S-1) array, lambda_mat matrix copied across
-                   T+S-1 time periods
-    L          = scalar > 0, aggregate labor
-    L_cstr     = boolean or (T+S-1) boolean vector, =True if L < eps or
-                 if L_t < eps
+    epsilon = scalar > 0, small value at which stitch f(X) function
+    a       = scalar > 0, multiplicative factor in f(X) = a*exp(b*X)
+    b       = scalar, multiplicative factor in exponent of
+              f(X) = a*exp(b*X)
+    L       = scalar > 0 or (T+S-1,) vector, aggregate labor or time
+              path of aggregate labor
+    L_cstr  = boolean or (T+S-1) boolean vector, =True if L < eps or
+              if L_t < eps
 
     FILES CREATED BY THIS FUNCTION: None
 
@@ -78,10 +110,8 @@ def get_L(narr, emat, lambdas):
     epsilon = 0.1
     a = epsilon / np.exp(1)
     b = 1 / epsilon
-    S = narr.shape[0]
+    L = get_aggr_sum(narr, emat * lambdas, out)
     if narr.ndim == 2:  # This is the steady-state case
-        lambda_mat = np.tile(lambdas, (S, 1))
-        L = (narr * emat * lambda_mat).sum()
         L_cstr = L < epsilon
         if L_cstr:
             print('get_L() warning: distribution of labor supply ' +
@@ -89,12 +119,6 @@ def get_L(narr, emat, lambdas):
             # Force L >= eps by stitching a * exp(b * L) for L < eps
             L = a * np.exp(b * L)
     elif narr.ndim == 3:  # This is the time path case
-        Tpers = narr.shape[2]
-        J = lambdas.shape[0]
-        emat_arr = np.tile(np.reshape(emat, (S, J, 1)), (1, 1, Tpers))
-        lambda_arr = np.tile(np.reshape(lambdas, (1, J, 1)),
-                             (S, 1, Tpers))
-        L = ((narr * emat_arr * lambda_arr).sum(0)).sum(0)
         L_cstr = L < epsilon
         if L.min() < epsilon:
             print('Aggregate labor constraint is violated ' +
@@ -104,7 +128,7 @@ def get_L(narr, emat, lambdas):
     return L
 
 
-def get_K(barr, lambdas):
+def get_K(barr, lambdas, out=None):
     '''
     --------------------------------------------------------------------
     Solve for steady-state aggregate capital stock K or time path of
@@ -129,8 +153,12 @@ def get_K(barr, lambdas):
               of savings (b_{j,s,t})
     lambdas = (J,) vector, income percentiles for distribution of
                 ability within each cohort
+    out     = None or (T+S-1,) vector, array in which the time path of
+              the aggregate capital stock is stored if barr is
+              (S, J, T+S-1)
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_aggr_sum()
 
     OBJECTS CREATED WITHIN FUNCTION:
     epsilon    = scalar > 0, small value at which stitch f(X) function
@@ -138,11 +166,7 @@ def get_K(barr, lambdas):
     b          = scalar, multiplicative factor in exponent of
                  f(X) = a*exp(b*X)
     S          = integer >= 3, number of periods in individual life
-    Tpers      = integer > 3, number of time periods in the time path
-    J          = integer >= 1, number of ability types
     lambda_mat = (S, J) matrix, lambdas vector copied down S rows
-    lambda_arr = (S, J, T+S-1) array, lambda_mat matrix copied across
-                 T+S-1 time periods
     K          = scalar or (T+S-1,) vector, steady-state aggregate
                  capital stock or time path of aggregate capital stock
     K_cstr     = boolean or (T+S-1) boolean vector, =True if K < eps or
@@ -157,9 +181,9 @@ def get_K(barr, lambdas):
     a = epsilon / np.exp(1)
     b = 1 / epsilon
     S = barr.shape[0]
+    lambda_mat = np.tile(lambdas, (S, 1))
+    K = get_aggr_sum(barr, lambda_mat, out)
     if barr.ndim == 2:  # This is the steady-state case
-        lambda_mat = np.tile(lambdas, (S, 1))
-        K = (barr * lambda_mat).sum()
         K_cstr = K < epsilon
         if K_cstr:
             print('get_K() warning: distribution of savings and/or ' +
@@ -168,11 +192,6 @@ def get_K(barr, lambdas):
             K = a * np.exp(b * K)
 
     elif barr.ndim == 3:  # This is the time path case
-        Tpers = barr.shape[2]
-        J = lambdas.shape[0]
-        lambda_arr = np.tile(np.reshape(lambdas, (1, J, 1)),
-                             (S, 1, Tpers))
-        K = ((barr * lambda_arr).sum(0)).sum(0)
         K_cstr = K < epsilon
         if K.min() < epsilon:
             print('Aggregate capital constraint is violated ' +
@@ -215,7 +234,7 @@ def get_Y(params, K, L):
     return Y
 
 
-def get_C(carr, lambdas):
+def get_C(carr, lambdas, out=None):
     '''
     --------------------------------------------------------------------
     Solve for steady-state aggregate consumption C or time path of
@@ -227,16 +246,15 @@ def get_C(carr, lambdas):
               distribution of consumption c_{j,s,t}
     lambdas = (J,) vector, income percentiles for distribution of
                ability within each cohort
+    out     = None or (T,) vector, array in which the time path of
+              aggregate consumption is stored if carr is (S, J, T)
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_aggr_sum()
 
     OBJECTS CREATED WITHIN FUNCTION:
     S          = integer >= 3, number of periods in individual life
-    Tpers      = integer > 3, number of time periods in the time path
-    J          = integer >= 1, number of ability types
     lambda_mat = (S, J) matrix, lambdas vector copied down S rows
-    lambda_arr = (S, J, T+S-1) array, lambda_mat matrix copied across
-                 T+S-1 time periods
     C          = scalar > 0 or (T,) vector, aggregate consumption or
                  time path of aggregate consumption
 
@@ -244,14 +262,7 @@ def get_C(carr, lambdas):
     --------------------------------------------------------------------
     '''
     S = carr.shape[0]
-    if carr.ndim == 2:  # This is the steady-state case
-        lambda_mat = np.tile(lambdas, (S, 1))
-        C = (carr * lambda_mat).sum()
-    elif carr.ndim == 3:  # This is the time path case
-        Tpers = carr.shape[2]
-        J = lambdas.shape[0]
-        lambda_arr = np.tile(np.reshape(lambdas, (1, J, 1)),
-                             (S, 1, Tpers))
-        C = ((carr * lambda_arr).sum(0)).sum(0)
+    lambda_mat = np.tile(lambdas, (S, 1))
+    C = get_aggr_sum(carr, lambda_mat, out)
 
     return C
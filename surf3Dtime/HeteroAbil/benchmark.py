@@ -0,0 +1,575 @@
+'''
+------------------------------------------------------------------------
+This program times the household, firm, and aggregate kernels and the
+end-to-end steady-state and time path iteration (TPI) solutions of the
+model with S-period lived agents, endogenous labor, and heterogeneous
+abilities for the S=20, J=4 configuration of execute.py and the S=80,
+J=7 configuration of s80j7/execute.py. The timings are saved in a JSON
+file and compared against a stored baseline file. A benchmark whose
+best time is more than threshold slower than its baseline is reported
+as a regression, and the script exits with status 1 if there is any.
+
+    <bench_dir>/bench.json = dictionary with keys
+        'meta'    = dictionary, Python, NumPy, and kernel backend
+                    versions, platform, and date of the run
+        'results' = dictionary, for each configuration name a
+                    dictionary of the timing statistics of each
+                    benchmark {'best', 'median', 'mean', 'number',
+                    'repeat'}, all times in seconds per call
+
+Rename or copy bench.json to bench_baseline.json (or set
+save_baseline=True) to make the current timings the baseline.
+
+This Python script imports the following module(s):
+    households.py
+    aggregates.py
+    firms.py
+    ability.py
+    elliputil.py
+    kernels.py
+    SS.py
+    TPI.py
+    parameters.py
+
+This Python script defines the following function(s):
+    get_bench_configs()
+    time_call()
+    get_e_interp_cold()
+    get_kernel_benches()
+    run_bench()
+    save_bench()
+    load_bench()
+    compare_bench()
+
+Files created by this script:
+    OUTPUT/BENCH/bench.json
+    OUTPUT/BENCH/bench_baseline.json (if save_baseline=True or it does
+        not exist yet)
+------------------------------------------------------------------------
+'''
+# Import packages
+import os
+import sys
+import io
+import json
+import time
+import platform
+import contextlib
+import numpy as np
+import households as hh
+import aggregates as aggr
+import firms
+import ability as abil
+import elliputil as elp
+import kernels
+import SS as ss
+import TPI as tpi
+import parameters as prm
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_bench_configs():
+    '''
+    --------------------------------------------------------------------
+    Return the primitive parameter overrides of the benchmarked model
+    configurations
+    --------------------------------------------------------------------
+    INPUTS: None
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    configs = dictionary, primitive parameter overrides of each
+              configuration by name. 's20j4' is the model of execute.py
+              and 's80j7' is the model of s80j7/execute.py
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: configs
+    --------------------------------------------------------------------
+    '''
+    configs = {
+        's20j4': {},
+        's80j7': {'S': 80,
+                  'lambdas': np.array([0.25, 0.25, 0.2, 0.1, 0.1, 0.09,
+                                       0.01]),
+                  'init_wgt': 0.90}}
+
+    return configs
+
+
+def time_call(func, args, repeat=5, min_time=0.2):
+    '''
+    --------------------------------------------------------------------
+    Time func(*args). The number of calls in each repeat is doubled
+    until one repeat takes at least min_time seconds, and the repeats
+    are timed with the printed output of func suppressed
+    --------------------------------------------------------------------
+    INPUTS:
+    func     = function, function to time
+    args     = tuple, arguments of func
+    repeat   = integer >= 1, number of timed repeats
+    min_time = scalar >= 0, minimum time in seconds of one repeat. If
+               min_time=0, each repeat is a single call
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        func()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    number     = integer >= 1, number of calls in each repeat
+    sink       = StringIO object, receives the printed output of func
+    rep_time   = scalar >= 0, time of one repeat in seconds
+    rep_start  = scalar, time at the start of a repeat
+    call_times = (repeat,) vector, time per call of each repeat
+    stats      = dictionary, {'best', 'median', 'mean', 'number',
+                 'repeat'}, timing statistics in seconds per call
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: stats
+    --------------------------------------------------------------------
+    '''
+    number = 1
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        while True:
+            rep_start = time.perf_counter()
+            for _ in range(number):
+                func(*args)
+            rep_time = time.perf_counter() - rep_start
+            sink.seek(0)
+            sink.truncate()
+            if rep_time >= min_time:
+                break
+            number *= 2
+        call_times = np.zeros(repeat)
+        call_times[0] = rep_time / number
+        for rep in range(1, repeat):
+            rep_start = time.perf_counter()
+            for _ in range(number):
+                func(*args)
+            call_times[rep] = (time.perf_counter() - rep_start) / number
+            sink.seek(0)
+            sink.truncate()
+    stats = {'best': call_times.min(), 'median': np.median(call_times),
+             'mean': call_times.mean(), 'number': number,
+             'repeat': repeat}
+
+    return stats
+
+
+def get_e_interp_cold(S, age_wgts, age_wgts_80, abil_wgts, plot=False):
+    '''
+    --------------------------------------------------------------------
+    Clear the memoized ability results and call abil.get_e_interp(), so
+    that the benchmark times the arctan fits and the interpolation
+    instead of a lookup in abil.abil_memo
+    --------------------------------------------------------------------
+    INPUTS:
+    S           = integer in [3,80], number of periods an individual
+                  lives
+    age_wgts    = (S,) vector, population distribution by model age
+    age_wgts_80 = (80,) vector, data population distribution by age
+    abil_wgts   = (J,) vector, income percentiles of ability types
+    plot        = boolean, =True if want graphs of the ability matrix
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        abil.clear_abil_memo()
+        abil.get_e_interp()
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: (S, J) matrix from abil.get_e_interp()
+    --------------------------------------------------------------------
+    '''
+    abil.clear_abil_memo()
+
+    return abil.get_e_interp(S, age_wgts, age_wgts_80, abil_wgts, plot)
+
+
+def get_kernel_benches(params, ss_output):
+    '''
+    --------------------------------------------------------------------
+    Build the kernel benchmarks of one model configuration. The inputs
+    of the kernels are taken from the steady-state solution, and the
+    aggregate kernels are timed on (S, J, T2) arrays of the size of
+    the time paths of TPI. abil.get_e_interp() is timed both without
+    (cold) and with ('[memo]') its memoized results
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = dictionary, model parameters from prm.get_params()
+    ss_output = dictionary, steady-state solution from ss.get_SS_bsct()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_e_interp_cold()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    S            = integer in [3,80], number of periods an individual
+                   lives
+    T2           = integer > T1, number of time periods after which
+                   steady-state is forced in TPI
+    emat         = (S, J) matrix, e_{j,s} ability by age and income
+                   group
+    lambdas      = (J,) vector, income percentiles for distribution of
+                   ability within each cohort
+    rpath        = (S,) vector, lifetime path of interest rates
+    wpath        = (S,) vector, lifetime path of wages
+    c1           = scalar > 0, steady-state c1 of the top ability group
+    cnb_args     = length 9 tuple, args to pass into hh.get_cnb_vecs()
+    c1_args      = length 12 tuple, args to pass into hh.c1_bSp1err()
+    carr         = (S, J, T2) array, steady-state consumption in every
+                   period
+    narr         = (S, J, T2) array, steady-state labor supply in every
+                   period
+    barr         = (S, J, T2) array, steady-state savings in every
+                   period
+    Kpath        = (T2,) vector, steady-state aggregate capital stock in
+                   every period
+    Lpath        = (T2,) vector, steady-state aggregate labor in every
+                   period
+    mod_age_dist = (S,) vector, population distribution by model age
+    dat_age_dist = (80,) vector, data population distribution by age
+    ellip_init   = (2,) vector, initial guesses for b and upsilon
+    cfe_params   = (2,) vector, values for (Frisch, CFE_scale)
+    benches      = list, (name, func, args) of each kernel benchmark
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: benches
+    --------------------------------------------------------------------
+    '''
+    S = params['S']
+    T2 = params['T2']
+    emat = params['emat']
+    lambdas = params['lambdas']
+    rpath = ss_output['r_ss'] * np.ones(S)
+    wpath = ss_output['w_ss'] * np.ones(S)
+    c1 = ss_output['c_ss'][0, -1]
+    cnb_args = (0.0, emat[:, -1], params['beta'], params['sigma'],
+                params['l_tilde'], params['b_ellip'], params['upsilon'],
+                params['chi_n_vec'], params['SS_EulDiff'])
+    carr = np.repeat(ss_output['c_ss'][:, :, np.newaxis], T2, axis=2)
+    narr = np.repeat(ss_output['n_ss'][:, :, np.newaxis], T2, axis=2)
+    barr = np.repeat(ss_output['b_ss'][:, :, np.newaxis], T2, axis=2)
+    Kpath = ss_output['K_ss'] * np.ones(T2)
+    Lpath = ss_output['L_ss'] * np.ones(T2)
+    mod_age_dist = (1 / S) * np.ones(S)
+    dat_age_dist = ((1 / (params['end_age'] - params['start_age'] + 1)) *
+                    np.ones(params['end_age'] - params['start_age'] + 1))
+    ellip_init = np.array([1.0, 2.0])
+    cfe_params = np.array([params['Frisch_elast'], params['CFE_scale']])
+    benches = []
+    for n_method in ['root', 'closed', 'brent']:
+        c1_args = (0.0, emat[:, -1], params['beta'], params['sigma'],
+                   params['l_tilde'], params['b_ellip'],
+                   params['upsilon'], params['chi_n_vec'], rpath, wpath,
+                   params['SS_EulDiff'], n_method)
+        benches.append(('hh.get_cnb_vecs[' + n_method + ']',
+                        hh.get_cnb_vecs,
+                        (c1, rpath, wpath, cnb_args, n_method)))
+        benches.append(('hh.c1_bSp1err[' + n_method + ']',
+                        hh.c1_bSp1err, (c1,) + c1_args))
+    benches += [
+        ('aggr.get_K', aggr.get_K, (barr, lambdas)),
+        ('aggr.get_L', aggr.get_L, (narr, emat, lambdas)),
+        ('aggr.get_C', aggr.get_C, (carr, lambdas)),
+        ('firms.get_r', firms.get_r,
+         ((params['A'], params['alpha'], params['delta']), Kpath,
+          Lpath)),
+        ('firms.get_w', firms.get_w,
+         ((params['A'], params['alpha']), Kpath, Lpath)),
+        ('abil.get_e_interp', get_e_interp_cold,
+         (S, mod_age_dist, dat_age_dist, lambdas, False)),
+        ('abil.get_e_interp[memo]', abil.get_e_interp,
+         (S, mod_age_dist, dat_age_dist, lambdas, False)),
+        ('elp.fit_ellip_CFE', elp.fit_ellip_CFE,
+         (ellip_init, cfe_params, params['l_tilde'], False))]
+
+    return benches
+
+
+def run_bench(configs, opts):
+    '''
+    --------------------------------------------------------------------
+    Run the kernel and end-to-end benchmarks of each model
+    configuration. The end-to-end benchmarks solve the steady state with
+    ss.get_SS_bsct() and the transition path with tpi.get_TPI() without
+    the solution cache and without graphs
+    --------------------------------------------------------------------
+    INPUTS:
+    configs = dictionary, primitive parameter overrides of each
+              configuration by name, from get_bench_configs()
+    opts    = length 7 tuple, (repeat, min_time, e2e_repeat, solve_TPI,
+              n_method, hh_batch, hh_root)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        prm.get_params()
+        prm.get_tpi_params()
+        time_call()
+        ss.get_SS_bsct()
+        tpi.get_TPI()
+        get_kernel_benches()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    repeat     = integer >= 1, number of timed repeats of each kernel
+    min_time   = scalar >= 0, minimum time in seconds of one repeat of
+                 a kernel
+    e2e_repeat = integer >= 1, number of timed end-to-end solutions
+    solve_TPI  = boolean, =True if benchmark tpi.get_TPI()
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 household solution method of the end-to-end solutions
+    hh_batch   = boolean, =True if solve the household problems in
+                 batches in the end-to-end solutions
+    hh_root    = string, 'illinois', 'brent', or 'newton', vectorized
+                 root finder used if hh_batch=True
+    bench      = dictionary, {'meta', 'results'}
+    name       = string, name of model configuration
+    params     = dictionary, model parameters of the configuration
+    init_vals  = length 3 tuple, initial guesses of K_ss, L_ss, and c1
+    ss_args    = length 8 tuple, args to pass into ss.get_SS_bsct()
+    sink       = StringIO object, receives the printed solver output
+    ss_output  = dictionary, steady-state solution
+    tpi_params = length 23 tuple, args to pass into tpi.get_TPI()
+    bmat1      = (S, J) matrix, initial period savings distribution
+    tpi_args   = length 12 tuple, args to pass into tpi.get_TPI()
+    results    = dictionary, timing statistics of each benchmark of the
+                 configuration
+    bench_name = string, name of kernel benchmark
+    func       = function, kernel
+    args       = tuple, arguments of the kernel
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: bench
+    --------------------------------------------------------------------
+    '''
+    (repeat, min_time, e2e_repeat, solve_TPI, n_method, hh_batch,
+        hh_root) = opts
+    bench = {'meta': {'python': platform.python_version(),
+                      'numpy': np.__version__,
+                      'kernels': kernels.BACKEND,
+                      'platform': platform.platform(),
+                      'date': time.strftime('%Y-%m-%d %H:%M:%S')},
+             'results': {}}
+    for name in configs:
+        print('Benchmarking configuration ' + name + '.')
+        params = prm.get_params(configs[name])
+        init_vals = (3.0, 5.0, 0.03)
+        ss_args = (init_vals, params['ss_args'], False, n_method,
+                   hh_batch, None, False, hh_root)
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink):
+            ss_output = ss.get_SS_bsct(*ss_args)
+        results = {}
+        results['ss.get_SS_bsct'] = time_call(ss.get_SS_bsct, ss_args,
+                                              e2e_repeat, 0.0)
+        if solve_TPI:
+            tpi_params, bmat1 = prm.get_tpi_params(params, ss_output)
+            tpi_args = (tpi_params, bmat1, False, n_method, 1,
+                        'anderson', 5, None, False, hh_batch, hh_root,
+                        None)
+            results['tpi.get_TPI'] = time_call(tpi.get_TPI, tpi_args,
+                                               e2e_repeat, 0.0)
+        for bench_name, func, args in get_kernel_benches(params,
+                                                         ss_output):
+            results[bench_name] = time_call(func, args, repeat,
+                                            min_time)
+        for bench_name in results:
+            print('    %-28s %12.4e sec' %
+                  (bench_name, results[bench_name]['best']))
+        bench['results'][name] = results
+
+    return bench
+
+
+def save_bench(bench_path, bench):
+    '''
+    --------------------------------------------------------------------
+    Save benchmark timings in a JSON file. The file is written to a
+    temporary name and renamed so that an interrupted write never
+    leaves a partial file
+    --------------------------------------------------------------------
+    INPUTS:
+    bench_path = string, path of JSON file
+    bench      = dictionary, benchmark timings from run_bench()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    bench_dir = string, folder of bench_path
+    tmp_path  = string, temporary path of JSON file
+    name      = string, name of model configuration
+    results   = dictionary, timing statistics of each benchmark of a
+                configuration as Python floats
+
+    FILES CREATED BY THIS FUNCTION:
+        bench_path
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    bench_dir = os.path.dirname(bench_path)
+    if bench_dir and not os.access(bench_dir, os.F_OK):
+        os.makedirs(bench_dir)
+    results = {}
+    for name in bench['results']:
+        results[name] = {
+            bench_name: {stat: float(value) for stat, value in
+                         bench['results'][name][bench_name].items()}
+            for bench_name in bench['results'][name]}
+    tmp_path = bench_path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'w') as bench_file:
+        json.dump({'meta': bench['meta'], 'results': results},
+                  bench_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, bench_path)
+
+
+def load_bench(bench_path):
+    '''
+    --------------------------------------------------------------------
+    Load benchmark timings saved by save_bench()
+    --------------------------------------------------------------------
+    INPUTS:
+    bench_path = string, path of JSON file
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    bench = dictionary, benchmark timings {'meta', 'results'}, None if
+            bench_path does not exist
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: bench
+    --------------------------------------------------------------------
+    '''
+    if not os.path.exists(bench_path):
+        return None
+    with open(bench_path, 'r') as bench_file:
+        bench = json.load(bench_file)
+
+    return bench
+
+
+def compare_bench(bench, baseline, threshold=0.1):
+    '''
+    --------------------------------------------------------------------
+    Compare the best time of each benchmark with its baseline and print
+    the ratios. Benchmarks that are not in both runs are skipped
+    --------------------------------------------------------------------
+    INPUTS:
+    bench     = dictionary, benchmark timings from run_bench() or
+                load_bench()
+    baseline  = dictionary, baseline benchmark timings from
+                load_bench()
+    threshold = scalar >= 0, relative slowdown above which a benchmark
+                is a regression. threshold=0.1 flags benchmarks more
+                than 10 percent slower than the baseline
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    regressions = list, (name, bench_name, best, base_best, ratio) of
+                  each regression
+    name        = string, name of model configuration
+    bench_name  = string, name of benchmark
+    best        = scalar > 0, best time per call in bench
+    base_best   = scalar > 0, best time per call in baseline
+    ratio       = scalar > 0, best / base_best
+    flag        = string, 'REGRESSION' if ratio > 1 + threshold
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: regressions
+    --------------------------------------------------------------------
+    '''
+    regressions = []
+    for name in bench['results']:
+        if name not in baseline['results']:
+            continue
+        for bench_name in bench['results'][name]:
+            if bench_name not in baseline['results'][name]:
+                continue
+            best = bench['results'][name][bench_name]['best']
+            base_best = baseline['results'][name][bench_name]['best']
+            ratio = best / base_best
+            if ratio > 1 + threshold:
+                flag = 'REGRESSION'
+                regressions.append((name, bench_name, best, base_best,
+                                    ratio))
+            else:
+                flag = ''
+            print('%-6s %-28s %12.4e %12.4e %7.3f %s' %
+                  (name, bench_name, best, base_best, ratio, flag))
+
+    return regressions
+
+
+'''
+------------------------------------------------------------------------
+Run the benchmarks and compare them with the baseline
+------------------------------------------------------------------------
+configs       = dictionary, primitive parameter overrides of each
+                benchmarked configuration
+repeat        = integer >= 1, number of timed repeats of each kernel
+min_time      = scalar > 0, minimum time in seconds of one repeat of a
+                kernel
+e2e_repeat    = integer >= 1, number of timed end-to-end solutions
+solve_TPI     = boolean, =True if benchmark the TPI solution
+n_method      = string, 'root', 'closed', 'brent', or 'stacked',
+                household solution method of the end-to-end solutions
+hh_batch      = boolean, =True if solve the household problems in
+                batches in the end-to-end solutions
+hh_root       = string, 'illinois', 'brent', or 'newton', vectorized
+                root finder used if hh_batch=True
+threshold     = scalar >= 0, relative slowdown above which a benchmark
+                is a regression
+save_baseline = boolean, =True if save this run as the baseline
+cur_path      = string, path name of current directory
+bench_dir     = string, total path of benchmark folder
+bench_path    = string, path of JSON file of this run
+base_path     = string, path of JSON file of the baseline
+bench_opts    = length 7 tuple, options passed to run_bench()
+bench         = dictionary, benchmark timings of this run
+baseline      = dictionary or None, baseline benchmark timings
+regressions   = list, regressions from compare_bench()
+------------------------------------------------------------------------
+'''
+if __name__ == '__main__':
+    configs = get_bench_configs()
+    repeat = 5
+    min_time = 0.2
+    e2e_repeat = 3
+    solve_TPI = True
+    n_method = 'closed'
+    hh_batch = True
+    hh_root = 'brent'
+    threshold = 0.1
+    save_baseline = False
+    cur_path = os.path.split(os.path.abspath(__file__))[0]
+    bench_dir = os.path.join(cur_path, 'OUTPUT/BENCH')
+    bench_path = os.path.join(bench_dir, 'bench.json')
+    base_path = os.path.join(bench_dir, 'bench_baseline.json')
+    bench_opts = (repeat, min_time, e2e_repeat, solve_TPI, n_method,
+                  hh_batch, hh_root)
+    bench = run_bench(configs, bench_opts)
+    save_bench(bench_path, bench)
+    baseline = load_bench(base_path)
+    if save_baseline or (baseline is None):
+        save_bench(base_path, bench)
+        print('Saved benchmark baseline ' + base_path + '.')
+    else:
+        regressions = compare_bench(load_bench(bench_path), baseline,
+                                    threshold)
+        if regressions:
+            print(str(len(regressions)) + ' benchmark(s) slower than ' +
+                  'the baseline by more than ' +
+                  '%.0f' % (100 * threshold) + ' percent.')
+            sys.exit(1)
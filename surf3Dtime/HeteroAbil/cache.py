@@ -0,0 +1,334 @@
+'''
+------------------------------------------------------------------------
+This module contains the functions that store and retrieve steady-state
+and transition path solutions in a content-addressed cache directory.
+Each solution is saved as a pair of pickle files named by the kind of
+solution ('SS' or 'TPI') and a digest key of its argument tuple and of
+the solver options that change the stored solution, such as the
+household solution method and root finder (see SS.get_SS_key(),
+TPI.get_TPI(), and jacobian.get_jac_key()):
+
+    <cache_dir>/<kind>_<key>_vars.pkl = solution output dictionary
+    <cache_dir>/<kind>_<key>_args.pkl = argument tuple of the solution
+
+so that many parameterizations can be cached side by side. The
+modification time of a _vars.pkl file is updated every time it is
+retrieved, and the least recently used solutions are evicted when the
+cache exceeds its maximum number of entries or total size.
+
+The function get_nearest_entry() searches the argument files of the
+cache for the solution whose parameters are closest to a new set of
+parameters, which can be used as a starting guess for the new solution.
+
+This Python module imports the following module(s): None
+
+This Python module defines the following function(s):
+    get_cache_paths()
+    get_cache_entries()
+    load_cache()
+    save_cache()
+    evict_cache()
+    get_nearest_entry()
+------------------------------------------------------------------------
+'''
+# Import packages
+import os
+import pickle
+import numpy as np
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_cache_paths(cache_dir, kind, key):
+    '''
+    --------------------------------------------------------------------
+    Return the paths of the output and argument files of a cache entry
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir = string, path of cache directory
+    kind      = string, kind of solution, 'SS' or 'TPI'
+    key       = string, digest key of the solution
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    vars_path = string, path of pickled output dictionary
+    args_path = string, path of pickled argument tuple
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: vars_path, args_path
+    --------------------------------------------------------------------
+    '''
+    vars_path = os.path.join(cache_dir, kind + '_' + key + '_vars.pkl')
+    args_path = os.path.join(cache_dir, kind + '_' + key + '_args.pkl')
+
+    return vars_path, args_path
+
+
+def get_cache_entries(cache_dir, kind=None):
+    '''
+    --------------------------------------------------------------------
+    List the entries in the cache directory, ordered from least recently
+    used to most recently used
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir = string, path of cache directory
+    kind      = None or string, if not None only list entries of this
+                kind
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cache_paths()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    entries    = list, (atime, nbytes, kind, key) tuple for each entry
+    fname      = string, name of file in cache directory
+    entry_kind = string, kind of solution of the entry
+    key        = string, digest key of the entry
+    vars_path  = string, path of pickled output dictionary
+    args_path  = string, path of pickled argument tuple
+    atime      = scalar, time the entry was last saved or retrieved
+    nbytes     = integer >= 0, size in bytes of the entry's files
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: entries
+    --------------------------------------------------------------------
+    '''
+    entries = []
+    if not os.access(cache_dir, os.F_OK):
+        return entries
+    for fname in os.listdir(cache_dir):
+        if not fname.endswith('_vars.pkl'):
+            continue
+        entry_kind, key = fname[:-len('_vars.pkl')].split('_', 1)
+        if (kind is not None) and (entry_kind != kind):
+            continue
+        vars_path, args_path = get_cache_paths(cache_dir, entry_kind, key)
+        try:
+            atime = os.path.getmtime(vars_path)
+            nbytes = os.path.getsize(vars_path)
+            if os.path.exists(args_path):
+                nbytes += os.path.getsize(args_path)
+        except OSError:
+            continue
+        entries.append((atime, nbytes, entry_kind, key))
+    entries.sort()
+
+    return entries
+
+
+def load_cache(cache_dir, kind, key):
+    '''
+    --------------------------------------------------------------------
+    Retrieve a solution from the cache, and mark it as most recently
+    used
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir = string, path of cache directory
+    kind      = string, kind of solution, 'SS' or 'TPI'
+    key       = string, digest key of the solution
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cache_paths()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    vars_path = string, path of pickled output dictionary
+    args_path = string, path of pickled argument tuple
+    output    = dictionary or None, cached solution output, None if the
+                solution is not in the cache
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: output
+    --------------------------------------------------------------------
+    '''
+    vars_path, args_path = get_cache_paths(cache_dir, kind, key)
+    try:
+        with open(vars_path, 'rb') as vars_file:
+            output = pickle.load(vars_file)
+        os.utime(vars_path, None)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        output = None
+
+    return output
+
+
+def save_cache(cache_dir, kind, key, output, args, max_entries=200,
+               max_bytes=2 ** 30):
+    '''
+    --------------------------------------------------------------------
+    Save a solution and its argument tuple in the cache, then evict the
+    least recently used entries if the cache is over its limits. Files
+    are written to a temporary name and renamed so that an interrupted
+    write never leaves a partial entry in the cache.
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir   = string, path of cache directory
+    kind        = string, kind of solution, 'SS' or 'TPI'
+    key         = string, digest of args
+    output      = dictionary, solution output
+    args        = tuple, arguments that produced output
+    max_entries = integer >= 1, maximum number of entries in the cache
+    max_bytes   = integer >= 1, maximum total size of the cache in bytes
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cache_paths()
+        evict_cache()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    vars_path = string, path of pickled output dictionary
+    args_path = string, path of pickled argument tuple
+    path      = string, path of file being written
+    obj       = object, object being pickled
+    tmp_path  = string, temporary path of file being written
+
+    FILES CREATED BY THIS FUNCTION:
+        <kind>_<key>_vars.pkl
+        <kind>_<key>_args.pkl
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    if not os.access(cache_dir, os.F_OK):
+        os.makedirs(cache_dir)
+    vars_path, args_path = get_cache_paths(cache_dir, kind, key)
+    # Write the args file first so that every _vars.pkl file that is
+    # visible in the cache has its args
+    for path, obj in ((args_path, args), (vars_path, output)):
+        tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp_path, 'wb') as tmp_file:
+            pickle.dump(obj, tmp_file)
+        os.replace(tmp_path, path)
+    evict_cache(cache_dir, max_entries, max_bytes)
+
+
+def evict_cache(cache_dir, max_entries=200, max_bytes=2 ** 30):
+    '''
+    --------------------------------------------------------------------
+    Delete the least recently used entries of the cache until it has at
+    most max_entries entries and at most max_bytes total bytes. The most
+    recently used entry is never deleted.
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir   = string, path of cache directory
+    max_entries = integer >= 1, maximum number of entries in the cache
+    max_bytes   = integer >= 1, maximum total size of the cache in bytes
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cache_entries()
+        get_cache_paths()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    entries     = list, (atime, nbytes, kind, key) tuple for each entry
+                  from least to most recently used
+    num_entries = integer >= 0, number of entries left in the cache
+    tot_bytes   = integer >= 0, total bytes left in the cache
+    atime       = scalar, time the entry was last saved or retrieved
+    nbytes      = integer >= 0, size in bytes of the entry's files
+    kind        = string, kind of solution of the entry
+    key         = string, digest key of the entry
+    path        = string, path of file being deleted
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    entries = get_cache_entries(cache_dir)
+    num_entries = len(entries)
+    tot_bytes = sum([entry[1] for entry in entries])
+    for atime, nbytes, kind, key in entries[:-1]:
+        if (num_entries <= max_entries) and (tot_bytes <= max_bytes):
+            break
+        for path in get_cache_paths(cache_dir, kind, key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        num_entries -= 1
+        tot_bytes -= nbytes
+
+
+def get_nearest_entry(cache_dir, kind, args, get_features):
+    '''
+    --------------------------------------------------------------------
+    Find the cached solution of a given kind whose arguments are closest
+    to args. The function get_features(args) returns a tuple
+    (feat_vec, shape_key), in which feat_vec is a vector of parameter
+    values and shape_key a tuple of the dimensions that must be equal
+    for a solution to be used as a starting guess. The distance between
+    two entries with the same shape_key is the norm of the differences
+    in their features relative to the features of args
+
+        dist = || (feat_entry - feat_args) / |feat_args| ||
+    --------------------------------------------------------------------
+    INPUTS:
+    cache_dir    = string, path of cache directory
+    kind         = string, kind of solution, 'SS' or 'TPI'
+    args         = tuple, arguments of the new solution
+    get_features = function, returns (feat_vec, shape_key) given an
+                   argument tuple of this kind
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_features()
+        get_cache_entries()
+        get_cache_paths()
+        load_cache()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    feat_args  = (F,) vector, features of args
+    shape_args = tuple, shape key of args
+    scale      = (F,) vector, normalizing scale of each feature
+    near_key   = string or None, key of the nearest entry
+    near_dist  = scalar >= 0, distance of the nearest entry
+    near_args  = tuple or None, arguments of the nearest entry
+    key        = string, digest key of the entry
+    vars_path  = string, path of pickled output dictionary
+    args_path  = string, path of pickled argument tuple
+    entry_args = tuple, arguments of the entry
+    feat_entry = (F,) vector, features of the entry
+    shape_key  = tuple, shape key of the entry
+    dist       = scalar >= 0, distance between entry and args
+    output     = dictionary or None, output of the nearest entry
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: output, near_args, near_dist
+    --------------------------------------------------------------------
+    '''
+    feat_args, shape_args = get_features(args)
+    feat_args = np.asarray(feat_args, dtype=float)
+    scale = np.maximum(np.absolute(feat_args), 1e-8)
+    near_key = None
+    near_dist = np.inf
+    near_args = None
+    for atime, nbytes, entry_kind, key in get_cache_entries(cache_dir,
+                                                            kind):
+        vars_path, args_path = get_cache_paths(cache_dir, kind, key)
+        try:
+            with open(args_path, 'rb') as args_file:
+                entry_args = pickle.load(args_file)
+            feat_entry, shape_key = get_features(entry_args)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError,
+                IndexError, TypeError):
+            continue
+        feat_entry = np.asarray(feat_entry, dtype=float)
+        if (shape_key != shape_args or
+                feat_entry.shape != feat_args.shape):
+            continue
+        dist = np.sqrt((((feat_entry - feat_args) / scale) ** 2).sum())
+        if dist < near_dist:
+            near_key = key
+            near_dist = dist
+            near_args = entry_args
+    if near_key is None:
+        output = None
+    else:
+        output = load_cache(cache_dir, kind, near_key)
+
+    return output, near_args, near_dist
@@ -4,20 +4,31 @@ This module defines functions for fitting the elliptical disutility of
 labor functional form to the constant Frisch elasticity (CFE) disutility
 of labor functional form.
 
+Fitted parameters can be stored in a persistent lookup table (a JSON
+file) keyed by (Frisch, CFE_scale, l_tilde), so that a run whose CFE
+parameters have been fitted before does not fit them again, and a whole
+grid of Frisch elasticities can be fitted at once with a vectorized
+Levenberg-Marquardt batch fit.
+
 This module defines the following functions:
     gen_ellip()
     gen_uprightquad()
     MU_sumsq()
+    MU_sumsq_jac()
+    get_labor_sup()
     fit_ellip_CFE()
+    fit_ellip_batch()
+    load_ellip_table()
+    save_ellip_table()
+    add_ellip_table()
+    get_ellip_CFE()
 ------------------------------------------------------------------------
 '''
 
 # Import packages
+import json
 import numpy as np
 import scipy.optimize as opt
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
-from matplotlib.patches import Ellipse
 import os
 
 '''
@@ -61,6 +72,10 @@ def gen_ellip(h, k, a, b, mu, graph=True):
     xvec = np.linspace(h, h + a, N)
     yvec = b * ((1 - (((xvec - h) / a) ** mu)) ** (1 / mu)) + k
     if graph:
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import MultipleLocator
+        from matplotlib.patches import Ellipse
+
         e1 = Ellipse((h, k), 2 * a, 2 * b, 360.0, linewidth=2.0,
                      fill=False, label='Full ellipse')
         fig = plt.figure()
@@ -133,6 +148,9 @@ def gen_uprightquad(hvec, kvec, avec, bvec, muvec, graph=True):
              ((1 - (((xmat[i, :] - hvec[i]) / avec[i]) ** muvec[i])) **
              (1 / muvec[i])) + kvec[i])
     if graph:
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import MultipleLocator
+
         fig = plt.figure()
         ax = fig.add_subplot(111, aspect='equal')
         for i in range(II):
@@ -206,7 +224,120 @@ def MU_sumsq(ellip_params, *args):
     return sumsq
 
 
-def fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph):
+def MU_sumsq_jac(ellip_params, *args):
+    '''
+    --------------------------------------------------------------------
+    This function calculates the sum of squared errors between the
+    elliptical and CFE marginal disutility of labor functions, as in
+    MU_sumsq(), and its analytic gradient with respect to b and upsilon.
+    With x = labor_sup / l_tilde, the elliptical marginal disutility is
+
+        MU_ellip = (b / l_tilde) * x^(upsilon-1) *
+                   (1 - x^upsilon)^((1 - upsilon) / upsilon)
+
+    so that d MU_ellip / d b = MU_ellip / b and
+
+        d MU_ellip / d upsilon = MU_ellip * [log(x) -
+            log(1 - x^upsilon) / upsilon^2 -
+            ((1 - upsilon) / upsilon) * x^upsilon * log(x) /
+            (1 - x^upsilon)]
+    --------------------------------------------------------------------
+    INPUTS:
+    ellip_params = (2,) vector, scale parameter b and shape parameter
+                   upsilon of elliptical disutility of labor
+    args         = length 4 tuple,
+                   (Frisch, CFE_scale, l_tilde, labor_sup)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    b_ellip    = scalar > 0, scale parameter of elliptical disutility of
+                 labor
+    upsilon    = scalar > 1, shape parameter of elliptical disutility of
+                 labor
+    Frisch     = scalar > 0, Frisch elasticity of labor supply in CFE
+                 disutility of labor function
+    CFE_scale  = scalar > 0, level parameter for CFE disutility of labor
+                 function
+    l_tilde    = scalar > 0, time endowment for each agent each period
+    labor_sup  = (N,) vector, points in support of labor supply
+    lab_ratio  = (N,) vector, labor_sup / l_tilde
+    log_ratio  = (N,) vector, log of lab_ratio
+    ratio_ups  = (N,) vector, lab_ratio ** upsilon
+    MU_CFE     = (N,) vector, CFE marginal disutility of labor for
+                 labor_sup
+    MU_ellip   = (N,) vector, elliptical marginal disutility of labor
+                 for labor_sup
+    MU_err     = (N,) vector, MU_ellip - MU_CFE
+    dlogMU_ups = (N,) vector, derivative of log(MU_ellip) with respect
+                 to upsilon
+    sumsq      = scalar > 0, sum of squared errors between elliptical
+                 and CFE marginal utility functions
+    sumsq_grad = (2,) vector, gradient of sumsq with respect to b and
+                 upsilon
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: sumsq, sumsq_grad
+    --------------------------------------------------------------------
+    '''
+    b_ellip, upsilon = ellip_params
+    Frisch, CFE_scale, l_tilde, labor_sup = args
+
+    lab_ratio = labor_sup / l_tilde
+    log_ratio = np.log(lab_ratio)
+    ratio_ups = lab_ratio ** upsilon
+    MU_CFE = CFE_scale * (labor_sup ** (1 / Frisch))
+    MU_ellip = ((b_ellip / l_tilde) * (lab_ratio ** (upsilon - 1)) *
+                ((1 - ratio_ups) ** ((1 - upsilon) / upsilon)))
+    MU_err = MU_ellip - MU_CFE
+    dlogMU_ups = (log_ratio - np.log(1 - ratio_ups) / (upsilon ** 2) -
+                  ((1 - upsilon) / upsilon) * ratio_ups * log_ratio /
+                  (1 - ratio_ups))
+    sumsq = (MU_err ** 2).sum()
+    sumsq_grad = 2 * np.array([(MU_err * MU_ellip).sum() / b_ellip,
+                               (MU_err * MU_ellip * dlogMU_ups).sum()])
+
+    return sumsq, sumsq_grad
+
+
+def get_labor_sup(l_tilde):
+    '''
+    --------------------------------------------------------------------
+    This function returns the points in the support of labor supply on
+    which the elliptical disutility of labor is fit to the CFE
+    disutility of labor
+    --------------------------------------------------------------------
+    INPUTS:
+    l_tilde = scalar > 0, time endowment to each agent each period
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    labor_min = scalar in (0, labor_max), lower bound of support of
+                labor supply to be used in estimation of parameters
+    labor_max = scalar in (labor_min, l_tilde), upper bound of support
+                of labor supply to be used in estimation of parameters
+    labor_N   = integer > 30, number of points in support of labor
+                supply to be used in estimation of parameters
+    labor_sup = (labor_N,) vector, points in support of labor supply to
+                be used in estimation of parameters
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: labor_sup
+    --------------------------------------------------------------------
+    '''
+    labor_min = 0.05
+    labor_max = 0.95 * l_tilde
+    labor_N = 1000
+    labor_sup = np.linspace(labor_min, labor_max, labor_N)
+
+    return labor_sup
+
+
+def fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph,
+                  return_success=False):
     '''
     --------------------------------------------------------------------
     This function estimates the elliptical disutility of labor
@@ -218,22 +349,20 @@ def fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph):
                  parameters: Frisch elasticity and scale parameter
     l_tilde    = scalar > 0, time endowment to each agent each period
     graph      = Boolean, =True want to save plots of results
+    return_success = Boolean, =True if also return whether the
+                     minimizer converged
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_labor_sup()
+        MU_sumsq_jac()
 
     OBJECTS CREATED WITHIN FUNCTION:
     Frisch       = scalar > 0, Frisch elasticity of labor supply
     CFE_scale    = scalar > 0, scale parameter in CFE disutil. of labor
-    labor_min    = scalar in (0, labor_max), lower bound of support of
-                   labor supply to be used in estimation of parameters
-    labor_max    = scalar in (labor_min, l_tilde), upper bound of
-                   support of labor supply to be used in estimation of
-                   parameters
-    labor_N      = integer > 30, number of points in support of labor
-                   supply to be used in estimation of parameters
     labor_sup    = (labor_N,) vector, points in support of labor supply
                    to be used in estimation of parameters
-    fit_args     = length 3 tuple, (Frisch, CFE_scale, labor_sup)
+    fit_args     = length 4 tuple, (Frisch, CFE_scale, l_tilde,
+                   labor_sup)
     bnds_elp     = length 2 tuple, lower and upper bound pairs for b and
                    upsilon elliptical disutility of labor parameters
     ellip_params = length 9 dictionary, output from opt.minimize
@@ -247,19 +376,17 @@ def fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph):
     FILES CREATED BY THIS FUNCTION:
         images/EllipVsCFE_MargUtil.png
 
-    RETURNS: b_ellip, upsilon
+    RETURNS: b_ellip, upsilon, or b_ellip, upsilon, success if
+             return_success=True
     --------------------------------------------------------------------
     '''
     Frisch, CFE_scale = cfe_params
-    labor_min = 0.05
-    labor_max = 0.95 * l_tilde
-    labor_N = 1000
-    labor_sup = np.linspace(labor_min, labor_max, labor_N)
+    labor_sup = get_labor_sup(l_tilde)
     fit_args = (Frisch, CFE_scale, l_tilde, labor_sup)
     bnds_elp = ((1e-12, None), (1 + 1e-12, None))
     ellip_params = opt.minimize(
-        MU_sumsq, ellip_init, args=(fit_args), method='L-BFGS-B',
-        bounds=bnds_elp)
+        MU_sumsq_jac, ellip_init, args=(fit_args), jac=True,
+        method='L-BFGS-B', bounds=bnds_elp)
     b_ellip, upsilon = ellip_params.x
     sumsq = ellip_params.fun
     if ellip_params.success:
@@ -282,6 +409,9 @@ def fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph):
                           values of labor supply
             ------------------------------------------------------------
             '''
+            import matplotlib.pyplot as plt
+            from matplotlib.ticker import MultipleLocator
+
             # Create directory if images folder does not already exist
             cur_path = os.path.split(os.path.abspath(__file__))[0]
             output_fldr = "images"
@@ -318,4 +448,357 @@ def fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph):
     else:
         print('NOT SUCCESSFUL ESTIMATION OF ELLIPTICAL UTILITY')
 
+    if return_success:
+        return b_ellip, upsilon, ellip_params.success
+    return b_ellip, upsilon
+
+
+def fit_ellip_batch(ellip_init, Frisch_vec, CFE_scale, l_tilde,
+                    maxiter=200, tol=1e-12):
+    '''
+    --------------------------------------------------------------------
+    This function fits the elliptical disutility of labor parameters to
+    the CFE disutility of labor for a whole vector of Frisch
+    elasticities at once. The N least squares problems are solved
+    together by a vectorized Levenberg-Marquardt method, in which each
+    iteration evaluates the residuals and their analytic Jacobian for
+    all N problems as (N, labor_N) arrays and solves the N 2 x 2 damped
+    normal equations in one call. Each problem has its own damping
+    parameter and stops when its relative improvement or step is below
+    tol. The bounds b > 0 and upsilon > 1 are imposed by clipping.
+    --------------------------------------------------------------------
+    INPUTS:
+    ellip_init = (2,) vector, initial guesses for b and upsilon
+    Frisch_vec = (N,) vector, Frisch elasticities of labor supply
+    CFE_scale  = scalar > 0, scale parameter in CFE disutil. of labor
+    l_tilde    = scalar > 0, time endowment to each agent each period
+    maxiter    = integer >= 1, maximum number of iterations
+    tol        = scalar > 0, relative convergence tolerance
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_labor_sup()
+        get_resid()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    labor_sup  = (labor_N,) vector, points in support of labor supply
+    lab_ratio  = (labor_N,) vector, labor_sup / l_tilde
+    log_ratio  = (labor_N,) vector, log of lab_ratio
+    MU_CFE     = (N, labor_N) matrix, CFE marginal disutility of labor
+    lb_vec     = (2,) vector, lower bounds of b and upsilon
+    get_resid  = function, residuals MU_ellip - MU_CFE and their
+                 Jacobian with respect to b and upsilon for a (N, 2)
+                 matrix of parameters
+    N          = integer >= 1, number of Frisch elasticities
+    params     = (N, 2) matrix, current b and upsilon of each problem
+    damp       = (N,) vector, Levenberg-Marquardt damping parameters
+    resid      = (N, labor_N) matrix, current residuals
+    resid_jac  = (N, labor_N, 2) array, current Jacobian of residuals
+    sumsq      = (N,) vector, current sums of squared residuals
+    active     = (N,) boolean vector, =True if problem not converged
+    JTJ        = (N, 2, 2) array, Gauss-Newton Hessians
+    JTr        = (N, 2) matrix, gradients divided by 2
+    step       = (N, 2) matrix, damped Gauss-Newton steps
+    params_new = (N, 2) matrix, trial parameters
+    sumsq_new  = (N,) vector, sums of squared residuals at params_new
+    better     = (N,) boolean vector, =True if trial step accepted
+    conv       = (N,) boolean vector, =True if problem converged in
+                 this iteration
+    b_vec      = (N,) vector, fitted b of each Frisch elasticity
+    ups_vec    = (N,) vector, fitted upsilon of each Frisch elasticity
+    success    = (N,) boolean vector, =True if problem converged
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: b_vec, ups_vec, sumsq, success
+    --------------------------------------------------------------------
+    '''
+    Frisch_vec = np.asarray(Frisch_vec, dtype=float)
+    labor_sup = get_labor_sup(l_tilde)
+    lab_ratio = labor_sup / l_tilde
+    log_ratio = np.log(lab_ratio)
+    MU_CFE = CFE_scale * (labor_sup[np.newaxis, :] **
+                          (1 / Frisch_vec[:, np.newaxis]))
+    lb_vec = np.array([1e-12, 1 + 1e-12])
+
+    def get_resid(params, rows):
+        b_ellip = params[:, 0:1]
+        upsilon = params[:, 1:2]
+        ratio_ups = lab_ratio ** upsilon
+        MU_ellip = ((b_ellip / l_tilde) * (lab_ratio ** (upsilon - 1)) *
+                    ((1 - ratio_ups) ** ((1 - upsilon) / upsilon)))
+        dlogMU_ups = (log_ratio - np.log(1 - ratio_ups) /
+                      (upsilon ** 2) - ((1 - upsilon) / upsilon) *
+                      ratio_ups * log_ratio / (1 - ratio_ups))
+        resid = MU_ellip - MU_CFE[rows]
+        resid_jac = np.stack((MU_ellip / b_ellip, MU_ellip * dlogMU_ups),
+                             axis=2)
+        return resid, resid_jac
+
+    N = Frisch_vec.shape[0]
+    params = np.tile(np.asarray(ellip_init, dtype=float), (N, 1))
+    damp = 1e-3 * np.ones(N)
+    resid, resid_jac = get_resid(params, np.arange(N))
+    sumsq = (resid ** 2).sum(1)
+    active = np.ones(N, dtype=bool)
+    for _ in range(maxiter):
+        if not active.any():
+            break
+        rows = np.flatnonzero(active)
+        JTJ = np.einsum('nki,nkj->nij', resid_jac[rows], resid_jac[rows])
+        JTr = np.einsum('nki,nk->ni', resid_jac[rows], resid[rows])
+        JTJ_damp = JTJ.copy()
+        JTJ_damp[:, [0, 1], [0, 1]] *= 1 + damp[rows, np.newaxis]
+        step = -np.linalg.solve(JTJ_damp, JTr[:, :, np.newaxis])[:, :, 0]
+        params_new = np.maximum(params[rows] + step, lb_vec)
+        resid_new, resid_jac_new = get_resid(params_new, rows)
+        sumsq_new = (resid_new ** 2).sum(1)
+        better = np.isfinite(sumsq_new) & (sumsq_new <= sumsq[rows])
+        conv = (better & ((sumsq[rows] - sumsq_new <= tol * sumsq_new) |
+                          (np.abs(params_new - params[rows]).max(1) <=
+                           tol * np.abs(params[rows]).max(1))))
+        acc = rows[better]
+        params[acc] = params_new[better]
+        resid[acc] = resid_new[better]
+        resid_jac[acc] = resid_jac_new[better]
+        sumsq[acc] = sumsq_new[better]
+        damp[rows] = np.where(better, damp[rows] / 10, damp[rows] * 10)
+        active[rows[conv | (damp[rows] > 1e16)]] = False
+    b_vec = params[:, 0]
+    ups_vec = params[:, 1]
+    success = ~active & (damp <= 1e16)
+
+    return b_vec, ups_vec, sumsq, success
+
+
+def load_ellip_table(table_path):
+    '''
+    --------------------------------------------------------------------
+    This function loads the lookup table of fitted elliptical disutility
+    of labor parameters saved by save_ellip_table()
+    --------------------------------------------------------------------
+    INPUTS:
+    table_path = string, path of JSON lookup table file
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    table_file = file object, lookup table file
+    ellip_tbl  = (M, 6) matrix, rows (Frisch, CFE_scale, l_tilde,
+                 b_ellip, upsilon, sumsq) of the M fitted entries. Empty
+                 if table_path does not exist or cannot be read
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: ellip_tbl
+    --------------------------------------------------------------------
+    '''
+    ellip_tbl = np.zeros((0, 6))
+    if os.path.exists(table_path):
+        try:
+            with open(table_path, 'r') as table_file:
+                ellip_tbl = np.array(json.load(table_file)['entries'],
+                                     dtype=float).reshape((-1, 6))
+        except (ValueError, KeyError):
+            ellip_tbl = np.zeros((0, 6))
+
+    return ellip_tbl
+
+
+def save_ellip_table(table_path, ellip_tbl):
+    '''
+    --------------------------------------------------------------------
+    This function saves the lookup table of fitted elliptical disutility
+    of labor parameters sorted by (CFE_scale, l_tilde, Frisch). The file
+    is written to a temporary name and renamed so that an interrupted
+    write never leaves a partial file
+    --------------------------------------------------------------------
+    INPUTS:
+    table_path = string, path of JSON lookup table file
+    ellip_tbl  = (M, 6) matrix, rows (Frisch, CFE_scale, l_tilde,
+                 b_ellip, upsilon, sumsq) of the M fitted entries
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    table_dir  = string, folder of table_path
+    order      = (M,) vector, sorting order of the rows
+    tmp_path   = string, temporary path of lookup table file
+    table_file = file object, lookup table file
+
+    FILES CREATED BY THIS FUNCTION:
+        table_path
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    table_dir = os.path.dirname(table_path)
+    if table_dir and not os.access(table_dir, os.F_OK):
+        os.makedirs(table_dir)
+    order = np.lexsort((ellip_tbl[:, 0], ellip_tbl[:, 2], ellip_tbl[:, 1]))
+    tmp_path = table_path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'w') as table_file:
+        json.dump({'columns': ['Frisch', 'CFE_scale', 'l_tilde',
+                               'b_ellip', 'upsilon', 'sumsq'],
+                   'entries': ellip_tbl[order].tolist()}, table_file,
+                  indent=1)
+    os.replace(tmp_path, table_path)
+
+
+def add_ellip_table(table_path, ellip_init, Frisch_vec, CFE_scale,
+                    l_tilde):
+    '''
+    --------------------------------------------------------------------
+    This function fits the elliptical disutility of labor parameters of
+    every Frisch elasticity in Frisch_vec that is not in the lookup
+    table yet with one batch fit and adds them to the table
+    --------------------------------------------------------------------
+    INPUTS:
+    table_path = string, path of JSON lookup table file
+    ellip_init = (2,) vector, initial guesses for b and upsilon
+    Frisch_vec = (N,) vector, Frisch elasticities of labor supply
+    CFE_scale  = scalar > 0, scale parameter in CFE disutil. of labor
+    l_tilde    = scalar > 0, time endowment to each agent each period
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        load_ellip_table()
+        fit_ellip_batch()
+        save_ellip_table()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    ellip_tbl  = (M, 6) matrix, lookup table
+    same_cfe   = (M,) boolean vector, =True if row has the same CFE_scale
+                 and l_tilde
+    new_Frisch = (K,) vector, Frisch elasticities not in the table
+    b_vec      = (K,) vector, fitted b of each new Frisch elasticity
+    ups_vec    = (K,) vector, fitted upsilon of each new Frisch
+                 elasticity
+    sumsq      = (K,) vector, sum of squared errors of each fit
+    success    = (K,) boolean vector, =True if fit converged
+    new_rows   = (K', 6) matrix, rows of the converged fits
+
+    FILES CREATED BY THIS FUNCTION:
+        table_path
+
+    RETURNS: ellip_tbl
+    --------------------------------------------------------------------
+    '''
+    ellip_tbl = load_ellip_table(table_path)
+    same_cfe = (np.isclose(ellip_tbl[:, 1], CFE_scale, rtol=1e-12,
+                           atol=0.0) &
+                np.isclose(ellip_tbl[:, 2], l_tilde, rtol=1e-12,
+                           atol=0.0))
+    new_Frisch = np.array(
+        [Frisch for Frisch in np.unique(np.asarray(Frisch_vec, float))
+         if not np.isclose(ellip_tbl[same_cfe, 0], Frisch, rtol=1e-12,
+                           atol=0.0).any()])
+    if new_Frisch.shape[0] > 0:
+        b_vec, ups_vec, sumsq, success = \
+            fit_ellip_batch(ellip_init, new_Frisch, CFE_scale, l_tilde)
+        new_rows = np.column_stack(
+            (new_Frisch, CFE_scale * np.ones(new_Frisch.shape[0]),
+             l_tilde * np.ones(new_Frisch.shape[0]), b_vec, ups_vec,
+             sumsq))[success]
+        ellip_tbl = np.vstack((ellip_tbl, new_rows))
+        save_ellip_table(table_path, ellip_tbl)
+
+    return ellip_tbl
+
+
+def get_ellip_CFE(ellip_init, cfe_params, l_tilde, graph=False,
+                  table_path=None, interp_tol=0.0):
+    '''
+    --------------------------------------------------------------------
+    This function returns the elliptical disutility of labor parameters
+    for the CFE parameters from the lookup table in table_path if they
+    have been fitted before. Otherwise the parameters are fitted by
+    fit_ellip_CFE(), starting from the parameters interpolated linearly
+    between the nearest tabulated Frisch elasticities with the same
+    CFE_scale and l_tilde (or from ellip_init if there are none), and
+    added to the table. If the two tabulated Frisch elasticities that
+    bracket Frisch are at most interp_tol apart, the interpolated
+    parameters are returned without fitting. Fits that did not converge
+    are returned but not added to the table.
+    --------------------------------------------------------------------
+    INPUTS:
+    ellip_init = (2,) vector, initial guesses for b and upsilon
+    cfe_params = (2,) vector, parameters for CFE disutility of labor
+                 parameters: Frisch elasticity and scale parameter
+    l_tilde    = scalar > 0, time endowment to each agent each period
+    graph      = Boolean, =True want to save plots of results, in which
+                 case the parameters are always fitted
+    table_path = None or string, path of JSON lookup table file. If
+                 None, the parameters are fitted by fit_ellip_CFE()
+    interp_tol = scalar >= 0, maximum distance between the bracketing
+                 tabulated Frisch elasticities for which the
+                 interpolated parameters are returned without fitting
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        fit_ellip_CFE()
+        get_labor_sup()
+        load_ellip_table()
+        MU_sumsq()
+        save_ellip_table()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    Frisch    = scalar > 0, Frisch elasticity of labor supply
+    CFE_scale = scalar > 0, scale parameter in CFE disutil. of labor
+    ellip_tbl = (M, 6) matrix, lookup table
+    same_cfe  = (M,) boolean vector, =True if row has the same CFE_scale
+                and l_tilde
+    cfe_tbl   = (M', 6) matrix, rows with the same CFE_scale and
+                l_tilde sorted by Frisch
+    match     = (M',) boolean vector, =True if row has the same Frisch
+    idx       = integer, index of first row of cfe_tbl with a larger
+                Frisch
+    fit_init  = (2,) vector, initial guesses for b and upsilon
+    b_ellip   = scalar > 0, scale parameter in elliptical disutility of
+                labor function
+    upsilon   = scalar > 1, shape parameter in elliptical disutility of
+                labor function
+    success   = Boolean, =True if the fit converged
+    sumsq     = scalar > 0, sum of squared errors of the fit
+
+    FILES CREATED BY THIS FUNCTION:
+        table_path
+
+    RETURNS: b_ellip, upsilon
+    --------------------------------------------------------------------
+    '''
+    if table_path is None:
+        return fit_ellip_CFE(ellip_init, cfe_params, l_tilde, graph)
+    Frisch, CFE_scale = cfe_params
+    ellip_tbl = load_ellip_table(table_path)
+    same_cfe = (np.isclose(ellip_tbl[:, 1], CFE_scale, rtol=1e-12,
+                           atol=0.0) &
+                np.isclose(ellip_tbl[:, 2], l_tilde, rtol=1e-12,
+                           atol=0.0))
+    cfe_tbl = ellip_tbl[same_cfe]
+    cfe_tbl = cfe_tbl[np.argsort(cfe_tbl[:, 0])]
+    match = np.isclose(cfe_tbl[:, 0], Frisch, rtol=1e-12, atol=0.0)
+    if match.any() and not graph:
+        b_ellip, upsilon = cfe_tbl[np.flatnonzero(match)[0], 3:5]
+        return b_ellip, upsilon
+    fit_init = np.asarray(ellip_init, dtype=float)
+    if cfe_tbl.shape[0] > 0:
+        fit_init = np.array([np.interp(Frisch, cfe_tbl[:, 0],
+                                       cfe_tbl[:, 3]),
+                             np.interp(Frisch, cfe_tbl[:, 0],
+                                       cfe_tbl[:, 4])])
+        idx = np.searchsorted(cfe_tbl[:, 0], Frisch)
+        if ((not graph) and (0 < idx < cfe_tbl.shape[0]) and
+                (cfe_tbl[idx, 0] - cfe_tbl[idx - 1, 0] <= interp_tol)):
+            b_ellip, upsilon = fit_init
+            return b_ellip, upsilon
+    b_ellip, upsilon, success = fit_ellip_CFE(fit_init, cfe_params,
+                                              l_tilde, graph, True)
+    if not success:
+        print('WARNING: Elliptical utility fit for Frisch=' + str(Frisch) +
+              ' did not converge and is not saved in ' + table_path)
+    elif not match.any():
+        sumsq = MU_sumsq((b_ellip, upsilon), Frisch, CFE_scale, l_tilde,
+                         get_labor_sup(l_tilde))
+        ellip_tbl = np.vstack((ellip_tbl, [Frisch, CFE_scale, l_tilde,
+                                           b_ellip, upsilon, sumsq]))
+        save_ellip_table(table_path, ellip_tbl)
+
     return b_ellip, upsilon
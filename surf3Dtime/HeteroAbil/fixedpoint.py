@@ -0,0 +1,268 @@
+'''
+------------------------------------------------------------------------
+This module contains the functions that update the guess of a fixed
+point problem x = g(x), such as the outer loop of the steady-state or
+time path iteration (TPI) solutions of the overlapping generations
+model. Each update function takes the current guess x_init, the implied
+new value g(x_init), and a history dictionary that the function updates
+in place from one iteration to the next.
+
+    damped:   x_{k+1} = xi * g(x_k) + (1 - xi) * x_k
+
+    anderson: Anderson mixing of the last m residuals
+              f_k = g(x_k) - x_k with mixing parameter xi
+
+    broyden:  quasi-Newton step on f(x) = g(x) - x with the "good"
+              Broyden update of the inverse Jacobian, starting from the
+              damped step H_0 = -xi * I
+
+    newton:   Newton step on f(x) = g(x) - x with a fixed Jacobian
+              dg/dx - I, such as the sequence-space Jacobian of the TPI
+              mapping around the steady state (see jacobian.py)
+
+This Python module imports the following module(s): None
+
+This Python module defines the following function(s):
+    damped_update()
+    anderson_update()
+    broyden_update()
+    newton_update()
+    fp_update()
+------------------------------------------------------------------------
+'''
+# Import packages
+import numpy as np
+import scipy.linalg as sla
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def damped_update(x_init, g_x, hist, params):
+    '''
+    --------------------------------------------------------------------
+    Damped (relaxed) fixed point iteration update
+    --------------------------------------------------------------------
+    INPUTS:
+    x_init = (N,) vector, current guess x_k
+    g_x    = (N,) vector, value of g(x_k)
+    hist   = dictionary, history of the iterations (not used)
+    params = length 2 tuple, (xi, mem)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    xi     = scalar in (0, 1], damping parameter
+    mem    = integer >= 1, memory of the accelerated updates (not used)
+    x_next = (N,) vector, updated guess x_{k+1}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: x_next
+    --------------------------------------------------------------------
+    '''
+    xi, mem = params
+    x_next = xi * g_x + (1 - xi) * x_init
+
+    return x_next
+
+
+def anderson_update(x_init, g_x, hist, params):
+    '''
+    --------------------------------------------------------------------
+    Anderson mixing update. The residuals f_k = g(x_k) - x_k and guesses
+    x_k of the last mem + 1 iterations are stored in hist. The weights
+    gamma minimize ||f_k - dF * gamma|| where the columns of dF are the
+    differences in consecutive residuals, and
+
+        x_{k+1} = x_k - dX * gamma + xi * (f_k - dF * gamma)
+    --------------------------------------------------------------------
+    INPUTS:
+    x_init = (N,) vector, current guess x_k
+    g_x    = (N,) vector, value of g(x_k)
+    hist   = dictionary, history of the iterations with keys 'x' and
+             'f', lists of the past guesses and residuals
+    params = length 2 tuple, (xi, mem)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        np.linalg.lstsq()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    xi     = scalar in (0, 1], mixing parameter
+    mem    = integer >= 1, number of past residual differences used
+    f_x    = (N,) vector, residual g(x_k) - x_k
+    x_hist = (N, m+1) matrix, last m+1 guesses, m <= mem
+    f_hist = (N, m+1) matrix, last m+1 residuals
+    dX     = (N, m) matrix, differences in consecutive guesses
+    dF     = (N, m) matrix, differences in consecutive residuals
+    gamma  = (m,) vector, least squares mixing weights
+    x_next = (N,) vector, updated guess x_{k+1}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: x_next
+    --------------------------------------------------------------------
+    '''
+    xi, mem = params
+    f_x = g_x - x_init
+    hist.setdefault('x', []).append(x_init.copy())
+    hist.setdefault('f', []).append(f_x.copy())
+    hist['x'] = hist['x'][-(mem + 1):]
+    hist['f'] = hist['f'][-(mem + 1):]
+    if len(hist['x']) == 1:
+        x_next = x_init + xi * f_x
+    else:
+        x_hist = np.array(hist['x']).T
+        f_hist = np.array(hist['f']).T
+        dX = np.diff(x_hist, axis=1)
+        dF = np.diff(f_hist, axis=1)
+        gamma = np.linalg.lstsq(dF, f_x, rcond=-1)[0]
+        x_next = x_init - dX.dot(gamma) + xi * (f_x - dF.dot(gamma))
+
+    return x_next
+
+
+def broyden_update(x_init, g_x, hist, params):
+    '''
+    --------------------------------------------------------------------
+    Broyden quasi-Newton update on the residual f(x) = g(x) - x. The
+    approximate inverse Jacobian H starts at -xi * I, so the first step
+    is the damped step, and is updated with the "good" Broyden rank-one
+    update each iteration
+
+        H += (dx - H df) dx' H / (dx' H df)
+        x_{k+1} = x_k - H f_k
+    --------------------------------------------------------------------
+    INPUTS:
+    x_init = (N,) vector, current guess x_k
+    g_x    = (N,) vector, value of g(x_k)
+    hist   = dictionary, history of the iterations with keys 'x', 'f',
+             and 'H', the last guess, last residual, and inverse
+             Jacobian approximation
+    params = length 2 tuple, (xi, mem)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    xi     = scalar in (0, 1], damping parameter of initial H
+    mem    = integer >= 1, memory of the accelerated updates (not used)
+    f_x    = (N,) vector, residual g(x_k) - x_k
+    H      = (N, N) matrix, approximate inverse Jacobian of f
+    dx     = (N,) vector, x_k - x_{k-1}
+    df     = (N,) vector, f_k - f_{k-1}
+    Hdf    = (N,) vector, H * df
+    denom  = scalar, dx' H df
+    x_next = (N,) vector, updated guess x_{k+1}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: x_next
+    --------------------------------------------------------------------
+    '''
+    xi, mem = params
+    f_x = g_x - x_init
+    if 'H' not in hist:
+        H = -xi * np.eye(x_init.shape[0])
+    else:
+        H = hist['H']
+        dx = x_init - hist['x']
+        df = f_x - hist['f']
+        Hdf = H.dot(df)
+        denom = dx.dot(Hdf)
+        if np.absolute(denom) > 1e-14 * np.absolute(dx).sum():
+            H = H + np.outer(dx - Hdf, dx.dot(H)) / denom
+    hist['H'] = H
+    hist['x'] = x_init.copy()
+    hist['f'] = f_x.copy()
+    x_next = x_init - H.dot(f_x)
+
+    return x_next
+
+
+def newton_update(x_init, g_x, hist, params):
+    '''
+    --------------------------------------------------------------------
+    Newton update on the residual f(x) = g(x) - x with a fixed Jacobian.
+    The LU factorization of the Jacobian of f, dg/dx - I, is computed
+    by the caller with scipy.linalg.lu_factor() and stored in hist
+    under the key 'jac_lu'
+
+        x_{k+1} = x_k - (dg/dx - I)^(-1) f_k
+    --------------------------------------------------------------------
+    INPUTS:
+    x_init = (N,) vector, current guess x_k
+    g_x    = (N,) vector, value of g(x_k)
+    hist   = dictionary, history of the iterations with key 'jac_lu',
+             the LU factorization of dg/dx - I
+    params = length 2 tuple, (xi, mem)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        sla.lu_solve()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    f_x    = (N,) vector, residual g(x_k) - x_k
+    x_next = (N,) vector, updated guess x_{k+1}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: x_next
+    --------------------------------------------------------------------
+    '''
+    f_x = g_x - x_init
+    x_next = x_init - sla.lu_solve(hist['jac_lu'], f_x)
+
+    return x_next
+
+
+def fp_update(method, params, x_init, g_x, hist, x_lb=None):
+    '''
+    --------------------------------------------------------------------
+    Update the guess of a fixed point problem with the chosen method.
+    If the accelerated update violates the lower bound x_lb, the
+    history is cleared and the damped update is used instead. The fixed
+    Jacobian of the Newton update is kept.
+    --------------------------------------------------------------------
+    INPUTS:
+    method = string, 'damped', 'anderson', 'broyden', or 'newton'
+    params = length 2 tuple, (xi, mem)
+    x_init = (N,) vector, current guess x_k
+    g_x    = (N,) vector, value of g(x_k)
+    hist   = dictionary, history of the iterations, initialized as {}
+    x_lb   = None or scalar or (N,) vector, strict lower bound on x
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        damped_update()
+        anderson_update()
+        broyden_update()
+        newton_update()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    err_msg = string, error message
+    x_next  = (N,) vector, updated guess x_{k+1}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: x_next
+    --------------------------------------------------------------------
+    '''
+    if method == 'damped':
+        x_next = damped_update(x_init, g_x, hist, params)
+    elif method == 'anderson':
+        x_next = anderson_update(x_init, g_x, hist, params)
+    elif method == 'broyden':
+        x_next = broyden_update(x_init, g_x, hist, params)
+    elif method == 'newton':
+        x_next = newton_update(x_init, g_x, hist, params)
+    else:
+        err_msg = ('ERROR, fp_update(): method must be "damped", ' +
+                   '"anderson", "broyden", or "newton".')
+        raise RuntimeError(err_msg)
+    if (x_lb is not None) and (not np.all(x_next > x_lb)):
+        if method != 'newton':
+            hist.clear()
+        x_next = damped_update(x_init, g_x, hist, params)
+
+    return x_next
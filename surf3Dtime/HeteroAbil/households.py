@@ -6,28 +6,46 @@ transition path of the overlapping generations model with S-period lived
 agents endogenous labor supply, and heterogeneous ability from Chapter 8
 of the OG textbook.
 
-This Python module imports the following module(s): None
+This Python module imports the following module(s):
+    kernels.py
+    rootfinder.py
+    instrument.py
 
 This Python module defines the following function(s):
     get_cons()
     MU_c_stitch()
     MDU_n_stitch()
-    get_n_s()
+    get_MU_c_coefs()
+    get_MDU_n_coefs()
+    get_MU_c_deriv()
+    get_MDU_n_deriv()
+    get_n_js()
+    get_n_closed()
     get_n_errors()
     get_b_errors()
     bn_solve()
     FOC_savings()
     FOC_labor()
+    get_bn_jac()
+    solve_bn()
     get_cnb_vecs()
+    get_cnb_sens()
     c1_bSp1err()
+    c1_bSp1err_jac()
+    get_cnb_mat()
+    c1_bSp1err_mat()
+    c1_bSp1err_mat_jac()
+    solve_lifetime()
 ------------------------------------------------------------------------
 '''
 # Import packages
 import numpy as np
 import scipy.optimize as opt
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
+import scipy.linalg as sla
 import os
+import kernels as kern
+import rootfinder
+import instrument as inst
 
 '''
 ------------------------------------------------------------------------
@@ -88,25 +106,23 @@ def MU_c_stitch(cvec, sigma, graph=False):
         g(c) = b2 * (c ** 2) + b1 * c + b0
     --------------------------------------------------------------------
     INPUTS:
-    cvec  = scalar or (p,) vector, individual consumption value or
-            lifetime consumption over p consecutive periods
+    cvec  = scalar or array, individual consumption value or lifetime
+            consumption over p consecutive periods
     sigma = scalar >= 1, coefficient of relative risk aversion for CRRA
             utility function: (c**(1-sigma) - 1) / (1 - sigma)
     graph = boolean, =True if want plot of stitched marginal utility of
             consumption function
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_MU_c_coefs()
+        kern.mu_c()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    epsilon    = scalar > 0, positive value close to zero
-    c_s        = scalar, individual consumption
-    c_s_cnstr  = boolean, =True if c_s < epsilon
-    b1         = scalar, intercept value in linear marginal utility
-    b2         = scalar, slope coefficient in linear marginal utility
-    MU_c       = scalar or (p,) vector, marginal utility of consumption
-                 or vector of marginal utilities of consumption
-    p          = integer >= 1, number of periods remaining in lifetime
-    cvec_cnstr = (p,) boolean vector, =True for values of cvec < epsilon
+    epsilon = scalar > 0, positive value close to zero
+    b1      = scalar, intercept value in linear marginal utility
+    b2      = scalar, slope coefficient in linear marginal utility
+    MU_c    = scalar or array, marginal utility of consumption or
+              marginal utilities of consumption with the shape of cvec
 
     FILES CREATED BY THIS FUNCTION:
         MU_c_stitched.png
@@ -114,24 +130,8 @@ def MU_c_stitch(cvec, sigma, graph=False):
     RETURNS: MU_c
     --------------------------------------------------------------------
     '''
-    epsilon = 0.0001
-    if np.ndim(cvec) == 0:
-        c_s = cvec
-        c_s_cnstr = c_s < epsilon
-        if c_s_cnstr:
-            b2 = (-sigma * (epsilon ** (-sigma - 1))) / 2
-            b1 = (epsilon ** (-sigma)) - 2 * b2 * epsilon
-            MU_c = 2 * b2 * c_s + b1
-        else:
-            MU_c = c_s ** (-sigma)
-    elif np.ndim(cvec) == 1:
-        p = cvec.shape[0]
-        cvec_cnstr = cvec < epsilon
-        MU_c = np.zeros(p)
-        MU_c[~cvec_cnstr] = cvec[~cvec_cnstr] ** (-sigma)
-        b2 = (-sigma * (epsilon ** (-sigma - 1))) / 2
-        b1 = (epsilon ** (-sigma)) - 2 * b2 * epsilon
-        MU_c[cvec_cnstr] = 2 * b2 * cvec[cvec_cnstr] + b1
+    epsilon, b1, b2 = get_MU_c_coefs(sigma)
+    MU_c = kern.mu_c(cvec, sigma, (epsilon, b1, b2))
 
     if graph:
         '''
@@ -150,6 +150,9 @@ def MU_c_stitch(cvec, sigma, graph=False):
                       consumption
         ----------------------------------------------------------------
         '''
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import MultipleLocator
+
         # Create directory if images directory does not already exist
         cur_path = os.path.split(os.path.abspath(__file__))[0]
         output_fldr = "images"
@@ -210,42 +213,34 @@ def MDU_n_stitch(nvec, params, graph=False):
         g_high(n) = d2 * (n ** 2) + d1 * n + d0
     --------------------------------------------------------------------
     INPUTS:
-    nvec   = scalar or (p,) vector, labor supply value or labor supply
-             values over remaining periods of lifetime
+    nvec   = scalar or array, labor supply value or labor supply values
+             over remaining periods of lifetime
     params = length 3 tuple, (l_tilde, b_ellip, upsilon)
     graph  = Boolean, =True if want plot of stitched marginal disutility
              of labor function
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_MDU_n_coefs()
+        kern.mdu_n()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    l_tilde       = scalar > 0, time endowment for each agent each per
-    b_ellip       = scalar > 0, scale parameter for elliptical utility
-                    of leisure function
-    upsilon       = scalar > 1, shape parameter for elliptical utility
-                    of leisure function
-    eps_low       = scalar > 0, positive value close to zero
-    eps_high      = scalar > 0, positive value just less than l_tilde
-    n_s           = scalar, individual labor supply
-    n_s_low       = boolean, =True for n_s < eps_low
-    n_s_high      = boolean, =True for n_s > eps_high
-    n_s_uncstr    = boolean, =True for n_s >= eps_low and
-                    n_s <= eps_high
-    MDU_n         = scalar or (p,) vector, marginal disutility or
-                    marginal utilities of labor supply
-    b1            = scalar, intercept value in linear marginal
-                    disutility of labor at lower bound
-    b2            = scalar, slope coefficient in linear marginal
-                    disutility of labor at lower bound
-    d1            = scalar, intercept value in linear marginal
-                    disutility of labor at upper bound
-    d2            = scalar, slope coefficient in linear marginal
-                    disutility of labor at upper bound
-    p             = integer >= 1, number of periods remaining in life
-    nvec_s_low    = boolean, =True for n_s < eps_low
-    nvec_s_high   = boolean, =True for n_s > eps_high
-    nvec_s_uncstr = boolean, =True for n_s >= eps_low and
-                    n_s <= eps_high
+    l_tilde  = scalar > 0, time endowment for each agent each per
+    b_ellip  = scalar > 0, scale parameter for elliptical utility of
+               leisure function
+    upsilon  = scalar > 1, shape parameter for elliptical utility of
+               leisure function
+    eps_low  = scalar > 0, positive value close to zero
+    eps_high = scalar > 0, positive value just less than l_tilde
+    MDU_n    = scalar or array, marginal disutility or marginal
+               disutilities of labor supply with the shape of nvec
+    b1       = scalar, intercept value in linear marginal disutility of
+               labor at lower bound
+    b2       = scalar, slope coefficient in linear marginal disutility
+               of labor at lower bound
+    d1       = scalar, intercept value in linear marginal disutility of
+               labor at upper bound
+    d2       = scalar, slope coefficient in linear marginal disutility
+               of labor at upper bound
 
     FILES CREATED BY THIS FUNCTION:
         MDU_n_stitched.png
@@ -254,77 +249,8 @@ def MDU_n_stitch(nvec, params, graph=False):
     --------------------------------------------------------------------
     '''
     l_tilde, b_ellip, upsilon = params
-    eps_low = 0.000001
-    eps_high = l_tilde - 0.000001
-    # This if is for when nvec is a scalar
-    if np.ndim(nvec) == 0:
-        n_s = nvec
-        n_s_low = n_s < eps_low
-        n_s_high = n_s > eps_high
-        n_s_uncstr = (n_s >= eps_low) and (n_s <= eps_high)
-        if n_s_uncstr:
-            MDU_n = \
-                ((b_ellip / l_tilde) * ((n_s / l_tilde) **
-                 (upsilon - 1)) * ((1 - ((n_s / l_tilde) ** upsilon)) **
-                 ((1 - upsilon) / upsilon)))
-        elif n_s_low:
-            b2 = (0.5 * b_ellip * (l_tilde ** (-upsilon)) *
-                  (upsilon - 1) * (eps_low ** (upsilon - 2)) *
-                  ((1 - ((eps_low / l_tilde) ** upsilon)) **
-                  ((1 - upsilon) / upsilon)) *
-                  (1 + ((eps_low / l_tilde) ** upsilon) *
-                  ((1 - ((eps_low / l_tilde) ** upsilon)) ** (-1))))
-            b1 = ((b_ellip / l_tilde) * ((eps_low / l_tilde) **
-                  (upsilon - 1)) *
-                  ((1 - ((eps_low / l_tilde) ** upsilon)) **
-                  ((1 - upsilon) / upsilon)) - (2 * b2 * eps_low))
-            MDU_n = 2 * b2 * n_s + b1
-        elif n_s_high:
-            d2 = (0.5 * b_ellip * (l_tilde ** (-upsilon)) *
-                  (upsilon - 1) * (eps_high ** (upsilon - 2)) *
-                  ((1 - ((eps_high / l_tilde) ** upsilon)) **
-                  ((1 - upsilon) / upsilon)) *
-                  (1 + ((eps_high / l_tilde) ** upsilon) *
-                  ((1 - ((eps_high / l_tilde) ** upsilon)) ** (-1))))
-            d1 = ((b_ellip / l_tilde) * ((eps_high / l_tilde) **
-                  (upsilon - 1)) *
-                  ((1 - ((eps_high / l_tilde) ** upsilon)) **
-                  ((1 - upsilon) / upsilon)) - (2 * d2 * eps_high))
-            MDU_n = 2 * d2 * n_s + d1
-    # This if is for when nvec is a one-dimensional vector
-    elif np.ndim(nvec) == 1:
-        p = nvec.shape[0]
-        nvec_low = nvec < eps_low
-        nvec_high = nvec > eps_high
-        nvec_uncstr = np.logical_and(~nvec_low, ~nvec_high)
-        MDU_n = np.zeros(p)
-        MDU_n[nvec_uncstr] = (
-            (b_ellip / l_tilde) *
-            ((nvec[nvec_uncstr] / l_tilde) ** (upsilon - 1)) *
-            ((1 - ((nvec[nvec_uncstr] / l_tilde) ** upsilon)) **
-             ((1 - upsilon) / upsilon)))
-        b2 = (0.5 * b_ellip * (l_tilde ** (-upsilon)) * (upsilon - 1) *
-              (eps_low ** (upsilon - 2)) *
-              ((1 - ((eps_low / l_tilde) ** upsilon)) **
-              ((1 - upsilon) / upsilon)) *
-              (1 + ((eps_low / l_tilde) ** upsilon) *
-              ((1 - ((eps_low / l_tilde) ** upsilon)) ** (-1))))
-        b1 = ((b_ellip / l_tilde) * ((eps_low / l_tilde) **
-              (upsilon - 1)) *
-              ((1 - ((eps_low / l_tilde) ** upsilon)) **
-              ((1 - upsilon) / upsilon)) - (2 * b2 * eps_low))
-        MDU_n[nvec_low] = 2 * b2 * nvec[nvec_low] + b1
-        d2 = (0.5 * b_ellip * (l_tilde ** (-upsilon)) * (upsilon - 1) *
-              (eps_high ** (upsilon - 2)) *
-              ((1 - ((eps_high / l_tilde) ** upsilon)) **
-              ((1 - upsilon) / upsilon)) *
-              (1 + ((eps_high / l_tilde) ** upsilon) *
-              ((1 - ((eps_high / l_tilde) ** upsilon)) ** (-1))))
-        d1 = ((b_ellip / l_tilde) * ((eps_high / l_tilde) **
-              (upsilon - 1)) *
-              ((1 - ((eps_high / l_tilde) ** upsilon)) **
-              ((1 - upsilon) / upsilon)) - (2 * d2 * eps_high))
-        MDU_n[nvec_high] = 2 * d2 * nvec[nvec_high] + d1
+    eps_low, eps_high, b1, b2, d1, d2 = get_MDU_n_coefs(params)
+    MDU_n = kern.mdu_n(nvec, params, (eps_low, eps_high, b1, b2, d1, d2))
 
     if graph:
         '''
@@ -344,6 +270,9 @@ def MDU_n_stitch(nvec, params, graph=False):
                       consumption
         ----------------------------------------------------------------
         '''
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import MultipleLocator
+
         # Create directory if images directory does not already exist
         cur_path = os.path.split(os.path.abspath(__file__))[0]
         output_fldr = "images"
@@ -388,6 +317,275 @@ def MDU_n_stitch(nvec, params, graph=False):
     return MDU_n
 
 
+def get_MU_c_coefs(sigma):
+    '''
+    --------------------------------------------------------------------
+    Generate the bound and the coefficients of the linear stitched
+    marginal utility of consumption function used in MU_c_stitch() at
+    the lower bound of consumption
+    --------------------------------------------------------------------
+    INPUTS:
+    sigma = scalar >= 1, coefficient of relative risk aversion for CRRA
+            utility function
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    epsilon = scalar > 0, positive value close to zero
+    b1      = scalar, intercept value in linear marginal utility
+    b2      = scalar, slope coefficient in linear marginal utility
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: epsilon, b1, b2
+    --------------------------------------------------------------------
+    '''
+    epsilon = 0.0001
+    b2 = (-sigma * (epsilon ** (-sigma - 1))) / 2
+    b1 = (epsilon ** (-sigma)) - 2 * b2 * epsilon
+
+    return epsilon, b1, b2
+
+
+def get_MDU_n_coefs(params):
+    '''
+    --------------------------------------------------------------------
+    Generate the bounds and the coefficients of the linear stitched
+    marginal disutility of labor functions used in MDU_n_stitch() at the
+    lower bound and upper bound of labor supply
+    --------------------------------------------------------------------
+    INPUTS:
+    params = length 3 tuple, (l_tilde, b_ellip, upsilon)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    l_tilde  = scalar > 0, time endowment for each agent each per
+    b_ellip  = scalar > 0, scale parameter for elliptical utility of
+               leisure function
+    upsilon  = scalar > 1, shape parameter for elliptical utility of
+               leisure function
+    eps_low  = scalar > 0, positive value close to zero
+    eps_high = scalar > 0, positive value just less than l_tilde
+    b1       = scalar, intercept value in linear marginal disutility of
+               labor at lower bound
+    b2       = scalar, slope coefficient in linear marginal disutility
+               of labor at lower bound
+    d1       = scalar, intercept value in linear marginal disutility of
+               labor at upper bound
+    d2       = scalar, slope coefficient in linear marginal disutility
+               of labor at upper bound
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: eps_low, eps_high, b1, b2, d1, d2
+    --------------------------------------------------------------------
+    '''
+    l_tilde, b_ellip, upsilon = params
+    eps_low = 0.000001
+    eps_high = l_tilde - 0.000001
+    b2 = (0.5 * b_ellip * (l_tilde ** (-upsilon)) * (upsilon - 1) *
+          (eps_low ** (upsilon - 2)) *
+          ((1 - ((eps_low / l_tilde) ** upsilon)) **
+          ((1 - upsilon) / upsilon)) *
+          (1 + ((eps_low / l_tilde) ** upsilon) *
+          ((1 - ((eps_low / l_tilde) ** upsilon)) ** (-1))))
+    b1 = ((b_ellip / l_tilde) * ((eps_low / l_tilde) **
+          (upsilon - 1)) *
+          ((1 - ((eps_low / l_tilde) ** upsilon)) **
+          ((1 - upsilon) / upsilon)) - (2 * b2 * eps_low))
+    d2 = (0.5 * b_ellip * (l_tilde ** (-upsilon)) * (upsilon - 1) *
+          (eps_high ** (upsilon - 2)) *
+          ((1 - ((eps_high / l_tilde) ** upsilon)) **
+          ((1 - upsilon) / upsilon)) *
+          (1 + ((eps_high / l_tilde) ** upsilon) *
+          ((1 - ((eps_high / l_tilde) ** upsilon)) ** (-1))))
+    d1 = ((b_ellip / l_tilde) * ((eps_high / l_tilde) **
+          (upsilon - 1)) *
+          ((1 - ((eps_high / l_tilde) ** upsilon)) **
+          ((1 - upsilon) / upsilon)) - (2 * d2 * eps_high))
+
+    return eps_low, eps_high, b1, b2, d1, d2
+
+
+def get_n_closed(params, w, cvec):
+    '''
+    --------------------------------------------------------------------
+    Solve the static labor supply Euler equation for a whole vector (or
+    matrix) of consumption values at once, without a root finder.
+
+    w * e * u'(c) = chi_n * v'(n)
+
+    The elliptical marginal disutility of labor can be written as
+
+    v'(n) = (b / l_tilde) * (z ** ((upsilon - 1) / upsilon)),
+        where z = (n / l_tilde) ** upsilon /
+                  (1 - (n / l_tilde) ** upsilon)
+
+    which is monotonically increasing in n and inverts in closed form.
+    The linear stitched functions at the lower and upper bounds of labor
+    supply in MDU_n_stitch() invert trivially. The resulting labor
+    supply is the unique root of get_n_errors() for either version of
+    the Euler errors.
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = length 6 tuple, (evec, sigma, l_tilde, chi_n_vec,
+                b_ellip, upsilon)
+    evec      = (p,) vector or (p, N) matrix, ability over remaining life
+    sigma     = scalar > 0, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, time endowment of each agent in each period
+    chi_n_vec = (p,) vector or (p, N) matrix, values for chi^n_p
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    w         = scalar > 0 or (p,) vector or (p, N) matrix, steady-state
+                wage or time path of wage
+    cvec      = (p,) vector or (p, N) matrix, consumption by age c_p
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        MU_c_stitch()
+        get_MDU_n_coefs()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    mu_c       = (p,) vector or (p, N) matrix, marginal utility of
+                 consumption
+    mdu_n      = (p,) vector or (p, N) matrix, marginal disutility of
+                 labor supply implied by the labor supply Euler equation
+    eps_low    = scalar > 0, lower bound of elliptical part of v'(n)
+    eps_high   = scalar > 0, upper bound of elliptical part of v'(n)
+    b1         = scalar, intercept of stitched v'(n) at lower bound
+    b2         = scalar, slope of stitched v'(n) at lower bound
+    d1         = scalar, intercept of stitched v'(n) at upper bound
+    d2         = scalar, slope of stitched v'(n) at upper bound
+    n_low      = boolean array, =True if solution n < eps_low
+    n_high     = boolean array, =True if solution n > eps_high
+    n_uncstr   = boolean array, =True if eps_low <= n <= eps_high
+    z          = (n_uncstr.sum(),) vector, transformed labor supply
+    nvec       = (p,) vector or (p, N) matrix, optimal labor supply
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: nvec
+    --------------------------------------------------------------------
+    '''
+    evec, sigma, l_tilde, chi_n_vec, b_ellip, upsilon = params
+    cvec = np.asarray(cvec, dtype=float)
+    mu_c = MU_c_stitch(cvec, sigma)
+    mdu_n = np.broadcast_to(w * evec * mu_c / chi_n_vec, cvec.shape)
+    eps_low, eps_high, b1, b2, d1, d2 = \
+        get_MDU_n_coefs((l_tilde, b_ellip, upsilon))
+    n_low = mdu_n < 2 * b2 * eps_low + b1
+    n_high = mdu_n > 2 * d2 * eps_high + d1
+    n_uncstr = np.logical_and(~n_low, ~n_high)
+    nvec = np.zeros(cvec.shape)
+    nvec[n_low] = (mdu_n[n_low] - b1) / (2 * b2)
+    nvec[n_high] = (mdu_n[n_high] - d1) / (2 * d2)
+    z = (mdu_n[n_uncstr] * l_tilde / b_ellip) ** (upsilon / (upsilon - 1))
+    nvec[n_uncstr] = l_tilde * ((z / (1 + z)) ** (1 / upsilon))
+
+    return nvec
+
+
+def get_MU_c_deriv(cvec, sigma):
+    '''
+    --------------------------------------------------------------------
+    Generate the derivative of the stitched marginal utility of
+    consumption in MU_c_stitch() with respect to consumption
+
+    u''(c) = -sigma * c ** (-sigma - 1) if c >= epsilon
+           = g''(c) = 2 * b2 if c < epsilon
+    --------------------------------------------------------------------
+    INPUTS:
+    cvec  = scalar or array, consumption
+    sigma = scalar >= 1, coefficient of relative risk aversion for CRRA
+            utility function
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_MU_c_coefs()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    epsilon  = scalar > 0, positive value close to zero
+    b1       = scalar, intercept value in linear marginal utility
+    b2       = scalar, slope coefficient in linear marginal utility
+    dMU_c_dc = scalar or array, derivative of marginal utility of
+               consumption with the shape of cvec
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: dMU_c_dc
+    --------------------------------------------------------------------
+    '''
+    epsilon, b1, b2 = get_MU_c_coefs(sigma)
+    cvec = np.asarray(cvec, dtype=float)
+    dMU_c_dc = np.where(cvec < epsilon, 2 * b2,
+                        -sigma * (np.maximum(cvec, epsilon) **
+                                  (-sigma - 1)))
+
+    return dMU_c_dc
+
+
+def get_MDU_n_deriv(nvec, params):
+    '''
+    --------------------------------------------------------------------
+    Generate the derivative of the stitched marginal disutility of labor
+    in MDU_n_stitch() with respect to labor supply
+
+    v''(n) = (b / (l_tilde ** 2)) * (upsilon - 1) *
+             ((n / l_tilde) ** (upsilon - 2)) *
+             ((1 - ((n / l_tilde) ** upsilon)) ** ((1-upsilon)/upsilon)) *
+             (1 + ((n / l_tilde) ** upsilon) /
+              (1 - ((n / l_tilde) ** upsilon)))
+             if eps_low <= n <= eps_high
+           = 2 * b2 if n < eps_low
+           = 2 * d2 if n > eps_high
+    --------------------------------------------------------------------
+    INPUTS:
+    nvec   = scalar or array, labor supply
+    params = length 3 tuple, (l_tilde, b_ellip, upsilon)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_MDU_n_coefs()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    l_tilde   = scalar > 0, time endowment for each agent each period
+    b_ellip   = scalar > 0, scale parameter for elliptical utility of
+                leisure function
+    upsilon   = scalar > 1, shape parameter for elliptical utility of
+                leisure function
+    eps_low   = scalar > 0, lower bound of elliptical part of v'(n)
+    eps_high  = scalar > 0, upper bound of elliptical part of v'(n)
+    b1        = scalar, intercept of stitched v'(n) at lower bound
+    b2        = scalar, slope of stitched v'(n) at lower bound
+    d1        = scalar, intercept of stitched v'(n) at upper bound
+    d2        = scalar, slope of stitched v'(n) at upper bound
+    n_in      = array, nvec clipped to [eps_low, eps_high] and divided
+                by l_tilde
+    n_in_ups  = array, n_in ** upsilon
+    dMDU_n_dn = scalar or array, derivative of marginal disutility of
+                labor with the shape of nvec
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: dMDU_n_dn
+    --------------------------------------------------------------------
+    '''
+    l_tilde, b_ellip, upsilon = params
+    eps_low, eps_high, b1, b2, d1, d2 = get_MDU_n_coefs(params)
+    nvec = np.asarray(nvec, dtype=float)
+    n_in = np.minimum(np.maximum(nvec, eps_low), eps_high) / l_tilde
+    n_in_ups = n_in ** upsilon
+    dMDU_n_dn = np.where(
+        nvec < eps_low, 2 * b2,
+        np.where(nvec > eps_high, 2 * d2,
+                 (b_ellip / (l_tilde ** 2)) * (upsilon - 1) *
+                 (n_in ** (upsilon - 2)) *
+                 ((1 - n_in_ups) ** ((1 - upsilon) / upsilon)) *
+                 (1 + n_in_ups / (1 - n_in_ups))))
+
+    return dMDU_n_dn
+
+
 def get_n_js(n_js, *args):
     '''
     --------------------------------------------------------------------
@@ -462,14 +660,15 @@ def get_n_errors(params, w, cvec, nvec, diff):
                 Use percent difference errors otherwise.
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
-        MU_c_stitch()
-        MDU_n_stitch()
+        get_MU_c_coefs()
+        get_MDU_n_coefs()
+        kern.n_errors()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    mu_c     = (p,) vector, marginal utility of consumption
-    mu_n     = (p,) vector, marginal utility of labor supply
-    n_errors = (p,) vector, Euler errors characterizing optimal labor
-               supply nvec
+    kern_params = length 6 tuple, (sigma, c_coefs, l_tilde, b_ellip,
+                  upsilon, n_coefs) args to pass into kern.n_errors()
+    n_errors    = (p,) vector, Euler errors characterizing optimal labor
+                  supply nvec
 
     FILES CREATED BY THIS FUNCTION: None
 
@@ -477,13 +676,10 @@ def get_n_errors(params, w, cvec, nvec, diff):
     --------------------------------------------------------------------
     '''
     evec, sigma, l_tilde, chi_n_vec, b_ellip, upsilon = params
-    mu_c = MU_c_stitch(cvec, sigma)
-    mdun_params = (l_tilde, b_ellip, upsilon)
-    mdu_n = MDU_n_stitch(nvec, mdun_params)
-    if diff:
-        n_errors = (w * evec * mu_c) - chi_n_vec * mdu_n
-    else:
-        n_errors = ((w * evec * mu_c) / (chi_n_vec * mdu_n)) - 1
+    kern_params = (sigma, get_MU_c_coefs(sigma), l_tilde, b_ellip,
+                   upsilon, get_MDU_n_coefs((l_tilde, b_ellip, upsilon)))
+    n_errors = kern.n_errors(w, evec, cvec, nvec, chi_n_vec, kern_params,
+                             diff)
 
     return n_errors
 
@@ -509,11 +705,10 @@ def get_b_errors(params, r, cvec, diff):
               errors. Use percent difference errors otherwise.
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
-        MU_c_stitch()
+        get_MU_c_coefs()
+        kern.b_errors()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    mu_c     = (p-1,) vector, marginal utility of current consumption
-    mu_cp1   = (p-1,) vector, marginal utility of next period consumpt'n
     b_errors = (p-1,) vector, Euler errors characterizing optimal
                savings bvec
 
@@ -523,12 +718,8 @@ def get_b_errors(params, r, cvec, diff):
     --------------------------------------------------------------------
     '''
     beta, sigma = params
-    mu_c = MU_c_stitch(cvec[:-1], sigma)
-    mu_cp1 = MU_c_stitch(cvec[1:], sigma)
-    if diff:
-        b_errors = (beta * (1 + r) * mu_cp1) - mu_c
-    else:
-        b_errors = ((beta * (1 + r) * mu_cp1) / mu_c) - 1
+    b_errors = kern.b_errors(r, cvec, (beta, sigma, get_MU_c_coefs(sigma)),
+                             diff)
 
     return b_errors
 
@@ -536,216 +727,390 @@ def get_b_errors(params, r, cvec, diff):
 def bn_solve(guesses, *args):
     '''
     --------------------------------------------------------------------
-    Finds the euler errors for certain b and n, one ability type at a time.
+    Generate the stacked vector of Euler errors of one household's
+    remaining lifetime of p periods given its savings b_{s+1} for the
+    first p-1 periods and its labor supply n_s for all p periods.
+    Initial wealth b_{S-p+1} is given and savings after the last period
+    of life are set to zero, so that the p-1 savings Euler equations
+    and p labor supply Euler equations are 2p-1 equations in the 2p-1
+    unknowns. The budget constraints use the same ability indexing as
+    get_cnb_vecs(), so the root of this system is the same lifetime as
+    the one found by shooting on c1.
     --------------------------------------------------------------------
     INPUTS:
-    guesses = (2S-1,) vector, initial guesses for b and n
-    params  = length 10 tuple, r, w, S, beta, sigma, l_tilde, b_ellip,
-              upsilon, chi_n_vec, diff
+    guesses = (2p-1,) vector, (b_{S-p+2},...b_S, n_{S-p+1},...n_S)
+    args    = length 11 tuple, (b_init, evec, beta, sigma, l_tilde,
+              b_ellip, upsilon, chi_n_vec, rpath, wpath, diff)
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         FOC_savings()
         FOC_labor()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    r         = scalar, real interest rate
-    w         = scalar, real wage rate
-    S         =
-    beta      =
-    sigma     =
-    l_tilde   =
-    b_ellip   =
-    upsilon   =
-    chi_n_vec =
-    diff      =
-    b_guess   = [S,] vector, initial guess at household savings
-    n_guess   = [S,] vector, initial guess at household labor supply
-    b_s       = [S,] vector, wealth enter period with
-    b_splus1  = [S,] vector, household savings
-    b_splus2  = [S,] vector, household savings one period ahead
-    b_params  =
-    error1    = [S,] vector, errors from FOC for savings
-    n_params  =
-    error2    = [S,] vector, errors from FOC for labor supply
-    tax1 = [S,] vector, total income taxes paid
-    cons = [S,] vector, household consumption
-    RETURNS: 2Sx1 list of euler errors
-    OUTPUT: None
-    --------------------------------------------------------------------
-    '''
-    (r, w, S, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
-        diff) = args
-    b_guess = np.append(np.array(guesses[:S - 1]), 0.0)
-    n_guess = np.array(guesses[S - 1:])
-    b_s = np.array([0] + list(b_guess[:-1]))
-    b_splus1 = b_guess
-    b_splus2 = np.array(list(b_guess[1:]) + [0])
-    b_params = (sigma, beta, S, diff, 'SS')
-    error1 = FOC_savings(r, w, b_s, b_splus1, b_splus2, n_guess, b_params)
-    n_params = (sigma, l_tilde, b_ellip, upsilon, chi_n_vec, S, diff, 'SS')
-    error2 = FOC_labor(r, w, b_s, b_splus1, n_guess, n_params)
-
-    # Put in constraints for consumption and savings.
-    # According to the euler equations, they can be negative.  When
-    # Chi_b is large, they will be.  This prevents that from happening.
-    # I'm not sure if the constraints are needed for labor.
-    # But we might as well put them in for now.
-    # mask1 = n_guess < 0
-    # mask2 = n_guess > l_tilde
-    # #mask3 = b_guess <= 0
-    # mask4 = np.isnan(n_guess)
-    # mask5 = np.isnan(b_guess)
-    # error2[mask1] = 1e14
-    # error2[mask2] = 1e14
-    # #error1[mask3] = 1e14
-    # error1[mask5] = 1e14
-    # error2[mask4] = 1e14
-
-    # cons = hh.get_cons(r, w, b_s, b_splus1, n_guess)
-    # mask6 = cons < 0
-    # error1[mask6] = 1e14
-
-    return list(error1.flatten()) + list(error2.flatten())
-
-
-def FOC_savings(r, w, b, b_splus1, b_splus2, n, params):
-    '''
-    Computes Euler errors for the FOC for savings in the steady state.
-    This function is usually looped through over J, so it does one lifetime income group at a time.
-    Inputs:
-        r           = scalar, interest rate
-        w           = scalar, wage rate
-        b           = [S,J] array, distribution of wealth/capital holdings
-        b_splus1    = [S,J] array, distribution of wealth/capital holdings one period ahead
-        b_splus2    = [S,J] array, distribution of wealth/capital holdings two periods ahead
-        n           = [S,J] array, distribution of labor supply
-        BQ          = [J,] vector, aggregate bequests by lifetime income group
-        factor      = scalar, scaling factor to convert model income to dollars
-        T_H         = scalar, lump sum transfer
-        params      = length 18 tuple (e, sigma, beta, g_y, chi_b, theta, tau_bq, rho, lambdas,
-                                    J, S, etr_params, mtry_params, h_wealth, p_wealth,
-                                    m_wealth, tau_payroll, tau_bq)
-        e           = [S,J] array, effective labor units
-        sigma       = scalar, coefficient of relative risk aversion
-        beta        = scalar, discount factor
-        g_y         = scalar, exogenous labor augmenting technological growth
-        chi_b       = [J,] vector, utility weight on bequests for each lifetime income group
-        theta       = [J,] vector, replacement rate for each lifetime income group
-        tau_bq      = scalar, bequest tax rate (scalar)
-        rho         = [S,] vector, mortality rates
-        lambdas     = [J,] vector, ability weights
-        J           = integer, number of lifetime income groups
-        S           = integer, number of economically active periods in lifetime
-        etr_params  = [S,12] array, parameters of effective income tax rate function
-        mtry_params = [S,12] array, parameters of marginal tax rate on capital income function
-        h_wealth    = scalar, parameter in wealth tax function
-        p_wealth    = scalar, parameter in wealth tax function
-        m_wealth    = scalar, parameter in wealth tax function
-        tau_payroll = scalar, payroll tax rate
-        tau_bq      = scalar, bequest tax rate
-    Functions called:
-        hh.get_cons
-        marg_ut_cons
-        tax.total_taxes
-        tax.MTR_capital
-    Objects in function:
-        tax1 = [S,J] array, net taxes in the current period
-        tax2 = [S,J] array, net taxes one period ahead
-        cons1 = [S,J] array, consumption in the current period
-        cons2 = [S,J] array, consumption one period ahead
-        deriv = [S,J] array, after-tax return on capital
-        savings_ut = [S,J] array, marginal utility from savings
-        euler = [S,J] array, Euler error from FOC for savings
-    Returns: euler
-    '''
-    sigma, beta, S, diff, method = params
-
-    if method == 'TPI_scalar':
-        n_extended = np.array([n] + [0])
-    else:
-        n_extended = np.array(list(n) + [0])
+    b_init    = scalar, initial wealth b_{S-p+1}
+    evec      = (p,) vector, ability path over remaining life
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s over remaining lifetime
+    rpath     = (p,) vector, path of interest rates over remaining life
+    wpath     = (p,) vector, path of wages over remaining lifetime
+    diff      = boolean, =True if simple difference Euler errors,
+                otherwise percent deviation Euler errors
+    p         = integer >= 1, number of periods remaining in lifetime
+    e_bc      = (p,) vector, ability that multiplies labor income in the
+                budget constraint of each period
+    bvec      = (p,) vector, wealth at the beginning of each period
+    b_splus1  = (p,) vector, savings of each period, the last of which
+                is zero
+    nvec      = (p,) vector, labor supply
+    b_params  = length 4 tuple, args to pass into FOC_savings()
+    b_errors  = (p-1,) vector, savings Euler errors
+    n_params  = length 8 tuple, args to pass into FOC_labor()
+    n_errors  = (p,) vector, labor supply Euler errors
+    errors    = (2p-1,) vector, stacked Euler errors (b_errors, n_errors)
 
-    cons = get_cons(r, w, b, b_splus1, n)
+    FILES CREATED BY THIS FUNCTION: None
 
-    # cons2 = hh.get_cons(r, w, b_splus1, b_splus2, n_extended[1:])
+    RETURNS: errors
+    --------------------------------------------------------------------
+    '''
+    (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        rpath, wpath, diff) = args
+    p = evec.shape[0]
+    e_bc = np.append(evec[1:], evec[-1])
+    bvec = np.append(b_init, guesses[:p - 1])
+    b_splus1 = np.append(guesses[:p - 1], 0.0)
+    nvec = np.asarray(guesses[p - 1:], dtype=float)
+    b_params = (e_bc, beta, sigma, diff)
+    b_errors = FOC_savings(rpath, wpath, bvec, b_splus1, nvec, b_params)
+    n_params = (evec, e_bc, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+                diff)
+    n_errors = FOC_labor(rpath, wpath, bvec, b_splus1, nvec, n_params)
+    errors = np.append(b_errors, n_errors)
+
+    return errors
+
+
+def FOC_savings(r, w, b, b_splus1, n, params):
+    '''
+    --------------------------------------------------------------------
+    Generate the savings Euler errors of a remaining lifetime given its
+    paths of wealth, savings, and labor supply
+    --------------------------------------------------------------------
+    INPUTS:
+    r        = (p,) vector, path of interest rates over remaining life
+    w        = (p,) vector, path of wages over remaining lifetime
+    b        = (p,) vector, wealth at the beginning of each period
+    b_splus1 = (p,) vector, savings of each period
+    n        = (p,) vector, labor supply
+    params   = length 4 tuple, (e_bc, beta, sigma, diff)
 
-    # mu_c = hh.MU_c_stitch(cons1, sigma)
-    # mu_cp1 = hh.MU_c_stitch(cons2[:-1], sigma)
-    mu_c = MU_c_stitch(cons[:-1], sigma)
-    mu_cp1 = MU_c_stitch(cons[1:], sigma)
-    if diff:
-        b_errors = (beta * (1 + r) * mu_cp1) - mu_c
-    else:
-        b_errors = ((beta * (1 + r) * mu_cp1) / mu_c) - 1
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cons()
+        get_b_errors()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    e_bc     = (p,) vector, ability that multiplies labor income in the
+               budget constraint of each period
+    beta     = scalar in (0, 1), discount factor
+    sigma    = scalar >= 1, coefficient of relative risk aversion
+    diff     = boolean, =True if simple difference Euler errors,
+               otherwise percent deviation Euler errors
+    cvec     = (p,) vector, consumption implied by budget constraints
+    b_errors = (p-1,) vector, savings Euler errors
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: b_errors
+    --------------------------------------------------------------------
+    '''
+    e_bc, beta, sigma, diff = params
+    cvec = get_cons(r, w * e_bc, b, b_splus1, n)
+    b_errors = get_b_errors((beta, sigma), r[1:], cvec, diff)
 
     return b_errors
 
 
 def FOC_labor(r, w, b, b_splus1, n, params):
     '''
-    Computes Euler errors for the FOC for labor supply in the steady state.
-    This function is usually looped through over J, so it does one lifetime income group at a time.
-    Inputs:
-        r           = scalar, interest rate
-        w           = scalar, wage rate
-        b           = [S,J] array, distribution of wealth/capital holdings
-        b_splus1    = [S,J] array, distribution of wealth/capital holdings one period ahead
-        n           = [S,J] array, distribution of labor supply
-        BQ          = [J,] vector, aggregate bequests by lifetime income group
-        factor      = scalar, scaling factor to convert model income to dollars
-        T_H         = scalar, lump sum transfer
-        params      = length 19 tuple (e, sigma, g_y, theta, b_ellipse, upsilon, ltilde,
-                                    chi_n, tau_bq, lambdas, J, S,
-                                    etr_params, mtrx_params, h_wealth, p_wealth,
-                                    m_wealth, tau_payroll, tau_bq)
-        e           = [S,J] array, effective labor units
-        sigma       = scalar, coefficient of relative risk aversion
-        g_y         = scalar, exogenous labor augmenting technological growth
-        theta       = [J,] vector, replacement rate for each lifetime income group
-        b_ellipse   = scalar, scaling parameter in elliptical utility function
-        upsilon     = curvature parameter in elliptical utility function
-        chi_n       = [S,] vector, utility weights on disutility of labor
-        ltilde      = scalar, upper bound of household labor supply
-        tau_bq      = scalar, bequest tax rate (scalar)
-        lambdas     = [J,] vector, ability weights
-        J           = integer, number of lifetime income groups
-        S           = integer, number of economically active periods in lifetime
-        etr_params  = [S,10] array, parameters of effective income tax rate function
-        mtrx_params = [S,10] array, parameters of marginal tax rate on labor income function
-        h_wealth    = scalar, parameter in wealth tax function
-        p_wealth    = scalar, parameter in wealth tax function
-        m_wealth    = scalar, parameter in wealth tax function
-        tau_payroll = scalar, payroll tax rate
-        tau_bq      = scalar, bequest tax rate
-    Functions called:
-        hh.get_cons
-        marg_ut_cons
-        marg_ut_labor
-        tax.total_taxes
-        tax.MTR_labor
-    Objects in function:
-        tax = [S,J] array, net taxes in the current period
-        cons = [S,J] array, consumption in the current period
-        deriv = [S,J] array, net of tax share of labor income
-        euler = [S,J] array, Euler error from FOC for labor supply
-    Returns: euler
-    '''
-    sigma, l_tilde, b_ellip, upsilon, chi_n, S, diff, method   = params
-
-    cons = get_cons(r, w, b, b_splus1, n)
-
-    mu_c = MU_c_stitch(cons, sigma)
-    mdun_params = (l_tilde, b_ellip, upsilon)
-    mdu_n = MDU_n_stitch(n, mdun_params)
+    --------------------------------------------------------------------
+    Generate the labor supply Euler errors of a remaining lifetime given
+    its paths of wealth, savings, and labor supply
+    --------------------------------------------------------------------
+    INPUTS:
+    r        = (p,) vector, path of interest rates over remaining life
+    w        = (p,) vector, path of wages over remaining lifetime
+    b        = (p,) vector, wealth at the beginning of each period
+    b_splus1 = (p,) vector, savings of each period
+    n        = (p,) vector, labor supply
+    params   = length 8 tuple, (evec, e_bc, sigma, l_tilde, b_ellip,
+               upsilon, chi_n_vec, diff)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cons()
+        get_n_errors()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    evec      = (p,) vector, ability path over remaining life
+    e_bc      = (p,) vector, ability that multiplies labor income in the
+                budget constraint of each period
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s over remaining lifetime
+    diff      = boolean, =True if simple difference Euler errors,
+                otherwise percent deviation Euler errors
+    cvec      = (p,) vector, consumption implied by budget constraints
+    n_params  = length 6 tuple, args to pass into get_n_errors()
+    n_errors  = (p,) vector, labor supply Euler errors
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: n_errors
+    --------------------------------------------------------------------
+    '''
+    (evec, e_bc, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        diff) = params
+    cvec = get_cons(r, w * e_bc, b, b_splus1, n)
+    n_params = (evec, sigma, l_tilde, chi_n_vec, b_ellip, upsilon)
+    n_errors = get_n_errors(n_params, w, cvec, n, diff)
+
+    return n_errors
+
+
+def get_bn_jac(guesses, *args):
+    '''
+    --------------------------------------------------------------------
+    Generate the Jacobian of the stacked Euler errors of bn_solve() with
+    respect to (b, n) in the banded storage of scipy.linalg.solve_banded
+    with two sub-diagonals and two super-diagonals. The unknowns and the
+    equations are interleaved by period,
+
+        x = (n_1, b_2, n_2, b_3, ..., b_p, n_p)
+        F = (n_err_1, b_err_1, n_err_2, b_err_2, ..., b_err_{p-1},
+             n_err_p)
+
+    so that the labor supply error of period s only depends on b_s, n_s,
+    and b_{s+1} and the savings error between periods s and s+1 only
+    depends on b_s, n_s, b_{s+1}, n_{s+1}, and b_{s+2}. In the (b, n)
+    blocks of bn_solve() this is the tridiagonal dependence of the
+    savings errors on b and the diagonal dependence of the labor supply
+    errors on n.
+    --------------------------------------------------------------------
+    INPUTS:
+    guesses = (2p-1,) vector, (b_{S-p+2},...b_S, n_{S-p+1},...n_S)
+    args    = length 11 tuple, (b_init, evec, beta, sigma, l_tilde,
+              b_ellip, upsilon, chi_n_vec, rpath, wpath, diff)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cons()
+        MU_c_stitch()
+        MDU_n_stitch()
+        get_MU_c_deriv()
+        get_MDU_n_deriv()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    b_init    = scalar, initial wealth b_{S-p+1}
+    evec      = (p,) vector, ability path over remaining life
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s over remaining lifetime
+    rpath     = (p,) vector, path of interest rates over remaining life
+    wpath     = (p,) vector, path of wages over remaining lifetime
+    diff      = boolean, =True if simple difference Euler errors,
+                otherwise percent deviation Euler errors
+    p         = integer >= 1, number of periods remaining in lifetime
+    e_bc      = (p,) vector, ability that multiplies labor income in the
+                budget constraint of each period
+    bvec      = (p,) vector, wealth at the beginning of each period
+    b_splus1  = (p,) vector, savings of each period
+    nvec      = (p,) vector, labor supply
+    cvec      = (p,) vector, consumption implied by budget constraints
+    mu_c      = (p,) vector, marginal utility of consumption
+    dmu_c     = (p,) vector, derivative of mu_c with respect to c
+    mdu_n     = (p,) vector, marginal disutility of labor
+    dmdu_n    = (p,) vector, derivative of mdu_n with respect to n
+    dc_db     = (p,) vector, derivative of c_s with respect to b_s
+    dc_dn     = (p,) vector, derivative of c_s with respect to n_s
+    dF_dA     = (p,) vector, derivative of labor supply error with
+                respect to w * e * u'(c)
+    dF_dB     = (p,) vector, derivative of labor supply error with
+                respect to chi^n * v'(n)
+    P_vec     = (p-1,) vector, beta * (1 + r_{s+1}) * u'(c_{s+1})
+    dG_dP     = (p-1,) vector, derivative of savings error with respect
+                to P_vec
+    dG_dQ     = (p-1,) vector, derivative of savings error with respect
+                to u'(c_s)
+    n_row     = (p,) vector, derivative of labor supply errors with
+                respect to c_s
+    b_row_c   = (p-1,) vector, derivative of savings errors with respect
+                to c_s
+    b_row_cp1 = (p-1,) vector, derivative of savings errors with respect
+                to c_{s+1}
+    jac_band  = (5, 2p-1) matrix, banded Jacobian, element [2+i-k, k]
+                of which is the derivative of F_i with respect to x_k
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: jac_band
+    --------------------------------------------------------------------
+    '''
+    (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        rpath, wpath, diff) = args
+    p = evec.shape[0]
+    e_bc = np.append(evec[1:], evec[-1])
+    bvec = np.append(b_init, guesses[:p - 1])
+    b_splus1 = np.append(guesses[:p - 1], 0.0)
+    nvec = np.asarray(guesses[p - 1:], dtype=float)
+    cvec = get_cons(rpath, wpath * e_bc, bvec, b_splus1, nvec)
+    mu_c = MU_c_stitch(cvec, sigma)
+    dmu_c = get_MU_c_deriv(cvec, sigma)
+    mdu_n = MDU_n_stitch(nvec, (l_tilde, b_ellip, upsilon))
+    dmdu_n = get_MDU_n_deriv(nvec, (l_tilde, b_ellip, upsilon))
+    dc_db = 1 + rpath
+    dc_dn = wpath * e_bc
+    P_vec = beta * (1 + rpath[1:]) * mu_c[1:]
     if diff:
-        n_errors = (w * mu_c) - chi_n * mdu_n
+        dF_dA = np.ones(p)
+        dF_dB = -np.ones(p)
+        dG_dP = np.ones(p - 1)
+        dG_dQ = -np.ones(p - 1)
     else:
-        n_errors = ((w * mu_c) / (chi_n * mdu_n)) - 1
+        dF_dA = 1 / (chi_n_vec * mdu_n)
+        dF_dB = -(wpath * evec * mu_c) / ((chi_n_vec * mdu_n) ** 2)
+        dG_dP = 1 / mu_c[:-1]
+        dG_dQ = -P_vec / (mu_c[:-1] ** 2)
+    n_row = dF_dA * wpath * evec * dmu_c
+    b_row_c = dG_dQ * dmu_c[:-1]
+    b_row_cp1 = dG_dP * beta * (1 + rpath[1:]) * dmu_c[1:]
+    jac_band = np.zeros((5, 2 * p - 1))
+    # Labor supply error of period s in row 2s
+    jac_band[2, 0::2] = n_row * dc_dn + dF_dB * chi_n_vec * dmdu_n
+    jac_band[3, 1::2] = n_row[1:] * dc_db[1:]
+    jac_band[1, 1::2] = -n_row[:-1]
+    # Savings error between periods s and s+1 in row 2s+1
+    jac_band[4, 1:2 * p - 4:2] = b_row_c[1:] * dc_db[1:p - 1]
+    jac_band[3, 0::2][:p - 1] = b_row_c * dc_dn[:-1]
+    jac_band[2, 1::2] = -b_row_c + b_row_cp1 * dc_db[1:]
+    jac_band[1, 2::2] = b_row_cp1 * dc_dn[1:]
+    jac_band[0, 3::2] = -b_row_cp1[:-1]
+
+    return jac_band
+
+
+def solve_bn(bn_init, args, tol=1e-13, maxiter=100):
+    '''
+    --------------------------------------------------------------------
+    Solve the stacked Euler equations of bn_solve() for the savings and
+    labor supply of one household's remaining lifetime by Newton's
+    method with the banded Jacobian of get_bn_jac(), which costs O(p)
+    per iteration. Each Newton step is halved until the sum of squared
+    Euler errors falls, up to 30 times. If it never falls, the iteration
+    stops at the current guess, which counts as converged (the Euler
+    errors are at their rounding floor) only if the full Newton step is
+    within the step tolerance.
+    --------------------------------------------------------------------
+    INPUTS:
+    bn_init = (2p-1,) vector, initial guess (b_{S-p+2},...b_S,
+              n_{S-p+1},...n_S)
+    args    = length 11 tuple, args to pass into bn_solve() and
+              get_bn_jac()
+    tol     = scalar > 0, convergence tolerance on the maximum absolute
+              Euler error and on the relative size of the Newton step
+    maxiter = integer >= 1, maximum number of Newton iterations
 
-    return n_errors
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        bn_solve()
+        get_bn_jac()
+        scipy.linalg.solve_banded()
 
+    OBJECTS CREATED WITHIN FUNCTION:
+    p        = integer >= 1, number of periods remaining in lifetime
+    order    = (2p-1,) vector, indices of the interleaved unknowns and
+               equations of get_bn_jac() in the stacked vectors of
+               bn_solve()
+    bn_vec   = (2p-1,) vector, current guess of (b, n)
+    errors   = (2p-1,) vector, stacked Euler errors at bn_vec
+    sumsq    = scalar >= 0, sum of squared Euler errors at bn_vec
+    iter_bn  = integer >= 0, iteration number
+    success  = boolean, =True if Newton's method converged
+    jac_band = (5, 2p-1) matrix, banded Jacobian at bn_vec
+    step     = (2p-1,) vector, Newton step
+    lam      = scalar in (0, 1], step length
+    bn_new   = (2p-1,) vector, trial guess of (b, n)
+    err_new  = (2p-1,) vector, stacked Euler errors at bn_new
+    sumsq_new = scalar >= 0, sum of squared Euler errors at bn_new
+    halving  = integer >= 0, number of step halvings
 
-def get_cnb_vecs(c_init, rpath, wpath, params):
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: bn_vec, errors, success, iter_bn
+    --------------------------------------------------------------------
+    '''
+    p = args[1].shape[0]
+    order = np.zeros(2 * p - 1, dtype=int)
+    order[0::2] = np.arange(p - 1, 2 * p - 1)
+    order[1::2] = np.arange(p - 1)
+    bn_vec = np.array(bn_init, dtype=float)
+    errors = bn_solve(bn_vec, *args)
+    sumsq = (errors ** 2).sum()
+    iter_bn = 0
+    success = np.absolute(errors).max() <= tol
+    while (not success) and (iter_bn < maxiter):
+        iter_bn += 1
+        jac_band = get_bn_jac(bn_vec, *args)
+        if p == 1:
+            # solve_banded() does not read the diagonal row of a 1 x 1
+            # system stored with sub- and super-diagonals
+            step = -errors / jac_band[2]
+        else:
+            step = np.zeros(2 * p - 1)
+            step[order] = sla.solve_banded((2, 2), jac_band,
+                                           -errors[order],
+                                           check_finite=False)
+        lam = 1.0
+        halving = 0
+        sumsq_new = np.inf
+        while np.isfinite(step).all() and (halving <= 30):
+            bn_new = bn_vec + lam * step
+            err_new = bn_solve(bn_new, *args)
+            sumsq_new = (err_new ** 2).sum()
+            if sumsq_new < sumsq:
+                break
+            lam = lam / 2
+            halving += 1
+        if not (sumsq_new < sumsq):
+            # No descent along the Newton step (or a singular
+            # Jacobian): stop at the best guess found so far
+            success = (np.isfinite(step).all() and
+                       (np.absolute(step).max() <=
+                        tol * (1 + np.absolute(bn_vec).max())))
+            break
+        bn_vec = bn_new
+        errors = err_new
+        sumsq = sumsq_new
+        success = ((np.absolute(errors).max() <= tol) or
+                   (np.absolute(lam * step).max() <=
+                    tol * (1 + np.absolute(bn_vec).max())))
+
+    return bn_vec, errors, success, iter_bn
+
+
+def get_cnb_vecs(c_init, rpath, wpath, params, n_method='root',
+                 monitor=None):
     '''
     --------------------------------------------------------------------
     Generate lifetime consumption vector for individual given a guess
@@ -756,17 +1121,36 @@ def get_cnb_vecs(c_init, rpath, wpath, params):
     c_{s+1,t+1} = c_{s,t} * ([beta * (1 + r_{t+1})] ** (1 / sigma))
 
     w_t * e_{j,s} * (c_{s,t} ** (-sigma)) = chi_n_s * g'(n_{s,t})
+
+    With n_method='root', the labor supply Euler equation is solved
+    with a separate root finder for each period of the lifetime. With
+    n_method='closed', the consumption path is computed all at once and
+    the labor supply path is solved in closed form by get_n_closed().
+    With n_method='brent', the consumption path is computed all at once
+    and the labor supply Euler equations of all periods are solved
+    together by the vectorized root finder rootfinder.root_vec(). All
+    methods return the same solution up to the root finder tolerance.
     --------------------------------------------------------------------
     INPUTS:
-    c_init = scalar > 0, consumption in initial period of lifetime
-             c_{S-p+1}
-    rpath  = (p,) vector, path of interest rates over lifetime
-    wpath  = (p,) vector, path of wages over lifetime
-    params = length 9 tuple, (b_init, evec, beta, sigma, l_tilde,
-             b_ellip, upsilon, chi_n_vec, diff)
+    c_init   = scalar > 0, consumption in initial period of lifetime
+               c_{S-p+1}
+    rpath    = (p,) vector, path of interest rates over lifetime
+    wpath    = (p,) vector, path of wages over lifetime
+    params   = length 9 tuple, (b_init, evec, beta, sigma, l_tilde,
+               b_ellip, upsilon, chi_n_vec, diff)
+    n_method = string, 'root', 'closed', or 'brent', method used to
+               solve the labor supply Euler equations
+    monitor  = None or dictionary, monitor from instrument.get_monitor()
+               that counts the labor supply root finder calls
+               (n_root_calls), their function evaluations (n_root_nfev)
+               and failures (n_root_fail), and the closed form labor
+               supply solutions (n_closed_calls)
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         get_n_js()
+        get_n_closed()
+        rootfinder.root_vec()
+        inst.add_count()
 
     OBJECTS CREATED WITHIN FUNCTION:
     b_init    = scalar, initial wealth b_{S-p+1}
@@ -788,10 +1172,17 @@ def get_cnb_vecs(c_init, rpath, wpath, params):
     bvec      = (p,) vector, household lifetime savings given c_{S-p+1}
                 and b_{S-p+1} where b1=0
     per       = integer >= 1, index of period number
+    c_growth  = (p-1,) vector, gross growth rates of consumption implied
+                by the savings Euler equations
+    n_params  = length 6 tuple, args to pass into get_n_closed()
+    err_msg   = string, error message
     n_args    = length 9 tuple, (c_{j,s}, e_{j,s}, w_t, sigma, l_tilde,
                 chi_n_s, b_ellip, upsilon, diff)
     n_options = length 1 dict, options for opt.root(get_n_s,...)
     result_n  = results object, solution from opt.root(get_n_s,...)
+    n_errs    = (p,) vector, labor supply Euler errors at nvec
+    n_success = boolean, =True if rootfinder.root_vec() converged
+    n_nfev    = integer >= 1, number of evaluations of get_n_js()
     b_Sp1     = scalar, savings after the last period of life. Should be
                 zero in equilibrium
 
@@ -803,32 +1194,156 @@ def get_cnb_vecs(c_init, rpath, wpath, params):
     (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
         diff) = params
     p = rpath.shape[0]
-    cvec = np.zeros(p)
-    nvec = np.zeros(p)
-    bvec = np.zeros(p)
-    for per in range(p):
-        if per == 0:
-            bvec[per] = b_init
-            cvec[per] = c_init
+    if n_method == 'root':
+        cvec = np.zeros(p)
+        nvec = np.zeros(p)
+        bvec = np.zeros(p)
+        for per in range(p):
+            if per == 0:
+                bvec[per] = b_init
+                cvec[per] = c_init
+            else:
+                bvec[per] = ((1 + rpath[per - 1]) * bvec[per - 1] +
+                             wpath[per - 1] * evec[per] * nvec[per - 1] -
+                             cvec[per - 1])
+                cvec[per] = cvec[per - 1] * ((beta * (1 + rpath[per])) **
+                                             (1 / sigma))
+            n_args = (cvec[per], evec[per], wpath[per], sigma, l_tilde,
+                      chi_n_vec[per], b_ellip, upsilon, diff)
+            n_options = {'maxiter': 500}
+            result_n = \
+                opt.root(get_n_js, l_tilde / 2, args=(n_args),
+                         method='lm', tol=1e-14, options=(n_options))
+            nvec[per] = result_n.x
+            inst.add_count(monitor, 'n_root_calls')
+            inst.add_count(monitor, 'n_root_nfev', result_n.nfev)
+            if not result_n.success:
+                inst.add_count(monitor, 'n_root_fail')
+    elif n_method in ('closed', 'brent'):
+        c_growth = (beta * (1 + rpath[1:])) ** (1 / sigma)
+        cvec = c_init * np.append(1.0, np.cumprod(c_growth))
+        if n_method == 'closed':
+            n_params = (evec, sigma, l_tilde, chi_n_vec, b_ellip,
+                        upsilon)
+            nvec = get_n_closed(n_params, wpath, cvec)
+            inst.add_count(monitor, 'n_closed_calls')
         else:
+            n_args = (cvec, evec, wpath, sigma, l_tilde, chi_n_vec,
+                      b_ellip, upsilon, diff)
+            nvec, n_errs, n_success, n_nfev = \
+                rootfinder.root_vec(get_n_js, (l_tilde / 2) * np.ones(p),
+                                    args=n_args, method='brent',
+                                    tol=1e-14)
+            inst.add_count(monitor, 'n_root_calls')
+            inst.add_count(monitor, 'n_root_nfev', n_nfev)
+            if not n_success:
+                inst.add_count(monitor, 'n_root_fail')
+        bvec = np.zeros(p)
+        bvec[0] = b_init
+        for per in range(1, p):
             bvec[per] = ((1 + rpath[per - 1]) * bvec[per - 1] +
                          wpath[per - 1] * evec[per] * nvec[per - 1] -
                          cvec[per - 1])
-            cvec[per] = cvec[per - 1] * ((beta * (1 + rpath[per])) **
-                                         (1 / sigma))
-        n_args = (cvec[per], evec[per], wpath[per], sigma, l_tilde,
-                  chi_n_vec[per], b_ellip, upsilon, diff)
-        n_options = {'maxiter': 500}
-        result_n = \
-            opt.root(get_n_js, l_tilde / 2, args=(n_args),
-                     method='lm', tol=1e-14, options=(n_options))
-        nvec[per] = result_n.x
+    else:
+        err_msg = ('ERROR, get_cnb_vecs(): n_method must be ' +
+                   "'root', 'closed', or 'brent'.")
+        raise RuntimeError(err_msg)
     b_Sp1 = ((1 + rpath[-1]) * bvec[-1] +
              wpath[-1] * evec[-1] * nvec[-1] - cvec[-1])
 
     return cvec, nvec, bvec, b_Sp1
 
 
+def get_cnb_sens(cvec, nvec, rpath, wpath, params):
+    '''
+    --------------------------------------------------------------------
+    Given the lifetime decisions implied by initial consumption c1 from
+    get_cnb_vecs(), compute the derivatives of the lifetime decisions
+    and of b_{S+1} with respect to c1 by propagating the sensitivities
+    forward through the savings Euler equations, the labor supply Euler
+    equations, and the budget constraints (forward-mode sensitivity)
+
+    dc_s/dc1 = c_s / c1 = prod_{u=2}^s (beta * (1 + r_u)) ** (1/sigma)
+    dn_s/dc1 = (w_s * e_s * u''(c_s)) / (chi_n_s * v''(n_s)) * dc_s/dc1
+    db_{s+1}/dc1 = (1 + r_s) * db_s/dc1 + w_s * e_{s+1} * dn_s/dc1 -
+                   dc_s/dc1
+
+    The labor supply derivative follows from differentiating
+    w * e * u'(c) = chi_n * v'(n), which holds at the solution for
+    either version of the Euler errors and any n_method. The budget
+    constraint recursion uses the same ability indexing as
+    get_cnb_vecs(). The inputs can also be (p, N) matrices whose
+    columns are the lifetimes of N households from get_cnb_mat(), in
+    which case the sensitivities are computed for all N at once.
+    --------------------------------------------------------------------
+    INPUTS:
+    cvec   = (p,) vector or (p, N) matrix, household lifetime
+             consumption given c1
+    nvec   = (p,) vector or (p, N) matrix, household lifetime labor
+             supply given c1
+    rpath  = (p,) vector or (p, N) matrix, path of interest rates over
+             remaining life
+    wpath  = (p,) vector or (p, N) matrix, path of wages over remaining
+             lifetime
+    params = length 7 tuple, (evec, beta, sigma, l_tilde, b_ellip,
+             upsilon, chi_n_vec)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_MU_c_deriv()
+        get_MDU_n_deriv()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    evec      = (p,) vector or (p, N) matrix, ability path over
+                remaining life
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector or (p, 1) matrix, values for chi^n_s for
+                remaining lifetime
+    p         = integer >= 1, number of periods remaining in lifetime
+    c_growth  = (p-1,) vector or (p-1, N) matrix, consumption growth
+                factors implied by the savings Euler equations
+    dc_dc1    = (p,) vector or (p, N) matrix, derivative of cvec with
+                respect to c1
+    dn_dc     = (p,) vector or (p, N) matrix, derivative of optimal nvec
+                with respect to cvec from the labor supply Euler
+                equations
+    dn_dc1    = (p,) vector or (p, N) matrix, derivative of nvec with
+                respect to c1
+    db_dc1    = (p,) vector or (p, N) matrix, derivative of bvec with
+                respect to c1
+    dbSp1_dc1 = scalar or (N,) vector, derivative of b_{S+1} with
+                respect to c1
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: dc_dc1, dn_dc1, db_dc1, dbSp1_dc1
+    --------------------------------------------------------------------
+    '''
+    (evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec) = params
+    p = rpath.shape[0]
+    c_growth = (beta * (1 + rpath[1:])) ** (1 / sigma)
+    dc_dc1 = np.concatenate((np.ones((1,) + c_growth.shape[1:]),
+                             np.cumprod(c_growth, axis=0)))
+    dn_dc = ((wpath * evec * get_MU_c_deriv(cvec, sigma)) /
+             (chi_n_vec * get_MDU_n_deriv(nvec,
+                                          (l_tilde, b_ellip, upsilon))))
+    dn_dc1 = dn_dc * dc_dc1
+    db_dc1 = np.zeros(dc_dc1.shape)
+    for per in range(1, p):
+        db_dc1[per] = ((1 + rpath[per - 1]) * db_dc1[per - 1] +
+                       wpath[per - 1] * evec[per] * dn_dc1[per - 1] -
+                       dc_dc1[per - 1])
+    dbSp1_dc1 = ((1 + rpath[-1]) * db_dc1[-1] +
+                 wpath[-1] * evec[-1] * dn_dc1[-1] - dc_dc1[-1])
+
+    return dc_dc1, dn_dc1, db_dc1, dbSp1_dc1
+
+
 def c1_bSp1err(c_init, *args):
     '''
     --------------------------------------------------------------------
@@ -840,8 +1355,9 @@ def c1_bSp1err(c_init, *args):
     INPUTS:
     c_init = scalar > 0, assumed initial period consumption for
              individual
-    args   = length 11 tuple, (b_init, evec, beta, sigma, l_tilde,
-             b_ellip, upsilon, chi_n_vec, rpath, wpath, diff)
+    args   = length 12 or 13 tuple, (b_init, evec, beta, sigma,
+             l_tilde, b_ellip, upsilon, chi_n_vec, rpath, wpath, diff,
+             n_method[, monitor])
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         get_cnb_vecs()
@@ -861,6 +1377,10 @@ def c1_bSp1err(c_init, *args):
     wpath     = (p,) vector, path of wages over remaining lifetime
     diff      = boolean, =True if simple difference Euler errors,
                 otherwise percent deviation Euler errors
+    n_method  = string, 'root', 'closed', or 'brent', method used to
+                solve the labor supply Euler equations in get_cnb_vecs()
+    monitor   = None or dictionary, monitor passed to get_cnb_vecs(),
+                None if args has 12 elements
     cnb_args  = length 9 tuple, args to pass into get_cnb_vecs()
     cvec      = (p,) vector, household lifetime consumption given c1
     nvec      = (p,) vector, household lifetime labor supply given c1
@@ -877,10 +1397,443 @@ def c1_bSp1err(c_init, *args):
     --------------------------------------------------------------------
     '''
     (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
-        rpath, wpath, diff) = args
+        rpath, wpath, diff, n_method) = args[:12]
+    monitor = args[12] if len(args) > 12 else None
     cnb_args = (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon,
                 chi_n_vec, diff)
     cvec, nvec, bvec, b_Sp1 = get_cnb_vecs(c_init, rpath, wpath,
-                                           cnb_args)
+                                           cnb_args, n_method, monitor)
 
     return b_Sp1
+
+
+def c1_bSp1err_jac(c_init, *args):
+    '''
+    --------------------------------------------------------------------
+    Given value for c1, as well as w and r, return implied savings for
+    period after last period of life b_{S+1} as in c1_bSp1err() along
+    with its derivative with respect to c1 from get_cnb_sens(), so that
+    the shooting root finder can be called as
+
+        opt.root(c1_bSp1err_jac, c1_init, args=(c1_args), jac=True, ...)
+
+    instead of estimating the derivative by finite differences, each of
+    which re-solves the whole lifetime
+    --------------------------------------------------------------------
+    INPUTS:
+    c_init = scalar > 0 or (1,) vector, assumed initial period
+             consumption for individual
+    args   = length 12 or 13 tuple, (b_init, evec, beta, sigma,
+             l_tilde, b_ellip, upsilon, chi_n_vec, rpath, wpath, diff,
+             n_method[, monitor])
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cnb_vecs()
+        get_cnb_sens()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    b_init    = scalar, initial wealth of agent
+    evec      = (p,) vector, ability path over remaining life
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s for remaining lifetime
+    rpath     = (p,) vector, path of interest rates over remaining life
+    wpath     = (p,) vector, path of wages over remaining lifetime
+    diff      = boolean, =True if simple difference Euler errors,
+                otherwise percent deviation Euler errors
+    n_method  = string, 'root', 'closed', or 'brent', method used to
+                solve the labor supply Euler equations in get_cnb_vecs()
+    monitor   = None or dictionary, monitor passed to get_cnb_vecs(),
+                None if args has 12 elements
+    cnb_args  = length 9 tuple, args to pass into get_cnb_vecs()
+    cvec      = (p,) vector, household lifetime consumption given c1
+    nvec      = (p,) vector, household lifetime labor supply given c1
+    bvec      = (p,) vector, household lifetime savings given c1
+    b_Sp1     = scalar, residual savings in period after last period of
+                life, should be zero in equilibrium
+    sens_args = length 7 tuple, args to pass into get_cnb_sens()
+    dc_dc1    = (p,) vector, derivative of cvec with respect to c1
+    dn_dc1    = (p,) vector, derivative of nvec with respect to c1
+    db_dc1    = (p,) vector, derivative of bvec with respect to c1
+    dbSp1_dc1 = scalar, derivative of b_{S+1} with respect to c1
+    b_Sp1_jac = (1, 1) matrix, Jacobian of b_Sp1 with respect to c1
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: b_Sp1, b_Sp1_jac
+    --------------------------------------------------------------------
+    '''
+    (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        rpath, wpath, diff, n_method) = args[:12]
+    monitor = args[12] if len(args) > 12 else None
+    c_init = np.asarray(c_init, dtype=float).ravel()[0]
+    cnb_args = (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon,
+                chi_n_vec, diff)
+    cvec, nvec, bvec, b_Sp1 = get_cnb_vecs(c_init, rpath, wpath,
+                                           cnb_args, n_method, monitor)
+    sens_args = (evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec)
+    dc_dc1, dn_dc1, db_dc1, dbSp1_dc1 = \
+        get_cnb_sens(cvec, nvec, rpath, wpath, sens_args)
+    b_Sp1_jac = np.array([[dbSp1_dc1]])
+
+    return np.array([b_Sp1]), b_Sp1_jac
+
+
+def get_cnb_mat(c1_vec, rpath, wpath, params):
+    '''
+    --------------------------------------------------------------------
+    Generate the lifetime consumption, labor supply, and savings paths
+    of N households at once given a vector of guesses for their initial
+    consumption c_{S-p+1}. This is the batched version of
+    get_cnb_vecs() with n_method='closed', in which each column of the
+    output matrices is the lifetime of one household.
+
+    c_{s+1,t+1} = c_{s,t} * ([beta * (1 + r_{t+1})] ** (1 / sigma))
+
+    w_t * e_{j,s} * (c_{s,t} ** (-sigma)) = chi_n_s * g'(n_{s,t})
+    --------------------------------------------------------------------
+    INPUTS:
+    c1_vec = (N,) vector, consumption in initial period of each lifetime
+    rpath  = (p,) vector or (p, N) matrix, path of interest rates over
+             lifetime common to all N households or for each household
+    wpath  = (p,) vector or (p, N) matrix, path of wages over lifetime
+             common to all N households or for each household
+    params = length 9 tuple, (b_init, emat, beta, sigma, l_tilde,
+             b_ellip, upsilon, chi_n_vec, diff)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_n_closed()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    b_init    = scalar or (N,) vector, initial wealth b_{S-p+1}
+    emat      = (p, N) matrix, ability paths over remaining lives
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s over remaining lifetime
+    diff      = boolean, =True if simple difference Euler error,
+                otherwise percent deviation Euler error
+    p         = integer >= 1, number of periods remaining in lifetimes
+    N         = integer >= 1, number of households
+    rmat      = (p, N) matrix, interest rate paths for each household
+    wmat      = (p, N) matrix, wage paths for each household
+    c_growth  = (p-1, N) matrix, gross growth rates of consumption
+                implied by the savings Euler equations
+    cmat      = (p, N) matrix, lifetime consumption given c1_vec
+    n_params  = length 6 tuple, args to pass into get_n_closed()
+    nmat      = (p, N) matrix, lifetime labor supply given c1_vec
+    bmat      = (p, N) matrix, lifetime savings given c1_vec
+    per       = integer >= 1, index of period number
+    b_Sp1_vec = (N,) vector, savings after the last period of life.
+                Should be zero in equilibrium
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: cmat, nmat, bmat, b_Sp1_vec
+    --------------------------------------------------------------------
+    '''
+    (b_init, emat, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        diff) = params
+    p, N = emat.shape
+    rmat = np.broadcast_to(rpath.reshape((p, -1)), (p, N))
+    wmat = np.broadcast_to(wpath.reshape((p, -1)), (p, N))
+    c_growth = (beta * (1 + rmat[1:, :])) ** (1 / sigma)
+    cmat = np.vstack((np.ones((1, N)), np.cumprod(c_growth, axis=0)))
+    cmat = cmat * np.asarray(c1_vec, dtype=float).reshape((1, N))
+    n_params = (emat, sigma, l_tilde, chi_n_vec.reshape((p, 1)), b_ellip,
+                upsilon)
+    nmat = get_n_closed(n_params, wmat, cmat)
+    bmat = np.zeros((p, N))
+    bmat[0, :] = b_init
+    for per in range(1, p):
+        bmat[per, :] = ((1 + rmat[per - 1, :]) * bmat[per - 1, :] +
+                        wmat[per - 1, :] * emat[per, :] *
+                        nmat[per - 1, :] - cmat[per - 1, :])
+    b_Sp1_vec = ((1 + rmat[-1, :]) * bmat[-1, :] +
+                 wmat[-1, :] * emat[-1, :] * nmat[-1, :] - cmat[-1, :])
+
+    return cmat, nmat, bmat, b_Sp1_vec
+
+
+def c1_bSp1err_mat(c1_vec, *args):
+    '''
+    --------------------------------------------------------------------
+    Given a vector of values for c1 of N households, as well as w and r,
+    solve for the households' lifetime decisions and return the vector
+    of implied savings for the period after the last period of life
+    b_{S+1}. This is the batched version of c1_bSp1err(), whose ith
+    element only depends on the ith element of c1_vec.
+    --------------------------------------------------------------------
+    INPUTS:
+    c1_vec = (N,) vector, assumed initial period consumption for each
+             household
+    args   = length 11 tuple, (b_init, emat, beta, sigma, l_tilde,
+             b_ellip, upsilon, chi_n_vec, rpath, wpath, diff)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cnb_mat()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    b_init    = scalar or (N,) vector, initial wealth of each household
+    emat      = (p, N) matrix, ability paths over remaining lives
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s for remaining lifetime
+    rpath     = (p,) vector or (p, N) matrix, paths of interest rates
+                over remaining lives
+    wpath     = (p,) vector or (p, N) matrix, paths of wages over
+                remaining lives
+    diff      = boolean, =True if simple difference Euler errors,
+                otherwise percent deviation Euler errors
+    cnb_args  = length 9 tuple, args to pass into get_cnb_mat()
+    cmat      = (p, N) matrix, lifetime consumption given c1_vec
+    nmat      = (p, N) matrix, lifetime labor supply given c1_vec
+    bmat      = (p, N) matrix, lifetime savings given c1_vec
+    b_Sp1_vec = (N,) vector, residual savings in period after last
+                period of life of each household
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: b_Sp1_vec
+    --------------------------------------------------------------------
+    '''
+    (b_init, emat, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        rpath, wpath, diff) = args
+    cnb_args = (b_init, emat, beta, sigma, l_tilde, b_ellip, upsilon,
+                chi_n_vec, diff)
+    cmat, nmat, bmat, b_Sp1_vec = get_cnb_mat(c1_vec, rpath, wpath,
+                                              cnb_args)
+
+    return b_Sp1_vec
+
+
+def c1_bSp1err_mat_jac(c1_vec, *args):
+    '''
+    --------------------------------------------------------------------
+    Given a vector of values for c1 of N households, as well as w and r,
+    return the vector of implied savings for the period after the last
+    period of life b_{S+1} as in c1_bSp1err_mat() along with the vector
+    of derivatives of each b_{S+1} with respect to its own c1 from
+    get_cnb_sens(). This is the function passed into
+    rootfinder.root_vec() with method='newton'.
+    --------------------------------------------------------------------
+    INPUTS:
+    c1_vec = (N,) vector, assumed initial period consumption for each
+             household
+    args   = length 11 tuple, (b_init, emat, beta, sigma, l_tilde,
+             b_ellip, upsilon, chi_n_vec, rpath, wpath, diff)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_cnb_mat()
+        get_cnb_sens()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    b_init    = scalar or (N,) vector, initial wealth of each household
+    emat      = (p, N) matrix, ability paths over remaining lives
+    beta      = scalar in (0, 1), discount factor
+    sigma     = scalar >= 1, coefficient of relative risk aversion
+    l_tilde   = scalar > 0, per-period time endowment for every agent
+    b_ellip   = scalar > 0, fitted value of b for elliptical disutility
+                of labor
+    upsilon   = scalar > 1, fitted value of upsilon for elliptical
+                disutility of labor
+    chi_n_vec = (p,) vector, values for chi^n_s for remaining lifetime
+    rpath     = (p,) vector or (p, N) matrix, paths of interest rates
+                over remaining lives
+    wpath     = (p,) vector or (p, N) matrix, paths of wages over
+                remaining lives
+    diff      = boolean, =True if simple difference Euler errors,
+                otherwise percent deviation Euler errors
+    p         = integer >= 1, number of periods remaining in lifetimes
+    N         = integer >= 1, number of households
+    cnb_args  = length 9 tuple, args to pass into get_cnb_mat()
+    cmat      = (p, N) matrix, lifetime consumption given c1_vec
+    nmat      = (p, N) matrix, lifetime labor supply given c1_vec
+    bmat      = (p, N) matrix, lifetime savings given c1_vec
+    b_Sp1_vec = (N,) vector, residual savings in period after last
+                period of life of each household
+    rmat      = (p, N) matrix, interest rate paths for each household
+    wmat      = (p, N) matrix, wage paths for each household
+    sens_args = length 7 tuple, args to pass into get_cnb_sens()
+    dc_dc1    = (p, N) matrix, derivative of cmat with respect to c1_vec
+    dn_dc1    = (p, N) matrix, derivative of nmat with respect to c1_vec
+    db_dc1    = (p, N) matrix, derivative of bmat with respect to c1_vec
+    dbSp1_vec = (N,) vector, derivative of each element of b_Sp1_vec
+                with respect to the same element of c1_vec
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: b_Sp1_vec, dbSp1_vec
+    --------------------------------------------------------------------
+    '''
+    (b_init, emat, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        rpath, wpath, diff) = args
+    p, N = emat.shape
+    cnb_args = (b_init, emat, beta, sigma, l_tilde, b_ellip, upsilon,
+                chi_n_vec, diff)
+    cmat, nmat, bmat, b_Sp1_vec = get_cnb_mat(c1_vec, rpath, wpath,
+                                              cnb_args)
+    rmat = np.broadcast_to(rpath.reshape((p, -1)), (p, N))
+    wmat = np.broadcast_to(wpath.reshape((p, -1)), (p, N))
+    sens_args = (emat, beta, sigma, l_tilde, b_ellip, upsilon,
+                 chi_n_vec.reshape((p, 1)))
+    dc_dc1, dn_dc1, db_dc1, dbSp1_vec = \
+        get_cnb_sens(cmat, nmat, rmat, wmat, sens_args)
+
+    return b_Sp1_vec, dbSp1_vec
+
+
+def solve_lifetime(args):
+    '''
+    --------------------------------------------------------------------
+    Solve the remaining lifetime problem of one household given its
+    initial wealth, ability path, and the interest rates and wages over
+    its remaining life, and compute the associated Euler errors. This
+    function takes a single tuple argument so that it can be mapped
+    over many households by a process pool executor.
+
+    With n_method='stacked', the lifetime is not solved by shooting on
+    c1. Instead the stacked savings and labor supply Euler equations are
+    solved for (b, n) by solve_bn(), starting from the lifetime that
+    get_cnb_vecs() with n_method='closed' implies for c1_init, with
+    labor supply kept away from the bounds 0 and l_tilde. If solve_bn()
+    or, for the other methods, opt.root(c1_bSp1err_jac) does not
+    converge, a RuntimeError is raised.
+    --------------------------------------------------------------------
+    INPUTS:
+    args = length 14 tuple, (b_init, evec, beta, sigma, l_tilde, b_ellip,
+           upsilon, chi_n_vec, rpath, wpath, diff, n_method, c1_init,
+           tol)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        c1_bSp1err_jac()
+        get_cnb_vecs()
+        solve_bn()
+        get_cons()
+        get_n_errors()
+        get_b_errors()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    err_msg      = string, error message
+    b_init       = scalar, initial wealth b_{S-p+1}
+    evec         = (p,) vector, ability path over remaining lifetime
+    beta         = scalar in (0, 1), discount factor
+    sigma        = scalar >= 1, coefficient of relative risk aversion
+    l_tilde      = scalar > 0, per-period time endowment for every agent
+    b_ellip      = scalar > 0, fitted value of b for elliptical
+                   disutility of labor
+    upsilon      = scalar > 1, fitted value of upsilon for elliptical
+                   disutility of labor
+    chi_n_vec    = (p,) vector, values for chi^n_s over remaining life
+    rpath        = (p,) vector, interest rates over remaining lifetime
+    wpath        = (p,) vector, wages over remaining lifetime
+    diff         = boolean, =True if simple difference Euler errors,
+                   otherwise percent deviation Euler errors
+    n_method     = string, 'root', 'closed', 'brent', or 'stacked',
+                   method used to solve the household problem
+    c1_init      = scalar > 0, initial guess for c_{S-p+1}
+    tol          = scalar > 0, tolerance level for
+                   opt.root(c1_bSp1err_jac) or solve_bn()
+    p            = integer in [1, S], number of periods remaining in
+                   lifetime
+    c1_options   = length 1 dict, options for
+                   opt.root(c1_bSp1err_jac,...)
+    c1_args      = length 12 tuple, args to pass into c1_bSp1err_jac()
+    results_c1   = results object, solution from
+                   opt.root(c1_bSp1err_jac,...)
+    c1           = scalar > 0, optimal initial consumption
+    cnb_args     = length 9 tuple, args to pass into get_cnb_vecs()
+    bn_args      = length 11 tuple, args to pass into solve_bn()
+    bn_init      = (2p-1,) vector, initial guess for solve_bn()
+    bn_vec       = (2p-1,) vector, optimal (b, n) from solve_bn()
+    bn_errors    = (2p-1,) vector, stacked Euler errors at bn_vec
+    bn_success   = boolean, =True if solve_bn() converged
+    bn_iter      = integer >= 0, number of Newton iterations
+    e_bc         = (p,) vector, ability that multiplies labor income in
+                   the budget constraint of each period
+    cvec         = (p,) vector, lifetime consumption
+    nvec         = (p,) vector, lifetime labor supply
+    bvec         = (p,) vector, lifetime savings
+    b_Sp1        = scalar, savings after the last period of life. Should
+                   be zero in equilibrium
+    n_err_params = length 6 tuple, args to pass into get_n_errors()
+    n_err_vec    = (p,) vector, lifetime labor supply Euler errors
+    b_err_params = length 2 tuple, args to pass into get_b_errors()
+    b_err_vec    = (p-1,) vector, lifetime savings Euler errors
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: c1, cvec, nvec, bvec, b_Sp1, n_err_vec, b_err_vec
+    --------------------------------------------------------------------
+    '''
+    (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon, chi_n_vec,
+        rpath, wpath, diff, n_method, c1_init, tol) = args
+    p = evec.shape[0]
+    cnb_args = (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon,
+                chi_n_vec, diff)
+    if n_method == 'stacked':
+        bn_args = (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon,
+                   chi_n_vec, rpath, wpath, diff)
+        cvec, nvec, bvec, b_Sp1 = get_cnb_vecs(c1_init, rpath, wpath,
+                                               cnb_args, 'closed')
+        if not np.isfinite(bvec).all():
+            bvec = np.linspace(b_init, 0.0, p + 1)[:p]
+        nvec = np.clip(nvec, 0.05 * l_tilde, 0.95 * l_tilde)
+        bn_init = np.append(bvec[1:], nvec)
+        bn_vec, bn_errors, bn_success, bn_iter = \
+            solve_bn(bn_init, bn_args, tol)
+        if not bn_success:
+            err_msg = ('ERROR, solve_lifetime(): solve_bn() did not ' +
+                       'converge in ' + str(bn_iter) + ' iterations ' +
+                       'for the ' + str(p) + '-period lifetime with ' +
+                       'b_init=' + str(b_init) + ', max. abs. Euler ' +
+                       'error ' + str(np.absolute(bn_errors).max()) +
+                       '.')
+            raise RuntimeError(err_msg)
+        bvec = np.append(b_init, bn_vec[:p - 1])
+        nvec = bn_vec[p - 1:]
+        e_bc = np.append(evec[1:], evec[-1])
+        cvec = get_cons(rpath, wpath * e_bc, bvec,
+                        np.append(bn_vec[:p - 1], 0.0), nvec)
+        b_Sp1 = ((1 + rpath[-1]) * bvec[-1] +
+                 wpath[-1] * evec[-1] * nvec[-1] - cvec[-1])
+        c1 = cvec[0]
+    else:
+        c1_options = {'maxiter': 500}
+        c1_args = (b_init, evec, beta, sigma, l_tilde, b_ellip, upsilon,
+                   chi_n_vec, rpath, wpath, diff, n_method)
+        results_c1 = opt.root(c1_bSp1err_jac, c1_init, args=(c1_args),
+                              jac=True, method='lm', tol=tol,
+                              options=(c1_options))
+        if not results_c1.success:
+            err_msg = ('ERROR, solve_lifetime(): opt.root(' +
+                       'c1_bSp1err_jac) did not converge for the ' +
+                       str(p) + '-period lifetime with b_init=' +
+                       str(b_init) + ': ' + str(results_c1.message))
+            raise RuntimeError(err_msg)
+        c1 = results_c1.x
+        cvec, nvec, bvec, b_Sp1 = get_cnb_vecs(c1, rpath, wpath,
+                                               cnb_args, n_method)
+    n_err_params = (evec, sigma, l_tilde, chi_n_vec, b_ellip, upsilon)
+    n_err_vec = get_n_errors(n_err_params, wpath, cvec, nvec, diff)
+    if p > 1:
+        b_err_params = (beta, sigma)
+        b_err_vec = get_b_errors(b_err_params, rpath[1:], cvec, diff)
+    else:
+        b_err_vec = np.zeros(0)
+
+    return c1, cvec, nvec, bvec, b_Sp1, n_err_vec, b_err_vec
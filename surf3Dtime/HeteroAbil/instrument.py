@@ -0,0 +1,233 @@
+'''
+------------------------------------------------------------------------
+This module contains the functions that record how the time of the
+steady-state and time path iteration (TPI) solutions is spent. A monitor
+is a dictionary that accumulates counters (such as the number of root
+finder calls, function evaluations, and failures of the inner household
+solves) and timers (such as the time spent solving household problems
+and aggregating) between records. The solvers take a monitor=None
+keyword and call
+
+    add_count(monitor, name, num)
+    add_time(monitor, name, seconds)
+    emit(monitor, event, fields)
+
+all of which do nothing if monitor is None. Each call of emit() builds a
+record dictionary with the event name, the fields passed in (such as the
+iteration number and its wall time), and the counters and timers
+accumulated since the last record, passes it to every sink of the
+monitor, and resets the counters and timers. A sink is any function that
+takes a record. This module provides a sink that appends JSON lines to a
+file and a sink that collects the records in a list in memory.
+
+This Python module imports the following module(s): None
+
+This Python module defines the following function(s):
+    get_monitor()
+    add_count()
+    add_time()
+    emit()
+    get_json_value()
+    get_jsonl_sink()
+    get_list_sink()
+------------------------------------------------------------------------
+'''
+# Import packages
+import time
+import json
+import numpy as np
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_monitor(sinks):
+    '''
+    --------------------------------------------------------------------
+    Create a monitor that sends its records to a list of sinks
+    --------------------------------------------------------------------
+    INPUTS:
+    sinks = list, functions that each take a record dictionary, such as
+            those returned by get_jsonl_sink() and get_list_sink()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    monitor = dictionary, {'sinks': list of sinks, 'counts': counters
+              since the last record, 'times': timers since the last
+              record, 'start': time at which the monitor was created}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: monitor
+    --------------------------------------------------------------------
+    '''
+    monitor = {'sinks': list(sinks), 'counts': {}, 'times': {},
+               'start': time.perf_counter()}
+
+    return monitor
+
+
+def add_count(monitor, name, num=1):
+    '''
+    --------------------------------------------------------------------
+    Add num to the counter name of the monitor
+    --------------------------------------------------------------------
+    INPUTS:
+    monitor = None or dictionary, monitor from get_monitor()
+    name    = string, name of counter
+    num     = integer, amount added to the counter
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    if monitor is not None:
+        monitor['counts'][name] = monitor['counts'].get(name, 0) + int(num)
+
+
+def add_time(monitor, name, seconds):
+    '''
+    --------------------------------------------------------------------
+    Add seconds to the timer name of the monitor
+    --------------------------------------------------------------------
+    INPUTS:
+    monitor = None or dictionary, monitor from get_monitor()
+    name    = string, name of timer
+    seconds = scalar >= 0, time added to the timer
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    if monitor is not None:
+        monitor['times'][name] = (monitor['times'].get(name, 0.0) +
+                                  float(seconds))
+
+
+def emit(monitor, event, fields):
+    '''
+    --------------------------------------------------------------------
+    Send a record of an event with the counters and timers accumulated
+    since the last record to every sink of the monitor, then reset the
+    counters and timers
+    --------------------------------------------------------------------
+    INPUTS:
+    monitor = None or dictionary, monitor from get_monitor()
+    event   = string, name of event, such as 'SS_iter' or 'TPI_iter'
+    fields  = dictionary, values describing the event
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        sink()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    record = dictionary, {'event', 'elapsed', fields..., 'counts',
+             'times'}, in which elapsed is the time in seconds since
+             the monitor was created
+    sink   = function, sink of the monitor
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    if monitor is None:
+        return
+    record = {'event': event,
+              'elapsed': time.perf_counter() - monitor['start']}
+    record.update(fields)
+    record['counts'] = monitor['counts']
+    record['times'] = monitor['times']
+    monitor['counts'] = {}
+    monitor['times'] = {}
+    for sink in monitor['sinks']:
+        sink(record)
+
+
+def get_json_value(obj):
+    '''
+    --------------------------------------------------------------------
+    Convert a NumPy scalar or array in a record to a value that the json
+    module can write
+    --------------------------------------------------------------------
+    INPUTS:
+    obj = object, value that json.dumps() cannot write
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: list, scalar, or string
+    --------------------------------------------------------------------
+    '''
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+
+    return str(obj)
+
+
+def get_jsonl_sink(path):
+    '''
+    --------------------------------------------------------------------
+    Create a sink that appends each record to a file as one line of JSON
+    --------------------------------------------------------------------
+    INPUTS:
+    path = string, path of JSON lines file
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_json_value()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    jsonl_sink = function, sink that writes a record to path
+
+    FILES CREATED BY THIS FUNCTION:
+        path
+
+    RETURNS: jsonl_sink
+    --------------------------------------------------------------------
+    '''
+    def jsonl_sink(record):
+        with open(path, 'a') as jsonl_file:
+            jsonl_file.write(json.dumps(record, default=get_json_value) +
+                             '\n')
+
+    return jsonl_sink
+
+
+def get_list_sink(records):
+    '''
+    --------------------------------------------------------------------
+    Create a sink that collects the records in a list in memory
+    --------------------------------------------------------------------
+    INPUTS:
+    records = list, list to which the records are appended
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    list_sink = function, sink that appends a record to records
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: list_sink
+    --------------------------------------------------------------------
+    '''
+    def list_sink(record):
+        records.append(record)
+
+    return list_sink
@@ -0,0 +1,660 @@
+'''
+------------------------------------------------------------------------
+This module contains the functions that compute the sequence-space
+Jacobian of the time path iteration (TPI) mapping of the model with
+S-period lived agents, endogenous labor supply, and heterogeneous
+ability from Chapter 8 of the OG textbook. TPI looks for a fixed point
+of the mapping G from the stacked guess of the aggregate capital and
+labor paths
+
+    x = (K_1, ... K_T2, L_1, ... L_T2)
+
+to the paths (K_new, L_new) implied by household and firm optimization.
+The Jacobian dG/dx is computed once around the steady state, with the
+steady-state savings distribution as the initial distribution, as the
+product of the household block d(K_new, L_new)/d(r, w) and the firm
+block d(r, w)/d(K, L). The household block is computed by finite
+differences of get_cnbpath(). Because a change in the interest rate or
+wage in period t only changes the lifetimes of the households alive in
+period t, the column of the household block for period t is zero
+outside of the rows for periods t-S+1 to t+S-1. The columns of periods
+that are 2S-1 or more periods apart are therefore computed with the
+same perturbed price path.
+
+The Jacobian does not depend on the initial savings distribution bmat1,
+so it is saved in the solution cache (see cache.py) by the digest of the
+steady-state parameters and reused by every transition path experiment
+with the same steady state.
+
+The same household block gives a linear approximation of the transition
+path for initial savings distributions close to the steady-state
+distribution b_ss. With the Jacobian dG/db1 of the K and L paths with
+respect to the initial distribution (get_b1_jac()), the equilibrium
+x = G(x, bmat1) is approximated to first order by
+
+    (I - dG/dx) dx = dG/db1 (bmat1 - b_ss)
+
+and the aggregate consumption path by dC = dC/dx dx + dC/db1 db1.
+get_IRF_mat() solves this system once for every element of the initial
+distribution, after which get_TPI_lin() returns the approximate
+transition path for any bmat1 with one matrix-vector product.
+
+This Python module imports the following module(s):
+    aggregates.py
+    firms.py
+    TPI.py
+    utilities.py
+    cache.py
+
+This Python module defines the following function(s):
+    get_KL_new()
+    get_jac_args()
+    get_jac_key()
+    get_KL_jac()
+    get_b1_jac()
+    get_IRF_mat()
+    get_TPI_lin()
+------------------------------------------------------------------------
+'''
+# Import packages
+import time
+import numpy as np
+import aggregates as aggr
+import firms
+import TPI as tpi
+import utilities as utils
+import cache
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_KL_new(params, rpath, wpath, n_method='root', hh_batch=False,
+               hh_root='illinois', cpath_prev=None):
+    '''
+    --------------------------------------------------------------------
+    Solve the household lifetime problems given time paths of interest
+    rates and wages, and return the implied stacked aggregate capital
+    and labor paths from period 1 to T2
+    --------------------------------------------------------------------
+    INPUTS:
+    params     = length 14 tuple, (J, S, T2, lambdas, emat, beta,
+                 sigma, l_tilde, b_ellip, upsilon, chi_n_vec, bmat1,
+                 TPI_tol, diff)
+    rpath      = (T2+S-1,) vector, time path of the interest rates
+    wpath      = (T2+S-1,) vector, time path of the wages
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 method used to solve the household problems
+    hh_batch   = boolean, =True if solve the household lifetime problems
+                 in batches with tpi.get_cnbpath_mat()
+    hh_root    = string, 'illinois', 'brent', or 'newton', method of
+                 rootfinder.root_vec() used if hh_batch=True
+    cpath_prev = None or (S, J, T2+S-1) array, time path of the
+                 distribution of consumption used for the initial
+                 guesses of c1
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        tpi.get_cnbpath()
+        tpi.get_cnbpath_mat()
+        aggr.get_K()
+        aggr.get_L()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    J        = integer >= 1, number of ability types
+    T2       = integer > S, number of periods until steady state
+    lambdas  = (J,) vector, income percentiles for ability types
+    emat     = (S, J) matrix, e_{j,s} ability by age and ability type
+    cpath    = (S, J, T2+S-1) array, time path of the distribution of
+               consumption
+    npath    = (S, J, T2+S-1) array, time path of the distribution of
+               labor supply
+    bpath    = (S, J, T2+S-1) array, time path of the distribution of
+               savings
+    KL_new   = (2*T2,) vector, implied time paths of the aggregate
+               capital stock and aggregate labor, appended
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: KL_new, cpath
+    --------------------------------------------------------------------
+    '''
+    J, T2, lambdas, emat = params[0], params[2], params[3], params[4]
+    if hh_batch:
+        cpath, npath, bpath = tpi.get_cnbpath_mat(params, rpath, wpath,
+                                                  hh_root, cpath_prev)[:3]
+    else:
+        cpath, npath, bpath = tpi.get_cnbpath(params, rpath, wpath,
+                                              n_method, None,
+                                              cpath_prev)[:3]
+    KL_new = np.zeros(2 * T2)
+    aggr.get_K(bpath[:, :, :T2], lambdas, KL_new[:T2])
+    aggr.get_L(npath[:, :, :T2], emat, lambdas, KL_new[T2:])
+
+    return KL_new, cpath
+
+
+def get_jac_args(params, ss_output):
+    '''
+    --------------------------------------------------------------------
+    Return the tuple of the parameters that determine the sequence-space
+    Jacobian of the TPI mapping, which is saved with it in the cache.
+    These are the TPI parameters without the TPI iteration controls
+    (maxiter, mindist, xi) and with the steady-state savings
+    distribution. The cache key also includes the household solver
+    options (see get_jac_key())
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = length 23 tuple, (J, S, T1, T2, lambdas, emat, beta,
+                sigma, l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha,
+                delta, K_ss, L_ss, C_ss, maxiter, mindist, TPI_tol, xi,
+                diff)
+    ss_output = dictionary, steady-state solution from SS.get_SS_root()
+                or SS.get_SS_bsct()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    jac_args = length 20 tuple, (J, S, T2, lambdas, emat, beta, sigma,
+               l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+               K_ss, L_ss, C_ss, TPI_tol, diff, b_ss)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: jac_args
+    --------------------------------------------------------------------
+    '''
+    jac_args = ((params[0], params[1]) + tuple(params[3:18]) +
+                (params[20], params[22], ss_output['b_ss']))
+
+    return jac_args
+
+
+def get_jac_key(jac_args, n_method='root', hh_batch=False,
+                hh_root='illinois', eps=1e-6):
+    '''
+    --------------------------------------------------------------------
+    Return the cache key of a Jacobian, the digest of its parameters
+    together with the household solver options and finite difference
+    step that change it. With hh_batch=True the households are solved
+    by tpi.get_cnbpath_mat() and n_method is not used, and otherwise
+    hh_root is not used, so the unused option is left out
+    --------------------------------------------------------------------
+    INPUTS:
+    jac_args = length 20 tuple, parameters from get_jac_args()
+    n_method = string, 'root', 'closed', 'brent', or 'stacked', method
+               used to solve the household problems
+    hh_batch = boolean, =True if solve the household lifetime problems
+               in batches with tpi.get_cnbpath_mat()
+    hh_root  = string, 'illinois', 'brent', or 'newton', method of
+               rootfinder.root_vec() used if hh_batch=True
+    eps      = scalar > 0, finite difference step
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        utils.get_digest()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    solver_opts = length 4 tuple, (n_method, hh_batch, hh_root, eps)
+                  with the unused option None
+    jac_key     = string, digest of (jac_args, solver_opts)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: jac_key
+    --------------------------------------------------------------------
+    '''
+    solver_opts = (None if hh_batch else n_method, bool(hh_batch),
+                   hh_root if hh_batch else None, float(eps))
+    jac_key = utils.get_digest((jac_args, solver_opts))
+
+    return jac_key
+
+
+def get_KL_jac(params, ss_output, n_method='root', hh_batch=False,
+               hh_root='illinois', cache_dir=None, eps=1e-6,
+               return_C=False):
+    '''
+    --------------------------------------------------------------------
+    Compute the sequence-space Jacobian dG/dx of the TPI mapping from
+    the stacked aggregate capital and labor paths x to the paths
+    G(x) = (K_new, L_new) implied by household and firm optimization,
+    around the steady state. The household block is computed by forward
+    differences of step eps with the steady-state savings distribution
+    as the initial distribution, and then multiplied by the derivatives
+    of the interest rate and wage with respect to K and L
+
+        dr/dK = -(1 - alpha) * (r + delta) / K
+        dr/dL = (1 - alpha) * (r + delta) / L
+        dw/dK = alpha * w / K
+        dw/dL = -alpha * w / L
+
+    The row of K_new in period 1 is zero because K_1 is given by bmat1.
+    The Jacobian dC/dx of the implied aggregate consumption path is
+    computed from the same household solutions and is returned too if
+    return_C=True.
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = length 23 tuple, (J, S, T1, T2, lambdas, emat, beta,
+                sigma, l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha,
+                delta, K_ss, L_ss, C_ss, maxiter, mindist, TPI_tol, xi,
+                diff)
+    ss_output = dictionary, steady-state solution from SS.get_SS_root()
+                or SS.get_SS_bsct()
+    n_method  = string, 'root', 'closed', 'brent', or 'stacked', method
+                used to solve the household problems
+    hh_batch  = boolean, =True if solve the household lifetime problems
+                in batches with tpi.get_cnbpath_mat()
+    hh_root   = string, 'illinois', 'brent', or 'newton', method of
+                rootfinder.root_vec() used if hh_batch=True
+    cache_dir = None or string, path of solution cache directory. If
+                not None and the Jacobian for the same steady state is
+                in the cache, it is returned without recomputing.
+                Otherwise the new Jacobian is saved in the cache
+    eps       = scalar > 0, finite difference step of the interest
+                rates and wages
+    return_C  = boolean, =True if also return the consumption Jacobian
+                jac_C
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_jac_args()
+        get_jac_key()
+        cache.load_cache()
+        firms.get_r()
+        firms.get_w()
+        get_KL_new()
+        aggr.get_C()
+        utils.print_time()
+        cache.save_cache()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    start_time = scalar, current time in seconds (float)
+    jac_args   = length 20 tuple, parameters that determine the Jacobian
+    jac_key    = string, digest of jac_args and the solver options used
+                 as the cache key
+    jac_output = dictionary or None, {jac_KL, jac_C, jac_time}
+    J          = integer >= 1, number of ability types
+    S          = integer in [3,80], number of periods an individual
+                 lives
+    T2         = integer > S, number of periods until steady state
+    lambdas    = (J,) vector, income percentiles for ability types
+    emat       = (S, J) matrix, e_{j,s} ability by age and ability type
+    A          = scalar > 0, total factor productivity parameter
+    alpha      = scalar in (0,1), capital share of income
+    delta      = scalar in [0,1], per-period capital depreciation rate
+    K_ss       = scalar > 0, steady-state aggregate capital stock
+    L_ss       = scalar > 0, steady-state aggregate labor
+    cnb_params = length 14 tuple, args to pass into get_KL_new()
+    r_ss       = scalar, steady-state interest rate
+    w_ss       = scalar > 0, steady-state wage
+    rpath_ss   = (T2+S-1,) vector, steady-state interest rate path
+    wpath_ss   = (T2+S-1,) vector, steady-state wage path
+    KL_base    = (2*T2,) vector, K and L paths at steady-state prices
+    cpath_ss   = (S, J, T2+S-1) array, consumption path at steady-state
+                 prices, used for the initial guesses of c1
+    C_base     = (T2,) vector, aggregate consumption path at
+                 steady-state prices
+    jac_hh     = (2*T2, 2*T2) matrix, household block, columns are the
+                 derivatives with respect to (r_1,...r_T2, w_1,...w_T2)
+    jac_C_hh   = (T2, 2*T2) matrix, household block of aggregate
+                 consumption
+    n_groups   = integer >= 1, number of columns of each price that are
+                 computed separately
+    grp        = integer in [0, n_groups), index of column group
+    dates      = (N,) vector, periods perturbed together in group grp
+    price      = integer in {0, 1}, =0 for interest rates and =1 for
+                 wages
+    rpath      = (T2+S-1,) vector, perturbed interest rate path
+    wpath      = (T2+S-1,) vector, perturbed wage path
+    KL_new     = (2*T2,) vector, K and L paths at perturbed prices
+    cpath      = (S, J, T2+S-1) array, consumption path at perturbed
+                 prices
+    dKL        = (2*T2,) vector, forward difference of KL_new
+    dC         = (T2,) vector, forward difference of the aggregate
+                 consumption path
+    t          = integer in [0, T2), perturbed period
+    rows       = (2*T2,) boolean vector, rows of the periods within S-1
+                 periods of t
+    dr_dK      = scalar, derivative of r with respect to K
+    dr_dL      = scalar, derivative of r with respect to L
+    dw_dK      = scalar, derivative of w with respect to K
+    dw_dL      = scalar, derivative of w with respect to L
+    jac_KL     = (2*T2, 2*T2) matrix, Jacobian dG/dx
+    jac_C      = (T2, 2*T2) matrix, Jacobian dC/dx
+    jac_time   = scalar, time to compute the Jacobian (seconds)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: jac_KL or (jac_KL, jac_C) if return_C=True
+    --------------------------------------------------------------------
+    '''
+    start_time = time.perf_counter()
+    jac_args = get_jac_args(params, ss_output)
+    if cache_dir is not None:
+        jac_key = get_jac_key(jac_args, n_method, hh_batch, hh_root, eps)
+        jac_output = cache.load_cache(cache_dir, 'JAC', jac_key)
+        if jac_output is not None and 'jac_C' in jac_output:
+            print('Retrieved TPI Jacobian ' + jac_key[:12] +
+                  ' from cache.')
+            if return_C:
+                return jac_output['jac_KL'], jac_output['jac_C']
+            return jac_output['jac_KL']
+    (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde, b_ellip,
+        upsilon, chi_n_vec, A, alpha, delta, K_ss, L_ss, C_ss, maxiter,
+        mindist, TPI_tol, xi, diff) = params
+    cnb_params = (J, S, T2, lambdas, emat, beta, sigma, l_tilde,
+                  b_ellip, upsilon, chi_n_vec, ss_output['b_ss'],
+                  TPI_tol, diff)
+    r_ss = firms.get_r((A, alpha, delta), K_ss, L_ss)
+    w_ss = firms.get_w((A, alpha), K_ss, L_ss)
+    rpath_ss = r_ss * np.ones(T2 + S - 1)
+    wpath_ss = w_ss * np.ones(T2 + S - 1)
+    KL_base, cpath_ss = get_KL_new(cnb_params, rpath_ss, wpath_ss,
+                                   n_method, hh_batch, hh_root)
+    C_base = aggr.get_C(cpath_ss[:, :, :T2], lambdas)
+
+    # Household block, computed for the columns of periods at least
+    # 2S-1 periods apart with the same perturbed price path
+    jac_hh = np.zeros((2 * T2, 2 * T2))
+    jac_C_hh = np.zeros((T2, 2 * T2))
+    n_groups = min(T2, 2 * S - 1)
+    for grp in range(n_groups):
+        dates = np.arange(grp, T2, n_groups)
+        for price in range(2):
+            rpath = rpath_ss.copy()
+            wpath = wpath_ss.copy()
+            if price == 0:
+                rpath[dates] += eps
+            else:
+                wpath[dates] += eps
+            KL_new, cpath = get_KL_new(cnb_params, rpath, wpath,
+                                       n_method, hh_batch, hh_root,
+                                       cpath_ss)
+            dKL = (KL_new - KL_base) / eps
+            dC = (aggr.get_C(cpath[:, :, :T2], lambdas) - C_base) / eps
+            for t in dates:
+                rows = np.tile(np.absolute(np.arange(T2) - t) < S, 2)
+                jac_hh[rows, price * T2 + t] = dKL[rows]
+                jac_C_hh[rows[:T2], price * T2 + t] = dC[rows[:T2]]
+    # The initial capital stock is given by the initial distribution
+    jac_hh[0, :] = 0.0
+
+    # Firm block
+    dr_dK = -(1 - alpha) * (r_ss + delta) / K_ss
+    dr_dL = (1 - alpha) * (r_ss + delta) / L_ss
+    dw_dK = alpha * w_ss / K_ss
+    dw_dL = -alpha * w_ss / L_ss
+    jac_KL = np.hstack((jac_hh[:, :T2] * dr_dK + jac_hh[:, T2:] * dw_dK,
+                        jac_hh[:, :T2] * dr_dL + jac_hh[:, T2:] * dw_dL))
+    jac_C = np.hstack((jac_C_hh[:, :T2] * dr_dK + jac_C_hh[:, T2:] * dw_dK,
+                       jac_C_hh[:, :T2] * dr_dL + jac_C_hh[:, T2:] * dw_dL))
+    jac_time = time.perf_counter() - start_time
+    utils.print_time(jac_time, 'TPI Jacobian')
+
+    if cache_dir is not None:
+        jac_output = {'jac_KL': jac_KL, 'jac_C': jac_C,
+                      'jac_time': jac_time}
+        cache.save_cache(cache_dir, 'JAC', jac_key, jac_output, jac_args)
+
+    if return_C:
+        return jac_KL, jac_C
+    return jac_KL
+
+
+def get_b1_jac(params, ss_output, n_method='root', hh_batch=False,
+               hh_root='illinois', cache_dir=None, eps=1e-6):
+    '''
+    --------------------------------------------------------------------
+    Compute the Jacobian dG/db1 of the K, L, and C paths implied by
+    household optimization with respect to the initial savings
+    distribution bmat1, at steady-state prices and around the steady-
+    state savings distribution b_ss. Given the prices, the initial
+    savings of the households of age s and ability type j in period 1
+    only change the remaining lifetime of that cohort, so all the
+    elements of bmat1 are perturbed by eps at once and the column of
+    each element is read off the diagonal of its cohort in the forward
+    differences of the consumption, savings, and labor supply paths
+
+        dK_t/db1_{s,j} = lambda_j * db_{s+t,j,t}/db1_{s,j}
+        dL_t/db1_{s,j} = e_{j,s+t} * lambda_j * dn_{s+t,j,t}/db1_{s,j}
+        dC_t/db1_{s,j} = lambda_j * dc_{s+t,j,t}/db1_{s,j}
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = length 23 tuple, (J, S, T1, T2, lambdas, emat, beta,
+                sigma, l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha,
+                delta, K_ss, L_ss, C_ss, maxiter, mindist, TPI_tol, xi,
+                diff)
+    ss_output = dictionary, steady-state solution from SS.get_SS_root()
+                or SS.get_SS_bsct()
+    n_method  = string, 'root', 'closed', 'brent', or 'stacked', method
+                used to solve the household problems
+    hh_batch  = boolean, =True if solve the household lifetime problems
+                in batches with tpi.get_cnbpath_mat()
+    hh_root   = string, 'illinois', 'brent', or 'newton', method of
+                rootfinder.root_vec() used if hh_batch=True
+    cache_dir = None or string, path of solution cache directory. If
+                not None and the Jacobian for the same steady state is
+                in the cache, it is returned without recomputing.
+                Otherwise the new Jacobian is saved in the cache
+    eps       = scalar > 0, finite difference step of the initial
+                savings
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_jac_args()
+        get_jac_key()
+        cache.load_cache()
+        firms.get_r()
+        firms.get_w()
+        tpi.get_cnbpath()
+        tpi.get_cnbpath_mat()
+        utils.print_time()
+        cache.save_cache()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    start_time = scalar, current time in seconds (float)
+    jac_args   = length 20 tuple, parameters that determine the Jacobian
+    jac_key    = string, digest of jac_args and the solver options used
+                 as the cache key
+    jac_output = dictionary or None, {jac_b1, jac_time}
+    J          = integer >= 1, number of ability types
+    S          = integer in [3,80], number of periods an individual
+                 lives
+    T2         = integer > S, number of periods until steady state
+    lambdas    = (J,) vector, income percentiles for ability types
+    emat       = (S, J) matrix, e_{j,s} ability by age and ability type
+    A          = scalar > 0, total factor productivity parameter
+    alpha      = scalar in (0,1), capital share of income
+    delta      = scalar in [0,1], per-period capital depreciation rate
+    K_ss       = scalar > 0, steady-state aggregate capital stock
+    L_ss       = scalar > 0, steady-state aggregate labor
+    b_ss       = (S, J) matrix, steady-state savings distribution
+    rpath_ss   = (T2+S-1,) vector, steady-state interest rate path
+    wpath_ss   = (T2+S-1,) vector, steady-state wage path
+    paths      = list, (cpath, npath, bpath) at b_ss and at b_ss + eps
+    bmat1      = (S, J) matrix, initial savings distribution
+    cnb_params = length 14 tuple, args to pass into tpi.get_cnbpath()
+                 or tpi.get_cnbpath_mat()
+    cpath_ss   = (S, J, T2+S-1) array, consumption path at b_ss, used
+                 for the initial guesses of c1
+    dcpath     = (S, J, T2+S-1) array, forward difference of cpath
+    dnpath     = (S, J, T2+S-1) array, forward difference of npath
+    dbpath     = (S, J, T2+S-1) array, forward difference of bpath
+    jac_b1     = (3*T2, S*J) matrix, Jacobian of the stacked K, L, and
+                 C paths with respect to bmat1, column s*J+j is the
+                 derivative with respect to bmat1[s, j]
+    s          = integer in [0, S), age index of a cohort in period 1
+    p          = integer >= 1, number of periods of the cohort's
+                 remaining lifetime up to period T2
+    per_idx    = (p,) vector, periods of the cohort's remaining lifetime
+    jac_time   = scalar, time to compute the Jacobian (seconds)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: jac_b1
+    --------------------------------------------------------------------
+    '''
+    start_time = time.perf_counter()
+    jac_args = get_jac_args(params, ss_output)
+    if cache_dir is not None:
+        jac_key = get_jac_key(jac_args, n_method, hh_batch, hh_root, eps)
+        jac_output = cache.load_cache(cache_dir, 'JACB', jac_key)
+        if jac_output is not None:
+            print('Retrieved initial distribution Jacobian ' +
+                  jac_key[:12] + ' from cache.')
+            return jac_output['jac_b1']
+    (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde, b_ellip,
+        upsilon, chi_n_vec, A, alpha, delta, K_ss, L_ss, C_ss, maxiter,
+        mindist, TPI_tol, xi, diff) = params
+    b_ss = ss_output['b_ss']
+    rpath_ss = (firms.get_r((A, alpha, delta), K_ss, L_ss) *
+                np.ones(T2 + S - 1))
+    wpath_ss = firms.get_w((A, alpha), K_ss, L_ss) * np.ones(T2 + S - 1)
+    paths = []
+    cpath_ss = None
+    for bmat1 in (b_ss, b_ss + eps):
+        cnb_params = (J, S, T2, lambdas, emat, beta, sigma, l_tilde,
+                      b_ellip, upsilon, chi_n_vec, bmat1, TPI_tol, diff)
+        if hh_batch:
+            paths.append(tpi.get_cnbpath_mat(cnb_params, rpath_ss,
+                                             wpath_ss, hh_root,
+                                             cpath_ss)[:3])
+        else:
+            paths.append(tpi.get_cnbpath(cnb_params, rpath_ss, wpath_ss,
+                                         n_method, None, cpath_ss)[:3])
+        cpath_ss = paths[0][0]
+    dcpath = (paths[1][0] - paths[0][0]) / eps
+    dnpath = (paths[1][1] - paths[0][1]) / eps
+    dbpath = (paths[1][2] - paths[0][2]) / eps
+
+    jac_b1 = np.zeros((3 * T2, S * J))
+    for s in range(S):
+        p = min(S - s, T2)
+        per_idx = np.arange(p)
+        jac_b1[per_idx, s * J:(s + 1) * J] = \
+            lambdas * dbpath[s + per_idx, :, per_idx]
+        jac_b1[T2 + per_idx, s * J:(s + 1) * J] = \
+            emat[s + per_idx, :] * lambdas * dnpath[s + per_idx, :, per_idx]
+        jac_b1[2 * T2 + per_idx, s * J:(s + 1) * J] = \
+            lambdas * dcpath[s + per_idx, :, per_idx]
+    jac_time = time.perf_counter() - start_time
+    utils.print_time(jac_time, 'Initial distribution Jacobian')
+
+    if cache_dir is not None:
+        jac_output = {'jac_b1': jac_b1, 'jac_time': jac_time}
+        cache.save_cache(cache_dir, 'JACB', jac_key, jac_output, jac_args)
+
+    return jac_b1
+
+
+def get_IRF_mat(jac_KL, jac_C, jac_b1):
+    '''
+    --------------------------------------------------------------------
+    Solve the linearized equilibrium conditions of the transition path
+    for every element of the initial savings distribution at once. The
+    column s*J+j of the returned matrix is the response of the stacked
+    K, L, and C paths to a unit change in bmat1[s, j]
+
+        dx = (I - dG/dx)^(-1) dG/db1
+        dC = dC/dx dx + dC/db1
+    --------------------------------------------------------------------
+    INPUTS:
+    jac_KL = (2*T2, 2*T2) matrix, Jacobian dG/dx from get_KL_jac()
+    jac_C  = (T2, 2*T2) matrix, Jacobian dC/dx from get_KL_jac()
+    jac_b1 = (3*T2, S*J) matrix, Jacobian of the K, L, and C paths with
+             respect to bmat1 from get_b1_jac()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    T2      = integer > S, number of periods until steady state
+    irf_mat = (3*T2, S*J) matrix, responses of the K, L, and C paths
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: irf_mat
+    --------------------------------------------------------------------
+    '''
+    T2 = jac_C.shape[0]
+    irf_mat = np.zeros(jac_b1.shape)
+    irf_mat[:2 * T2] = np.linalg.solve(np.eye(2 * T2) - jac_KL,
+                                       jac_b1[:2 * T2])
+    irf_mat[2 * T2:] = jac_C.dot(irf_mat[:2 * T2]) + jac_b1[2 * T2:]
+
+    return irf_mat
+
+
+def get_TPI_lin(params, bmat1, ss_output, irf_mat):
+    '''
+    --------------------------------------------------------------------
+    Return the linear approximation of the transition path equilibrium
+    from the initial savings distribution bmat1, which should be close
+    to the steady-state distribution b_ss. The K and L paths are the
+    steady-state values plus irf_mat times (bmat1 - b_ss), and so is
+    the aggregate consumption path. The prices and output follow from
+    the firms' problem.
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = length 23 tuple, (J, S, T1, T2, lambdas, emat, beta,
+                sigma, l_tilde, b_ellip, upsilon, chi_n_vec, A, alpha,
+                delta, K_ss, L_ss, C_ss, maxiter, mindist, TPI_tol, xi,
+                diff)
+    bmat1     = (S, J) matrix, initial period savings distribution
+    ss_output = dictionary, steady-state solution from SS.get_SS_root()
+                or SS.get_SS_bsct()
+    irf_mat   = (3*T2, S*J) matrix, responses of the K, L, and C paths
+                from get_IRF_mat()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        firms.get_r()
+        firms.get_w()
+        aggr.get_Y()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    start_time = scalar, current time in seconds (float)
+    S          = integer in [3,80], number of periods an individual
+                 lives
+    T2         = integer > S, number of periods until steady state
+    A          = scalar > 0, total factor productivity parameter
+    alpha      = scalar in (0,1), capital share of income
+    delta      = scalar in [0,1], per-period capital depreciation rate
+    K_ss       = scalar > 0, steady-state aggregate capital stock
+    L_ss       = scalar > 0, steady-state aggregate labor
+    C_ss       = scalar > 0, steady-state aggregate consumption
+    dKLC       = (3*T2,) vector, deviations of the K, L, and C paths
+                 from the steady state
+    Kpath      = (T2+S-1,) vector, time path of aggregate capital
+    Lpath      = (T2+S-1,) vector, time path of aggregate labor
+    rpath      = (T2+S-1,) vector, time path of the interest rate
+    wpath      = (T2+S-1,) vector, time path of the wage
+    Ypath      = (T2+S-1,) vector, time path of aggregate output
+    Cpath      = (T2+S-1,) vector, time path of aggregate consumption
+    lin_time   = scalar, time to compute the paths (seconds)
+    lin_output = dictionary, {Kpath, Lpath, rpath, wpath, Ypath, Cpath,
+                 lin_time}
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: lin_output
+    --------------------------------------------------------------------
+    '''
+    start_time = time.perf_counter()
+    S, T2 = params[1], params[3]
+    A, alpha, delta, K_ss, L_ss, C_ss = params[12:18]
+    dKLC = irf_mat.dot((bmat1 - ss_output['b_ss']).ravel())
+    Kpath = K_ss * np.ones(T2 + S - 1)
+    Kpath[:T2] += dKLC[:T2]
+    Lpath = L_ss * np.ones(T2 + S - 1)
+    Lpath[:T2] += dKLC[T2:2 * T2]
+    Cpath = C_ss * np.ones(T2 + S - 1)
+    Cpath[:T2] += dKLC[2 * T2:]
+    rpath = firms.get_r((A, alpha, delta), Kpath, Lpath)
+    wpath = firms.get_w((A, alpha), Kpath, Lpath)
+    Ypath = aggr.get_Y((A, alpha), Kpath, Lpath)
+    lin_time = time.perf_counter() - start_time
+
+    lin_output = {
+        'Kpath': Kpath, 'Lpath': Lpath, 'rpath': rpath, 'wpath': wpath,
+        'Ypath': Ypath, 'Cpath': Cpath, 'lin_time': lin_time}
+
+    return lin_output
@@ -0,0 +1,364 @@
+'''
+------------------------------------------------------------------------
+This module contains the elementwise kernels of the innermost household
+functions: the stitched marginal utility of consumption, the stitched
+marginal disutility of labor, and the labor supply and savings Euler
+errors that combine them. The stitching at the bounds is fused into a
+single pass over the inputs.
+
+The backend is selected when the module is imported. If the numba
+package is installed, each kernel is a compiled NumPy ufunc that works
+on scalars and arrays of any shape with broadcasting. Otherwise, each
+kernel is a pure-NumPy function with the same signature and results.
+Setting the environment variable OGVIS_KERNELS='numpy' forces the
+NumPy backend.
+
+    BACKEND = 'numba' or 'numpy', backend selected at import
+
+The coefficients of the stitched functions are computed by
+households.get_MU_c_coefs() and households.get_MDU_n_coefs() and passed
+in to the kernels.
+
+This Python module imports the following module(s): None
+
+This Python module defines the following function(s):
+    mu_c_kernel()
+    mdu_n_kernel()
+    n_err_kernel()
+    b_err_kernel()
+    mu_c()
+    mdu_n()
+    n_errors()
+    b_errors()
+------------------------------------------------------------------------
+'''
+# Import packages
+import os
+import numpy as np
+if os.environ.get('OGVIS_KERNELS', 'numba') == 'numpy':
+    numba = None
+else:
+    try:
+        import numba
+    except ImportError:
+        numba = None
+
+'''
+------------------------------------------------------------------------
+    Kernels
+------------------------------------------------------------------------
+'''
+if numba is not None:
+    BACKEND = 'numba'
+
+    @numba.njit(cache=True)
+    def _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2):
+        if c < eps_c:
+            return 2 * c_b2 * c + c_b1
+        return c ** (-sigma)
+
+    @numba.njit(cache=True)
+    def _mdu_n_scalar(n, l_tilde, b_ellip, upsilon, eps_low, eps_high,
+                      b1, b2, d1, d2):
+        if n < eps_low:
+            return 2 * b2 * n + b1
+        if n > eps_high:
+            return 2 * d2 * n + d1
+        return ((b_ellip / l_tilde) * ((n / l_tilde) ** (upsilon - 1)) *
+                ((1 - ((n / l_tilde) ** upsilon)) **
+                 ((1 - upsilon) / upsilon)))
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, ' +
+                      'float64)'], cache=True)
+    def mu_c_kernel(c, sigma, eps_c, c_b1, c_b2):
+        return _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2)
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, ' +
+                      'float64, float64, float64, float64, float64, ' +
+                      'float64)'], cache=True)
+    def mdu_n_kernel(n, l_tilde, b_ellip, upsilon, eps_low, eps_high,
+                     b1, b2, d1, d2):
+        return _mdu_n_scalar(n, l_tilde, b_ellip, upsilon, eps_low,
+                             eps_high, b1, b2, d1, d2)
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, ' +
+                      'float64, float64, float64, float64, float64, ' +
+                      'float64, float64, float64, float64, float64, ' +
+                      'float64, float64, float64, float64, boolean)'],
+                     cache=True)
+    def n_err_kernel(w, e, c, n, chi_n, sigma, eps_c, c_b1, c_b2,
+                     l_tilde, b_ellip, upsilon, eps_low, eps_high, b1,
+                     b2, d1, d2, diff):
+        mu_c = _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2)
+        mdu_n = _mdu_n_scalar(n, l_tilde, b_ellip, upsilon, eps_low,
+                              eps_high, b1, b2, d1, d2)
+        if diff:
+            return (w * e * mu_c) - chi_n * mdu_n
+        return ((w * e * mu_c) / (chi_n * mdu_n)) - 1
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, ' +
+                      'float64, float64, float64, float64, boolean)'],
+                     cache=True)
+    def b_err_kernel(r, c, c_p1, beta, sigma, eps_c, c_b1, c_b2, diff):
+        mu_c = _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2)
+        mu_cp1 = _mu_c_scalar(c_p1, sigma, eps_c, c_b1, c_b2)
+        if diff:
+            return (beta * (1 + r) * mu_cp1) - mu_c
+        return ((beta * (1 + r) * mu_cp1) / mu_c) - 1
+
+else:
+    BACKEND = 'numpy'
+
+    def _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2):
+        if c < eps_c:
+            return 2 * c_b2 * c + c_b1
+        return c ** (-sigma)
+
+    def _mdu_n_scalar(n, l_tilde, b_ellip, upsilon, eps_low, eps_high,
+                      b1, b2, d1, d2):
+        if n < eps_low:
+            return 2 * b2 * n + b1
+        if n > eps_high:
+            return 2 * d2 * n + d1
+        return ((b_ellip / l_tilde) * ((n / l_tilde) ** (upsilon - 1)) *
+                ((1 - ((n / l_tilde) ** upsilon)) **
+                 ((1 - upsilon) / upsilon)))
+
+    def _get_single(*arrs):
+        '''
+        ----------------------------------------------------------------
+        Return the values of arrs as Python scalars and the broadcast
+        shape of arrs if every element of arrs has size 1, and None
+        otherwise. Inputs of size 1, such as the labor supply guesses
+        passed in by opt.root(), are evaluated with scalar arithmetic,
+        which avoids the overhead of several NumPy calls per element.
+        ----------------------------------------------------------------
+        '''
+        if all([np.size(arr) == 1 for arr in arrs]):
+            return ([np.asarray(arr).item() for arr in arrs],
+                    np.broadcast(*arrs).shape)
+        return None
+
+    def _put_single(val, shape):
+        if shape == ():
+            return val
+        return np.full(shape, val)
+
+    def mu_c_kernel(c, sigma, eps_c, c_b1, c_b2):
+        '''
+        ----------------------------------------------------------------
+        Stitched marginal utility of consumption, pure-NumPy version.
+        Values below eps_c are raised to eps_c before the power is taken
+        so that no invalid power of a negative number is computed.
+        ----------------------------------------------------------------
+        '''
+        if np.ndim(c) == 0:
+            return _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2)
+        c = np.asarray(c, dtype=float)
+        return np.where(c < eps_c, 2 * c_b2 * c + c_b1,
+                        np.maximum(c, eps_c) ** (-sigma))
+
+    def mdu_n_kernel(n, l_tilde, b_ellip, upsilon, eps_low, eps_high,
+                     b1, b2, d1, d2):
+        '''
+        ----------------------------------------------------------------
+        Stitched marginal disutility of labor, pure-NumPy version.
+        Values outside [eps_low, eps_high] are clipped before the
+        elliptical part is computed.
+        ----------------------------------------------------------------
+        '''
+        single = _get_single(n)
+        if single is not None:
+            return _put_single(_mdu_n_scalar(single[0][0], l_tilde,
+                                             b_ellip, upsilon, eps_low,
+                                             eps_high, b1, b2, d1, d2),
+                               single[1])
+        n = np.asarray(n, dtype=float)
+        n_in = np.minimum(np.maximum(n, eps_low), eps_high) / l_tilde
+        mdu_n = ((b_ellip / l_tilde) * (n_in ** (upsilon - 1)) *
+                 ((1 - (n_in ** upsilon)) ** ((1 - upsilon) / upsilon)))
+        return np.where(n < eps_low, 2 * b2 * n + b1,
+                        np.where(n > eps_high, 2 * d2 * n + d1, mdu_n))
+
+    def n_err_kernel(w, e, c, n, chi_n, sigma, eps_c, c_b1, c_b2,
+                     l_tilde, b_ellip, upsilon, eps_low, eps_high, b1,
+                     b2, d1, d2, diff):
+        '''
+        ----------------------------------------------------------------
+        Labor supply Euler errors, pure-NumPy version
+        ----------------------------------------------------------------
+        '''
+        single = _get_single(w, e, c, n, chi_n)
+        if single is not None:
+            w, e, c, n, chi_n = single[0]
+            mu_c = _mu_c_scalar(c, sigma, eps_c, c_b1, c_b2)
+            mdu_n = _mdu_n_scalar(n, l_tilde, b_ellip, upsilon, eps_low,
+                                  eps_high, b1, b2, d1, d2)
+        else:
+            mu_c = mu_c_kernel(c, sigma, eps_c, c_b1, c_b2)
+            mdu_n = mdu_n_kernel(n, l_tilde, b_ellip, upsilon, eps_low,
+                                 eps_high, b1, b2, d1, d2)
+        if diff:
+            n_err = (w * e * mu_c) - chi_n * mdu_n
+        else:
+            n_err = ((w * e * mu_c) / (chi_n * mdu_n)) - 1
+        if single is not None:
+            n_err = _put_single(n_err, single[1])
+        return n_err
+
+    def b_err_kernel(r, c, c_p1, beta, sigma, eps_c, c_b1, c_b2, diff):
+        '''
+        ----------------------------------------------------------------
+        Savings Euler errors, pure-NumPy version
+        ----------------------------------------------------------------
+        '''
+        mu_c = mu_c_kernel(c, sigma, eps_c, c_b1, c_b2)
+        mu_cp1 = mu_c_kernel(c_p1, sigma, eps_c, c_b1, c_b2)
+        if diff:
+            return (beta * (1 + r) * mu_cp1) - mu_c
+        return ((beta * (1 + r) * mu_cp1) / mu_c) - 1
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def mu_c(cvec, sigma, c_coefs):
+    '''
+    --------------------------------------------------------------------
+    Stitched marginal utility of consumption
+    --------------------------------------------------------------------
+    INPUTS:
+    cvec    = scalar or array, consumption
+    sigma   = scalar >= 1, coefficient of relative risk aversion
+    c_coefs = length 3 tuple, (epsilon, b1, b2) from
+              households.get_MU_c_coefs()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        mu_c_kernel()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    MU_c = scalar or array, marginal utility of consumption
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: MU_c
+    --------------------------------------------------------------------
+    '''
+    MU_c = mu_c_kernel(cvec, sigma, c_coefs[0], c_coefs[1], c_coefs[2])
+
+    return MU_c
+
+
+def mdu_n(nvec, params, n_coefs):
+    '''
+    --------------------------------------------------------------------
+    Stitched marginal disutility of labor
+    --------------------------------------------------------------------
+    INPUTS:
+    nvec    = scalar or array, labor supply
+    params  = length 3 tuple, (l_tilde, b_ellip, upsilon)
+    n_coefs = length 6 tuple, (eps_low, eps_high, b1, b2, d1, d2) from
+              households.get_MDU_n_coefs()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        mdu_n_kernel()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    l_tilde = scalar > 0, time endowment for each agent each period
+    b_ellip = scalar > 0, scale parameter for elliptical utility
+    upsilon = scalar > 1, shape parameter for elliptical utility
+    MDU_n   = scalar or array, marginal disutility of labor
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: MDU_n
+    --------------------------------------------------------------------
+    '''
+    l_tilde, b_ellip, upsilon = params
+    MDU_n = mdu_n_kernel(nvec, l_tilde, b_ellip, upsilon, n_coefs[0],
+                         n_coefs[1], n_coefs[2], n_coefs[3], n_coefs[4],
+                         n_coefs[5])
+
+    return MDU_n
+
+
+def n_errors(w, evec, cvec, nvec, chi_n_vec, params, diff):
+    '''
+    --------------------------------------------------------------------
+    Labor supply Euler errors with the marginal utility of consumption
+    and marginal disutility of labor fused into one pass
+    --------------------------------------------------------------------
+    INPUTS:
+    w         = scalar or array, wage
+    evec      = scalar or array, ability
+    cvec      = scalar or array, consumption
+    nvec      = scalar or array, labor supply
+    chi_n_vec = scalar or array, values for chi^n_s
+    params    = length 6 tuple, (sigma, c_coefs, l_tilde, b_ellip,
+                upsilon, n_coefs)
+    diff      = boolean, =True if use simple difference Euler errors.
+                Use percent difference errors otherwise.
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        n_err_kernel()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    sigma    = scalar >= 1, coefficient of relative risk aversion
+    c_coefs  = length 3 tuple, (epsilon, b1, b2) of MU_c_stitch()
+    l_tilde  = scalar > 0, time endowment for each agent each period
+    b_ellip  = scalar > 0, scale parameter for elliptical utility
+    upsilon  = scalar > 1, shape parameter for elliptical utility
+    n_coefs  = length 6 tuple, (eps_low, eps_high, b1, b2, d1, d2) of
+               MDU_n_stitch()
+    n_errs   = scalar or array, labor supply Euler errors
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: n_errs
+    --------------------------------------------------------------------
+    '''
+    sigma, c_coefs, l_tilde, b_ellip, upsilon, n_coefs = params
+    n_errs = n_err_kernel(w, evec, cvec, nvec, chi_n_vec, sigma,
+                          c_coefs[0], c_coefs[1], c_coefs[2], l_tilde,
+                          b_ellip, upsilon, n_coefs[0], n_coefs[1],
+                          n_coefs[2], n_coefs[3], n_coefs[4], n_coefs[5],
+                          bool(diff))
+
+    return n_errs
+
+
+def b_errors(r, cvec, params, diff):
+    '''
+    --------------------------------------------------------------------
+    Savings Euler errors between consecutive periods of cvec with the
+    marginal utilities of consumption fused into one pass
+    --------------------------------------------------------------------
+    INPUTS:
+    r      = scalar or (p-1,) vector, interest rate
+    cvec   = (p,) vector, consumption by age
+    params = length 3 tuple, (beta, sigma, c_coefs)
+    diff   = boolean, =True if use simple difference Euler errors.
+             Use percent difference errors otherwise.
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        b_err_kernel()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    beta    = scalar in (0,1), discount factor
+    sigma   = scalar >= 1, coefficient of relative risk aversion
+    c_coefs = length 3 tuple, (epsilon, b1, b2) of MU_c_stitch()
+    b_errs  = (p-1,) vector, savings Euler errors
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: b_errs
+    --------------------------------------------------------------------
+    '''
+    beta, sigma, c_coefs = params
+    b_errs = b_err_kernel(r, cvec[:-1], cvec[1:], beta, sigma, c_coefs[0],
+                          c_coefs[1], c_coefs[2], bool(diff))
+
+    return b_errs
@@ -0,0 +1,230 @@
+'''
+------------------------------------------------------------------------
+This module contains the functions that build the parameters and the
+argument tuples of the steady-state and time path iteration (TPI)
+solutions of the model with S-period lived agents, endogenous labor,
+and heterogeneous abilities from a small dictionary of primitive
+parameters. The default values of the primitive parameters are the
+values declared in execute.py, and any of them can be overridden, which
+is what a parameter sweep (see sweep.py) does for each of its tasks.
+
+This Python module imports the following module(s):
+    ability.py
+    elliputil.py
+    aggregates.py
+
+This Python module defines the following function(s):
+    get_default_params()
+    get_params()
+    get_tpi_params()
+------------------------------------------------------------------------
+'''
+# Import packages
+import numpy as np
+import ability as abil
+import elliputil as elp
+import aggregates as aggr
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_default_params():
+    '''
+    --------------------------------------------------------------------
+    Return a dictionary of the primitive parameters of the model with
+    the default values declared in execute.py
+    --------------------------------------------------------------------
+    INPUTS: None
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    prim_params = dictionary, primitive parameters of the model
+        S            = integer in [3,80], number of periods an
+                       individual lives
+        lambdas      = (J,) vector, income percentiles for distribution
+                       of ability within each cohort
+        beta_annual  = scalar in (0,1), discount factor for one year
+        sigma        = scalar > 0, coefficient of relative risk aversion
+        l_tilde      = scalar > 0, per-period time endowment
+        chi_n        = scalar > 0, value of chi^n_s for every age s
+        start_age    = integer >= 0, beginning age in years at which
+                       agents are born
+        end_age      = integer > start_age, year of life at the end of
+                       which agents die with certainty
+        A            = scalar > 0, total factor productivity
+        alpha        = scalar in (0,1), capital share of income
+        delta_annual = scalar in [0,1], one-year depreciation rate
+        Frisch_elast = scalar > 0, Frisch elasticity of labor supply
+        CFE_scale    = scalar > 0, scale parameter of CFE disutility
+        SS_tol       = scalar > 0, tolerance level for steady state
+        SS_EulDiff   = boolean, =True if use simple differences in
+                       steady-state Euler errors
+        T1_mult      = scalar > 1, T1 = round(T1_mult * S)
+        T2_mult      = scalar > T1_mult, T2 = round(T2_mult * S)
+        TPI_tol      = scalar > 0, tolerance level for TPI
+        maxiter_TPI  = integer >= 1, maximum number of TPI iterations
+        mindist_TPI  = scalar > 0, convergence criterion for TPI
+        xi_TPI       = scalar in (0,1], TPI path updating parameter
+        TPI_EulDiff  = boolean, =True if use simple differences in TPI
+                       Euler errors
+        init_wgt     = scalar > 0, factor by which the initial wealth
+                       distribution differs from b_ss
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: prim_params
+    --------------------------------------------------------------------
+    '''
+    prim_params = {'S': 20, 'lambdas': np.array([0.4, 0.3, 0.2, 0.1]),
+                   'beta_annual': 0.96, 'sigma': 2.5, 'l_tilde': 1.0,
+                   'chi_n': 1.0, 'start_age': 21, 'end_age': 100,
+                   'A': 1.0, 'alpha': 0.35, 'delta_annual': 0.05,
+                   'Frisch_elast': 0.8, 'CFE_scale': 1.0,
+                   'SS_tol': 1e-13, 'SS_EulDiff': True, 'T1_mult': 3.0,
+                   'T2_mult': 3.5, 'TPI_tol': 1e-13, 'maxiter_TPI': 200,
+                   'mindist_TPI': 1e-13, 'xi_TPI': 0.20,
+                   'TPI_EulDiff': True, 'init_wgt': 0.95}
+
+    return prim_params
+
+
+def get_params(overrides=None, ellip_table=None):
+    '''
+    --------------------------------------------------------------------
+    Build the full set of model parameters from the default primitive
+    parameters and a dictionary of overrides, including the steady-state
+    argument tuple ss_args that is passed to ss.get_SS_bsct() and
+    ss.get_SS_root()
+    --------------------------------------------------------------------
+    INPUTS:
+    overrides   = None or dictionary, values of primitive parameters
+                  that differ from get_default_params()
+    ellip_table = None or string, path of lookup table of fitted
+                  elliptical disutility of labor parameters passed to
+                  elp.get_ellip_CFE()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_default_params()
+        abil.get_e_interp()
+        elp.get_ellip_CFE()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    params       = dictionary, primitive and derived model parameters
+    key          = string, name of an overridden parameter
+    err_msg      = string, error message
+    S            = integer in [3,80], number of periods an individual
+                   lives
+    lambdas      = (J,) vector, income percentiles for distribution of
+                   ability within each cohort
+    J            = integer >= 1, number of ability groups
+    mod_age_dist = (S,) vector, population distribution by model age
+    dat_age_dist = (end_age-start_age+1,) vector, data population
+                   distribution by age
+    emat         = (S, J) matrix, e_{j,s} ability by age and income
+                   group
+    b_ellip      = scalar > 0, fitted value of b for elliptical
+                   disutility of labor
+    upsilon      = scalar > 1, fitted value of upsilon for elliptical
+                   disutility of labor
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: params
+    --------------------------------------------------------------------
+    '''
+    params = get_default_params()
+    if overrides is not None:
+        for key in overrides:
+            if key not in params:
+                err_msg = ('ERROR, get_params(): ' + str(key) + ' is ' +
+                           'not a primitive parameter of the model.')
+                raise RuntimeError(err_msg)
+            params[key] = overrides[key]
+    S = int(params['S'])
+    lambdas = np.asarray(params['lambdas'], dtype=float)
+    # Make sure that lambdas vector sums to 1.0
+    if not np.isclose(1.0, lambdas.sum()):
+        err_msg = ('ERROR, get_params(): lambdas vector does not sum ' +
+                   'to one.')
+        raise RuntimeError(err_msg)
+    J = lambdas.shape[0]
+    params['S'] = S
+    params['lambdas'] = lambdas
+    params['J'] = J
+    params['beta'] = params['beta_annual'] ** (80 / S)
+    params['delta'] = 1 - ((1 - params['delta_annual']) ** (80 / S))
+    params['chi_n_vec'] = params['chi_n'] * np.ones(S)
+    mod_age_dist = (1 / S) * np.ones(S)
+    dat_age_dist = ((1 / (params['end_age'] - params['start_age'] + 1)) *
+                    np.ones(params['end_age'] - params['start_age'] + 1))
+    emat = abil.get_e_interp(S, mod_age_dist, dat_age_dist, lambdas,
+                             plot=False)
+    params['emat'] = emat
+    b_ellip, upsilon = \
+        elp.get_ellip_CFE(np.array([1.0, 2.0]),
+                          np.array([params['Frisch_elast'],
+                                    params['CFE_scale']]),
+                          params['l_tilde'], False, ellip_table)
+    params['b_ellip'] = b_ellip
+    params['upsilon'] = upsilon
+    params['T1'] = int(round(params['T1_mult'] * S))
+    params['T2'] = int(round(params['T2_mult'] * S))
+    params['ss_args'] = (J, S, lambdas, emat, params['beta'],
+                         params['sigma'], params['l_tilde'], b_ellip,
+                         upsilon, params['chi_n_vec'], params['A'],
+                         params['alpha'], params['delta'],
+                         params['SS_tol'], params['SS_EulDiff'])
+
+    return params
+
+
+def get_tpi_params(params, ss_output):
+    '''
+    --------------------------------------------------------------------
+    Build the argument tuple that is passed to tpi.get_TPI() and the
+    initial wealth distribution from the model parameters and the
+    steady-state solution
+    --------------------------------------------------------------------
+    INPUTS:
+    params    = dictionary, model parameters from get_params()
+    ss_output = dictionary, steady-state solution from ss.get_SS_bsct()
+                or ss.get_SS_root()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        aggr.get_K()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    bmat1      = (S, J) matrix, initial period savings distribution
+    K1         = scalar, initial period aggregate capital stock
+    K1_cstr    = boolean, =True if K1 <= 0
+    err_msg    = string, error message
+    tpi_params = length 23 tuple, args to pass into tpi.get_TPI()
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: tpi_params, bmat1
+    --------------------------------------------------------------------
+    '''
+    bmat1 = params['init_wgt'] * ss_output['b_ss']
+    # Make sure init. period distribution is feasible in terms of K
+    K1, K1_cstr = aggr.get_K(bmat1, params['lambdas'])
+    if K1_cstr:
+        err_msg = ('ERROR, get_tpi_params(): Initial savings ' +
+                   'distribution is not feasible because K1<epsilon.')
+        raise RuntimeError(err_msg)
+    tpi_params = (params['J'], params['S'], params['T1'], params['T2'],
+                  params['lambdas'], params['emat'], params['beta'],
+                  params['sigma'], params['l_tilde'], params['b_ellip'],
+                  params['upsilon'], params['chi_n_vec'], params['A'],
+                  params['alpha'], params['delta'], ss_output['K_ss'],
+                  ss_output['L_ss'], ss_output['C_ss'],
+                  params['maxiter_TPI'], params['mindist_TPI'],
+                  params['TPI_tol'], params['xi_TPI'],
+                  params['TPI_EulDiff'])
+
+    return tpi_params, bmat1
@@ -0,0 +1,376 @@
+'''
+------------------------------------------------------------------------
+This module contains the functions that render the steady-state and
+transition path figures of the model with S-period lived agents,
+endogenous labor, and heterogeneous abilities from the plain arrays of
+the solutions. The solvers in SS.py and TPI.py only return arrays, and
+figures are rendered in a separate stage, so matplotlib is imported only
+inside the rendering functions of this module, and a run or a worker
+that does not draw figures never imports it.
+
+The figures are described by render tasks, which are small tuples
+
+    (kind, fig_name, plot_data, output_dir)
+
+in which plot_data is a dictionary with only the arrays that the figure
+needs. The tasks are rendered in this process or handed to a background
+pool of worker processes, so that the solver can continue while the
+figures are drawn:
+
+    fig_pool = ProcessPoolExecutor(max_workers=2)
+    fig_futures = render_figs(get_fig_tasks('SS', ss_output, lambdas),
+                              fig_pool)
+    ...
+    wait_figs(fig_futures)
+
+This Python module imports the following module(s): None
+
+This Python module defines the following function(s):
+    get_fig_tasks()
+    plot_dist()
+    plot_path()
+    render_fig()
+    render_figs()
+    wait_figs()
+------------------------------------------------------------------------
+'''
+# Import packages
+import os
+import numpy as np
+
+'''
+------------------------------------------------------------------------
+    Figures
+------------------------------------------------------------------------
+SS_figs  = tuple, names of the steady-state figures
+TPI_figs = dictionary, (output key, title, y-axis label) of each
+           transition path figure by name
+------------------------------------------------------------------------
+'''
+SS_figs = ('c_ss_3D', 'c_ss_2D', 'n_ss_3D', 'n_ss_2D', 'b_ss_3D',
+           'b_ss_2D')
+TPI_figs = {
+    'Kpath': ('Kpath', 'Time path for aggregate capital stock K',
+              r'Aggregate capital $K_{t}$'),
+    'Lpath': ('Lpath', 'Time path for aggregate labor L',
+              r'Aggregate labor $L_{t}$'),
+    'Ypath': ('Ypath', 'Time path for aggregate output (GDP) Y',
+              r'Aggregate output $Y_{t}$'),
+    'C_aggr_path': ('Cpath', 'Time path for aggregate consumption C',
+                    r'Aggregate consumption $C_{t}$'),
+    'wpath': ('wpath', 'Time path for real wage w',
+              r'Real wage $w_{t}$'),
+    'rpath': ('rpath', 'Time path for real interest rate r',
+              r'Real interest rate $r_{t}$')}
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_fig_tasks(kind, output, lambdas=None, fig_names=None,
+                  output_dir=None):
+    '''
+    --------------------------------------------------------------------
+    Build the render tasks of the requested figures of a steady-state or
+    transition path solution. Each task only holds the arrays its figure
+    needs, so that it is cheap to send to a worker process
+    --------------------------------------------------------------------
+    INPUTS:
+    kind       = string, 'SS' or 'TPI'
+    output     = dictionary, ss_output from ss.get_SS_bsct() or
+                 ss.get_SS_root() if kind='SS', or tpi_output from
+                 tpi.get_TPI() if kind='TPI'
+    lambdas    = None or (J,) vector, income percentiles for ability
+                 types. Required if kind='SS'
+    fig_names  = None or list, names of the requested figures from
+                 SS_figs or TPI_figs. If None, all figures of kind
+    output_dir = None or string, path of the folder in which the figures
+                 are saved. If None, the images folder next to this
+                 module
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    all_figs  = tuple, names of all figures of kind
+    err_msg   = string, error message
+    fig_name  = string, name of a requested figure
+    var_name  = string, name of the (S, J) matrix of a SS figure
+    plot_data = dictionary, arrays needed to draw a figure
+    fig_tasks = list, render tasks (kind, fig_name, plot_data,
+                output_dir)
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: fig_tasks
+    --------------------------------------------------------------------
+    '''
+    if kind == 'SS':
+        all_figs = SS_figs
+    elif kind == 'TPI':
+        all_figs = tuple(TPI_figs.keys())
+    else:
+        err_msg = ('ERROR, get_fig_tasks(): kind must be "SS" or ' +
+                   '"TPI".')
+        raise RuntimeError(err_msg)
+    if fig_names is None:
+        fig_names = all_figs
+    if output_dir is None:
+        output_dir = os.path.join(
+            os.path.split(os.path.abspath(__file__))[0], 'images')
+    fig_tasks = []
+    for fig_name in fig_names:
+        if fig_name not in all_figs:
+            err_msg = ('ERROR, get_fig_tasks(): ' + str(fig_name) +
+                       ' is not a ' + kind + ' figure.')
+            raise RuntimeError(err_msg)
+        if kind == 'SS':
+            var_name = fig_name[:len(fig_name) - len('_3D')]
+            plot_data = {var_name: np.asarray(output[var_name]),
+                         'lambdas': np.asarray(lambdas)}
+        else:
+            plot_data = {'path': np.asarray(output[TPI_figs[fig_name][0]])}
+        fig_tasks.append((kind, fig_name, plot_data, output_dir))
+
+    return fig_tasks
+
+
+def plot_dist(plt, fig_name, plot_data, output_path):
+    '''
+    --------------------------------------------------------------------
+    Draw and save a 3D surface or a 2D line plot of a steady-state
+    distribution of consumption, labor supply, or savings by age and
+    ability type
+    --------------------------------------------------------------------
+    INPUTS:
+    plt         = module, matplotlib.pyplot
+    fig_name    = string, name of the figure from SS_figs
+    plot_data   = dictionary, {var_name: (S, J) matrix, 'lambdas': (J,)
+                  vector}
+    output_path = string, path of file name of figure to be saved
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    var_name    = string, 'c_ss', 'n_ss', or 'b_ss'
+    var_ss      = (S, J) matrix, steady-state distribution
+    lambdas     = (J,) vector, income percentiles for ability types
+    S           = integer in [3, 80], number of periods an individual
+                  lives
+    J           = integer >= 1, number of ability types
+    var_label   = string, axis label of the distribution
+    sgrid       = (S,) vector, ages from 1 to S
+    lamcumsum   = (J,) vector, cumulative sum of lambdas vector
+    jmidgrid    = (J,) vector, midpoints of ability percentile bins
+    smat        = (J, S) matrix, sgrid copied down J rows
+    jmat        = (J, S) matrix, jmidgrid copied across S columns
+    linestyles  = (4,) vector, line styles of the first four types
+    markers     = (6,) vector, markers of the remaining types
+    pct_lb      = scalar, lower percentile bound of ability type j
+    this_label  = string, legend label of ability type j
+    box         = Bbox object, position of the axes
+
+    FILES CREATED BY THIS FUNCTION:
+        output_path.png
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    from matplotlib.ticker import MultipleLocator
+
+    var_name = fig_name[:len(fig_name) - len('_3D')]
+    var_ss = plot_data[var_name]
+    lambdas = plot_data['lambdas']
+    S, J = var_ss.shape
+    var_label = {'c_ss': r'indiv. consumption $c_{j,s}$',
+                 'n_ss': r'labor supply $n_{j,s}$',
+                 'b_ss': r'indiv. savings $b_{j,s}$'}[var_name]
+    sgrid = np.arange(1, S + 1)
+    if fig_name.endswith('_3D'):
+        lamcumsum = lambdas.cumsum()
+        jmidgrid = 0.5 * lamcumsum + 0.5 * (lamcumsum - lambdas)
+        smat, jmat = np.meshgrid(sgrid, jmidgrid)
+        fig = plt.figure()
+        ax = fig.add_subplot(111, projection='3d')
+        ax.set_xlabel(r'age-$s$')
+        ax.set_ylabel(r'ability-$j$')
+        ax.set_zlabel(var_label)
+        ax.plot_surface(smat, jmat, var_ss.T, rstride=1, cstride=6,
+                        cmap=plt.get_cmap('summer'))
+    else:
+        fig, ax = plt.subplots()
+        linestyles = np.array(["-", "--", "-.", ":"])
+        markers = np.array(["x", "v", "o", "d", ">", "|"])
+        pct_lb = 0
+        for j in range(J):
+            this_label = (str(int(np.rint(pct_lb))) + " - " +
+                          str(int(np.rint(pct_lb + 100 * lambdas[j]))) +
+                          "%")
+            pct_lb += 100 * lambdas[j]
+            if j <= 3:
+                ax.plot(sgrid, var_ss[:, j], label=this_label,
+                        linestyle=linestyles[j], color='black')
+            elif j > 3:
+                ax.plot(sgrid, var_ss[:, j], label=this_label,
+                        marker=markers[j - 4], color='black')
+        ax.xaxis.set_minor_locator(MultipleLocator(1))
+        plt.grid(True, which='major', color='0.65', linestyle='-')
+        box = ax.get_position()
+        ax.set_position([box.x0, box.y0, box.width * 0.8, box.height])
+        ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
+        ax.set_xlabel(r'age-$s$')
+        ax.set_ylabel(var_label)
+    plt.savefig(output_path)
+    # plt.show()
+    plt.close()
+
+
+def plot_path(plt, fig_name, plot_data, output_path):
+    '''
+    --------------------------------------------------------------------
+    Draw and save the time path of an aggregate variable or price
+    --------------------------------------------------------------------
+    INPUTS:
+    plt         = module, matplotlib.pyplot
+    fig_name    = string, name of the figure from TPI_figs
+    plot_data   = dictionary, {'path': (T2+S-1,) vector}
+    output_path = string, path of file name of figure to be saved
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    title  = string, title of the figure
+    ylabel = string, y-axis label of the figure
+    path   = (T2+S-1,) vector, time path
+    tvec   = (T2+S-1,) vector, time period vector
+
+    FILES CREATED BY THIS FUNCTION:
+        output_path.png
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    from matplotlib.ticker import MultipleLocator
+
+    title, ylabel = TPI_figs[fig_name][1:]
+    path = plot_data['path']
+    tvec = np.linspace(1, path.shape[0], path.shape[0])
+    fig, ax = plt.subplots()
+    plt.plot(tvec, path, marker='D')
+    # for the minor ticks, use no labels; default NullFormatter
+    ax.xaxis.set_minor_locator(MultipleLocator(1))
+    plt.grid(True, which='major', color='0.65', linestyle='-')
+    plt.title(title)
+    plt.xlabel(r'Period $t$')
+    plt.ylabel(ylabel)
+    plt.savefig(output_path)
+    # plt.show()
+    plt.close()
+
+
+def render_fig(fig_task):
+    '''
+    --------------------------------------------------------------------
+    Render one figure. This is the only place where matplotlib is
+    imported, with the non-interactive Agg backend so that it can run
+    in a background worker process
+    --------------------------------------------------------------------
+    INPUTS:
+    fig_task = length 4 tuple, (kind, fig_name, plot_data, output_dir)
+               from get_fig_tasks()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        plot_dist()
+        plot_path()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    kind        = string, 'SS' or 'TPI'
+    fig_name    = string, name of the figure
+    plot_data   = dictionary, arrays needed to draw the figure
+    output_dir  = string, path of the folder in which the figure is
+                  saved
+    output_path = string, path of file name of figure to be saved
+
+    FILES CREATED BY THIS FUNCTION:
+        output_dir/fig_name.png
+
+    RETURNS: output_path
+    --------------------------------------------------------------------
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
+
+    kind, fig_name, plot_data, output_dir = fig_task
+    # Create directory if images directory does not already exist
+    if not os.access(output_dir, os.F_OK):
+        os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, fig_name)
+    if kind == 'SS':
+        plot_dist(plt, fig_name, plot_data, output_path)
+    else:
+        plot_path(plt, fig_name, plot_data, output_path)
+
+    return output_path
+
+
+def render_figs(fig_tasks, executor=None):
+    '''
+    --------------------------------------------------------------------
+    Render a list of figures in this process or submit them to a pool
+    of background worker processes
+    --------------------------------------------------------------------
+    INPUTS:
+    fig_tasks = list, render tasks from get_fig_tasks()
+    executor  = None or ProcessPoolExecutor, pool of worker processes to
+                which the tasks are submitted. If None, the figures are
+                rendered in this process before returning
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        render_fig()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    fig_task    = length 4 tuple, render task of a figure
+    fig_futures = list, Future of each figure submitted to executor
+
+    FILES CREATED BY THIS FUNCTION:
+        output_dir/fig_name.png for each task
+
+    RETURNS: fig_futures
+    --------------------------------------------------------------------
+    '''
+    fig_futures = []
+    for fig_task in fig_tasks:
+        if executor is None:
+            render_fig(fig_task)
+        else:
+            fig_futures.append(executor.submit(render_fig, fig_task))
+
+    return fig_futures
+
+
+def wait_figs(fig_futures):
+    '''
+    --------------------------------------------------------------------
+    Wait until the figures submitted by render_figs() are saved. An
+    error raised while rendering a figure is raised again here
+    --------------------------------------------------------------------
+    INPUTS:
+    fig_futures = list, Futures returned by render_figs()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    fig_paths = list, path of each saved figure
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: fig_paths
+    --------------------------------------------------------------------
+    '''
+    fig_paths = [fig_future.result() for fig_future in fig_futures]
+
+    return fig_paths
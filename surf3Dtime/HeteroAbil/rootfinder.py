@@ -0,0 +1,499 @@
+'''
+------------------------------------------------------------------------
+This module contains vectorized root finders that solve N independent
+scalar root problems f_i(x_i) = 0 at the same time. They are used to
+solve the household problems of many ability types or cohorts at once
+instead of calling a scipy root finder on each problem in a Python loop.
+
+The function func(xvec, *args) passed into these root finders must take
+an (N,) vector xvec and return the (N,) vector of errors, where the ith
+error only depends on the ith element of xvec. For the safeguarded
+Newton method, func must return a tuple of the (N,) vector of errors and
+the (N,) vector of their derivatives with respect to xvec.
+
+    illinois: Illinois version of regula falsi on the bracket
+    brent:    Brent's method, inverse quadratic interpolation and secant
+              steps safeguarded by bisection on the bracket
+    newton:   Newton steps safeguarded by bisection on the bracket
+
+root_vec() brackets the roots and calls the chosen method.
+
+This Python module imports the following module(s): None
+
+This Python module defines the following function(s):
+    get_bracket_vec()
+    illinois_vec()
+    brent_vec()
+    newton_vec()
+    root_vec()
+------------------------------------------------------------------------
+'''
+# Import packages
+import numpy as np
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_bracket_vec(func, x_init, args=(), maxiter=100):
+    '''
+    --------------------------------------------------------------------
+    Find brackets [x_lo, x_hi] such that func changes sign on each
+    bracket by stepping out from the initial guesses in both directions
+    with step sizes that double every iteration
+    --------------------------------------------------------------------
+    INPUTS:
+    func    = function, vectorized function whose roots are bracketed
+    x_init  = scalar or (N,) vector, initial guesses of the roots
+    args    = tuple, additional arguments to pass into func
+    maxiter = integer >= 1, maximum number of bracket expansions
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        func()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    x_lo    = (N,) vector, lower ends of brackets
+    x_hi    = (N,) vector, upper ends of brackets
+    f_lo    = (N,) vector, values of func at x_lo
+    f_hi    = (N,) vector, values of func at x_hi
+    step    = (N,) vector, current bracket expansion step sizes
+    found   = (N,) boolean vector, =True if bracket has been found
+    iter_br = integer >= 0, iteration number
+    x_new   = (N,) vector, trial points below and above initial guesses
+    f_new   = (N,) vector, values of func at x_new
+    down    = (N,) boolean vector, =True if sign change found below x_lo
+    up      = (N,) boolean vector, =True if sign change found above x_hi
+    err_msg = string, error message
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: x_lo, x_hi, f_lo, f_hi
+    --------------------------------------------------------------------
+    '''
+    x_lo = np.array(x_init, dtype=float).flatten()
+    x_hi = x_lo.copy()
+    f_lo = np.asarray(func(x_lo, *args), dtype=float).copy()
+    f_hi = f_lo.copy()
+    step = 0.1 * np.absolute(x_lo) + 1e-4
+    found = f_lo == 0.0
+    iter_br = 0
+    while (not found.all()) and (iter_br < maxiter):
+        iter_br += 1
+        # Step down from the current lower ends of the brackets
+        x_new = np.where(found, x_lo, x_lo - step)
+        f_new = np.asarray(func(x_new, *args), dtype=float)
+        down = ~found & (np.sign(f_new) != np.sign(f_lo))
+        x_hi[down] = x_lo[down]
+        f_hi[down] = f_lo[down]
+        x_lo[~found] = x_new[~found]
+        f_lo[~found] = f_new[~found]
+        found = found | down
+        # Step up from the current upper ends of the brackets
+        x_new = np.where(found, x_hi, x_hi + step)
+        f_new = np.asarray(func(x_new, *args), dtype=float)
+        up = ~found & (np.sign(f_new) != np.sign(f_hi))
+        x_lo[up] = x_hi[up]
+        f_lo[up] = f_hi[up]
+        x_hi[~found] = x_new[~found]
+        f_hi[~found] = f_new[~found]
+        found = found | up
+        step = 2 * step
+
+    if not found.all():
+        err_msg = ('ERROR, get_bracket_vec(): Could not bracket a root ' +
+                   'for ' + str((~found).sum()) + ' of ' +
+                   str(found.shape[0]) + ' problems.')
+        raise RuntimeError(err_msg)
+
+    return x_lo, x_hi, f_lo, f_hi
+
+
+def illinois_vec(func, x_lo, x_hi, f_lo, f_hi, args=(), tol=1e-13,
+                 maxiter=500):
+    '''
+    --------------------------------------------------------------------
+    Solve N independent scalar root problems on brackets [x_lo, x_hi]
+    with the Illinois version of the regula falsi (false position)
+    method. Each iteration evaluates func once on the whole vector of
+    current guesses. Problems that have converged keep their solution
+    while the others keep iterating.
+    --------------------------------------------------------------------
+    INPUTS:
+    func    = function, vectorized function whose roots are found
+    x_lo    = (N,) vector, lower ends of brackets
+    x_hi    = (N,) vector, upper ends of brackets
+    f_lo    = (N,) vector, values of func at x_lo
+    f_hi    = (N,) vector, values of func at x_hi, opposite in sign to
+              f_lo
+    args    = tuple, additional arguments to pass into func
+    tol     = scalar > 0, convergence tolerance on both the absolute
+              value of func and the relative width of the bracket
+    maxiter = integer >= 1, maximum number of iterations
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        func()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    a        = (N,) vector, current ends of brackets with values fa
+    b        = (N,) vector, current ends of brackets with values fb
+    fa       = (N,) vector, values of func at a
+    fb       = (N,) vector, values of func at b
+    side     = (N,) integer vector, -1 or 1 for the end of the bracket
+               that was retained in the previous iteration
+    xvec     = (N,) vector, current estimates of the roots
+    fvec     = (N,) vector, values of func at xvec
+    conv     = (N,) boolean vector, =True if problem has converged
+    iter_rt  = integer >= 0, iteration number
+    denom    = (N,) vector, fb - fa
+    x_new    = (N,) vector, false position points of the brackets
+    f_new    = (N,) vector, values of func at x_new
+    same_a   = (N,) boolean vector, =True if f_new has the same sign as
+               fa
+    same_b   = (N,) boolean vector, =True if f_new has the same sign as
+               fb
+    success  = boolean, =True if all N problems converged
+    nfev     = integer >= 1, number of vector evaluations of func
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: xvec, fvec, success, nfev
+    --------------------------------------------------------------------
+    '''
+    a = np.array(x_lo, dtype=float)
+    b = np.array(x_hi, dtype=float)
+    fa = np.array(f_lo, dtype=float)
+    fb = np.array(f_hi, dtype=float)
+    side = np.zeros(a.shape[0], dtype=int)
+    xvec = np.where(np.absolute(fa) <= np.absolute(fb), a, b)
+    fvec = np.where(np.absolute(fa) <= np.absolute(fb), fa, fb)
+    conv = ((np.absolute(fvec) <= tol) |
+            (np.absolute(b - a) <= tol * (1 + np.absolute(xvec))))
+    iter_rt = 0
+    nfev = 0
+    while (not conv.all()) and (iter_rt < maxiter):
+        iter_rt += 1
+        denom = fb - fa
+        denom[denom == 0.0] = 1.0
+        x_new = np.where(conv, xvec, (a * fb - b * fa) / denom)
+        f_new = np.asarray(func(x_new, *args), dtype=float)
+        nfev += 1
+        f_new[conv] = fvec[conv]
+        same_a = ~conv & (np.sign(f_new) == np.sign(fa))
+        same_b = ~conv & ~same_a
+        # Replace end a, and halve fb if b was also kept last iteration
+        fb[same_a & (side == 1)] *= 0.5
+        a[same_a] = x_new[same_a]
+        fa[same_a] = f_new[same_a]
+        side[same_a] = 1
+        # Replace end b, and halve fa if a was also kept last iteration
+        fa[same_b & (side == -1)] *= 0.5
+        b[same_b] = x_new[same_b]
+        fb[same_b] = f_new[same_b]
+        side[same_b] = -1
+        xvec = x_new
+        fvec = f_new
+        conv = ((np.absolute(fvec) <= tol) |
+                (np.absolute(b - a) <= tol * (1 + np.absolute(xvec))))
+    success = conv.all()
+
+    return xvec, fvec, success, nfev
+
+
+def brent_vec(func, x_lo, x_hi, f_lo, f_hi, args=(), tol=1e-13,
+              maxiter=500):
+    '''
+    --------------------------------------------------------------------
+    Solve N independent scalar root problems on brackets [x_lo, x_hi]
+    with Brent's method. Each iteration tries an inverse quadratic
+    interpolation step (or a secant step if only two points are
+    distinct) for every problem and falls back to bisection for the
+    problems in which the interpolation step is not safe, following
+    the steps of scipy.optimize.brentq(). Each iteration evaluates func
+    once on the whole vector of current guesses. Problems that have
+    converged keep their solution while the others keep iterating.
+    --------------------------------------------------------------------
+    INPUTS:
+    func    = function, vectorized function whose roots are found
+    x_lo    = (N,) vector, lower ends of brackets
+    x_hi    = (N,) vector, upper ends of brackets
+    f_lo    = (N,) vector, values of func at x_lo
+    f_hi    = (N,) vector, values of func at x_hi, opposite in sign to
+              f_lo
+    args    = tuple, additional arguments to pass into func
+    tol     = scalar > 0, convergence tolerance on both the absolute
+              value of func and the relative width of the bracket
+    maxiter = integer >= 1, maximum number of iterations
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        func()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    xpre    = (N,) vector, previous estimates of the roots
+    xcur    = (N,) vector, current estimates of the roots
+    xblk    = (N,) vector, contrapoints, values of x such that func
+              has opposite signs at xcur and xblk
+    fpre    = (N,) vector, values of func at xpre
+    fcur    = (N,) vector, values of func at xcur
+    fblk    = (N,) vector, values of func at xblk
+    spre    = (N,) vector, step taken two iterations ago
+    scur    = (N,) vector, step taken in previous iteration
+    conv    = (N,) boolean vector, =True if problem has converged
+    iter_rt = integer >= 0, iteration number
+    nfev    = integer >= 0, number of vector evaluations of func
+    flip    = (N,) boolean vector, =True if the sign of func changed
+              between xpre and xcur so that xpre is the new contrapoint
+    swap    = (N,) boolean vector, =True if |fblk| < |fcur| so that
+              xcur and xblk are swapped
+    delta   = (N,) vector, half of the convergence tolerance on x
+    sbis    = (N,) vector, bisection steps
+    interp  = (N,) boolean vector, =True if an interpolation step is
+              tried
+    secant  = (N,) boolean vector, =True if the interpolation step is a
+              secant step
+    dpre    = (N,) vector, slopes between xpre and xcur
+    dblk    = (N,) vector, slopes between xblk and xcur
+    stry    = (N,) vector, trial interpolation steps
+    accept  = (N,) boolean vector, =True if the interpolation step is
+              accepted
+    active  = (N,) boolean vector, =True if problem has not converged
+    success = boolean, =True if all N problems converged
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: xcur, fcur, success, nfev
+    --------------------------------------------------------------------
+    '''
+    xpre = np.array(x_lo, dtype=float)
+    xcur = np.array(x_hi, dtype=float)
+    fpre = np.array(f_lo, dtype=float)
+    fcur = np.array(f_hi, dtype=float)
+    xblk = np.zeros(xcur.shape[0])
+    fblk = np.zeros(xcur.shape[0])
+    spre = np.zeros(xcur.shape[0])
+    scur = np.zeros(xcur.shape[0])
+    conv = (fpre == 0.0) | (fcur == 0.0)
+    xcur = np.where(fpre == 0.0, xpre, xcur)
+    fcur = np.where(fpre == 0.0, fpre, fcur)
+    iter_rt = 0
+    nfev = 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while iter_rt < maxiter:
+            flip = ~conv & (np.sign(fpre) != np.sign(fcur))
+            xblk[flip] = xpre[flip]
+            fblk[flip] = fpre[flip]
+            spre[flip] = xcur[flip] - xpre[flip]
+            scur[flip] = spre[flip]
+            swap = ~conv & (np.absolute(fblk) < np.absolute(fcur))
+            xpre[swap] = xcur[swap]
+            xcur[swap] = xblk[swap]
+            xblk[swap] = xpre[swap]
+            fpre[swap] = fcur[swap]
+            fcur[swap] = fblk[swap]
+            fblk[swap] = fpre[swap]
+            delta = tol * (1 + np.absolute(xcur)) / 2
+            sbis = (xblk - xcur) / 2
+            conv = (conv | (fcur == 0.0) | (np.absolute(sbis) < delta) |
+                    (np.absolute(fcur) <= tol))
+            if conv.all():
+                break
+            iter_rt += 1
+            interp = ((np.absolute(spre) > delta) &
+                      (np.absolute(fcur) < np.absolute(fpre)))
+            secant = xpre == xblk
+            dpre = (fpre - fcur) / (xpre - xcur)
+            dblk = (fblk - fcur) / (xblk - xcur)
+            stry = np.where(secant,
+                            -fcur * (xcur - xpre) / (fcur - fpre),
+                            -fcur * (fblk * dblk - fpre * dpre) /
+                            (dblk * dpre * (fblk - fpre)))
+            accept = (interp & np.isfinite(stry) &
+                      (2 * np.absolute(stry) <
+                       np.minimum(np.absolute(spre),
+                                  3 * np.absolute(sbis) - delta)))
+            active = ~conv
+            spre = np.where(active & accept, scur,
+                            np.where(active, sbis, spre))
+            scur = np.where(active & accept, stry,
+                            np.where(active, sbis, scur))
+            xpre = np.where(active, xcur, xpre)
+            fpre = np.where(active, fcur, fpre)
+            xcur = np.where(active & (np.absolute(scur) > delta),
+                            xcur + scur,
+                            np.where(active,
+                                     xcur + np.where(sbis > 0, delta,
+                                                     -delta), xcur))
+            fcur = np.where(active,
+                            np.asarray(func(xcur, *args), dtype=float),
+                            fcur)
+            nfev += 1
+    success = conv.all()
+
+    return xcur, fcur, success, nfev
+
+
+def newton_vec(func, x_lo, x_hi, f_lo, f_hi, args=(), tol=1e-13,
+               maxiter=500):
+    '''
+    --------------------------------------------------------------------
+    Solve N independent scalar root problems on brackets [x_lo, x_hi]
+    with Newton's method safeguarded by bisection. A Newton step that
+    leaves the current bracket, or whose derivative is zero or not
+    finite, is replaced by the bisection step. The bracket is updated
+    with the sign of func at each new point. Each iteration evaluates
+    func and its derivative once on the whole vector of current
+    guesses.
+    --------------------------------------------------------------------
+    INPUTS:
+    func    = function, vectorized function that returns the errors and
+              their derivatives, (fvec, dfvec) = func(xvec, *args)
+    x_lo    = (N,) vector, lower ends of brackets
+    x_hi    = (N,) vector, upper ends of brackets
+    f_lo    = (N,) vector, values of func at x_lo
+    f_hi    = (N,) vector, values of func at x_hi, opposite in sign to
+              f_lo
+    args    = tuple, additional arguments to pass into func
+    tol     = scalar > 0, convergence tolerance on the absolute value of
+              func, the relative width of the bracket, and the relative
+              size of the Newton step
+    maxiter = integer >= 1, maximum number of iterations
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        func()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    a       = (N,) vector, current ends of brackets with values fa
+    b       = (N,) vector, current ends of brackets with values fb
+    fa      = (N,) vector, values of func at a
+    xvec    = (N,) vector, current estimates of the roots
+    fvec    = (N,) vector, values of func at xvec
+    dfvec   = (N,) vector, derivatives of func at xvec
+    step    = (N,) vector, last step taken
+    conv    = (N,) boolean vector, =True if problem has converged
+    iter_rt = integer >= 0, iteration number
+    nfev    = integer >= 1, number of vector evaluations of func
+    x_newt  = (N,) vector, Newton points
+    x_bis   = (N,) vector, midpoints of brackets
+    safe    = (N,) boolean vector, =True if Newton point is inside the
+              bracket
+    x_new   = (N,) vector, next estimates of the roots
+    f_new   = (N,) vector, values of func at x_new
+    df_new  = (N,) vector, derivatives of func at x_new
+    same_a  = (N,) boolean vector, =True if f_new has the same sign as
+              fa
+    success = boolean, =True if all N problems converged
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: xvec, fvec, success, nfev
+    --------------------------------------------------------------------
+    '''
+    a = np.array(x_lo, dtype=float)
+    b = np.array(x_hi, dtype=float)
+    fa = np.array(f_lo, dtype=float)
+    xvec = np.where(np.absolute(f_lo) <= np.absolute(f_hi), a, b)
+    fvec, dfvec = func(xvec, *args)
+    fvec = np.array(fvec, dtype=float)
+    dfvec = np.array(dfvec, dtype=float)
+    nfev = 1
+    step = b - a
+    conv = ((np.absolute(fvec) <= tol) |
+            (np.absolute(b - a) <= tol * (1 + np.absolute(xvec))))
+    iter_rt = 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while (not conv.all()) and (iter_rt < maxiter):
+            iter_rt += 1
+            x_newt = xvec - fvec / dfvec
+            x_bis = (a + b) / 2
+            safe = (np.isfinite(x_newt) &
+                    (x_newt > np.minimum(a, b)) &
+                    (x_newt < np.maximum(a, b)))
+            x_new = np.where(conv, xvec, np.where(safe, x_newt, x_bis))
+            f_new, df_new = func(x_new, *args)
+            f_new = np.array(f_new, dtype=float)
+            df_new = np.array(df_new, dtype=float)
+            nfev += 1
+            f_new[conv] = fvec[conv]
+            df_new[conv] = dfvec[conv]
+            same_a = ~conv & (np.sign(f_new) == np.sign(fa))
+            a[same_a] = x_new[same_a]
+            fa[same_a] = f_new[same_a]
+            b[~conv & ~same_a] = x_new[~conv & ~same_a]
+            step = np.where(conv, step, x_new - xvec)
+            xvec = x_new
+            fvec = f_new
+            dfvec = df_new
+            conv = ((np.absolute(fvec) <= tol) |
+                    (np.absolute(b - a) <= tol * (1 + np.absolute(xvec))) |
+                    (np.absolute(step) <= tol * (1 + np.absolute(xvec))))
+    success = conv.all()
+
+    return xvec, fvec, success, nfev
+
+
+def root_vec(func, x_init, args=(), method='brent', tol=1e-13,
+             maxiter=500):
+    '''
+    --------------------------------------------------------------------
+    Solve N independent scalar root problems by bracketing each root
+    with get_bracket_vec() starting from x_init and then calling the
+    chosen bracketing root finder
+    --------------------------------------------------------------------
+    INPUTS:
+    func    = function, vectorized function whose roots are found. If
+              method='newton', func returns (fvec, dfvec)
+    x_init  = scalar or (N,) vector, initial guesses of the roots
+    args    = tuple, additional arguments to pass into func
+    method  = string, 'illinois', 'brent', or 'newton'
+    tol     = scalar > 0, convergence tolerance
+    maxiter = integer >= 1, maximum number of iterations
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_bracket_vec()
+        illinois_vec()
+        brent_vec()
+        newton_vec()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    err_msg = string, error message
+    f_only  = function, func with only the errors returned
+    x_lo    = (N,) vector, lower ends of brackets
+    x_hi    = (N,) vector, upper ends of brackets
+    f_lo    = (N,) vector, values of func at x_lo
+    f_hi    = (N,) vector, values of func at x_hi
+    xvec    = (N,) vector, roots
+    fvec    = (N,) vector, values of func at the roots
+    success = boolean, =True if all N problems converged
+    nfev    = integer >= 1, number of vector evaluations of func
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: xvec, fvec, success, nfev
+    --------------------------------------------------------------------
+    '''
+    if method not in ('illinois', 'brent', 'newton'):
+        err_msg = ('ERROR, root_vec(): method must be "illinois", ' +
+                   '"brent", or "newton".')
+        raise RuntimeError(err_msg)
+    if method == 'newton':
+        def f_only(xvec, *args):
+            return func(xvec, *args)[0]
+    else:
+        f_only = func
+    x_lo, x_hi, f_lo, f_hi = get_bracket_vec(f_only, x_init, args=args)
+    if method == 'illinois':
+        xvec, fvec, success, nfev = \
+            illinois_vec(func, x_lo, x_hi, f_lo, f_hi, args=args,
+                         tol=tol, maxiter=maxiter)
+    elif method == 'brent':
+        xvec, fvec, success, nfev = \
+            brent_vec(func, x_lo, x_hi, f_lo, f_hi, args=args, tol=tol,
+                      maxiter=maxiter)
+    else:
+        xvec, fvec, success, nfev = \
+            newton_vec(func, x_lo, x_hi, f_lo, f_hi, args=args,
+                       tol=tol, maxiter=maxiter)
+
+    return xvec, fvec, success, nfev
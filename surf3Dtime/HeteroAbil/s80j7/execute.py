@@ -7,36 +7,69 @@ labor, and heterogeneous abilities from Chapter 8 of the OG textbook.
 This Python script imports the following module(s):
     SS.py
     TPI.py
+    jacobian.py
     aggregates.py
     ability.py
     elliputil.py
     utilities.py
+    cache.py
+    instrument.py
+    plots.py
 
 This Python script calls the following function(s):
     abil.get_e_interp()
-    elp.fit_ellip_CFE()
+    elp.get_ellip_CFE()
+    inst.get_jsonl_sink()
+    inst.get_monitor()
     ss.get_SS_bsct()
+    ss.get_SS_root()
+    utils.save_arg_digests()
+    utils.load_arg_digests()
     utils.compare_args()
+    ss.get_SS_key()
+    cache.load_cache()
     aggr.get_K()
+    jac.get_KL_jac()
     tpi.get_TPI()
+    jac.get_b1_jac()
+    jac.get_IRF_mat()
+    jac.get_TPI_lin()
+    utils.print_time()
+    utils.save_path_arrays()
+    utils.save_vis_arrays()
+    plots.get_fig_tasks()
+    plots.render_figs()
+    plots.wait_figs()
 
 Files created by this script:
     OUTPUT/SS/ss_vars.pkl
     OUTPUT/SS/ss_args.pkl
+    OUTPUT/SS/ss_args_digests.json
     OUTPUT/TPI/tpi_vars.pkl
     OUTPUT/TPI/tpi_args.pkl
+    OUTPUT/TPI/tpi_<key>.npy for each array of tpi_output
+    OUTPUT/TPI/tpi_manifest.json
+    OUTPUT/TPI/tpi_vis_<key>.npy for each array of tpi_output
+    OUTPUT/TPI/tpi_vis_manifest.json
+    OUTPUT/TPI/tpi_ckpt.npz
+    OUTPUT/profile.jsonl
 ------------------------------------------------------------------------
 '''
 # Import packages
 import numpy as np
 import pickle
 import os
+from concurrent.futures import ProcessPoolExecutor
 import SS as ss
 import TPI as tpi
+import jacobian as jac
 import aggregates as aggr
 import ability as abil
 import elliputil as elp
 import utilities as utils
+import cache
+import instrument as inst
+import plots
 
 '''
 ------------------------------------------------------------------------
@@ -52,6 +85,13 @@ beta          = scalar in (0,1), discount factor for each model period
 sigma         = scalar > 0, coefficient of relative risk aversion
 l_tilde       = scalar > 0, per-period time endowment for every agent
 chi_n_vec     = (S,) vector, values for chi^n_s
+n_method      = string, 'root', 'closed', 'brent', or 'stacked',
+                method used to solve the household problems
+hh_batch      = boolean, =True if solve the household problems of all J
+                ability types (steady state) or of all cohorts (TPI) at
+                once with a vectorized root finder
+hh_root       = string, 'illinois', 'brent', or 'newton', vectorized
+                root finder used if hh_batch=True
 start_age     = integer >= 0, beginning age in years at which agents are
                 born. For example, start_age = 0 means agents are born
                 at the beginning of their 0th year (true day of birth)
@@ -74,6 +114,19 @@ SS_tol        = scalar > 0, tolerance level for steady-state fsolve
 SS_graphs     = boolean, =True if want graphs of steady-state objects
 SS_EulDiff    = boolean, =True if use simple differences in Euler
                 errors. Otherwise, use percent deviation form.
+SS_method     = string, 'bsct' to solve the SS outer loop by damped
+                fixed point iteration or 'root' to solve it as a root
+                problem in (K, L)
+SS_root_method = string, method used by opt.root() if SS_method='root'
+args_rtol     = scalar >= 0, relative tolerance within which the
+                parameters of the saved steady state in OUTPUT/SS match
+                the current parameters if SS_solve=False
+cache_fldr    = string, cur_path extension of the folder of the solution
+                cache, in which SS and TPI solutions are saved by the
+                digest of their args and retrieved instead of being
+                recomputed
+warm_start    = boolean, =True to start the SS and TPI solutions from
+                the cached solution with the nearest parameters
 T1            = integer > S, number of time periods until steady state
                 is assumed to be reached
 T2            = integer > T1, number of time periods after which steady-
@@ -84,9 +137,48 @@ maxiter_TPI   = integer >= 1, Maximum number of iterations for TPI
 mindist_TPI   = scalar > 0, Convergence criterion for TPI
 xi_TPI        = scalar in (0,1], TPI path updating parameter
 TPI_graphs    = Boolean, =True if want graphs of TPI objects
+TPI_workers   = integer >= 1, number of worker processes used to solve
+                the household lifetime problems in TPI. Values greater
+                than 1 only work on platforms that fork worker processes
+                (Linux), because this script is not guarded by
+                if __name__ == '__main__'. Ignored if hh_batch=True
+                or if S < tpi.workers_min_S, where a pool is slower
+                than solving the problems in sequence
+TPI_accel     = string, 'damped', 'anderson', 'broyden', or 'newton',
+                method used to update the guess of the K and L paths in
+                TPI. 'newton' uses the sequence-space Jacobian of the TPI
+                mapping around the steady state, which is saved in the
+                solution cache and reused for any initial distribution
+TPI_accel_mem = integer >= 1, number of past iterations used by Anderson
+                mixing in TPI
+TPI_ckpt_iter = integer >= 1, number of TPI iterations between
+                checkpoints of the K and L paths in OUTPUT/TPI/tpi_ckpt.npz
+TPI_ckpt_secs = None or scalar > 0, wall-clock seconds between TPI
+                checkpoints
+TPI_resume    = boolean, =True to restart TPI from the checkpoint in
+                OUTPUT/TPI/tpi_ckpt.npz if it was saved for the same
+                parameters and initial savings distribution
 TPI_EulDiff   = Boolean, =True if want difference version of Euler
                 errors beta*(1+r)*u'(c2) - u'(c1), =False if want ratio
                 version [beta*(1+r)*u'(c2)]/[u'(c1)] - 1
+TPI_lin_check = boolean, =True to also compute the linear approximation
+                of the transition path from the sequence-space Jacobians
+                (jac.get_TPI_lin()) and print its largest differences
+                from the TPI solution
+profile       = boolean, =True to append a JSON line with the timings
+                and root finder counts of each SS and TPI iteration to
+                OUTPUT/profile.jsonl
+vis_precision = None or string, 'float32' or 'int16', precision of the
+                visualization copies of the TPI arrays saved by
+                utils.save_vis_arrays() for surf3Dtime/main.py. If None,
+                no copies are saved
+fig_workers   = integer >= 0, number of background worker processes
+                that render the SS and TPI graphs from the solutions
+                while this script continues. If 0, the graphs are
+                rendered in this process. Values greater than 0 only
+                work on platforms that fork worker processes (Linux),
+                because this script is not guarded by
+                if __name__ == '__main__'
 ------------------------------------------------------------------------
 '''
 # Household parameters
@@ -102,6 +194,9 @@ beta = beta_annual ** (80 / S)
 sigma = 2.5
 l_tilde = 1.0
 chi_n_vec = 1.0 * np.ones(S)
+n_method = 'closed'
+hh_batch = True
+hh_root = 'brent'
 start_age = 21
 end_age = 100
 mod_age_dist = (1 / S) * np.ones(S)
@@ -119,6 +214,11 @@ SS_solve = True
 SS_tol = 1e-13
 SS_graphs = True
 SS_EulDiff = True
+SS_method = 'root'
+cache_fldr = 'OUTPUT/CACHE'
+warm_start = True
+SS_root_method = 'hybr'
+args_rtol = 0.0
 # TPI parameters
 T1 = int(round(3.0 * S))
 T2 = int(round(3.5 * S))
@@ -129,6 +229,16 @@ mindist_TPI = 1e-13
 xi_TPI = 0.20
 TPI_graphs = True
 TPI_EulDiff = True
+TPI_workers = 1
+TPI_accel = 'anderson'
+TPI_accel_mem = 5
+TPI_ckpt_iter = 10
+TPI_ckpt_secs = 600.0
+TPI_resume = True
+TPI_lin_check = False
+profile = False
+vis_precision = 'float32'
+fig_workers = 0
 
 '''
 ------------------------------------------------------------------------
@@ -137,6 +247,9 @@ disutility of labor function by matching marginal utilities along the
 support of leisure
 ------------------------------------------------------------------------
 ellip_graph  = Boolean, =True if want to save plot of fit
+ellip_table  = string, path of lookup table of fitted elliptical
+               disutility of labor parameters, from which the fit is
+               taken if these CFE parameters have been fitted before
 b_ellip_init = scalar > 0, initial guess for b
 upsilon_init = scalar > 1, initial guess for upsilon
 ellip_init   = (2,) vector, initial guesses for b and upsilon
@@ -157,8 +270,10 @@ ellip_init = np.array([b_ellip_init, upsilon_init])
 Frisch_elast = 0.8
 CFE_scale = 1.0
 cfe_params = np.array([Frisch_elast, CFE_scale])
-b_ellip, upsilon = elp.fit_ellip_CFE(ellip_init, cfe_params, l_tilde,
-                                     ellip_graph)
+ellip_table = os.path.join(os.path.split(os.path.abspath(__file__))[0],
+                           cache_fldr, 'ellip_table.json')
+b_ellip, upsilon = elp.get_ellip_CFE(ellip_init, cfe_params, l_tilde,
+                                     ellip_graph, ellip_table)
 
 '''
 ------------------------------------------------------------------------
@@ -169,6 +284,8 @@ ss_output_fldr = string, cur_path extension of SS output folder path
 ss_output_dir  = string, full path name of SS output folder
 ss_outputfile  = string, path name of file for SS output objects
 ss_paramsfile  = string, path name of file for SS parameter objects
+ss_digestfile  = string, path name of file for digests of SS parameter
+                 objects
 Kss_init       = scalar > 0, initial guess for K_ss
 Lss_init       = scalar > 0, initial guess for L_ss
 c1_init        = scalar > 0, initial guess for c1
@@ -181,8 +298,17 @@ ss_output      = length 14 dict, steady-state objects {n_ss, b_ss, c_ss,
 ss_vars_exst   = boolean, =True if ss_vars.pkl exists
 ss_args_exst   = boolean, =True if ss_args.pkl exists
 err_msg        = string, error message
-cur_ss_args    = length 17 tuple, current args
-args_same      = boolean, =True if ss_args == cur_ss_args
+cur_ss_args    = length 15 tuple, current args
+ss_key         = string, cache key of the steady state for cur_ss_args
+cache_dir      = string, total path of solution cache folder
+monitor        = None or dictionary, monitor from inst.get_monitor() if
+                 profile=True
+fig_dir        = string, full path name of images folder
+fig_pool       = None or ProcessPoolExecutor, background worker processes
+                 that render the graphs if fig_workers > 0
+fig_futures    = list, Future of each graph submitted to fig_pool
+args_same      = boolean, =True if ss_args == cur_ss_args up to the
+                 relative tolerance args_rtol
 ------------------------------------------------------------------------
 '''
 # Create OUTPUT/SS directory if does not already exist
@@ -193,122 +319,230 @@ if not os.access(ss_output_dir, os.F_OK):
     os.makedirs(ss_output_dir)
 ss_outputfile = os.path.join(ss_output_dir, 'ss_vars.pkl')
 ss_paramsfile = os.path.join(ss_output_dir, 'ss_args.pkl')
+ss_digestfile = os.path.join(ss_output_dir, 'ss_args_digests.json')
+cache_dir = os.path.join(cur_path, cache_fldr)
+if profile:
+    monitor = inst.get_monitor([inst.get_jsonl_sink(
+        os.path.join(cur_path, 'OUTPUT', 'profile.jsonl'))])
+else:
+    monitor = None
+fig_dir = os.path.join(cur_path, 'images')
+if (SS_graphs or TPI_graphs) and (fig_workers > 0):
+    fig_pool = ProcessPoolExecutor(max_workers=fig_workers)
+else:
+    fig_pool = None
+fig_futures = []
 
-# Compute steady-state solution
-if SS_solve:
-    print('BEGIN EQUILIBRIUM STEADY-STATE COMPUTATION')
-    Kss_init = 3.0
-    Lss_init = 5.0
-    c1_init = 0.03
-    init_vals = (Kss_init, Lss_init, c1_init)
-    ss_args = (J, S, lambdas, emat, beta, sigma, l_tilde, b_ellip,
-               upsilon, chi_n_vec, A, alpha, delta, SS_tol, SS_EulDiff)
-    print('Solving SS outer loop using bisection method.')
-    ss_output = ss.get_SS_bsct(init_vals, ss_args, SS_graphs)
+# Shut the graph worker processes down even if a solver raises
+try:
+    # Compute steady-state solution
+    if SS_solve:
+        print('BEGIN EQUILIBRIUM STEADY-STATE COMPUTATION')
+        Kss_init = 3.0
+        Lss_init = 5.0
+        c1_init = 0.03
+        init_vals = (Kss_init, Lss_init, c1_init)
+        ss_args = (J, S, lambdas, emat, beta, sigma, l_tilde, b_ellip,
+                   upsilon, chi_n_vec, A, alpha, delta, SS_tol, SS_EulDiff)
+        if SS_method == 'root':
+            print('Solving SS outer loop using root finder ' +
+                  SS_root_method + '.')
+            ss_output = ss.get_SS_root(init_vals, ss_args, False,
+                                       n_method, hh_batch, SS_root_method,
+                                       cache_dir, warm_start, hh_root,
+                                       monitor)
+        else:
+            print('Solving SS outer loop using bisection method.')
+            ss_output = ss.get_SS_bsct(init_vals, ss_args, False,
+                                       n_method, hh_batch, cache_dir,
+                                       warm_start, hh_root, monitor)
 
-    # Save ss_output as pickle
-    pickle.dump(ss_output, open(ss_outputfile, 'wb'))
-    pickle.dump(ss_args, open(ss_paramsfile, 'wb'))
+        # Save ss_output as pickle
+        pickle.dump(ss_output, open(ss_outputfile, 'wb'))
+        pickle.dump(ss_args, open(ss_paramsfile, 'wb'))
+        utils.save_arg_digests(ss_digestfile, ss_args)
 
-# Don't compute steady-state, get it from pickle
-else:
-    # Make sure that the SS output files exist
-    ss_vars_exst = os.path.exists(ss_outputfile)
-    ss_args_exst = os.path.exists(ss_paramsfile)
-    if (not ss_vars_exst) or (not ss_args_exst):
-        # If the files don't exist, stop the program and run the steady-
-        # state solution first
-        err_msg = ('ERROR: The SS output files do not exist and ' +
-                   'SS_solve=False. Must set SS_solve=True and ' +
-                   'compute steady-state solution.')
-        raise RuntimeError(err_msg)
+    # Don't compute steady-state, get it from pickle
     else:
-        # If the files do exist, make sure that none of the parameters
-        # changed from the parameters used in the solution for the saved
-        # steady-state pickle
-        ss_args = pickle.load(open(ss_paramsfile, 'rb'))
-        cur_ss_args = (J, S, lambdas, emat, beta, sigma, l_tilde,
-                       b_ellip, upsilon, chi_n_vec, A, alpha, delta,
-                       SS_tol, SS_EulDiff)
-        args_same = utils.compare_args(ss_args, cur_ss_args)
-        if args_same:
-            # If none of the parameters changed, use saved pickle
-            print('RETRIEVE STEADY-STATE SOLUTIONS FROM FILE')
-            ss_output = pickle.load(open(ss_outputfile, 'rb'))
-        else:
-            # If any of the parameters changed, end the program and
-            # compute the steady-state solution
-            err_msg = ('ERROR: Current ss_args are not equal to the ' +
-                       'ss_args that produced ss_output. Must solve ' +
-                       'for SS before solving transition path. Set ' +
-                       'SS_solve=True.')
+        # Make sure that the SS output files exist
+        ss_vars_exst = os.path.exists(ss_outputfile)
+        ss_args_exst = os.path.exists(ss_paramsfile)
+        if (not ss_vars_exst) or (not ss_args_exst):
+            # If the files don't exist, stop the program and run the steady-
+            # state solution first
+            err_msg = ('ERROR: The SS output files do not exist and ' +
+                       'SS_solve=False. Must set SS_solve=True and ' +
+                       'compute steady-state solution.')
             raise RuntimeError(err_msg)
+        else:
+            # If the files do exist, make sure that none of the parameters
+            # changed from the parameters used in the solution for the saved
+            # steady-state pickle
+            ss_args = pickle.load(open(ss_paramsfile, 'rb'))
+            cur_ss_args = (J, S, lambdas, emat, beta, sigma, l_tilde,
+                           b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+                           SS_tol, SS_EulDiff)
+            args_same = utils.compare_args(
+                ss_args, cur_ss_args, args_rtol, 0.0,
+                utils.load_arg_digests(ss_digestfile))
+            if SS_method == 'root':
+                ss_key = ss.get_SS_key(cur_ss_args, 'root', n_method,
+                                       hh_batch, hh_root, SS_root_method)
+            else:
+                ss_key = ss.get_SS_key(cur_ss_args, 'bsct', n_method,
+                                       hh_batch, hh_root)
+            ss_output = cache.load_cache(cache_dir, 'SS', ss_key)
+            if args_same:
+                # If none of the parameters changed, use saved pickle
+                print('RETRIEVE STEADY-STATE SOLUTIONS FROM FILE')
+                ss_output = pickle.load(open(ss_outputfile, 'rb'))
+            elif ss_output is not None:
+                # If the parameters changed but the solution for the current
+                # parameters is in the cache, use the cached solution
+                print('RETRIEVE STEADY-STATE SOLUTIONS FROM CACHE')
+                ss_args = cur_ss_args
+            else:
+                # If any of the parameters changed, end the program and
+                # compute the steady-state solution
+                err_msg = ('ERROR: Current ss_args are not equal to the ' +
+                           'ss_args that produced ss_output. Must solve ' +
+                           'for SS before solving transition path. Set ' +
+                           'SS_solve=True.')
+                if len(ss_args) != len(cur_ss_args):
+                    err_msg += (' The saved ss_args have ' +
+                                str(len(ss_args)) + ' elements instead ' +
+                                'of ' + str(len(cur_ss_args)) + '.')
+                raise RuntimeError(err_msg)
 
-'''
-------------------------------------------------------------------------
-Solve for the transition path equilibrium by time path iteration (TPI)
-------------------------------------------------------------------------
-tpi_output_fldr = string, cur_path extension of TPI output folder path
-tpi_output_dir  = string, full path name of TPI output folder
-tpi_outputfile  = string, path name of file for TPI output objects
-tpi_paramsfile  = string, path name of file for TPI parameter objects
-K_ss            = scalar > 0, steady-state aggregate capital stock
-L_ss            = scalar > 0, steady-state aggregate labor
-C_ss            = scalar > 0, steady-state aggregate consumption
-b_ss            = (S, J) matrix, steady-state savings distribution
-init_wgts       = (S, J) matrix, weights representing the factor by
-                  which the initial wealth distribution differs from the
-                  steady-state wealth distribution
-bvec1           = (S,) vector, initial period savings distribution
-K1              = scalar, initial period aggregate capital stock
-K1_cstr         = Boolean, =True if K1 <= 0
-tpi_params      = length 23 tuple, args to pass into tpi.get_TPI()
-tpi_output      = length 14 dictionary, {cpath, npath, bpath, wpath,
-                  rpath, Kpath, Lpath, Ypath, Cpath, bSp1_err_path,
-                  b_err_path, n_err_path, RCerrPath, tpi_time}
-tpi_args        = length 24 tuple, args that were passed in to get_TPI()
-------------------------------------------------------------------------
-'''
-if TPI_solve:
-    print('BEGIN EQUILIBRIUM TRANSITION PATH COMPUTATION')
+    # Render the steady-state graphs in the background while the transition
+    # path is solved
+    if SS_graphs:
+        fig_futures += plots.render_figs(
+            plots.get_fig_tasks('SS', ss_output, lambdas, None, fig_dir),
+            fig_pool)
 
-    # Create OUTPUT/TPI directory if does not already exist
-    cur_path = os.path.split(os.path.abspath(__file__))[0]
-    tpi_output_fldr = 'OUTPUT/TPI'
-    tpi_output_dir = os.path.join(cur_path, tpi_output_fldr)
-    if not os.access(tpi_output_dir, os.F_OK):
-        os.makedirs(tpi_output_dir)
-    tpi_outputfile = os.path.join(tpi_output_dir, 'tpi_vars.pkl')
-    tpi_paramsfile = os.path.join(tpi_output_dir, 'tpi_args.pkl')
+    '''
+    ------------------------------------------------------------------------
+    Solve for the transition path equilibrium by time path iteration (TPI)
+    ------------------------------------------------------------------------
+    tpi_output_fldr = string, cur_path extension of TPI output folder path
+    tpi_output_dir  = string, full path name of TPI output folder
+    tpi_outputfile  = string, path name of file for TPI output objects
+    tpi_paramsfile  = string, path name of file for TPI parameter objects
+    tpi_ckptfile    = string, path name of file for TPI checkpoints
+    K_ss            = scalar > 0, steady-state aggregate capital stock
+    L_ss            = scalar > 0, steady-state aggregate labor
+    C_ss            = scalar > 0, steady-state aggregate consumption
+    b_ss            = (S, J) matrix, steady-state savings distribution
+    init_wgts       = (S, J) matrix, weights representing the factor by
+                      which the initial wealth distribution differs from the
+                      steady-state wealth distribution
+    bvec1           = (S,) vector, initial period savings distribution
+    K1              = scalar, initial period aggregate capital stock
+    K1_cstr         = Boolean, =True if K1 <= 0
+    tpi_params      = length 23 tuple, args to pass into tpi.get_TPI()
+    jac_KL          = None or (2*T2, 2*T2) matrix, sequence-space Jacobian
+                      of the TPI mapping if TPI_accel='newton' or
+                      TPI_lin_check=True
+    jac_C           = (T2, 2*T2) matrix, Jacobian of the aggregate
+                      consumption path if TPI_lin_check=True
+    jac_b1          = (3*T2, S*J) matrix, Jacobian of the K, L, and C paths
+                      with respect to bmat1 if TPI_lin_check=True
+    irf_mat         = (3*T2, S*J) matrix, responses of the K, L, and C paths
+                      to bmat1 if TPI_lin_check=True
+    lin_output      = dictionary, linear approximation of the transition
+                      path if TPI_lin_check=True
+    tpi_output      = length 16 dictionary, {cpath, npath, bpath, wpath,
+                      rpath, Kpath, Lpath, Ypath, Cpath, bSp1_err_path,
+                      b_err_path, n_err_path, RCerrPath, tpi_time,
+                      iter_TPI, dist_path}
+    tpi_args        = length 24 tuple, args that were passed in to get_TPI()
+    ------------------------------------------------------------------------
+    '''
+    if TPI_solve:
+        print('BEGIN EQUILIBRIUM TRANSITION PATH COMPUTATION')
 
-    K_ss = ss_output['K_ss']
-    L_ss = ss_output['L_ss']
-    C_ss = ss_output['C_ss']
-    b_ss = ss_output['b_ss']
+        # Create OUTPUT/TPI directory if does not already exist
+        cur_path = os.path.split(os.path.abspath(__file__))[0]
+        tpi_output_fldr = 'OUTPUT/TPI'
+        tpi_output_dir = os.path.join(cur_path, tpi_output_fldr)
+        if not os.access(tpi_output_dir, os.F_OK):
+            os.makedirs(tpi_output_dir)
+        tpi_outputfile = os.path.join(tpi_output_dir, 'tpi_vars.pkl')
+        tpi_paramsfile = os.path.join(tpi_output_dir, 'tpi_args.pkl')
+        tpi_ckptfile = os.path.join(tpi_output_dir, 'tpi_ckpt.npz')
 
-    # Choose initial period distribution of wealth (bmat1), which
-    # determines initial period aggregate capital stock
-    init_wgts = 0.90 * np.ones((S, J))
-    bmat1 = init_wgts * b_ss
-    # Make sure init. period distribution is feasible in terms of K
-    K1, K1_cstr = aggr.get_K(bmat1, lambdas)
+        K_ss = ss_output['K_ss']
+        L_ss = ss_output['L_ss']
+        C_ss = ss_output['C_ss']
+        b_ss = ss_output['b_ss']
 
-    # If initial bvec1 is not feasible end program
-    if K1_cstr:
-        print('Initial savings distribution is not feasible because ' +
-              'K1<epsilon. Some element(s) of bmat1 must increase.')
-    else:
-        tpi_params = (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde,
-                      b_ellip, upsilon, chi_n_vec, A, alpha, delta,
-                      K_ss, L_ss, C_ss, maxiter_TPI, mindist_TPI,
-                      TPI_tol, xi_TPI, TPI_EulDiff)
-        tpi_output = tpi.get_TPI(tpi_params, bmat1, TPI_graphs)
+        # Choose initial period distribution of wealth (bmat1), which
+        # determines initial period aggregate capital stock
+        init_wgts = 0.90 * np.ones((S, J))
+        bmat1 = init_wgts * b_ss
+        # Make sure init. period distribution is feasible in terms of K
+        K1, K1_cstr = aggr.get_K(bmat1, lambdas)
+
+        # If initial bvec1 is not feasible end program
+        if K1_cstr:
+            print('Initial savings distribution is not feasible because ' +
+                  'K1<epsilon. Some element(s) of bmat1 must increase.')
+        else:
+            tpi_params = (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde,
+                          b_ellip, upsilon, chi_n_vec, A, alpha, delta,
+                          K_ss, L_ss, C_ss, maxiter_TPI, mindist_TPI,
+                          TPI_tol, xi_TPI, TPI_EulDiff)
+            if TPI_lin_check:
+                jac_KL, jac_C = jac.get_KL_jac(tpi_params, ss_output,
+                                               n_method, hh_batch, hh_root,
+                                               cache_dir, return_C=True)
+            elif TPI_accel == 'newton':
+                jac_KL = jac.get_KL_jac(tpi_params, ss_output, n_method,
+                                        hh_batch, hh_root, cache_dir)
+            else:
+                jac_KL = None
+            tpi_output = tpi.get_TPI(tpi_params, bmat1, False,
+                                     n_method, TPI_workers, TPI_accel,
+                                     TPI_accel_mem, cache_dir, warm_start,
+                                     hh_batch, hh_root, jac_KL,
+                                     tpi_ckptfile, TPI_ckpt_iter,
+                                     TPI_ckpt_secs, TPI_resume, monitor)
+            if TPI_lin_check:
+                jac_b1 = jac.get_b1_jac(tpi_params, ss_output, n_method,
+                                        hh_batch, hh_root, cache_dir)
+                irf_mat = jac.get_IRF_mat(jac_KL, jac_C, jac_b1)
+                lin_output = jac.get_TPI_lin(tpi_params, bmat1, ss_output,
+                                             irf_mat)
+                utils.print_time(lin_output['lin_time'], 'Linear TPI')
+                for path in ['Kpath', 'Lpath', 'rpath', 'wpath', 'Cpath']:
+                    print('Max abs. linear ' + path + ' difference: ',
+                          '%10.4e' % np.absolute(lin_output[path] -
+                                                 tpi_output[path]).max())
+
+            tpi_args = (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde,
+                        b_ellip, upsilon, chi_n_vec, A, alpha, delta, K_ss,
+                        L_ss, C_ss, maxiter_TPI, mindist_TPI, TPI_tol,
+                        xi_TPI, TPI_EulDiff, bmat1)
 
-        tpi_args = (J, S, T1, T2, lambdas, emat, beta, sigma, l_tilde,
-                    b_ellip, upsilon, chi_n_vec, A, alpha, delta, K_ss,
-                    L_ss, C_ss, maxiter_TPI, mindist_TPI, TPI_tol,
-                    xi_TPI, TPI_EulDiff, bmat1)
+            # Save tpi_output as pickle
+            pickle.dump(tpi_output, open(tpi_outputfile, 'wb'))
+            pickle.dump(tpi_args, open(tpi_paramsfile, 'wb'))
+            # Save the arrays of tpi_output in .npy files with a manifest, so
+            # that the visualizer can memory-map them instead of unpickling
+            # the whole solution
+            utils.save_path_arrays(tpi_output_dir, 'tpi', tpi_output)
+            # Save reduced-precision copies of the arrays for the visualizer
+            if vis_precision is not None:
+                utils.save_vis_arrays(tpi_output_dir, 'tpi', tpi_output,
+                                      vis_precision)
+            if TPI_graphs:
+                fig_futures += plots.render_figs(
+                    plots.get_fig_tasks('TPI', tpi_output, None, None,
+                                        fig_dir), fig_pool)
 
-        # Save tpi_output as pickle
-        pickle.dump(tpi_output, open(tpi_outputfile, 'wb'))
-        pickle.dump(tpi_args, open(tpi_paramsfile, 'wb'))
+    # Wait until the graphs rendered in the background are saved
+    plots.wait_figs(fig_futures)
+finally:
+    if fig_pool is not None:
+        fig_pool.shutdown()
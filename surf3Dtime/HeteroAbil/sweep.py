@@ -0,0 +1,498 @@
+'''
+------------------------------------------------------------------------
+This program runs a sweep of independent steady-state (and optionally
+transition path) solutions of the model with S-period lived agents,
+endogenous labor, and heterogeneous abilities over a grid or list of
+parameter sets. Each parameter set is a dictionary of primitive
+parameters that override the defaults in parameters.py. The tasks are
+solved across a pool of worker processes, and the result of each task
+is written to its own pickle file in the sweep folder as soon as it
+finishes. A task whose result file already exists is not solved again,
+so an interrupted sweep resumes where it stopped when it is rerun.
+
+    <sweep_dir>/task_<key>.pkl = dictionary with keys
+        'overrides' = dictionary, primitive parameter overrides
+        'status'    = string, 'ok' or 'error'
+        'err_msg'   = string, repr of the exception if status='error'
+        'ss_output' = dictionary or None, steady-state solution
+        'tpi_output' = dictionary or None, transition path solution
+        'task_time' = scalar > 0, seconds taken to solve the task
+
+This Python script imports the following module(s):
+    SS.py
+    TPI.py
+    jacobian.py
+    parameters.py
+    elliputil.py
+    utilities.py
+
+This Python script defines the following function(s):
+    get_sweep_grid()
+    get_task_key()
+    get_task_path()
+    solve_task()
+    save_task()
+    run_sweep()
+    load_sweep()
+    fit_sweep_ellip()
+
+Files created by this script:
+    OUTPUT/SWEEP/task_<key>.pkl
+    OUTPUT/CACHE/ellip_table.json
+------------------------------------------------------------------------
+'''
+# Import packages
+import os
+import pickle
+import itertools
+import time
+import concurrent.futures as cf
+import numpy as np
+import SS as ss
+import TPI as tpi
+import jacobian as jac
+import parameters as prm
+import elliputil as elp
+import utilities as utils
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+def get_sweep_grid(grid):
+    '''
+    --------------------------------------------------------------------
+    Create the list of parameter sets on the Cartesian product of the
+    values of each swept parameter
+    --------------------------------------------------------------------
+    INPUTS:
+    grid = dictionary, list of values of each swept primitive parameter,
+           for example {'sigma': [2.0, 2.5], 'alpha': [0.3, 0.35]}
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        itertools.product()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    names     = list, sorted names of the swept parameters
+    param_set = tuple, one combination of swept parameter values
+    tasks     = list, dictionary of overrides for each combination
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: tasks
+    --------------------------------------------------------------------
+    '''
+    names = sorted(grid.keys())
+    tasks = [dict(zip(names, param_set)) for param_set in
+             itertools.product(*[grid[name] for name in names])]
+
+    return tasks
+
+
+def get_task_key(overrides, opts):
+    '''
+    --------------------------------------------------------------------
+    Return the digest key of a sweep task, which depends on its
+    parameter overrides and the solution options
+    --------------------------------------------------------------------
+    INPUTS:
+    overrides = dictionary, primitive parameter overrides of the task
+    opts      = length 7 tuple, (solve_TPI, SS_method, n_method,
+                hh_batch, hh_root, TPI_accel, cache_dir)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        utils.get_digest()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    items = tuple, sorted (name, value) pairs of overrides
+    key   = string, digest key of the task
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: key
+    --------------------------------------------------------------------
+    '''
+    items = tuple([(name, overrides[name]) for name in
+                   sorted(overrides.keys())])
+    key = utils.get_digest((items, tuple(opts[:6])))
+
+    return key
+
+
+def get_task_path(sweep_dir, key):
+    '''
+    --------------------------------------------------------------------
+    Return the path of the result file of a sweep task
+    --------------------------------------------------------------------
+    INPUTS:
+    sweep_dir = string, path of sweep folder
+    key       = string, digest key of the task
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    task_path = string, path of the task's result pickle
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: task_path
+    --------------------------------------------------------------------
+    '''
+    task_path = os.path.join(sweep_dir, 'task_' + key + '.pkl')
+
+    return task_path
+
+
+def solve_task(overrides, opts):
+    '''
+    --------------------------------------------------------------------
+    Solve the steady state and, if solve_TPI=True, the transition path
+    for one parameter set. Any exception raised while solving the task
+    is caught and its repr is recorded in the result, so that one failed
+    task does not stop the sweep.
+    --------------------------------------------------------------------
+    INPUTS:
+    overrides = dictionary, primitive parameter overrides of the task
+    opts      = length 7 tuple, (solve_TPI, SS_method, n_method,
+                hh_batch, hh_root, TPI_accel, cache_dir)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        prm.get_params()
+        prm.get_tpi_params()
+        ss.get_SS_root()
+        ss.get_SS_bsct()
+        jac.get_KL_jac()
+        tpi.get_TPI()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    start_time = scalar, current processor time in seconds (float)
+    solve_TPI  = boolean, =True if solve the transition path after the
+                 steady state
+    SS_method  = string, 'root' or 'bsct', steady-state outer loop
+    n_method   = string, 'root', 'closed', 'brent', or 'stacked',
+                 household solution method
+    hh_batch   = boolean, =True if solve the household problems of all
+                 ability types (SS) or of all cohorts (TPI) at once
+    hh_root    = string, 'illinois', 'brent', or 'newton', vectorized
+                 root finder used if hh_batch=True
+    TPI_accel  = string, 'damped', 'anderson', 'broyden', or 'newton'
+    cache_dir  = None or string, path of solution cache folder, which is
+                 also used to warm start each task from its neighbors,
+                 to store the TPI Jacobian of each steady state, and to
+                 store the lookup table of fitted elliptical disutility
+                 of labor parameters
+    warm_start = boolean, =True if cache_dir is not None
+    ellip_tbl  = None or string, path of lookup table of fitted
+                 elliptical disutility of labor parameters
+    result     = dictionary, result of the task
+    params     = dictionary, model parameters of the task
+    init_vals  = length 3 tuple, initial guesses of K_ss, L_ss, and c1
+    tpi_params = length 23 tuple, args to pass into tpi.get_TPI()
+    bmat1      = (S, J) matrix, initial period savings distribution
+    jac_KL     = None or (2*T2, 2*T2) matrix, sequence-space Jacobian of
+                 the TPI mapping if TPI_accel='newton'
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: result
+    --------------------------------------------------------------------
+    '''
+    start_time = time.perf_counter()
+    (solve_TPI, SS_method, n_method, hh_batch, hh_root, TPI_accel,
+        cache_dir) = opts
+    warm_start = cache_dir is not None
+    if cache_dir is not None:
+        ellip_tbl = os.path.join(cache_dir, 'ellip_table.json')
+    else:
+        ellip_tbl = None
+    result = {'overrides': overrides, 'status': 'ok', 'err_msg': '',
+              'ss_output': None, 'tpi_output': None}
+    try:
+        params = prm.get_params(overrides, ellip_tbl)
+        init_vals = (3.0, 5.0, 0.03)
+        if SS_method == 'root':
+            result['ss_output'] = \
+                ss.get_SS_root(init_vals, params['ss_args'], False,
+                               n_method, hh_batch, 'hybr', cache_dir,
+                               warm_start, hh_root)
+        else:
+            result['ss_output'] = \
+                ss.get_SS_bsct(init_vals, params['ss_args'], False,
+                               n_method, hh_batch, cache_dir,
+                               warm_start, hh_root)
+        if solve_TPI:
+            tpi_params, bmat1 = prm.get_tpi_params(params,
+                                                   result['ss_output'])
+            if TPI_accel == 'newton':
+                jac_KL = jac.get_KL_jac(tpi_params, result['ss_output'],
+                                        n_method, hh_batch, hh_root,
+                                        cache_dir)
+            else:
+                jac_KL = None
+            result['tpi_output'] = \
+                tpi.get_TPI(tpi_params, bmat1, False, n_method, 1,
+                            TPI_accel, 5, cache_dir, warm_start,
+                            hh_batch, hh_root, jac_KL)
+    except Exception as err:
+        result['status'] = 'error'
+        result['err_msg'] = repr(err)
+    result['task_time'] = time.perf_counter() - start_time
+
+    return result
+
+
+def save_task(sweep_dir, key, result):
+    '''
+    --------------------------------------------------------------------
+    Save the result of a sweep task. The file is written to a temporary
+    name and renamed so that an interrupted write never leaves a partial
+    result that would be skipped on resume.
+    --------------------------------------------------------------------
+    INPUTS:
+    sweep_dir = string, path of sweep folder
+    key       = string, digest key of the task
+    result    = dictionary, result of the task
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_task_path()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    task_path = string, path of the task's result pickle
+    tmp_path  = string, temporary path of the result pickle
+
+    FILES CREATED BY THIS FUNCTION:
+        task_<key>.pkl
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    task_path = get_task_path(sweep_dir, key)
+    tmp_path = task_path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'wb') as tmp_file:
+        pickle.dump(result, tmp_file)
+    os.replace(tmp_path, task_path)
+
+
+def run_sweep(tasks, sweep_dir, opts, workers=1, retry_errors=False):
+    '''
+    --------------------------------------------------------------------
+    Solve a list of sweep tasks across a pool of worker processes,
+    saving each result to the sweep folder as soon as it finishes.
+    Tasks whose results are already saved are skipped, so rerunning an
+    interrupted sweep resumes it.
+    --------------------------------------------------------------------
+    INPUTS:
+    tasks        = list, dictionary of primitive parameter overrides for
+                   each task
+    sweep_dir    = string, path of sweep folder
+    opts         = length 7 tuple, (solve_TPI, SS_method, n_method,
+                   hh_batch, hh_root, TPI_accel, cache_dir)
+    workers      = integer >= 1, number of worker processes. If
+                   workers=1 the tasks are solved in this process
+    retry_errors = boolean, =True if tasks whose saved result has
+                   status='error' are solved again
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_task_key()
+        get_task_path()
+        solve_task()
+        save_task()
+        cf.ProcessPoolExecutor()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    todo      = dictionary, overrides of each task left to solve by key
+    overrides = dictionary, primitive parameter overrides of the task
+    key       = string, digest key of the task
+    task_path = string, path of the task's result pickle
+    result    = dictionary, result of the task
+    num_done  = integer >= 0, number of tasks finished in this call
+    executor  = concurrent.futures.ProcessPoolExecutor, worker pool
+    futures   = dictionary, key of the task of each future
+    future    = concurrent.futures.Future, pending result of a task
+    keys      = list, digest keys of all tasks in the order of tasks
+
+    FILES CREATED BY THIS FUNCTION:
+        task_<key>.pkl
+
+    RETURNS: keys
+    --------------------------------------------------------------------
+    '''
+    if not os.access(sweep_dir, os.F_OK):
+        os.makedirs(sweep_dir)
+    todo = {}
+    keys = []
+    for overrides in tasks:
+        key = get_task_key(overrides, opts)
+        keys.append(key)
+        task_path = get_task_path(sweep_dir, key)
+        if os.path.exists(task_path):
+            if not retry_errors:
+                continue
+            with open(task_path, 'rb') as task_file:
+                result = pickle.load(task_file)
+            if result['status'] == 'ok':
+                continue
+        todo[key] = overrides
+    print('Sweep: ' + str(len(tasks) - len(todo)) + ' of ' +
+          str(len(tasks)) + ' tasks already solved.')
+
+    num_done = 0
+    if workers == 1:
+        for key in todo:
+            result = solve_task(todo[key], opts)
+            save_task(sweep_dir, key, result)
+            num_done += 1
+            print('Sweep: task ' + key[:12] + ' ' + result['status'] +
+                  ' (' + str(num_done) + '/' + str(len(todo)) + ')')
+    else:
+        with cf.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(solve_task, todo[key], opts): key
+                       for key in todo}
+            for future in cf.as_completed(futures):
+                key = futures[future]
+                result = future.result()
+                save_task(sweep_dir, key, result)
+                num_done += 1
+                print('Sweep: task ' + key[:12] + ' ' +
+                      result['status'] + ' (' + str(num_done) + '/' +
+                      str(len(todo)) + ')')
+
+    return keys
+
+
+def load_sweep(sweep_dir, keys=None):
+    '''
+    --------------------------------------------------------------------
+    Load the saved results of a sweep
+    --------------------------------------------------------------------
+    INPUTS:
+    sweep_dir = string, path of sweep folder
+    keys      = None or list, digest keys of the tasks to load. If None,
+                all results in the sweep folder are loaded
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_task_path()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    fname     = string, name of file in sweep folder
+    results   = dictionary, result of each task by key
+    key       = string, digest key of the task
+    task_path = string, path of the task's result pickle
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: results
+    --------------------------------------------------------------------
+    '''
+    if keys is None:
+        keys = [fname[len('task_'):-len('.pkl')] for fname in
+                sorted(os.listdir(sweep_dir)) if
+                fname.startswith('task_') and fname.endswith('.pkl')]
+    results = {}
+    for key in keys:
+        task_path = get_task_path(sweep_dir, key)
+        if os.path.exists(task_path):
+            with open(task_path, 'rb') as task_file:
+                results[key] = pickle.load(task_file)
+
+    return results
+
+
+def fit_sweep_ellip(tasks, table_path):
+    '''
+    --------------------------------------------------------------------
+    Fit the elliptical disutility of labor parameters of every
+    (Frisch_elast, CFE_scale, l_tilde) combination of the tasks that is
+    not in the lookup table yet, with one batch fit for each
+    (CFE_scale, l_tilde) pair, before the tasks are handed to the
+    worker processes. The workers then only read the table instead of
+    each fitting and writing it
+    --------------------------------------------------------------------
+    INPUTS:
+    tasks      = list, dictionary of primitive parameter overrides for
+                 each task
+    table_path = string, path of JSON lookup table file
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        prm.get_default_params()
+        elp.add_ellip_table()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    defaults   = dictionary, default primitive parameters
+    Frisch_grp = dictionary, list of Frisch elasticities of the tasks by
+                 (CFE_scale, l_tilde) pair
+    overrides  = dictionary, primitive parameter overrides of a task
+    cfe_key    = length 2 tuple, (CFE_scale, l_tilde) of a task
+
+    FILES CREATED BY THIS FUNCTION:
+        table_path
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    defaults = prm.get_default_params()
+    Frisch_grp = {}
+    for overrides in tasks:
+        cfe_key = (float(overrides.get('CFE_scale',
+                                       defaults['CFE_scale'])),
+                   float(overrides.get('l_tilde', defaults['l_tilde'])))
+        Frisch_grp.setdefault(cfe_key, []).append(
+            float(overrides.get('Frisch_elast', defaults['Frisch_elast'])))
+    for cfe_key in Frisch_grp:
+        elp.add_ellip_table(table_path, np.array([1.0, 2.0]),
+                            np.array(Frisch_grp[cfe_key]), cfe_key[0],
+                            cfe_key[1])
+
+
+'''
+------------------------------------------------------------------------
+Declare the sweep and run it
+------------------------------------------------------------------------
+sweep_grid  = dictionary, list of values of each swept parameter
+tasks       = list, dictionary of overrides for each task
+solve_TPI   = boolean, =True if solve the transition path of each task
+SS_method   = string, 'root' or 'bsct', steady-state outer loop
+n_method    = string, 'root', 'closed', 'brent', or 'stacked',
+              household solution method
+hh_batch    = boolean, =True if solve the household problems of all
+              ability types (SS) or of all cohorts (TPI) at once
+hh_root     = string, 'illinois', 'brent', or 'newton', vectorized root
+              finder used if hh_batch=True
+TPI_accel   = string, 'damped', 'anderson', 'broyden', or 'newton'
+cur_path    = string, path name of current directory
+cache_dir   = string, total path of solution cache folder
+sweep_dir   = string, total path of sweep folder
+sweep_opts  = length 7 tuple, options passed to run_sweep()
+workers     = integer >= 1, number of worker processes
+sweep_keys  = list, digest keys of the tasks
+sweep_res   = dictionary, result of each task by key
+------------------------------------------------------------------------
+'''
+if __name__ == '__main__':
+    sweep_grid = {'sigma': [2.0, 2.5, 3.0], 'alpha': [0.3, 0.35, 0.4]}
+    tasks = get_sweep_grid(sweep_grid)
+    solve_TPI = False
+    SS_method = 'root'
+    n_method = 'closed'
+    hh_batch = True
+    hh_root = 'brent'
+    TPI_accel = 'anderson'
+    cur_path = os.path.split(os.path.abspath(__file__))[0]
+    cache_dir = os.path.join(cur_path, 'OUTPUT/CACHE')
+    sweep_dir = os.path.join(cur_path, 'OUTPUT/SWEEP')
+    sweep_opts = (solve_TPI, SS_method, n_method, hh_batch, hh_root,
+                  TPI_accel, cache_dir)
+    workers = max(1, min(len(tasks), os.cpu_count() or 1))
+    fit_sweep_ellip(tasks, os.path.join(cache_dir, 'ellip_table.json'))
+    sweep_keys = run_sweep(tasks, sweep_dir, sweep_opts, workers)
+    sweep_res = load_sweep(sweep_dir, sweep_keys)
+    for key in sweep_keys:
+        if sweep_res[key]['status'] == 'ok':
+            print(sweep_res[key]['overrides'], 'K_ss =',
+                  sweep_res[key]['ss_output']['K_ss'])
+        else:
+            print(sweep_res[key]['overrides'],
+                  sweep_res[key]['err_msg'])
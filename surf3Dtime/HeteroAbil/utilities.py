@@ -6,9 +6,19 @@ any of the other modules.
 This Python module defines the following function(s):
     print_time()
     compare_args()
+    get_arg_digests()
+    save_arg_digests()
+    load_arg_digests()
+    get_cohort_diag()
+    get_digest()
+    save_path_arrays()
+    save_vis_arrays()
 ------------------------------------------------------------------------
 '''
 # Import packages
+import os
+import json
+import hashlib
 import numpy as np
 
 '''
@@ -66,43 +76,523 @@ def print_time(seconds, type):
               str(secs) + ' sec')
 
 
-def compare_args(contnr1, contnr2):
+def compare_args(contnr1, contnr2, rtol=0.0, atol=0.0, digests1=None,
+                 digests2=None):
     '''
     --------------------------------------------------------------------
-    Determine whether the contents of two tuples are equal
+    Determine whether the contents of two tuples are equal. The elements
+    are compared by their digests from get_arg_digests(), which can be
+    computed once when a result and its args are saved and passed in as
+    digests1, so that checking whether the args of a saved solution
+    match the current args is one string comparison per element and
+    does not create any temporary arrays. Only an element whose digests
+    differ is compared by value, where numeric elements of the same
+    shape are equal if np.allclose(rtol, atol) holds (exact equality if
+    rtol=atol=0), which also matches numbers that are equal but of
+    different types, such as 1 and 1.0. The comparison stops at the
+    first element that differs, and tuples of different lengths are
+    not equal.
     --------------------------------------------------------------------
     INPUTS:
-    contnr1 = length n tuple
-    contnr2 = length n tuple
+    contnr1  = None or length n tuple. Can be None if digests1 is given,
+               in which case elements whose digests differ are not
+               compared by value
+    contnr2  = length n tuple
+    rtol     = scalar >= 0, relative tolerance for numeric elements
+    atol     = scalar >= 0, absolute tolerance for numeric elements
+    digests1 = None or length n list, digests of the elements of contnr1
+               from get_arg_digests(). Computed if None
+    digests2 = None or length n list, digests of the elements of contnr2
+               from get_arg_digests(). Computed if None
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_arg_digests()
 
     OBJECTS CREATED WITHIN FUNCTION:
     len1     = integer >= 1, number of elements in contnr1
     len2     = integer >= 1, number of elements in contnr2
-    err_msg  = string, error message
     same_vec = (len1,) boolean vector, =True for elements in contnr1 and
                contnr2 that are the same
     elem     = integer >= 0, element number in contnr1
-    same = boolean, =True if all elements of contnr1 and contnr2 are
-           equal
+    arr1     = array, element elem of contnr1
+    arr2     = array, element elem of contnr2
+    same     = boolean, =True if all elements of contnr1 and contnr2 are
+               equal
 
     FILES CREATED BY THIS FUNCTION: None
 
     RETURNS: same
     --------------------------------------------------------------------
     '''
-    len1 = len(contnr1)
-    len2 = len(contnr2)
+    if digests1 is None:
+        digests1 = get_arg_digests(contnr1)
+    if digests2 is None:
+        digests2 = get_arg_digests(contnr2)
+    len1 = len(digests1)
+    len2 = len(digests2)
     if not len1 == len2:
-        err_msg = ('ERROR, compare_args(): Two tuples have different ' +
-                   'lengths')
-        print(err_msg)
         same = False
     else:
         same_vec = np.zeros(len1, dtype=bool)
         for elem in range(len1):
-            same_vec[elem] = np.min(contnr1[elem] == contnr2[elem])
-        same = np.min(same_vec)
+            if digests1[elem] == digests2[elem]:
+                same_vec[elem] = True
+            elif contnr1 is not None:
+                arr1 = np.asarray(contnr1[elem])
+                arr2 = np.asarray(contnr2[elem])
+                if arr1.shape != arr2.shape:
+                    same_vec[elem] = False
+                elif (arr1.dtype.kind in 'biufc' and
+                      arr2.dtype.kind in 'biufc'):
+                    same_vec[elem] = np.allclose(arr1, arr2, rtol=rtol,
+                                                 atol=atol)
+                else:
+                    same_vec[elem] = np.array_equal(arr1, arr2)
+            if not same_vec[elem]:
+                break
+        same = bool(same_vec.all())
 
     return same
+
+
+def get_arg_digests(contnr):
+    '''
+    --------------------------------------------------------------------
+    Compute the digest of each element of an args tuple with
+    get_digest(), to be saved with a result and passed to
+    compare_args()
+    --------------------------------------------------------------------
+    INPUTS:
+    contnr = length n tuple, args tuple
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_digest()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    elem    = object, element of contnr
+    digests = length n list, hexadecimal digest of each element
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: digests
+    --------------------------------------------------------------------
+    '''
+    digests = [get_digest(elem) for elem in contnr]
+
+    return digests
+
+
+def save_arg_digests(path, contnr):
+    '''
+    --------------------------------------------------------------------
+    Save the digests of the elements of an args tuple in a JSON file,
+    next to the pickle of the args and the result they produced. The
+    file is written to a temporary name and renamed so that an
+    interrupted write never leaves a partial file
+    --------------------------------------------------------------------
+    INPUTS:
+    path   = string, path of JSON digests file
+    contnr = length n tuple, args tuple
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_arg_digests()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    tmp_path = string, temporary path of digests file
+    tmp_file = file object, temporary digests file
+
+    FILES CREATED BY THIS FUNCTION:
+        path
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'w') as tmp_file:
+        json.dump(get_arg_digests(contnr), tmp_file, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_arg_digests(path):
+    '''
+    --------------------------------------------------------------------
+    Load the digests saved by save_arg_digests()
+    --------------------------------------------------------------------
+    INPUTS:
+    path = string, path of JSON digests file
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    digest_file = file object, digests file
+    digests     = None or length n list, digest of each element of the
+                  args tuple. None if path does not exist or cannot be
+                  read
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: digests
+    --------------------------------------------------------------------
+    '''
+    digests = None
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as digest_file:
+                digests = json.load(digest_file)
+        except ValueError:
+            digests = None
+
+    return digests
+
+
+def get_cohort_diag(arr, s_init, t_init, p, j=None):
+    '''
+    --------------------------------------------------------------------
+    Return a writeable view of the diagonal of a time path array that
+    is the remaining lifetime of one cohort. The cohort is age s_init
+    (row index) in period t_init (column index) and lives p more
+    periods, so that the view is
+
+        [arr[s_init, t_init], arr[s_init + 1, t_init + 1], ...,
+         arr[s_init + p - 1, t_init + p - 1]]
+
+    The view shares memory with arr, so reading it or assigning into it
+    (e.g., get_cohort_diag(cpath, S - p, 0, p, j)[:] = cvec) does not
+    create any (p, p) temporary matrices.
+    --------------------------------------------------------------------
+    INPUTS:
+    arr    = (S, T) matrix or (S, J, T) array, time path of the
+             distribution of a household variable
+    s_init = integer >= 0, row index (age minus 1) of the cohort in
+             period t_init
+    t_init = integer >= 0, column index of the first period of the
+             cohort's remaining lifetime
+    p      = integer >= 0, number of periods in the cohort's remaining
+             lifetime
+    j      = None or integer >= 0, ability type index if arr is a 3D
+             array
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        np.lib.stride_tricks.as_strided()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    arr_st    = (S, T) matrix, view of arr for ability type j or arr
+                itself if arr is a 2D matrix
+    err_msg   = string, error message
+    diag_view = (p,) vector, view of the cohort diagonal of arr
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: diag_view
+    --------------------------------------------------------------------
+    '''
+    if arr.ndim == 3:
+        arr_st = arr[:, j, :]
+    else:
+        arr_st = arr
+    if (s_init < 0 or t_init < 0 or p < 0 or
+            s_init + p > arr_st.shape[0] or t_init + p > arr_st.shape[1]):
+        err_msg = ('ERROR, get_cohort_diag(): Cohort diagonal of ' +
+                   'length ' + str(p) + ' starting at (' + str(s_init) +
+                   ', ' + str(t_init) + ') does not fit in array of ' +
+                   'shape ' + str(arr_st.shape) + '.')
+        raise RuntimeError(err_msg)
+    diag_view = np.lib.stride_tricks.as_strided(
+        arr_st[s_init:, t_init:], shape=(p,),
+        strides=(arr_st.strides[0] + arr_st.strides[1],))
+
+    return diag_view
+
+
+def get_digest(contnr, hash_obj=None):
+    '''
+    --------------------------------------------------------------------
+    Compute a stable SHA-256 digest of the contents of a (possibly
+    nested) tuple of scalars, strings, and NumPy arrays, such as the
+    args tuples passed into the SS and TPI solvers. Scalars and strings
+    are hashed by the repr of their Python value and arrays of numbers
+    or strings by their dtype, shape, and bytes, so the digest is the
+    same across Python sessions and processes and does not depend on
+    whether a scalar is a Python or a NumPy number. Any other object,
+    such as a dictionary or an object array, whose bytes would be
+    memory addresses, raises a TypeError.
+    --------------------------------------------------------------------
+    INPUTS:
+    contnr   = tuple, list, NumPy array, scalar, string, or None, object
+               to hash
+    hash_obj = None or hashlib hash object, hash to update. If None, a
+               new SHA-256 hash is created and its hex digest returned
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_digest()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    new_hash = boolean, =True if hash_obj was created in this call
+    elem     = object, element of contnr
+    value    = bool, int, float, or complex, Python value of the scalar
+               contnr
+    arr      = NumPy array, contnr as a C-contiguous array
+    err_msg  = string, error message
+    digest   = string or None, hexadecimal digest if new_hash=True
+
+    FILES CREATED BY THIS FUNCTION: None
+
+    RETURNS: digest
+    --------------------------------------------------------------------
+    '''
+    new_hash = hash_obj is None
+    if new_hash:
+        hash_obj = hashlib.sha256()
+    if isinstance(contnr, (tuple, list)):
+        hash_obj.update(('seq' + str(len(contnr)) + ';').encode())
+        for elem in contnr:
+            get_digest(elem, hash_obj)
+    elif contnr is None:
+        hash_obj.update(b'none;')
+    elif isinstance(contnr, str):
+        hash_obj.update(('str' + repr(str(contnr)) + ';').encode())
+    elif isinstance(contnr, (bool, int, float, complex, np.bool_,
+                             np.number)):
+        if isinstance(contnr, np.generic):
+            value = contnr.item()
+        else:
+            value = contnr
+        hash_obj.update(('num' + repr(value) + ';').encode())
+    elif (isinstance(contnr, np.ndarray) and
+          contnr.dtype.kind in 'biufcSU'):
+        arr = np.ascontiguousarray(contnr)
+        hash_obj.update(('arr' + arr.dtype.str + str(arr.shape) +
+                         ';').encode())
+        hash_obj.update(arr.tobytes())
+    else:
+        err_msg = ('ERROR, get_digest(): Cannot compute a stable ' +
+                   'digest of an object of type ' +
+                   type(contnr).__name__ + '.')
+        raise TypeError(err_msg)
+    if new_hash:
+        digest = hash_obj.hexdigest()
+    else:
+        digest = None
+
+    return digest
+
+
+def save_path_arrays(output_dir, prefix, output):
+    '''
+    --------------------------------------------------------------------
+    Save the arrays of a solution output dictionary in a columnar
+    layout that can be opened with np.load(mmap_mode='r'), so that a
+    reader only touches the pages of the arrays and slices it uses. Each
+    array is saved in its own .npy file and the other (scalar) values
+    are saved in a JSON manifest that lists the files
+
+        <output_dir>/<prefix>_<key>.npy     = array output[key]
+        <output_dir>/<prefix>_manifest.json = {'arrays': {key: {'file',
+            'shape', 'dtype', 'transposed'}}, 'scalars': {key: value}}
+
+    Arrays with 3 dimensions, such as the (S, J, T2+S-1) time paths of
+    the distribution of individual variables, are saved transposed to
+    (T2+S-1, J, S) in C order, so that the ages and ability types of one
+    time period are contiguous. The reader transposes them back. Every
+    file is written to a temporary name and renamed, and the manifest is
+    written last, so a manifest always describes a complete set of
+    files.
+    --------------------------------------------------------------------
+    INPUTS:
+    output_dir = string, path of output directory
+    prefix     = string, prefix of the file names, such as 'tpi'
+    output     = dictionary, solution output with array and scalar
+                 values
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        np.save()
+        json.dump()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    manifest   = dictionary, description of the saved arrays and the
+                 values of the scalars
+    key        = string, key of output
+    value      = array or scalar, output[key]
+    arr        = array, value saved in the .npy file
+    transposed = boolean, =True if arr is the transpose of value
+    fname      = string, name of .npy file
+    path       = string, path of file being written
+    tmp_path   = string, temporary path of file being written
+    tmp_file   = file object, temporary file being written
+
+    FILES CREATED BY THIS FUNCTION:
+        <prefix>_<key>.npy
+        <prefix>_manifest.json
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    if not os.access(output_dir, os.F_OK):
+        os.makedirs(output_dir)
+    manifest = {'arrays': {}, 'scalars': {}}
+    for key, value in output.items():
+        if isinstance(value, np.ndarray) and value.ndim > 0:
+            transposed = value.ndim == 3
+            if transposed:
+                arr = np.ascontiguousarray(value.T)
+            else:
+                arr = np.ascontiguousarray(value)
+            fname = prefix + '_' + key + '.npy'
+            path = os.path.join(output_dir, fname)
+            tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+            with open(tmp_path, 'wb') as tmp_file:
+                np.save(tmp_file, arr)
+            os.replace(tmp_path, path)
+            manifest['arrays'][key] = {'file': fname,
+                                       'shape': list(value.shape),
+                                       'dtype': arr.dtype.str,
+                                       'transposed': transposed}
+        else:
+            manifest['scalars'][key] = np.asarray(value).item()
+    path = os.path.join(output_dir, prefix + '_manifest.json')
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'w') as tmp_file:
+        json.dump(manifest, tmp_file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def save_vis_arrays(output_dir, prefix, output, precision='float32'):
+    '''
+    --------------------------------------------------------------------
+    Save visualization-grade copies of the arrays of a solution output
+    dictionary in reduced precision, next to the full-precision files
+    written by save_path_arrays() and in the same layout
+
+        <output_dir>/<prefix>_vis_<key>.npy     = reduced copy of
+            output[key]
+        <output_dir>/<prefix>_vis_manifest.json = {'precision',
+            'source_digest', 'arrays': {key: {'file', 'shape', 'dtype',
+            'transposed', 'scale', 'offset', 'max_abs_err',
+            'max_rel_err'}}, 'scalars': {key: value}}
+
+    The (S, J, T2+S-1) time paths of the distribution of individual
+    variables are stored as float32 if precision='float32', which
+    halves their size, or as int16 codes q if precision='int16', which
+    quarters it. The value of an int16 code is offset + scale * q, in
+    which offset is the midpoint of the range of the array and scale
+    divides the range into 65534 steps, so the rounding error is at most
+    scale / 2. Arrays with fewer dimensions, such as the aggregate time
+    paths, are small and are stored as float32 in both modes, because
+    int16 steps would hide the small changes between periods that the
+    visualizer uses to find the end of the transition. Arrays with
+    nonfinite values are also stored as float32. The error of each copy
+    against output[key] is measured and recorded in the manifest.
+
+    The manifest also records source_digest, the SHA-256 hex digest of
+    the full-precision manifest <prefix>_manifest.json of the same
+    output (None if it does not exist), so a reader can tell that the
+    copies are stale after a later run saved only the full-precision
+    arrays. save_path_arrays() must therefore be called first.
+    --------------------------------------------------------------------
+    INPUTS:
+    output_dir = string, path of output directory
+    prefix     = string, prefix of the file names, such as 'tpi'
+    output     = dictionary, solution output with array and scalar
+                 values
+    precision  = string, 'float32' or 'int16', storage of the time paths
+                 of the distribution of individual variables
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        np.save()
+        json.dump()
+        <prefix>_manifest.json
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    err_msg     = string, error message
+    src_path    = string, path of the full-precision manifest
+    src_digest  = string or None, SHA-256 hex digest of the
+                  full-precision manifest
+    src_file    = file object, full-precision manifest
+    manifest    = dictionary, description of the saved arrays and the
+                  values of the scalars
+    key         = string, key of output
+    value       = array or scalar, output[key]
+    transposed  = boolean, =True if the saved array is the transpose of
+                  value
+    val_arr     = array, value as float64, transposed if transposed=True
+    val_min     = scalar, minimum of val_arr
+    val_max     = scalar, maximum of val_arr
+    scale       = scalar > 0, value of one int16 step
+    offset      = scalar, value of int16 code 0
+    arr         = array, reduced-precision copy saved in the .npy file
+    arr_val     = array, values represented by arr
+    abs_err     = array, absolute error of arr_val
+    abs_val     = array, absolute value of val_arr
+    max_abs_err = scalar >= 0, maximum absolute error of arr_val
+    max_abs_val = scalar >= 0, maximum absolute value of val_arr
+    fname       = string, name of .npy file
+    path        = string, path of file being written
+    tmp_path    = string, temporary path of file being written
+    tmp_file    = file object, temporary file being written
+
+    FILES CREATED BY THIS FUNCTION:
+        <prefix>_vis_<key>.npy
+        <prefix>_vis_manifest.json
+
+    RETURNS: None
+    --------------------------------------------------------------------
+    '''
+    if precision not in ('float32', 'int16'):
+        err_msg = ('ERROR, save_vis_arrays(): precision must be ' +
+                   '"float32" or "int16".')
+        raise RuntimeError(err_msg)
+    if not os.access(output_dir, os.F_OK):
+        os.makedirs(output_dir)
+    src_path = os.path.join(output_dir, prefix + '_manifest.json')
+    src_digest = None
+    if os.path.exists(src_path):
+        with open(src_path, 'rb') as src_file:
+            src_digest = hashlib.sha256(src_file.read()).hexdigest()
+    manifest = {'precision': precision, 'source_digest': src_digest,
+                'arrays': {}, 'scalars': {}}
+    for key, value in output.items():
+        if isinstance(value, np.ndarray) and value.ndim > 0:
+            transposed = value.ndim == 3
+            if transposed:
+                val_arr = np.ascontiguousarray(value.T, dtype=np.float64)
+            else:
+                val_arr = np.ascontiguousarray(value, dtype=np.float64)
+            scale = 1.0
+            offset = 0.0
+            if (precision == 'int16' and transposed and
+                    np.isfinite(val_arr).all()):
+                val_min = val_arr.min()
+                val_max = val_arr.max()
+                offset = 0.5 * (val_min + val_max)
+                if val_max > val_min:
+                    scale = (val_max - val_min) / 65534
+                arr = np.rint((val_arr - offset) / scale).astype(np.int16)
+                arr_val = offset + scale * arr.astype(np.float64)
+            else:
+                arr = val_arr.astype(np.float32)
+                arr_val = arr.astype(np.float64)
+            with np.errstate(invalid='ignore'):
+                abs_err = np.absolute(arr_val - val_arr)
+            abs_val = np.absolute(val_arr)
+            max_abs_err = np.append(0.0, abs_err[~np.isnan(abs_err)]).max()
+            max_abs_val = np.append(0.0, abs_val[~np.isnan(abs_val)]).max()
+            fname = prefix + '_vis_' + key + '.npy'
+            path = os.path.join(output_dir, fname)
+            tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+            with open(tmp_path, 'wb') as tmp_file:
+                np.save(tmp_file, arr)
+            os.replace(tmp_path, path)
+            manifest['arrays'][key] = {
+                'file': fname, 'shape': list(value.shape),
+                'dtype': arr.dtype.str, 'transposed': transposed,
+                'scale': float(scale), 'offset': float(offset),
+                'max_abs_err': float(max_abs_err),
+                'max_rel_err': (float(max_abs_err / max_abs_val) if
+                                max_abs_val > 0 else 0.0)}
+        else:
+            manifest['scalars'][key] = np.asarray(value).item()
+    path = os.path.join(output_dir, prefix + '_vis_manifest.json')
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'w') as tmp_file:
+        json.dump(manifest, tmp_file, indent=2)
+    os.replace(tmp_path, path)
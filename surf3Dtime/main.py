@@ -1,5 +1,7 @@
 import numpy as np
 import pickle
+import json
+import hashlib
 import os
 import sys
 
@@ -30,12 +32,62 @@ class Surface3d(LayoutDOM):
     color = String
 
 
+def load_tpi_vars(tpi_dir):
+    '''
+    Load the TPI output saved in tpi_dir by execute.py. The reduced-precision
+    visualization copies in tpi_vis_manifest.json are preferred, because they
+    are a half (float32) or a quarter (int16) of the size of the full solver
+    output, as long as they were saved from the current full-precision
+    manifest tpi_manifest.json (their source_digest matches its SHA-256
+    digest). Otherwise, if the arrays were saved in .npy files with a
+    manifest, they are memory-mapped read-only, so only the pages of the
+    arrays and time periods that are used are read from disk, and the pages
+    are shared by all processes that map them. The (S, J, T) paths are stored
+    time-major and transposed back here. Otherwise the whole pickled
+    tpi_vars.pkl is loaded.
+
+    float32 copies are memory-mapped like the full-precision arrays. int16
+    codes have to be converted to float32 values with the scale and offset
+    recorded in the manifest, so each int16 array is read whole and decoded
+    into memory: int16 copies trade the lazy loading for a smaller file on
+    disk. Use vis_precision='float32' in execute.py to keep the arrays lazy.
+    '''
+    full_path = os.path.join(tpi_dir, 'tpi_manifest.json')
+    full_digest = None
+    if os.path.exists(full_path):
+        with open(full_path, 'rb') as full_file:
+            full_digest = hashlib.sha256(full_file.read()).hexdigest()
+    manifest = None
+    vis_path = os.path.join(tpi_dir, 'tpi_vis_manifest.json')
+    if os.path.exists(vis_path):
+        with open(vis_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get('source_digest') != full_digest:
+            manifest = None
+    if manifest is None and full_digest is not None:
+        with open(full_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    if manifest is None:
+        with open(os.path.join(tpi_dir, 'tpi_vars.pkl'), 'rb') as tpi_file:
+            return pickle.load(tpi_file)
+    tpi_vars = dict(manifest['scalars'])
+    for key, info in manifest['arrays'].items():
+        arr = np.load(os.path.join(tpi_dir, info['file']), mmap_mode='r')
+        if arr.dtype.kind == 'i':
+            arr = arr.astype(np.float32)
+            arr *= np.float32(info['scale'])
+            arr += np.float32(info['offset'])
+        if info['transposed']:
+            arr = arr.T
+        tpi_vars[key] = arr
+    return tpi_vars
+
+
 # DATA
-# read in data from pickle
-tpi_args = pickle.load(open(
-    'surf3Dtime/HeteroAbil/s80j7/OUTPUT/TPI/tpi_args.pkl', 'rb'))
-tpi_vars = pickle.load(open(
-    'surf3Dtime/HeteroAbil/s80j7/OUTPUT/TPI/tpi_vars.pkl', 'rb'))
+# read in data from the memory-mapped arrays (or the pickle)
+tpi_dir = 'surf3Dtime/HeteroAbil/s80j7/OUTPUT/TPI'
+tpi_args = pickle.load(open(os.path.join(tpi_dir, 'tpi_args.pkl'), 'rb'))
+tpi_vars = load_tpi_vars(tpi_dir)
 
 # create smat and jmat
 S = tpi_args[1]